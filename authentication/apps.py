@@ -22,3 +22,7 @@ class AuthenticationConfig(AppConfig):
 
     def ready(self):
         import authentication.v1.signals
+
+        from authentication.v1.utils.jwt_keys import install_token_backend
+
+        install_token_backend()
@@ -0,0 +1,216 @@
+"""
+Benchmark guest token issuance under bursts of concurrent requests.
+
+Each burst sends many simultaneous requests for the same new email through the
+same single-flight path as GuestTokenView, against the configured database and
+Redis, and records the database writes each email caused, by statement and
+table. Single-flight issuance keeps these to the writes of creating one guest
+user, however large the burst: the user INSERT and the INSERT of its profile by
+the post_save signal, or none in the "ephemeral" GUEST_IDENTITY_MODE. The
+command fails if any email caused other writes or any request raised.
+
+Usage:
+    python manage.py benchmark_guest_tokens --emails 20 --burst 50
+"""
+
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from authentication.models import CustomUser, UserProfile
+from authentication.v1.utils.redis_client import RedisClient
+from authentication.v1.views.guest_views import GUEST_TOKEN_EXPIRY, mint_guest_token
+from coupon_core.utils.guest_identity import EPHEMERAL_MODE
+
+WRITE_STATEMENT = re.compile(
+    r'^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+"?([\w.]+)"?', re.IGNORECASE
+)
+
+
+def write_target(sql: str) -> Optional[str]:
+    """
+    Describe the write an SQL statement makes.
+
+    Args:
+        sql (str): The SQL statement.
+
+    Returns:
+        Optional[str]: The statement type and table, e.g.
+        "INSERT authentication_customuser", or None if it writes nothing.
+    """
+    match = WRITE_STATEMENT.match(sql)
+    if not match:
+        return None
+    statement = match.group(1).split()[0].upper()
+    return f"{statement} {match.group(2)}"
+
+
+def expected_writes() -> Counter:
+    """
+    Return the writes that issuing the first guest token for an email makes.
+
+    Returns:
+        Counter: The number of writes by statement type and table.
+    """
+    if settings.GUEST_IDENTITY_MODE == EPHEMERAL_MODE:
+        return Counter()
+    return Counter(
+        {
+            f"INSERT {CustomUser._meta.db_table}": 1,
+            f"INSERT {UserProfile._meta.db_table}": 1,
+        }
+    )
+
+
+class Command(BaseCommand):
+    """
+    Management command measuring guest token issuance under concurrent bursts.
+    """
+
+    help = "Benchmark stampede-safe guest token issuance."
+
+    def add_arguments(self, parser: Any) -> None:
+        """
+        Define the command line arguments.
+
+        Args:
+            parser (Any): The argument parser.
+        """
+        parser.add_argument(
+            "--emails", type=int, default=20, help="Number of distinct emails."
+        )
+        parser.add_argument(
+            "--burst",
+            type=int,
+            default=50,
+            help="Concurrent requests per email.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Run one burst per email and report throughput and database writes.
+
+        Raises:
+            CommandError: If a request failed, or an email caused other writes
+                than creating one guest user.
+        """
+        run_id = uuid.uuid4().hex[:8]
+        emails = [
+            f"guest-bench-{run_id}-{i}@example.com" for i in range(options["emails"])
+        ]
+        latencies: List[float] = []
+        writes: Dict[str, Counter] = {email: Counter() for email in emails}
+        tokens: Dict[str, set] = {email: set() for email in emails}
+        errors: List[BaseException] = []
+
+        started = time.perf_counter()
+        try:
+            for email in emails:
+                self._burst(email, options["burst"], latencies, writes, tokens, errors)
+            elapsed = time.perf_counter() - started
+        finally:
+            RedisClient().delete(*emails)
+            CustomUser.objects.filter(email__in=emails).delete()
+
+        if errors:
+            raise CommandError(
+                f"{len(errors)} of {len(emails) * options['burst']} requests "
+                f"failed; first error: {errors[0]!r}"
+            )
+
+        requests_sent = len(latencies)
+        latencies.sort()
+        self.stdout.write(f"guest identity mode: {settings.GUEST_IDENTITY_MODE}")
+        self.stdout.write(f"requests:            {requests_sent}")
+        self.stdout.write(f"throughput:          {requests_sent / elapsed:.1f} req/s")
+        self.stdout.write(
+            f"latency p50 / p95:   {statistics.median(latencies) * 1000:.1f} ms / "
+            f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms"
+        )
+        write_counts = [sum(made.values()) for made in writes.values()]
+        self.stdout.write(
+            f"db writes per email: max {max(write_counts)}, "
+            f"total {sum(write_counts)} for {len(emails)} emails"
+        )
+        write_set = sum(writes.values(), Counter())
+        for target, count in sorted(write_set.items()):
+            self.stdout.write(f"  {target}: {count}")
+        self.stdout.write(
+            f"tokens per email:    max {max(len(t) for t in tokens.values())}"
+        )
+
+        expected = expected_writes()
+        unexpected = {
+            email: dict(made) for email, made in writes.items() if made != expected
+        }
+        if unexpected:
+            email, made = next(iter(unexpected.items()))
+            raise CommandError(
+                f"{len(unexpected)} of {len(emails)} emails caused other writes "
+                f"than {dict(expected) or 'none'}; e.g. {email}: {made}"
+            )
+
+    def _burst(
+        self,
+        email: str,
+        size: int,
+        latencies: List[float],
+        writes: Dict[str, Counter],
+        tokens: Dict[str, set],
+        errors: List[BaseException],
+    ) -> None:
+        """
+        Send ``size`` simultaneous issuance requests for one email.
+
+        Args:
+            email (str): The email requested by every request of the burst.
+            size (int): The number of concurrent requests.
+            latencies (List[float]): Collects the latency of each request.
+            writes (Dict[str, Counter]): Collects the database writes per email,
+                by statement type and table.
+            tokens (Dict[str, set]): Collects the distinct tokens per email.
+            errors (List[BaseException]): Collects the errors requests raised.
+        """
+        barrier = threading.Barrier(size)
+        lock = threading.Lock()
+
+        def count_writes(execute: Callable, sql: str, *args: Any) -> Any:
+            target = write_target(sql)
+            if target:
+                with lock:
+                    writes[email][target] += 1
+            return execute(sql, *args)
+
+        def request() -> None:
+            try:
+                with connection.execute_wrapper(count_writes):
+                    barrier.wait()
+                    started = time.perf_counter()
+                    token, _ = RedisClient().get_or_set_single_flight(
+                        email, lambda: mint_guest_token(email), GUEST_TOKEN_EXPIRY
+                    )
+                    latency = time.perf_counter() - started
+                with lock:
+                    latencies.append(latency)
+                    tokens[email].add(token)
+            except BaseException as e:
+                with lock:
+                    errors.append(e)
+                # A failed request must not leave the others at the barrier
+                barrier.abort()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=request) for _ in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
@@ -1,11 +1,14 @@
 """
 Database router for routing authentication and related apps (admin, auth, sessions, contenttypes)
-to the authentication_shard database.
+to the authentication_shard database. Reads are spread over its healthy read replicas, if any,
+except shortly after a write in the same session.
 """
 
 from typing import Any, Optional, Set
 from django.db.models import Model
 
+from coupon_core.utils.db_replicas import read_alias, record_write, replica_aliases
+
 class AuthenticationRouter:
     """
     Routes database operations for the authentication app and related system apps
@@ -17,7 +20,8 @@ class AuthenticationRouter:
 
     def db_for_read(self, model: Model, **hints: Any) -> Optional[str]:
         """
-        Direct read operations for target apps to the authentication_shard database.
+        Direct read operations for target apps to a replica of the authentication_shard database,
+        or to the database itself.
 
         Args:
             model (Model): The model class to be read.
@@ -27,7 +31,7 @@ class AuthenticationRouter:
             Optional[str]: The database alias if the model belongs to a target app; otherwise, None.
         """
         if model._meta.app_label in self.target_apps:
-            return self.db_name
+            return read_alias(self.db_name)
         return None
 
     def db_for_write(self, model: Model, **hints: Any) -> Optional[str]:
@@ -42,12 +46,14 @@ class AuthenticationRouter:
             Optional[str]: The database alias if the model belongs to a target app; otherwise, None.
         """
         if model._meta.app_label in self.target_apps:
+            record_write(self.db_name)
             return self.db_name
         return None
 
     def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
         """
-        Allow relations if both objects are in either the authentication_shard or the default database.
+        Allow relations if both objects are in either the authentication_shard (or one of its
+        replicas) or the default database.
 
         Args:
             obj1 (Model): The first model instance.
@@ -57,7 +63,8 @@ class AuthenticationRouter:
         Returns:
             Optional[bool]: True if the relation is allowed, False otherwise, or None to use the default.
         """
-        if obj1._state.db in {self.db_name, "default"} and obj2._state.db in {self.db_name, "default"}:
+        allowed = {self.db_name, "default", *replica_aliases(self.db_name)}
+        if obj1._state.db in allowed and obj2._state.db in allowed:
             return True
         return None
 
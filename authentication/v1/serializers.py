@@ -134,30 +134,30 @@ class GuestTokenSerializer(serializers.Serializer):
 
     email: serializers.EmailField = serializers.EmailField(required=True)
 
-    def validate_email(self, value: str) -> str:
+    def get_or_create_guest_user(self, email: str) -> CustomUser:
         """
-        Validate or create a guest user associated with the provided email.
+        Retrieve the user associated with an email, creating a guest user if needed.
+
+        This is called only when a new guest token has to be minted, rather than
+        during validation, so requests served from the token cache do not touch
+        the database.
 
         Args:
-            value (str): Email to validate.
+            email (str): Email of the guest user.
 
         Returns:
-            str: Validated email after ensuring a guest user exists.
-
-        Side Effects:
-            - Creates a guest user if one doesn't exist.
+            CustomUser: The existing or newly created user.
         """
-        user, created = CustomUser.objects.get_or_create(
-            email=value,
+        user, _ = CustomUser.objects.get_or_create(
+            email=email,
             defaults={
-                "username": value.split("@")[0],  # Use email prefix as username
+                "username": email.split("@")[0],  # Use email prefix as username
                 "is_guest": True,  # Mark user as a guest
+                # Prevent guest users from logging in, within the same INSERT
+                "password": make_password(None),
             },
         )
-        if created:
-            user.set_unusable_password()  # Prevent guest users from logging in
-            user.save()
-        return value
+        return user
 
     def get_abstract_user(self, email: str) -> CustomUser:
         """
@@ -1,12 +1,19 @@
+import threading
+import time
 import unittest
-from typing import Any, Dict, Optional
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
 from unittest.mock import MagicMock, patch
 
+import redis
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import TokenError
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken, TokenError
 
+from authentication.v1.utils import redis_client as redis_client_module
 from authentication.v1.utils.redis_client import RedisClient
 from authentication.v1.utils.token_manager import TokenManager
+from coupon_core.utils.guest_identity import GUEST_ID_CLAIM
 
 CustomUser = get_user_model()
 
@@ -61,6 +68,188 @@ class TestRedisClient(unittest.TestCase):
         self.assertIn("Failed to get token for key", str(context.exception))
 
 
+class TestRedisClientPool(unittest.TestCase):
+    """
+    Test cases for the shared connection pool and batched operations.
+    """
+
+    def setUp(self) -> None:
+        """
+        Reset the process-wide pool so each test builds it from its settings.
+        """
+        redis_settings = override_settings(
+            REDIS_HOST="localhost",
+            REDIS_PORT=6379,
+            REDIS_PASSWORD=None,
+            REDIS_POOL={
+                "MAX_CONNECTIONS": 10,
+                "SOCKET_TIMEOUT": 1.0,
+                "SOCKET_CONNECT_TIMEOUT": 1.0,
+                "HEALTH_CHECK_INTERVAL": 30,
+            },
+        )
+        redis_settings.enable()
+        self.addCleanup(redis_settings.disable)
+        redis_client_module._pool = None
+        self.addCleanup(setattr, redis_client_module, "_pool", None)
+
+    def test_clients_share_one_pool(self) -> None:
+        """
+        Test that clients reuse the process-wide pool.
+
+        Expected Behavior:
+            - Every client is bound to the same pool.
+            - The pool applies the configured timeouts and health checks.
+        """
+        first, second = RedisClient(), RedisClient()
+        pool = first.client.connection_pool
+
+        self.assertIs(pool, second.client.connection_pool)
+        self.assertEqual(pool.max_connections, 10)
+        self.assertEqual(pool.connection_kwargs["socket_timeout"], 1.0)
+        self.assertEqual(pool.connection_kwargs["health_check_interval"], 30)
+
+    def test_mget_and_mset(self) -> None:
+        """
+        Test the batched helpers.
+
+        Expected Behavior:
+            - mget returns values in key order in one call.
+            - mset with an expiry queues one SETEX per key in a single pipeline.
+            - Redis errors are raised as RuntimeError.
+        """
+        client = RedisClient()
+        client.client = MagicMock()
+        client.client.mget.return_value = ["1", None]
+        pipe = client.client.pipeline.return_value.__enter__.return_value
+
+        self.assertEqual(client.mget(["a", "b"]), ["1", None])
+        client.client.mget.assert_called_once_with(["a", "b"])
+
+        client.mset({"a": "1", "b": "2"}, expiry=60)
+        client.client.pipeline.assert_called_once_with(transaction=False)
+        self.assertEqual(pipe.setex.call_count, 2)
+        pipe.execute.assert_called_once()
+
+        client.client.mget.side_effect = redis.ConnectionError("down")
+        with self.assertRaises(RuntimeError):
+            client.mget(["a"])
+
+
+class InMemoryRedis:
+    """
+    Thread-safe stand-in for the Redis commands used by single-flight issuance.
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            return self.data.get(key)
+
+    def setex(self, key: str, expiry: int, value: str) -> None:
+        with self.lock:
+            self.data[key] = value
+
+    def set(self, key: str, value: str, nx: bool = False, px: int = 0) -> bool:
+        with self.lock:
+            if nx and key in self.data:
+                return False
+            self.data[key] = value
+            return True
+
+    def release(self, keys: List[str], args: List[str]) -> int:
+        with self.lock:
+            if self.data.get(keys[0]) != args[0]:
+                return 0
+            del self.data[keys[0]]
+            return 1
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Test cases for single-flight computation of missing values.
+    """
+
+    def _client(self, store: InMemoryRedis) -> RedisClient:
+        """
+        Build a RedisClient backed by an in-memory store.
+        """
+        client = RedisClient.__new__(RedisClient)
+        client.client = store
+        client._release_lock = store.release
+        return client
+
+    def test_burst_computes_once(self) -> None:
+        """
+        Test a burst of concurrent requests for the same missing key.
+
+        Expected Behavior:
+            - The value is computed exactly once.
+            - Every caller receives the same value; only one reports creating it.
+            - The lock is released afterwards.
+        """
+        store = InMemoryRedis()
+        calls: List[int] = []
+        results: List[Any] = []
+        barrier = threading.Barrier(20)
+
+        def compute() -> str:
+            calls.append(1)
+            time.sleep(0.05)  # Widen the window in which others could miss
+            return "guest_token"
+
+        def request() -> None:
+            client = self._client(store)
+            barrier.wait()
+            results.append(
+                client.get_or_set_single_flight(
+                    "guest@example.com", compute, 60, poll_interval=0.01
+                )
+            )
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({token for token, _ in results}, {"guest_token"})
+        self.assertEqual(sum(created for _, created in results), 1)
+        self.assertNotIn("guest@example.com:lock", store.data)
+
+    def test_waiter_takes_over_after_failure(self) -> None:
+        """
+        Test that a failed computation does not leave the key locked.
+
+        Expected Behavior:
+            - The failing caller's error propagates and its lock is released.
+            - The next caller computes the value.
+            - A caller waiting on a lock that is never released times out.
+        """
+        store = InMemoryRedis()
+        client = self._client(store)
+
+        def fail() -> str:
+            raise ValueError("signer unavailable")
+
+        with self.assertRaises(ValueError):
+            client.get_or_set_single_flight("key", fail, 60)
+        self.assertEqual(
+            client.get_or_set_single_flight("key", lambda: "value", 60),
+            ("value", True),
+        )
+
+        store.set("other:lock", "held-elsewhere")
+        with self.assertRaises(TimeoutError):
+            client.get_or_set_single_flight(
+                "other", lambda: "value", 60, wait_timeout=0.05, poll_interval=0.01
+            )
+
+
 class TestTokenManager(unittest.TestCase):
     """
     Test cases for the TokenManager utility class.
@@ -102,6 +291,32 @@ class TestTokenManager(unittest.TestCase):
 
         self.assertIn("Unable to generate guest token", str(context.exception))
 
+    def test_create_ephemeral_guest_token(self) -> None:
+        """
+        Test generating a guest token that needs no user row.
+
+        Expected Behavior:
+            - The token carries a guest id, the email and the guest flag.
+            - It has no user id claim and expires after the given lifetime.
+            - Every token gets a new guest id.
+        """
+        token = AccessToken(
+            TokenManager.create_ephemeral_guest_token(
+                "guest@example.com", timedelta(hours=1)
+            )
+        )
+
+        self.assertTrue(token["is_guest"])
+        self.assertEqual(token["email"], "guest@example.com")
+        self.assertNotIn("user_id", token)
+        self.assertAlmostEqual(token["exp"] - time.time(), 3600, delta=5)
+        other = AccessToken(
+            TokenManager.create_ephemeral_guest_token(
+                "guest@example.com", timedelta(hours=1)
+            )
+        )
+        self.assertNotEqual(token[GUEST_ID_CLAIM], other[GUEST_ID_CLAIM])
+
     @patch("authentication.utils.token_manager.RefreshToken")
     def test_create_admin_tokens_success(self, mock_refresh_token: MagicMock) -> None:
         """
@@ -7,9 +7,13 @@ valid inputs, invalid inputs, and edge cases.
 
 from unittest.mock import ANY, patch
 
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import CustomUser
 
 
 class GuestTokenTestCase(APITestCase):
@@ -24,11 +28,17 @@ class GuestTokenTestCase(APITestCase):
         self.client = APIClient()
         self.guest_token_url = reverse("guest-token")
 
+    @override_settings(GUEST_IDENTITY_MODE="user")
+    @patch("authentication.v1.utils.redis_client.RedisClient.release_lock")
+    @patch(
+        "authentication.v1.utils.redis_client.RedisClient.acquire_lock",
+        return_value="lock-token",
+    )
     @patch("authentication.v1.utils.redis_client.RedisClient.get_token")
     @patch("authentication.v1.utils.redis_client.RedisClient.set_token")
     @patch("authentication.v1.utils.token_manager.TokenManager.create_guest_token")
     def test_guest_token_successful(
-        self, mock_create_token, mock_set_token, mock_get_token
+        self, mock_create_token, mock_set_token, mock_get_token, *_
     ):
         """
         Test successful guest token creation and retrieval.
@@ -46,6 +56,37 @@ class GuestTokenTestCase(APITestCase):
         self.assertEqual(response.data["guest_token"], "guest_token")
         mock_set_token.assert_called_once_with("guest@example.com", "guest_token", ANY)
 
+    @override_settings(GUEST_IDENTITY_MODE="ephemeral")
+    @patch("authentication.v1.utils.redis_client.RedisClient.release_lock")
+    @patch(
+        "authentication.v1.utils.redis_client.RedisClient.acquire_lock",
+        return_value="lock-token",
+    )
+    @patch(
+        "authentication.v1.utils.redis_client.RedisClient.get_token",
+        return_value=None,
+    )
+    @patch("authentication.v1.utils.redis_client.RedisClient.set_token")
+    def test_ephemeral_guest_token_creates_no_user(self, mock_set_token, *_):
+        """
+        Test guest token creation in the ephemeral guest identity mode.
+
+        Validates that the token carries a guest id and the email, and that no
+        user row is created for the guest.
+        """
+        data = {"email": "guest@example.com"}
+        response = self.client.post(self.guest_token_url, data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        token = AccessToken(response.data["guest_token"])
+        self.assertTrue(token["is_guest"])
+        self.assertEqual(token["email"], "guest@example.com")
+        self.assertIn("guest_id", token)
+        self.assertFalse(CustomUser.objects.filter(email="guest@example.com").exists())
+        mock_set_token.assert_called_once_with(
+            "guest@example.com", response.data["guest_token"], ANY
+        )
+
     @patch("authentication.v1.utils.redis_client.RedisClient.get_token")
     def test_guest_token_existing(self, mock_get_token):
         """
@@ -0,0 +1,127 @@
+import time
+import unittest
+from typing import Dict
+from unittest.mock import MagicMock
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from rest_framework_simplejwt.exceptions import (
+    TokenBackendError,
+    TokenBackendExpiredToken,
+)
+
+from authentication.v1.utils.jwt_keys import (
+    JWKSCache,
+    KeyRingTokenBackend,
+    build_jwks,
+    load_signing_key,
+)
+
+
+def _pem(private_key) -> str:
+    """
+    Serialize a private key to unencrypted PEM.
+    """
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _key_spec(kid: str, algorithm: str = "RS256") -> Dict[str, str]:
+    """
+    Build a JWT_SIGNING_KEYS entry with a freshly generated key.
+    """
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return {"kid": kid, "algorithm": algorithm, "private_key": _pem(private_key)}
+
+
+class TestKeyRingTokenBackend(unittest.TestCase):
+    """
+    Test cases for signing and verifying tokens with rotating keys.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create an RS256 key and an EdDSA key.
+        """
+        self.rsa_key = load_signing_key(_key_spec("rsa-1"))
+        self.ed_key = load_signing_key(_key_spec("ed-1", "EdDSA"))
+
+    def test_tokens_carry_the_active_kid(self) -> None:
+        """
+        Test that tokens are signed with the first key and verify.
+
+        Expected Behavior:
+            - The token header names the active key.
+            - The token decodes to its claims.
+        """
+        backend = KeyRingTokenBackend([self.ed_key, self.rsa_key])
+        token = backend.encode({"user_id": 1})
+
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], "ed-1")
+        self.assertEqual(jwt.get_unverified_header(token)["alg"], "EdDSA")
+        self.assertEqual(backend.decode(token)["user_id"], 1)
+
+    def test_rotated_key_still_verifies(self) -> None:
+        """
+        Test key rotation.
+
+        Expected Behavior:
+            - A token signed before rotation verifies while its key is listed.
+            - It is rejected once the retired key is removed.
+        """
+        old_token = KeyRingTokenBackend([self.rsa_key]).encode({"user_id": 1})
+        rotated = KeyRingTokenBackend([self.ed_key, self.rsa_key])
+        self.assertEqual(rotated.decode(old_token)["user_id"], 1)
+
+        with self.assertRaises(TokenBackendError):
+            KeyRingTokenBackend([self.ed_key]).decode(old_token)
+
+    def test_expired_and_tampered_tokens(self) -> None:
+        """
+        Test the errors raised for invalid tokens.
+
+        Expected Behavior:
+            - An expired token raises TokenBackendExpiredToken.
+            - A token with a modified payload raises TokenBackendError.
+        """
+        backend = KeyRingTokenBackend([self.rsa_key])
+        expired = backend.encode({"user_id": 1, "exp": int(time.time()) - 60})
+        with self.assertRaises(TokenBackendExpiredToken):
+            backend.decode(expired)
+
+        header, _, signature = backend.encode({"user_id": 1}).split(".")
+        forged = backend.encode({"user_id": 2}).split(".")[1]
+        with self.assertRaises(TokenBackendError):
+            backend.decode(f"{header}.{forged}.{signature}")
+
+    def test_verifies_with_jwks_cache(self) -> None:
+        """
+        Test verification by a service holding only the published JWKS.
+
+        Expected Behavior:
+            - The token verifies against the key fetched from the JWKS URL.
+            - The JWKS is fetched once, not per token.
+        """
+        token = KeyRingTokenBackend([self.rsa_key, self.ed_key]).encode({"user_id": 7})
+
+        cache = JWKSCache("http://auth/jwks.json", refresh_interval=3600)
+        response = MagicMock()
+        response.json.return_value = build_jwks([self.rsa_key, self.ed_key])
+        cache.session = MagicMock()
+        cache.session.get.return_value = response
+        self.addCleanup(cache.stop)
+
+        verifier = KeyRingTokenBackend([], jwks_cache=cache)
+        self.assertEqual(verifier.decode(token)["user_id"], 7)
+        self.assertEqual(verifier.decode(token)["user_id"], 7)
+        cache.session.get.assert_called_once()
+
+        with self.assertRaises(TokenBackendError):
+            verifier.encode({"user_id": 7})
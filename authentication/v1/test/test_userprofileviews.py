@@ -16,10 +16,15 @@ Date: YYYY-MM-DD
 
 from typing import Dict
 
+from datetime import timedelta
+
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
 from authentication.models import CustomUser, UserProfile
+from authentication.v1.utils.token_manager import TokenManager
+from coupon_core.utils.guest_identity import GuestUser
 
 
 class UserProfileViewTestCase(APITestCase):
@@ -183,6 +188,31 @@ class UserRegistrationViewTestCase(APITestCase):
             response.data["message"], "Guest user upgraded to a regular user."
         )
 
+    def test_upgrade_ephemeral_guest_creates_user(self) -> None:
+        """
+        Test registering a guest whose token carries an ephemeral guest id.
+
+        Expected Behavior:
+            - Returns HTTP 201 with a success message.
+            - A regular user row is created for the email in the guest token.
+        """
+        token = TokenManager.create_ephemeral_guest_token(
+            "ephemeral@example.com", timedelta(hours=1)
+        )
+        self.client.force_authenticate(user=GuestUser(AccessToken(token)))
+        data: Dict[str, str] = {
+            "password": "newsecurepassword",
+            "confirm_password": "newsecurepassword",
+        }
+        response = self.client.post("/authentication/api/v1/register/", data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["message"], "Guest user upgraded to a regular user."
+        )
+        user = CustomUser.objects.get(email="ephemeral@example.com")
+        self.assertFalse(user.is_guest)
+        self.assertTrue(user.check_password("newsecurepassword"))
+
     def test_upgrade_guest_user_password_mismatch(self) -> None:
         """
         Test upgrading a guest user with mismatched passwords.
@@ -14,6 +14,7 @@ Endpoints:
 - UserProfileView: Manages user profile operations (retrieve and update).
 - UserRegistrationView: Handles registration for guest and new users.
 - SocialAuth: Google, Apple, and Twitter authentication endpoints.
+- JWKSView: Publishes the public keys used to verify JWTs.
 """
 
 from django.urls import path
@@ -21,6 +22,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from authentication.v1.views.admin_views import LoginView, RegisterView, UserInfoView
 from authentication.v1.views.guest_views import GuestTokenView
+from authentication.v1.views.jwks_views import JWKSView
 from authentication.v1.views.userprofile_views import (
     UserProfileView,
     UserRegistrationView,
@@ -38,6 +40,7 @@ urlpatterns = [
     path("v1/register/", RegisterView.as_view(), name="register"),
     path("v1/guest-token/", GuestTokenView.as_view(), name="guest-token"),
     path("v1/token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("v1/.well-known/jwks.json", JWKSView.as_view(), name="jwks"),
     path("v1/user-info/", UserInfoView.as_view(), name="user-info"),
     path("v1/user-profile/", UserProfileView.as_view(), name="user-profile"),
     path(
@@ -0,0 +1,437 @@
+"""
+Utility module for asymmetric JWT signing and verification.
+
+The authentication service signs tokens with the private key of the first entry
+in ``JWT_SIGNING_KEYS`` (RS256 or EdDSA) and puts the key's id in the token's
+``kid`` header. Its public keys, including retired keys that may still have
+unexpired tokens, are published as a JWKS document. Other services verify
+tokens locally against an in-memory copy of that JWKS, refreshed in the
+background, so they need neither the signing secret nor a network call per
+request.
+
+Key rotation:
+1. Add a new key at the start of ``JWT_SIGNING_KEYS``; new tokens are signed
+   with it, while tokens signed with the old key still verify.
+2. Once the refresh token lifetime has passed, remove the old key.
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import jwt
+import requests
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from jwt import ExpiredSignatureError, InvalidTokenError
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import (
+    TokenBackendError,
+    TokenBackendExpiredToken,
+)
+
+logger = logging.getLogger(__name__)
+
+# Signing algorithms supported for key rotation
+SUPPORTED_ALGORITHMS = ("RS256", "EdDSA")
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """
+    A key pair used to sign and verify JWTs.
+
+    Attributes:
+        kid (str): The key id placed in the ``kid`` header of signed tokens.
+        algorithm (str): The signing algorithm, "RS256" or "EdDSA".
+        private_key (Any): The private key, or None for a verification-only key.
+        public_key (Any): The public key.
+    """
+
+    kid: str
+    algorithm: str
+    private_key: Any
+    public_key: Any
+
+    def to_jwk(self) -> Dict[str, Any]:
+        """
+        Export the public key as a JSON Web Key.
+
+        Returns:
+            Dict[str, Any]: The JWK, including its kid, algorithm and use.
+        """
+        algorithm = jwt.get_algorithm_by_name(self.algorithm)
+        jwk = json.loads(algorithm.to_jwk(self.public_key))
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+def load_signing_key(spec: Dict[str, str]) -> SigningKey:
+    """
+    Load a signing key from its settings entry.
+
+    Args:
+        spec (Dict[str, str]): A mapping with ``kid``, ``algorithm`` and either
+            ``private_key`` (PEM) or ``public_key`` (PEM) for a key that is
+            only used to verify.
+
+    Returns:
+        SigningKey: The loaded key.
+
+    Raises:
+        ValueError: If the entry is incomplete or uses an unsupported algorithm.
+    """
+    kid = spec.get("kid")
+    algorithm_name = spec.get("algorithm", "RS256")
+    if not kid:
+        raise ValueError("Every JWT signing key needs a 'kid'.")
+    if algorithm_name not in SUPPORTED_ALGORITHMS:
+        raise ValueError(f"Unsupported JWT signing algorithm: {algorithm_name}")
+
+    algorithm = jwt.get_algorithm_by_name(algorithm_name)
+    if spec.get("private_key"):
+        private_key = algorithm.prepare_key(spec["private_key"])
+        return SigningKey(kid, algorithm_name, private_key, private_key.public_key())
+    if spec.get("public_key"):
+        return SigningKey(
+            kid, algorithm_name, None, algorithm.prepare_key(spec["public_key"])
+        )
+    raise ValueError(f"JWT signing key '{kid}' has no private or public key.")
+
+
+def load_signing_keys(specs: Iterable[Dict[str, str]]) -> List[SigningKey]:
+    """
+    Load the configured signing keys, the active key first.
+
+    Args:
+        specs (Iterable[Dict[str, str]]): The ``JWT_SIGNING_KEYS`` entries.
+
+    Returns:
+        List[SigningKey]: The loaded keys.
+    """
+    return [load_signing_key(spec) for spec in specs]
+
+
+def build_jwks(keys: Iterable[SigningKey]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Build the JWKS document publishing the public keys.
+
+    Args:
+        keys (Iterable[SigningKey]): The signing keys.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: The JWKS document.
+    """
+    return {"keys": [key.to_jwk() for key in keys]}
+
+
+class JWKSCache:
+    """
+    In-memory copy of a remote JWKS document, refreshed in the background.
+
+    Keys are looked up by kid. An unknown kid triggers an immediate refresh, at
+    most once per ``min_refresh_interval``, so tokens signed with a freshly
+    rotated key verify without waiting for the next scheduled refresh.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 300,
+        min_refresh_interval: float = 30,
+        timeout: float = 5,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            url (str): The URL of the JWKS document.
+            refresh_interval (float): Seconds between background refreshes.
+            min_refresh_interval (float): Minimum seconds between refreshes
+                triggered by unknown key ids.
+            timeout (float): Timeout of a JWKS request in seconds.
+        """
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._keys: Dict[str, Tuple[Any, str]] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def refresh(self) -> bool:
+        """
+        Fetch the JWKS document and replace the cached keys.
+
+        Returns:
+            bool: True if the keys were refreshed, False if the fetch failed
+            and the previous keys were kept.
+        """
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            jwk_set = jwt.PyJWKSet.from_dict(response.json())
+        except (requests.RequestException, ValueError, jwt.PyJWKSetError) as e:
+            logger.error(f"Failed to refresh JWKS from {self.url}: {str(e)}")
+            with self._lock:
+                self._fetched_at = time.monotonic()
+            return False
+
+        keys = {
+            jwk.key_id: (jwk.key, jwk.algorithm_name)
+            for jwk in jwk_set.keys
+            if jwk.key_id and jwk.algorithm_name in SUPPORTED_ALGORITHMS
+        }
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} JWT verification key(s) from {self.url}")
+        return True
+
+    def get_key(self, kid: str) -> Optional[Tuple[Any, str]]:
+        """
+        Return the verification key and algorithm for a key id.
+
+        Args:
+            kid (str): The key id from the token header.
+
+        Returns:
+            Optional[Tuple[Any, str]]: The public key and its algorithm, or None
+            if the JWKS does not contain the key.
+        """
+        self.start()
+        with self._lock:
+            key = self._keys.get(kid)
+            due = time.monotonic() - self._fetched_at >= self.min_refresh_interval
+        if key is None and due:
+            self.refresh()
+            with self._lock:
+                key = self._keys.get(kid)
+        return key
+
+    def start(self) -> None:
+        """
+        Start the background refresh thread, if it is not running yet.
+        """
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_periodically, name="jwks-refresh", daemon=True
+            )
+        self.refresh()
+        self._refresher.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background refresh thread.
+        """
+        self._stopped.set()
+
+    def _refresh_periodically(self) -> None:
+        while not self._stopped.wait(self.refresh_interval):
+            self.refresh()
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    simplejwt token backend signing with the active key of a key ring and
+    verifying with the key named by each token's ``kid`` header.
+
+    Keys are looked up in the local key ring first, then in the JWKS cache.
+    """
+
+    def __init__(
+        self,
+        keys: List[SigningKey],
+        jwks_cache: Optional[JWKSCache] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        leeway: Any = None,
+        json_encoder: Optional[type] = None,
+    ) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            keys (List[SigningKey]): The local keys, the active signing key first.
+            jwks_cache (Optional[JWKSCache]): Remote keys used for verification.
+            audience (Optional[str]): The expected ``aud`` claim.
+            issuer (Optional[str]): The expected ``iss`` claim.
+            leeway (Any): Leeway for time-based claims.
+            json_encoder (Optional[type]): JSON encoder for token payloads.
+        """
+        algorithm = keys[0].algorithm if keys else SUPPORTED_ALGORITHMS[0]
+        super().__init__(
+            algorithm,
+            audience=audience,
+            issuer=issuer,
+            leeway=leeway,
+            json_encoder=json_encoder,
+        )
+        self.keys = {key.kid: key for key in keys}
+        self.active_key = keys[0] if keys and keys[0].private_key else None
+        self.jwks_cache = jwks_cache
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        """
+        Sign a payload with the active key.
+
+        Args:
+            payload (Dict[str, Any]): The token claims.
+
+        Returns:
+            str: The signed token.
+
+        Raises:
+            TokenBackendError: If this service holds no private key.
+        """
+        if self.active_key is None:
+            raise TokenBackendError(_("No JWT signing key is configured"))
+
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+        return jwt.encode(
+            jwt_payload,
+            self.active_key.private_key,
+            algorithm=self.active_key.algorithm,
+            headers={"kid": self.active_key.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def _verification_key(self, token: str) -> Tuple[Any, str]:
+        """
+        Find the key a token was signed with.
+
+        Args:
+            token (str): The encoded token.
+
+        Returns:
+            Tuple[Any, str]: The public key and its algorithm.
+
+        Raises:
+            TokenBackendError: If the token names no known key.
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+        if kid in self.keys:
+            key = self.keys[kid]
+            return key.public_key, key.algorithm
+        found = self.jwks_cache.get_key(kid) if self.jwks_cache and kid else None
+        if found is None:
+            raise TokenBackendError(_("Token is invalid"))
+        return found
+
+    def decode(self, token: str, verify: bool = True) -> Dict[str, Any]:
+        """
+        Verify a token with the key named in its header and return its claims.
+
+        Args:
+            token (str): The encoded token.
+            verify (bool): Whether to verify the signature.
+
+        Returns:
+            Dict[str, Any]: The token claims.
+
+        Raises:
+            TokenBackendError: If the token is malformed or its signature is invalid.
+            TokenBackendExpiredToken: If the token has expired.
+        """
+        key, algorithm = self._verification_key(token) if verify else (None, None)
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm] if algorithm else list(SUPPORTED_ALGORITHMS),
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken(_("Token is expired")) from e
+        except InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+
+_signing_keys: Optional[List[SigningKey]] = None
+
+
+def get_signing_keys() -> List[SigningKey]:
+    """
+    Return the signing keys configured in ``JWT_SIGNING_KEYS``, loaded once.
+
+    Returns:
+        List[SigningKey]: The keys, the active signing key first.
+    """
+    global _signing_keys
+    if _signing_keys is None:
+        _signing_keys = load_signing_keys(settings.JWT_SIGNING_KEYS)
+    return _signing_keys
+
+
+def build_token_backend() -> Optional[KeyRingTokenBackend]:
+    """
+    Build the token backend for the configured keys and JWKS URL.
+
+    Returns:
+        Optional[KeyRingTokenBackend]: The backend, or None if neither signing
+        keys nor a JWKS URL are configured and the HS256 backend stays in use.
+    """
+    keys = get_signing_keys()
+    if not keys and not settings.JWT_JWKS_URL:
+        return None
+
+    jwks_cache = None
+    if settings.JWT_JWKS_URL:
+        jwks_cache = JWKSCache(
+            settings.JWT_JWKS_URL,
+            refresh_interval=settings.JWT_JWKS_REFRESH_INTERVAL,
+        )
+    simple_jwt = getattr(settings, "SIMPLE_JWT", {})
+    return KeyRingTokenBackend(
+        keys,
+        jwks_cache=jwks_cache,
+        audience=simple_jwt.get("AUDIENCE"),
+        issuer=simple_jwt.get("ISSUER"),
+        leeway=simple_jwt.get("LEEWAY"),
+    )
+
+
+def install_token_backend() -> None:
+    """
+    Make simplejwt sign and verify tokens with the key ring, if configured.
+
+    simplejwt tokens resolve their backend from
+    ``rest_framework_simplejwt.state.token_backend`` when first used, so the
+    backend is replaced there when the app registry is ready.
+    """
+    backend = build_token_backend()
+    if backend is None:
+        return
+
+    from rest_framework_simplejwt import state
+
+    state.token_backend = backend
+    logger.info(
+        f"JWTs are signed with key '{backend.active_key.kid}'"
+        if backend.active_key
+        else "JWTs are verified with keys from the JWKS endpoint"
+    )
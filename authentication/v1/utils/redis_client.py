@@ -2,32 +2,75 @@
 Utility module for handling Redis operations.
 
 This module provides a Redis client for setting and retrieving tokens with enhanced
-error handling and configurations sourced from Django settings.
+error handling and configurations sourced from Django settings. All clients in a
+process share one connection pool, so constructing a RedisClient per request
+does not open new connections.
 """
 
-from typing import Any, Optional
+import threading
+import time
+import uuid
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple
 
 import redis
 from django.conf import settings
 
+# Deletes a lock only if it is still held by the caller's token, so a worker
+# whose lock expired cannot release a lock since taken by another worker.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_pool: Optional[redis.ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> redis.ConnectionPool:
+    """
+    Return the process-wide Redis connection pool, creating it on first use.
+
+    The pool is configured from the REDIS_HOST, REDIS_PORT, REDIS_PASSWORD and
+    REDIS_POOL settings. Idle connections are health-checked before reuse and
+    every socket operation is bounded by a timeout.
+
+    Returns:
+        redis.ConnectionPool: The shared connection pool.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = settings.REDIS_POOL
+                _pool = redis.ConnectionPool(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    password=settings.REDIS_PASSWORD,
+                    decode_responses=True,
+                    max_connections=config["MAX_CONNECTIONS"],
+                    socket_timeout=config["SOCKET_TIMEOUT"],
+                    socket_connect_timeout=config["SOCKET_CONNECT_TIMEOUT"],
+                    health_check_interval=config["HEALTH_CHECK_INTERVAL"],
+                    retry_on_timeout=True,
+                )
+    return _pool
+
 
 class RedisClient:
     """Handles Redis connections and operations with enhanced error handling."""
 
     def __init__(self) -> None:
         """
-        Initialize the Redis client with configuration from Django settings.
+        Initialize the Redis client on the shared connection pool.
 
         Raises:
             redis.ConnectionError: If the Redis server is unreachable.
         """
         try:
-            self.client = redis.StrictRedis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                password=settings.REDIS_PASSWORD,
-                decode_responses=True,
-            )
+            self.client = redis.StrictRedis(connection_pool=get_connection_pool())
+            self._release_lock = self.client.register_script(RELEASE_LOCK_SCRIPT)
         except redis.ConnectionError as e:
             raise ConnectionError(
                 f"Failed to connect to Redis: {str(e)}"
@@ -71,3 +114,203 @@ class RedisClient:
             raise RuntimeError(
                 f"Failed to get token for key '{key}': {str(e)}"
             ) from e
+
+    def mget(self, keys: Iterable[str]) -> List[Optional[str]]:
+        """
+        Retrieve several values in one round trip.
+
+        Args:
+            keys (Iterable[str]): The keys to retrieve.
+
+        Returns:
+            List[Optional[str]]: The values in key order, None for missing keys.
+
+        Raises:
+            RuntimeError: If the values cannot be retrieved.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        try:
+            return self.client.mget(keys)
+        except redis.RedisError as e:
+            raise RuntimeError(
+                f"Failed to get {len(keys)} keys: {str(e)}"
+            ) from e
+
+    def mset(self, mapping: Mapping[str, Any], expiry: Optional[int] = None) -> None:
+        """
+        Store several values in one round trip.
+
+        Args:
+            mapping (Mapping[str, Any]): The values to store, by key.
+            expiry (Optional[int]): The time-to-live for every key in seconds, or
+                None to store the keys without expiry.
+
+        Raises:
+            RuntimeError: If the values cannot be stored.
+        """
+        if not mapping:
+            return
+        try:
+            if expiry is None:
+                self.client.mset(dict(mapping))
+                return
+            with self.client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.setex(key, expiry, value)
+                pipe.execute()
+        except redis.RedisError as e:
+            raise RuntimeError(
+                f"Failed to set {len(mapping)} keys: {str(e)}"
+            ) from e
+
+    def pipeline(self, transaction: bool = False) -> redis.client.Pipeline:
+        """
+        Create a pipeline that queues commands and sends them in one round trip.
+
+        Use it as a context manager and call ``execute()`` to run the commands:
+
+            with RedisClient().pipeline() as pipe:
+                pipe.get("a")
+                pipe.expire("b", 60)
+                value, _ = pipe.execute()
+
+        Args:
+            transaction (bool): Whether to wrap the commands in MULTI/EXEC.
+
+        Returns:
+            redis.client.Pipeline: The pipeline, using a connection from the
+            shared pool.
+        """
+        return self.client.pipeline(transaction=transaction)
+
+    def delete(self, *keys: str) -> int:
+        """
+        Delete keys from Redis.
+
+        Args:
+            *keys (str): The keys to delete.
+
+        Returns:
+            int: The number of keys deleted.
+
+        Raises:
+            RuntimeError: If the keys cannot be deleted.
+        """
+        if not keys:
+            return 0
+        try:
+            return self.client.delete(*keys)
+        except redis.RedisError as e:
+            raise RuntimeError(
+                f"Failed to delete {len(keys)} keys: {str(e)}"
+            ) from e
+
+    def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """
+        Try to take a lock with ``SET NX``, without waiting.
+
+        Args:
+            key (str): The lock key.
+            timeout (float): Seconds after which the lock expires, should its
+                holder never release it.
+
+        Returns:
+            Optional[str]: The token identifying the holder, or None if the lock
+            is held by someone else.
+
+        Raises:
+            RuntimeError: If the lock cannot be requested.
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(key, token, nx=True, px=int(timeout * 1000))
+        except redis.RedisError as e:
+            raise RuntimeError(
+                f"Failed to acquire lock '{key}': {str(e)}"
+            ) from e
+        return token if acquired else None
+
+    def release_lock(self, key: str, token: str) -> bool:
+        """
+        Release a lock if it is still held with the given token.
+
+        Args:
+            key (str): The lock key.
+            token (str): The token returned by ``acquire_lock``.
+
+        Returns:
+            bool: True if the lock was released, False if it had expired.
+
+        Raises:
+            RuntimeError: If the lock cannot be released.
+        """
+        try:
+            return bool(self._release_lock(keys=[key], args=[token]))
+        except redis.RedisError as e:
+            raise RuntimeError(
+                f"Failed to release lock '{key}': {str(e)}"
+            ) from e
+
+    def get_or_set_single_flight(
+        self,
+        key: str,
+        compute: Callable[[], str],
+        expiry: int,
+        lock_timeout: float = 5,
+        wait_timeout: float = 3,
+        poll_interval: float = 0.05,
+    ) -> Tuple[str, bool]:
+        """
+        Return the value of a key, computing it in exactly one worker on a miss.
+
+        Concurrent callers missing the same key race for a lock. The winner
+        computes and stores the value; the others poll for it instead of
+        computing it too. If the winner fails, its lock is released and a
+        waiting caller takes over.
+
+        Args:
+            key (str): The key holding the value.
+            compute (Callable[[], str]): Produces the value on a miss.
+            expiry (int): The time-to-live of the stored value in seconds.
+            lock_timeout (float): Seconds after which an unreleased lock expires.
+            wait_timeout (float): Seconds a caller waits for another worker.
+            poll_interval (float): Seconds between checks while waiting.
+
+        Returns:
+            Tuple[str, bool]: The value, and whether this call computed it.
+
+        Raises:
+            TimeoutError: If no value appeared within ``wait_timeout``.
+            RuntimeError: If Redis cannot be reached.
+        """
+        value = self.get_token(key)
+        if value is not None:
+            return value, False
+
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            lock_token = self.acquire_lock(lock_key, lock_timeout)
+            if lock_token is not None:
+                try:
+                    # The previous holder may have stored the value just before
+                    # this caller took the lock
+                    value = self.get_token(key)
+                    if value is not None:
+                        return value, False
+                    value = compute()
+                    self.set_token(key, value, expiry)
+                    return value, True
+                finally:
+                    self.release_lock(lock_key, lock_token)
+
+            time.sleep(poll_interval)
+            value = self.get_token(key)
+            if value is not None:
+                return value, False
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Timed out waiting for another worker to set '{key}'"
+                )
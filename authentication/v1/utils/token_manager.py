@@ -5,11 +5,14 @@ Provides methods to create tokens for guest and admin users, with error handling
 """
 
 import logging
+from datetime import timedelta
 from typing import Dict
 
 from django.contrib.auth.models import AbstractUser
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from coupon_core.utils.guest_identity import GUEST_ID_CLAIM, new_guest_id
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +51,38 @@ class TokenManager:
             )
             raise ValueError("Unable to generate guest token.") from e
 
+    @staticmethod
+    def create_ephemeral_guest_token(email: str, lifetime: timedelta) -> str:
+        """
+        Create a JWT token for a guest without a user row.
+
+        The token identifies the guest by a new random id in its ``guest_id``
+        claim, so issuing it requires no database access.
+
+        Args:
+            email (str): The email the guest token is requested for.
+            lifetime (timedelta): How long the token stays valid.
+
+        Returns:
+            str: A JWT access token for the guest.
+
+        Raises:
+            ValueError: If token creation fails.
+        """
+        try:
+            token = AccessToken()
+            token.set_exp(lifetime=lifetime)
+            token[GUEST_ID_CLAIM] = new_guest_id()
+            token["is_guest"] = True
+            token["email"] = email
+            logger.info(
+                f"Ephemeral guest token created for guest: {token[GUEST_ID_CLAIM]}"
+            )
+            return str(token)
+        except TokenError as e:
+            logger.error(f"Failed to create ephemeral guest token: {str(e)}")
+            raise ValueError("Unable to generate guest token.") from e
+
     @staticmethod
     def create_admin_tokens(user: AbstractUser) -> Dict[str, str]:
         """
@@ -3,13 +3,17 @@ Views for handling guest token creation and retrieval.
 
 Provides functionality for users to obtain a guest token by providing their email address.
 If a token already exists for the given email, it is returned. Otherwise, a new token is
-generated, stored in Redis with a 1-hour expiration, and returned.
+generated, stored in Redis with a 1-hour expiration, and returned. Concurrent requests
+for the same email are single-flighted: one worker creates the user and token while
+the others wait for it in Redis. In the "ephemeral" GUEST_IDENTITY_MODE, guest tokens
+carry a random guest id and no user row is created.
 """
 
 import datetime
 import logging
-from typing import Any, Optional
+from typing import Any
 
+from django.conf import settings
 from django.db import IntegrityError
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
@@ -17,10 +21,10 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from authentication.models import CustomUser
 from authentication.v1.serializers import GuestTokenSerializer
 from authentication.v1.utils.redis_client import RedisClient
 from authentication.v1.utils.token_manager import TokenManager
+from coupon_core.utils.guest_identity import EPHEMERAL_MODE
 
 # drf-yasg imports for OpenAPI documentation
 from drf_yasg.utils import swagger_auto_schema
@@ -28,6 +32,32 @@ from drf_yasg import openapi
 
 logger = logging.getLogger(__name__)
 
+# Lifetime of a cached guest token in seconds
+GUEST_TOKEN_EXPIRY = int(datetime.timedelta(hours=1).total_seconds())
+
+
+def mint_guest_token(email: str) -> str:
+    """
+    Create a new guest token for an email, according to GUEST_IDENTITY_MODE.
+
+    In the "ephemeral" mode the token carries a random guest id and is valid for
+    as long as it is cached; otherwise the guest user row is retrieved or created.
+
+    Args:
+        email (str): The email the guest token is requested for.
+
+    Returns:
+        str: The guest token.
+    """
+    if settings.GUEST_IDENTITY_MODE == EPHEMERAL_MODE:
+        return TokenManager.create_ephemeral_guest_token(
+            email, datetime.timedelta(seconds=GUEST_TOKEN_EXPIRY)
+        )
+    user = GuestTokenSerializer().get_or_create_guest_user(email)
+    token = TokenManager.create_guest_token(user)
+    logger.debug(f"Generated new guest token for email: {email}")
+    return token
+
 
 class GuestTokenView(APIView):
     """
@@ -87,6 +117,10 @@ class GuestTokenView(APIView):
                 description="Validation error or a user with this email already exists.",
                 schema=error_response_schema
             ),
+            503: openapi.Response(
+                description="Another request is still creating the token; retry shortly.",
+                schema=error_response_schema
+            ),
             500: openapi.Response(
                 description="Unexpected error during guest token creation.",
                 schema=error_response_schema
@@ -97,9 +131,9 @@ class GuestTokenView(APIView):
         """
         Handle POST requests to create or retrieve a guest token.
 
-        This method validates the provided email, checks for an existing guest token in Redis,
-        and either returns the existing token or generates a new one. The new token is stored
-        in Redis with a 1-hour expiration time.
+        This method validates the provided email and returns the guest token cached in
+        Redis for it. On a miss, exactly one concurrent request creates the guest user
+        and token and stores the token with a 1-hour expiration; the others wait for it.
 
         Args:
             request (Any): The HTTP request object containing the guest token creation data.
@@ -118,38 +152,25 @@ class GuestTokenView(APIView):
 
             logger.debug(f"Attempting to create/retrieve guest token for email: {email}")
 
-            # Check if a token already exists for the given email.
-            existing_token: Optional[str] = redis_client.get_token(email)
-            if existing_token:
-                logger.info(f"Existing guest token found for email: {email}")
-                return Response(
-                    {"guest_token": existing_token},
-                    status=status.HTTP_200_OK
-                )
-
-            # Retrieve or create an abstract user associated with the email.
-            user: Optional[CustomUser] = serializer.get_abstract_user(email)
-            if not user:
-                logger.warning(f"No user found or created for email: {email}")
-                return Response(
-                    {"error": "Unable to create a guest user for the provided email."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Generate a new guest token.
-            token: str = TokenManager.create_guest_token(user)
-            logger.debug(f"Generated new guest token for email: {email}")
-
-            # Store the token in Redis with a 1-hour expiration.
-            redis_client.set_token(
-                email,
-                token,
-                int(datetime.timedelta(hours=1).total_seconds())
+            # Only one worker per email mints the token; the others wait for it.
+            token, created = redis_client.get_or_set_single_flight(
+                email, lambda: mint_guest_token(email), GUEST_TOKEN_EXPIRY
             )
-            logger.info(f"Guest token stored in Redis for email: {email}")
+            if not created:
+                logger.info(f"Existing guest token found for email: {email}")
+                return Response({"guest_token": token}, status=status.HTTP_200_OK)
 
+            logger.info(f"Guest token stored in Redis for email: {email}")
             return Response({"guest_token": token}, status=status.HTTP_201_CREATED)
 
+        except TimeoutError as te:
+            logger.warning(f"Timed out waiting for guest token creation: {te}")
+            return Response(
+                {"error": "The guest token is being created. Please retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+
         except IntegrityError as ie:
             logger.warning(f"Integrity error during guest token creation: {ie}")
             return Response(
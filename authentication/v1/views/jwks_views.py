@@ -0,0 +1,44 @@
+"""
+View publishing the JSON Web Key Set used to verify JWTs.
+
+Services verifying tokens issued by this service fetch the public keys from
+this endpoint and cache them in memory, so they can verify tokens locally.
+"""
+
+from typing import Any
+
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from authentication.v1.utils.jwt_keys import build_jwks, get_signing_keys
+
+# How long clients may cache the key set, in seconds
+JWKS_MAX_AGE = 300
+
+
+class JWKSView(APIView):
+    """
+    API view returning the public signing keys as a JWKS document.
+
+    Retired keys stay in the document until they are removed from
+    ``JWT_SIGNING_KEYS``, so tokens signed before a rotation keep verifying.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request: Any) -> Response:
+        """
+        Handle GET requests for the key set.
+
+        Args:
+            request (Any): The HTTP request object.
+
+        Returns:
+            Response: The JWKS document; empty if tokens are signed with HS256.
+        """
+        response = Response(build_jwks(get_signing_keys()), status=status.HTTP_200_OK)
+        response["Cache-Control"] = f"public, max-age={JWKS_MAX_AGE}"
+        return response
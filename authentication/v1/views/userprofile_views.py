@@ -8,6 +8,7 @@ This module provides the following endpoints:
 
 2. User Registration:
     - POST /api/v1/register/: Register a new user or upgrade a guest user to a regular user.
+      Ephemeral guests, which have no user row, get their row created here.
 
 Error Handling:
     - Handles missing profiles with 404 responses.
@@ -51,6 +52,25 @@ error_response_schema = openapi.Schema(
 )
 
 
+def get_user_profile(user: Any) -> UserProfile:
+    """
+    Return the profile of a user.
+
+    Args:
+        user (Any): The authenticated user.
+
+    Returns:
+        UserProfile: The user's profile.
+
+    Raises:
+        UserProfile.DoesNotExist: If the user has no profile, including ephemeral
+            guests, which have no user row until they register.
+    """
+    if getattr(user, "is_ephemeral_guest", False):
+        raise UserProfile.DoesNotExist("Ephemeral guests have no profile.")
+    return user.profile
+
+
 class UserProfileView(APIView):
     """
     API endpoint to manage user profiles.
@@ -92,7 +112,7 @@ class UserProfileView(APIView):
             - 500: Internal server error.
         """
         try:
-            profile = request.user.profile  # Assuming a One-to-One relationship exists.
+            profile = get_user_profile(request.user)
             serializer = UserProfileSerializer(profile)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except UserProfile.DoesNotExist:
@@ -141,7 +161,7 @@ class UserProfileView(APIView):
             - 500: Internal server error.
         """
         try:
-            profile = request.user.profile  # Fetch the authenticated user's profile.
+            profile = get_user_profile(request.user)
             serializer = UserProfileSerializer(profile, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()  # Save the updated profile data.
@@ -251,6 +271,14 @@ class UserRegistrationView(APIView):
                             status=status.HTTP_400_BAD_REQUEST,
                         )
 
+                    # Ephemeral guests have no user row yet; create it now.
+                    if getattr(request.user, "is_ephemeral_guest", False):
+                        return self._register_user(
+                            request.user.email,
+                            password,
+                            "Guest user upgraded to a regular user.",
+                        )
+
                     # Upgrade the guest user to a regular user.
                     request.user.is_guest = False
                     request.user.role = "user"
@@ -285,30 +313,43 @@ class UserRegistrationView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Use the serializer to validate and create the user.
-            serializer = RegisterSerializer(
-                data={
-                    "email": email,
-                    "password": password,
-                    "username": email.split("@")[0],
-                }
+            return self._register_user(
+                email, password, "User registered successfully."
             )
-            if serializer.is_valid():
-                user = serializer.save()
-                user.role = "user"
-                user.save()
-                return Response(
-                    {
-                        "message": "User registered successfully.",
-                        "user": serializer.data,
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
-
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
             return Response(
                 {"error": "An unexpected error occurred.", "details": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+    def _register_user(self, email: str, password: str, message: str) -> Response:
+        """
+        Validate and create a regular user.
+
+        Args:
+            email (str): The user's email.
+            password (str): The user's password.
+            message (str): The message returned on success.
+
+        Returns:
+            - 201: User successfully registered.
+            - 400: Validation errors.
+        """
+        serializer = RegisterSerializer(
+            data={
+                "email": email,
+                "password": password,
+                "username": email.split("@")[0],
+            }
+        )
+        if serializer.is_valid():
+            user = serializer.save()
+            user.role = "user"
+            user.save()
+            return Response(
+                {"message": message, "user": serializer.data},
+                status=status.HTTP_201_CREATED,
+            )
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
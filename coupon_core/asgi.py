@@ -17,6 +17,10 @@ from results.routing import websocket_urlpatterns
 # Set the settings module
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "coupon_core.settings")
 
+# Django's persistent connections are per thread and should be disabled under
+# ASGI, where requests' sync code runs in executor threads; pool them instead
+os.environ.setdefault("DB_CONNECTION_REUSE", "pool")
+
 # Default ASGI application for HTTP
 django_application = get_asgi_application()
 
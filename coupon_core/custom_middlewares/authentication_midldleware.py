@@ -2,16 +2,26 @@
 Custom middleware for token validation.
 
 Handles the validation of tokens for authenticated requests, supports both guest
-and regular user tokens, and fetches user metadata as needed.
+and regular user tokens, and fetches user metadata as needed. Token claims are
+decoded locally, once per request, into the shared authentication context;
+user metadata is cached per token so that only cache misses call the
+authentication service. Routes not requiring a token are looked up in the
+compiled route policy table.
 """
 
 import logging
 
-import requests
 from django.conf import settings
 from django.http import JsonResponse
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.tokens import Token
+
+from coupon_core.utils.auth_context import get_auth_context
+from coupon_core.utils.route_policy import get_route_policy
+from coupon_core.utils.user_metadata_cache import (
+    UserMetadataCache,
+    build_auth_service_session,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +43,12 @@ class TokenValidationMiddleware:
         """
         self.get_response = get_response
         self.auth_service_url = settings.AUTH_SERVICE_URL
+        self.metadata_cache = UserMetadataCache()
+        self.session = build_auth_service_session()
+        self.timeout = (
+            settings.USER_METADATA_CACHE["CONNECT_TIMEOUT"],
+            settings.USER_METADATA_CACHE["READ_TIMEOUT"],
+        )
 
     def __call__(self, request):
         """
@@ -45,7 +61,7 @@ class TokenValidationMiddleware:
             JsonResponse: If validation fails, returns an error response.
             Otherwise, passes the request to the next middleware or view.
         """
-        if self._is_public_endpoint(request.path):
+        if self._is_public_endpoint(request):
             return self.get_response(request)
 
         token = self._extract_token(request)
@@ -56,15 +72,15 @@ class TokenValidationMiddleware:
             )
 
         try:
-            decoded_token = self._validate_token(token)
+            decoded_token = self._validate_token(request)
 
             # Check if it's a guest token
-            if "is_guest" in decoded_token:
+            if decoded_token.get("is_guest", False):
                 request.is_guest = True
                 request.guest_metadata = decoded_token
             else:
                 # It's a regular user token
-                user_metadata = self._fetch_user_metadata(token)
+                user_metadata = self._get_user_metadata(token, decoded_token)
                 request.user_metadata = user_metadata
 
         except (InvalidToken, TokenError) as token_error:
@@ -79,18 +95,17 @@ class TokenValidationMiddleware:
 
         return self.get_response(request)
 
-    def _is_public_endpoint(self, path: str) -> bool:
+    def _is_public_endpoint(self, request) -> bool:
         """
-        Check if the request path matches a public endpoint.
+        Check if the request's route is declared as not requiring a token.
 
         Args:
-            path (str): The request path.
+            request: The HTTP request.
 
         Returns:
-            bool: True if the path matches a public endpoint, False otherwise.
+            bool: True if the route is public, False otherwise.
         """
-        public_endpoints = settings.PUBLIC_ENDPOINTS or ["/public/"]
-        return any(path.startswith(endpoint) for endpoint in public_endpoints)
+        return not get_route_policy(request).auth_required
 
     def _extract_token(self, request) -> str | None:
         """
@@ -102,25 +117,45 @@ class TokenValidationMiddleware:
         Returns:
             str | None: The extracted token, or None if not present.
         """
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            return auth_header.split(" ")[1]
-        return None
+        return get_auth_context(request).raw_token
 
-    def _validate_token(self, token: str) -> dict:
+    def _validate_token(self, request) -> Token:
         """
-        Validate the JWT token.
+        Return the request's validated JWT token.
+
+        The token is validated once per request, by whichever of the middleware,
+        the permission classes or DRF authentication needs it first.
 
         Args:
-            token (str): The JWT token.
+            request: The HTTP request.
 
         Returns:
-            dict: The decoded token payload.
+            Token: The validated token.
 
         Raises:
             InvalidToken: If the token is invalid.
         """
-        return AccessToken(token)
+        return get_auth_context(request).get_validated_token()
+
+    def _get_user_metadata(self, token: str, decoded_token) -> dict:
+        """
+        Return the user metadata for a token, from the cache when possible.
+
+        Args:
+            token (str): The JWT token.
+            decoded_token: The validated token, whose claims key the cache.
+
+        Returns:
+            dict: The user metadata.
+
+        Raises:
+            ValueError: If the authentication service fails to return metadata.
+        """
+        user_metadata = self.metadata_cache.get(decoded_token)
+        if user_metadata is None:
+            user_metadata = self._fetch_user_metadata(token)
+            self.metadata_cache.set(decoded_token, user_metadata)
+        return user_metadata
 
     def _fetch_user_metadata(self, token: str) -> dict:
         """
@@ -134,10 +169,13 @@ class TokenValidationMiddleware:
 
         Raises:
             ValueError: If the authentication service fails to return metadata.
+            requests.RequestException: If the service cannot be reached in time.
         """
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(
-            f"{self.auth_service_url}/api/v1/user-info/", headers=headers
+        response = self.session.get(
+            f"{self.auth_service_url}/api/v1/user-info/",
+            headers=headers,
+            timeout=self.timeout,
         )
 
         if response.status_code != 200:
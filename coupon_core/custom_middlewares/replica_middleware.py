@@ -0,0 +1,120 @@
+"""
+Read-your-writes middleware for replica routing.
+
+After a request writes to a primary database with read replicas, the
+database routers keep that primary's reads on it for a short window, so the
+write is visible to the session even before it reaches the replicas. This
+middleware carries that window across the session's requests in a cookie.
+The cookie only ever sends reads to a primary, so it needs no signature.
+"""
+
+import time
+from typing import Callable, Dict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+from coupon_core.utils.db_replicas import end_session, start_session
+
+COOKIE_NAME = "db_primary_until"
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware restoring and saving the primary databases a session reads from.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        """
+        Initializes the middleware with the next middleware or view in the chain.
+
+        Args:
+            get_response (Callable): The next middleware or view to process the request.
+        """
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Processes the request with the session's primaries pinned.
+
+        Args:
+            request (HttpRequest): The incoming HTTP request.
+
+        Returns:
+            HttpResponse: The HTTP response generated by the next middleware or view.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = start_session(self._read_cookie(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            pinned = end_session(token)
+        self._write_cookie(request, response, pinned)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Async version of `__call__`, used when the rest of the chain is async.
+
+        Args:
+            request (HttpRequest): The incoming HTTP request.
+
+        Returns:
+            HttpResponse: The HTTP response generated by the next middleware or view.
+        """
+        token = start_session(self._read_cookie(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            pinned = end_session(token)
+        self._write_cookie(request, response, pinned)
+        return response
+
+    def _read_cookie(self, request: HttpRequest) -> Dict[str, float]:
+        """
+        Parse the cookie, formatted as "alias:until|alias:until".
+
+        Args:
+            request (HttpRequest): The incoming HTTP request.
+
+        Returns:
+            Dict[str, float]: The pinned primaries; empty if the cookie is
+            missing or malformed.
+        """
+        value = request.COOKIES.get(COOKIE_NAME)
+        if not value:
+            return {}
+        try:
+            items = (item.partition(":") for item in value.split("|"))
+            return {alias: float(until) for alias, _, until in items}
+        except ValueError:
+            return {}
+
+    def _write_cookie(
+        self, request: HttpRequest, response: HttpResponse, pinned: Dict[str, float]
+    ) -> None:
+        """
+        Save the pinned primaries in the cookie, or drop a stale cookie.
+
+        Args:
+            request (HttpRequest): The HTTP request.
+            response (HttpResponse): The HTTP response.
+            pinned (Dict[str, float]): The primaries pinned after the request.
+        """
+        if pinned:
+            response.set_cookie(
+                COOKIE_NAME,
+                "|".join(f"{alias}:{until:.3f}" for alias, until in pinned.items()),
+                max_age=max(1, int(max(pinned.values()) - time.time()) + 1),
+                httponly=True,
+                samesite="Lax",
+            )
+        elif COOKIE_NAME in request.COOKIES:
+            response.delete_cookie(COOKIE_NAME)
@@ -5,17 +5,24 @@ This middleware extracts the client's IP address from the incoming request and a
 to the `request` object as `client_ip`. It ensures that the IP address is globally available
 for use across all views in the Django project.
 
-The middleware prioritizes the `X-Forwarded-For` header to fetch the original client IP if the
-request passes through a proxy. If the header is unavailable, it falls back to the `REMOTE_ADDR`
-field.
+The middleware honours the `X-Forwarded-For` header only for requests arriving through a
+trusted proxy, as declared for the request's route in the compiled route policy table; the
+right-most address not belonging to a trusted proxy is the client. Otherwise, or if the header
+is unavailable, it falls back to the `REMOTE_ADDR` field.
+
+The middleware is both sync and async capable, so async views served under ASGI
+do not pay for a thread switch in it.
 
 
 """
 
 from typing import Callable
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpRequest, HttpResponse
 
+from coupon_core.utils.route_policy import get_route_policy
+
 
 class ClientIPMiddleware:
     """
@@ -31,6 +38,9 @@ class ClientIPMiddleware:
             attaches it to the request object.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response: Callable) -> None:
         """
         Initializes the middleware with the next middleware or view in the chain.
@@ -39,15 +49,17 @@ class ClientIPMiddleware:
             get_response (Callable): The next middleware or view to process the request.
         """
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
         """
         Processes the incoming request, extracts the client's IP address, and
         attaches it to the request object.
 
-        The middleware prioritizes the `X-Forwarded-For` header to fetch the original
-        client IP if the request passes through a proxy. If the header is unavailable,
-        it falls back to the `REMOTE_ADDR` field.
+        `X-Forwarded-For` is honoured only if the request arrived through a proxy
+        trusted for its route. If the header is unavailable or untrusted, it falls
+        back to the `REMOTE_ADDR` field.
 
         Args:
             request (HttpRequest): The incoming HTTP request.
@@ -55,16 +67,26 @@ class ClientIPMiddleware:
         Returns:
             HttpResponse: The HTTP response generated by the next middleware or view.
         """
-        # Extract the IP address
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]  # First IP in the chain
-        else:
-            ip = request.META.get("REMOTE_ADDR")  # Direct IP address
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
-        # Attach the IP to the request object
-        request.client_ip = ip
+        # Resolve the IP address through the route's trusted proxies and
+        # attach it to the request object
+        request.client_ip = get_route_policy(request).client_ip(request.META)
 
         # Pass the request to the next middleware or view
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Async version of `__call__`, used when the rest of the chain is async.
+
+        Args:
+            request (HttpRequest): The incoming HTTP request.
+
+        Returns:
+            HttpResponse: The HTTP response generated by the next middleware or view.
+        """
+        request.client_ip = get_route_policy(request).client_ip(request.META)
+        return await self.get_response(request)
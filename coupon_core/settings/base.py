@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -84,6 +85,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "coupon_core.custom_middlewares.userlocation_middleware.ClientIPMiddleware",
+    "coupon_core.custom_middlewares.replica_middleware.ReadYourWritesMiddleware",
 ]
 
 
@@ -132,7 +134,7 @@ USE_TZ = True
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "coupon_core.utils.auth_context.ContextJWTAuthentication",
         "rest_framework.authentication.TokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -142,9 +144,161 @@ REST_FRAMEWORK = {
 
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL")
 
+# User metadata fetched from the authentication service by
+# TokenValidationMiddleware is cached per token, in process and in Redis.
+# Entries never outlive the token's expiry, and profile changes show after at
+# most TTL seconds, as entries are not invalidated.
+USER_METADATA_CACHE = {
+    "CACHE_ALIAS": os.getenv("USER_METADATA_CACHE_ALIAS", "default"),
+    "TTL": int(os.getenv("USER_METADATA_CACHE_TTL", 300)),
+    "LOCAL_MAX_ENTRIES": int(os.getenv("USER_METADATA_LOCAL_MAX_ENTRIES", 1024)),
+    "POOL_SIZE": int(os.getenv("AUTH_SERVICE_POOL_SIZE", 20)),
+    "CONNECT_TIMEOUT": float(os.getenv("AUTH_SERVICE_CONNECT_TIMEOUT", 2)),
+    "READ_TIMEOUT": float(os.getenv("AUTH_SERVICE_READ_TIMEOUT", 5)),
+}
+
+# Asymmetric JWT signing. JWT_SIGNING_KEYS is a JSON list of
+# {"kid", "algorithm" (RS256 or EdDSA), "private_key" or "public_key" (PEM)};
+# the first key signs new tokens and every key is published at the JWKS
+# endpoint. To rotate, prepend a new key and drop the old one once its tokens
+# have expired. Services without the private keys verify tokens against the
+# JWKS at JWT_JWKS_URL. With neither set, tokens are signed with HS256 and
+# SECRET_KEY as configured in SIMPLE_JWT.
+JWT_SIGNING_KEYS = json.loads(os.getenv("JWT_SIGNING_KEYS", "[]"))
+JWT_JWKS_URL = os.getenv("JWT_JWKS_URL")
+JWT_JWKS_REFRESH_INTERVAL = int(os.getenv("JWT_JWKS_REFRESH_INTERVAL", 300))
+
+# Connection pool shared by every RedisClient in a process. Idle connections
+# are health-checked before reuse and socket operations time out.
+REDIS_POOL = {
+    "MAX_CONNECTIONS": int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", 50)),
+    "SOCKET_TIMEOUT": float(os.getenv("REDIS_SOCKET_TIMEOUT", 2)),
+    "SOCKET_CONNECT_TIMEOUT": float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 2)),
+    "HEALTH_CHECK_INTERVAL": int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+}
+
+# "user": every guest gets a CustomUser row. "ephemeral": guest tokens carry a
+# random guest id and no user row is created until the guest registers; opt in
+# per environment, as ephemeral guests have no profile.
+GUEST_IDENTITY_MODE = os.getenv("GUEST_IDENTITY_MODE", "user")
+
+# Serve the nearby and search discount endpoints with their async views. Enable
+# when running under an ASGI server; under WSGI each async view runs in its own
+# event loop and gains nothing.
+GEODISCOUNTS_ASYNC_VIEWS = (
+    os.getenv("GEODISCOUNTS_ASYNC_VIEWS", "false").lower() == "true"
+)
+
+# Thread pool running the embedding model for the async search view. Searches
+# arriving while MAX_PENDING embeddings are running or queued are rejected.
+EMBEDDING_EXECUTOR = {
+    "MAX_WORKERS": int(os.getenv("EMBEDDING_EXECUTOR_MAX_WORKERS", 2)),
+    "MAX_PENDING": int(os.getenv("EMBEDDING_EXECUTOR_MAX_PENDING", 32)),
+}
+
+# Connections to the vector database kept open by the async vector client.
+VECTOR_DB_ASYNC_POOL_SIZE = int(os.getenv("VECTOR_DB_ASYNC_POOL_SIZE", 10))
+
+# Geographic shards of the geodiscounts catalog, as database aliases and the
+# [min_lon, min_lat, max_lon, max_lat] regions they own; the first shard also
+# holds locations outside every region. Entries must only ever be appended, as
+# a shard's position selects its id range. See geodiscounts/sharding.py.
+GEODISCOUNTS_SHARDS = [
+    {"alias": "geodiscounts_db", "regions": [[-180, -90, 180, 90]]},
+]
+
+# Threads querying the geodiscounts shards concurrently, per process; with 0,
+# shards are queried one after the other in the requesting thread.
+GEODISCOUNTS_FAN_OUT_WORKERS = int(os.getenv("GEODISCOUNTS_FAN_OUT_WORKERS", 8))
+
+# Monthly partitions of the discounts table by expiration date, maintained by
+# the manage_discount_partitions command: partitions are created MONTHS_AHEAD
+# months ahead and retired RETENTION_DAYS after their month ends, dropped or,
+# without DROP_RETIRED, detached and kept. See geodiscounts/partitions.py.
+DISCOUNT_PARTITIONS = {
+    "MONTHS_AHEAD": int(os.getenv("DISCOUNT_PARTITIONS_MONTHS_AHEAD", 3)),
+    "RETENTION_DAYS": int(os.getenv("DISCOUNT_PARTITIONS_RETENTION_DAYS", 30)),
+    "DROP_RETIRED": os.getenv("DISCOUNT_PARTITIONS_DROP_RETIRED", "true").lower()
+    == "true",
+}
+
+# Sweeper deleting expired discounts, with their shared discounts, vectors and
+# cached query results, GRACE_SECONDS after they expire. Each batch of
+# BATCH_SIZE discounts is one short transaction per shard, followed by a pause;
+# cache keys are invalidated CACHE_CHUNK_SIZE at a time.
+DISCOUNT_SWEEPER = {
+    "BATCH_SIZE": int(os.getenv("DISCOUNT_SWEEPER_BATCH_SIZE", 500)),
+    "CACHE_CHUNK_SIZE": int(os.getenv("DISCOUNT_SWEEPER_CACHE_CHUNK_SIZE", 500)),
+    "BATCH_PAUSE_SECONDS": float(os.getenv("DISCOUNT_SWEEPER_BATCH_PAUSE", 0.1)),
+    "GRACE_SECONDS": int(os.getenv("DISCOUNT_SWEEPER_GRACE_SECONDS", 0)),
+    "MAX_BATCHES": int(os.getenv("DISCOUNT_SWEEPER_MAX_BATCHES", 1000)),
+}
+
+# Periodic tasks run by Celery beat
+CELERY_BEAT_SCHEDULE = {
+    "sweep-expired-discounts": {
+        "task": "geodiscounts.sweep_expired_discounts",
+        "schedule": float(os.getenv("DISCOUNT_SWEEPER_INTERVAL_SECONDS", 3600)),
+    },
+    # Repairs retailer aggregates missed by writes bypassing model signals
+    "refresh-retailer-stats": {
+        "task": "geodiscounts.refresh_retailer_stats",
+        "schedule": float(os.getenv("RETAILER_STATS_REFRESH_SECONDS", 86400)),
+    },
+}
+
+# Celery queues: "default" for request-driven tasks, and "maintenance" for
+# periodic and batch tasks (sweeps, embedding backfills), each served by its own
+# workers so that neither starves the other. Kafka ingestion is not a task: it
+# runs in the run_discount_consumer service.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "geodiscounts.sweep_expired_discounts": {"queue": "maintenance"},
+    "geodiscounts.refresh_retailer_stats": {"queue": "maintenance"},
+    "geodiscounts.backfill_*": {"queue": "maintenance"},
+}
+# Workers reserve one task at a time, so a long task never holds back others
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+
+# Kafka consumer ingesting discounts; see geodiscounts/v1/utils/kafka_consumer.py
+KAFKA_BROKER_URL = os.getenv("KAFKA_BROKER_URL", "localhost:9092")
+KAFKA_CONSUMER = {
+    "TOPIC": os.getenv("KAFKA_TOPIC", "discounts_topic"),
+    "GROUP_ID": os.getenv("KAFKA_GROUP_ID", "discounts_group"),
+    "POLL_TIMEOUT": float(os.getenv("KAFKA_POLL_TIMEOUT", 1.0)),
+    "HEARTBEAT_FILE": os.getenv(
+        "KAFKA_CONSUMER_HEARTBEAT_FILE", "/tmp/discount_consumer.heartbeat"
+    ),
+    "HEARTBEAT_INTERVAL": float(os.getenv("KAFKA_CONSUMER_HEARTBEAT_INTERVAL", 10)),
+    "HEARTBEAT_MAX_AGE": float(os.getenv("KAFKA_CONSUMER_HEARTBEAT_MAX_AGE", 60)),
+    "RESTART_BACKOFF": 1.0,
+    "RESTART_BACKOFF_MAX": 60.0,
+}
+
 AUTH_USER_MODEL = "authentication.CustomUser"
 
-PUBLIC_ENDPOINTS = ["/authentication/api/v1/guest-token/"]
+PUBLIC_ENDPOINTS = [
+    "/authentication/api/v1/guest-token/",
+    "/api/authentication/v1/.well-known/jwks.json",
+]
+
+# Proxies trusted to report the client address in X-Forwarded-For.
+TRUSTED_PROXY_CIDRS = [
+    cidr.strip()
+    for cidr in os.getenv(
+        "TRUSTED_PROXY_CIDRS",
+        "127.0.0.0/8,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,::1/128,fc00::/7",
+    ).split(",")
+    if cidr.strip()
+]
+
+# Per-route policies, compiled into one route table by
+# coupon_core.utils.route_policy. Each entry has a "prefix" and optionally
+# "auth_required" (default True) and "trusted_proxies" (default
+# TRUSTED_PROXY_CIDRS); the longest matching prefix wins. PUBLIC_ENDPOINTS are
+# added as public routes.
+ROUTE_POLICIES = []
 
 
 
@@ -159,6 +313,19 @@ DATABASE_ROUTERS = [
     "geodiscounts.routers.GeoDiscountsRouter"
 ]
 
+# Read replicas of each primary database alias, as lists of {"alias", "weight"};
+# set from the environment in the environment-specific settings.
+DATABASE_REPLICAS = {}
+
+# Reads from a primary stay on it for STICKY_SECONDS after a write in the same
+# session. Replicas lagging by more than MAX_LAG_SECONDS are skipped; health is
+# checked at most once per HEALTH_CHECK_INTERVAL seconds per process.
+DATABASE_REPLICA_ROUTING = {
+    "STICKY_SECONDS": float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5)),
+    "HEALTH_CHECK_INTERVAL": float(os.getenv("DB_REPLICA_HEALTH_CHECK_INTERVAL", 10)),
+    "MAX_LAG_SECONDS": float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 30)),
+}
+
 
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
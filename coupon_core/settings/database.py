@@ -0,0 +1,209 @@
+"""
+Connection reuse for the PostgreSQL databases.
+
+Without it, Django opens a new (SSL) connection to Postgres on every request
+and closes it when the request finishes. The DB_CONNECTION_REUSE environment
+variable selects how connections are reused instead:
+
+- "persistent" (default under WSGI): each worker thread keeps its connection
+  open for DB_CONN_MAX_AGE seconds and checks its health before reusing it.
+- "pool" (default under ASGI, set by coupon_core/asgi.py): each process keeps a
+  psycopg 3 connection pool per database, sized for the database's workload.
+  Installed through the psycopg[pool] dependency.
+- "none": a connection per request, Django's default.
+
+Pool sizes default to DEFAULT_POOL_SIZES and can be overridden per database
+through DB_POOL_<ALIAS>_MIN_SIZE and DB_POOL_<ALIAS>_MAX_SIZE, such as
+DB_POOL_GEODISCOUNTS_DB_MAX_SIZE. Read replicas are sized like their primary.
+
+Read replicas of a database are declared in <ALIAS>_REPLICAS as a
+comma-separated list of host[:port][*weight], such as
+GEODISCOUNTS_DB_REPLICAS="replica-1:5432*2,replica-2". Each becomes a database
+alias <alias>_replica_<n> with the primary's settings and its own host.
+Connecting to a replica times out after DB_REPLICA_CONNECT_TIMEOUT seconds
+(default 2), so that a replica that went down is skipped rather than stalling
+the requests whose health check reaches it.
+
+Geographic shards of the geodiscounts catalog are declared in
+GEODISCOUNTS_SHARDS as a JSON list of {"alias", "regions", "database"} objects,
+such as [{"alias": "geodiscounts_db_eu", "regions": [[-25, 34, 45, 72]],
+"database": {"HOST": "geo-eu"}}]; see geodiscounts/sharding.py. Each shard
+gets geodiscounts_db's settings with its "database" overrides, and is sized
+like it when named geodiscounts_db_<region>. The first shard is the default.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+REPLICA_INFIX = "_replica_"
+
+PERSISTENT = "persistent"
+POOL = "pool"
+NONE = "none"
+
+# (min_size, max_size) of the per-process pool of each database. Discount
+# browsing makes geodiscounts_db the busiest, then token and profile lookups on
+# authentication_shard; default and vector_db see little ORM traffic.
+DEFAULT_POOL_SIZES: Dict[str, Tuple[int, int]] = {
+    "default": (1, 5),
+    "authentication_shard": (2, 10),
+    "geodiscounts_db": (4, 20),
+    "vector_db": (1, 5),
+}
+
+
+def pool_options(alias: str) -> Dict[str, Any]:
+    """
+    Build the psycopg pool options of a database.
+
+    Args:
+        alias (str): The database alias.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for psycopg_pool.ConnectionPool.
+    """
+    primary = alias.split(REPLICA_INFIX)[0]
+    min_size, max_size = next(
+        (
+            sizes
+            for name, sizes in DEFAULT_POOL_SIZES.items()
+            if primary == name or primary.startswith(f"{name}_")
+        ),
+        (1, 5),
+    )
+    prefix = f"DB_POOL_{alias.upper()}"
+    return {
+        "min_size": int(os.getenv(f"{prefix}_MIN_SIZE", min_size)),
+        "max_size": int(os.getenv(f"{prefix}_MAX_SIZE", max_size)),
+        # Seconds a request waits for a free connection before failing
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        # Idle connections above min_size are closed after this many seconds
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+        # Connections are recycled after this many seconds
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+    }
+
+
+def with_connection_reuse(
+    databases: Dict[str, Dict[str, Any]], mode: str | None = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Add connection reuse settings to each database.
+
+    Args:
+        databases (Dict[str, Dict[str, Any]]): The DATABASES setting.
+        mode (str | None): "persistent", "pool" or "none". Defaults to the
+            DB_CONNECTION_REUSE environment variable, or "persistent".
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The databases, with CONN_MAX_AGE,
+        CONN_HEALTH_CHECKS and pool options set.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    mode = (mode or os.getenv("DB_CONNECTION_REUSE", PERSISTENT)).lower()
+    if mode not in {PERSISTENT, POOL, NONE}:
+        raise ValueError(f"Unknown DB_CONNECTION_REUSE mode: {mode}")
+
+    configured = {}
+    for alias, database in databases.items():
+        database = {**database, "OPTIONS": dict(database.get("OPTIONS", {}))}
+        database["CONN_HEALTH_CHECKS"] = mode != NONE
+        if mode == PERSISTENT:
+            database["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", 600))
+        else:
+            # Django's pooling requires connections to be closed, that is
+            # returned to the pool, at the end of each request
+            database["CONN_MAX_AGE"] = 0
+        if mode == POOL:
+            database["OPTIONS"]["pool"] = pool_options(alias)
+        configured[alias] = database
+    return configured
+
+
+def with_geodiscount_shards(
+    databases: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Add the geodiscounts shards declared in the environment to the databases.
+
+    Args:
+        databases (Dict[str, Dict[str, Any]]): The DATABASES setting, including
+            geodiscounts_db.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]: The databases
+        with the shard aliases added, and the GEODISCOUNTS_SHARDS setting
+        listing each shard's alias and regions.
+
+    Raises:
+        ValueError: If the declaration is malformed.
+    """
+    declared = json.loads(os.getenv("GEODISCOUNTS_SHARDS", "null") or "null")
+    if not declared:
+        return databases, [
+            {"alias": "geodiscounts_db", "regions": [[-180, -90, 180, 90]]}
+        ]
+
+    configured = dict(databases)
+    shards = []
+    for entry in declared:
+        if "alias" not in entry or "regions" not in entry:
+            raise ValueError(f"Shards need an alias and regions: {entry}")
+        if any(len(bounds) != 4 for bounds in entry["regions"]):
+            raise ValueError(
+                f"Regions are [min_lon, min_lat, max_lon, max_lat]: {entry}"
+            )
+        alias = entry["alias"]
+        configured[alias] = {
+            **databases.get(alias, databases["geodiscounts_db"]),
+            **entry.get("database", {}),
+        }
+        shards.append({"alias": alias, "regions": entry["regions"]})
+    return configured, shards
+
+
+def with_read_replicas(
+    databases: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Add the read replicas declared in the environment to the databases.
+
+    Args:
+        databases (Dict[str, Dict[str, Any]]): The DATABASES setting.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]: The
+        databases with the replica aliases added, and the DATABASE_REPLICAS
+        setting listing each primary's replica aliases and weights.
+
+    Raises:
+        ValueError: If a replica declaration is malformed.
+    """
+    configured = dict(databases)
+    replicas: Dict[str, List[Dict[str, Any]]] = {}
+    for alias, database in databases.items():
+        declared = os.getenv(f"{alias.upper()}_REPLICAS", "")
+        for index, entry in enumerate(filter(None, declared.split(",")), start=1):
+            address, _, weight = entry.strip().partition("*")
+            host, _, port = address.partition(":")
+            replica_alias = f"{alias}{REPLICA_INFIX}{index}"
+            configured[replica_alias] = {
+                **database,
+                "HOST": host,
+                "PORT": port or database.get("PORT", "5432"),
+                "OPTIONS": {
+                    **database.get("OPTIONS", {}),
+                    "connect_timeout": int(
+                        os.getenv("DB_REPLICA_CONNECT_TIMEOUT", 2)
+                    ),
+                },
+                # Tests read the primary's test database through the replica
+                "TEST": {"MIRROR": alias},
+            }
+            replicas.setdefault(alias, []).append(
+                {"alias": replica_alias, "weight": int(weight or 1)}
+            )
+    return configured, replicas
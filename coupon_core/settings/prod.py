@@ -15,6 +15,12 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 import os
 from datetime import timedelta
 
+from .database import (
+    with_connection_reuse,
+    with_geodiscount_shards,
+    with_read_replicas,
+)
+
 # Debug
 DEBUG = False
 
@@ -97,6 +103,18 @@ DATABASES = {
     },
 }
 
+# Geographic shards of the geodiscounts catalog declared in GEODISCOUNTS_SHARDS;
+# discounts are placed on and queried from them by region.
+DATABASES, GEODISCOUNTS_SHARDS = with_geodiscount_shards(DATABASES)
+
+# Read replicas declared in <ALIAS>_REPLICAS; reads are routed to them by the
+# database routers.
+DATABASES, DATABASE_REPLICAS = with_read_replicas(DATABASES)
+
+# Reuse connections across requests instead of opening one per request; see
+# coupon_core/settings/database.py for the modes and per-database pool sizes.
+DATABASES = with_connection_reuse(DATABASES)
+
 # Credentials for Redis service
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "redis_password")
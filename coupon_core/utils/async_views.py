@@ -0,0 +1,77 @@
+"""
+Async support for Django REST framework views.
+
+DRF's APIView dispatches synchronously, so its handlers cannot await I/O.
+AsyncAPIView keeps DRF's request parsing, authentication, permission and
+throttling checks, exception handling and response rendering, but awaits its
+``async def`` handlers. Under an ASGI server the request then holds no worker
+thread while its handler waits on the network; only the authentication,
+permission and throttling checks run in a thread, as they may touch the
+database.
+"""
+
+import inspect
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handler methods are coroutines.
+
+    Subclasses define their handlers with ``async def``. Django requires the
+    handlers of a view to be either all sync or all async, so the inherited
+    OPTIONS handler is async here as well.
+    """
+
+    async def dispatch(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> Response:
+        """
+        Dispatch the request to its async handler.
+
+        Mirrors ``APIView.dispatch``, awaiting the handler.
+
+        Args:
+            request (HttpRequest): The incoming Django request.
+
+        Returns:
+            Response: The finalized response.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def options(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> Response:
+        """
+        Handler method for HTTP 'OPTIONS' request.
+        """
+        return super().options(request, *args, **kwargs)
@@ -0,0 +1,182 @@
+"""
+Request-scoped authentication context.
+
+The bearer token of a request is extracted, decoded and verified once, the
+first time anything asks for it, and the result is stored on the request.
+TokenValidationMiddleware, the custom permission classes and the DRF
+authentication class all read the same context instead of validating the
+token again.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from django.http import HttpRequest
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+
+from coupon_core.utils.guest_identity import GuestUser, is_ephemeral_guest_token
+
+# Attribute of the Django request holding its AuthContext
+REQUEST_ATTRIBUTE = "auth_context"
+
+_authenticator: Optional[JWTAuthentication] = None
+
+
+@dataclass
+class AuthContext:
+    """
+    The result of authenticating a request's bearer token.
+
+    Attributes:
+        raw_token (Optional[str]): The token from the Authorization header, or
+            None if the request carries no bearer token.
+        token (Optional[Token]): The validated token, or None.
+        error (Optional[Exception]): Why validation failed, if it did.
+    """
+
+    raw_token: Optional[str] = None
+    token: Optional[Token] = None
+    error: Optional[Exception] = None
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        bool: True if the request carries a valid token.
+        """
+        return self.token is not None
+
+    @property
+    def is_guest(self) -> bool:
+        """
+        bool: True if the request carries a valid guest token.
+        """
+        return self.is_valid and bool(self.token.get("is_guest", False))
+
+    def get_validated_token(self) -> Token:
+        """
+        Return the validated token, re-raising the validation error if any.
+
+        Returns:
+            Token: The validated token.
+
+        Raises:
+            InvalidToken: If the token is missing or failed validation.
+        """
+        if self.error is not None:
+            raise self.error
+        if self.token is None:
+            raise InvalidToken("No bearer token was provided.")
+        return self.token
+
+
+def _django_request(request: Any) -> HttpRequest:
+    """
+    Return the Django request behind a DRF request.
+    """
+    return getattr(request, "_request", request)
+
+
+def _get_authenticator() -> JWTAuthentication:
+    """
+    Return the shared JWT authenticator, created once the app registry is ready.
+    """
+    global _authenticator
+    if _authenticator is None:
+        _authenticator = JWTAuthentication()
+    return _authenticator
+
+
+def authenticate_request(request: Any) -> AuthContext:
+    """
+    Decode and verify the bearer token of a request.
+
+    Args:
+        request (Any): A Django or DRF request.
+
+    Returns:
+        AuthContext: The authentication result.
+    """
+    authenticator = _get_authenticator()
+    header = authenticator.get_header(request)
+    try:
+        raw_token = authenticator.get_raw_token(header) if header else None
+    except AuthenticationFailed as e:
+        # A malformed Authorization header counts as an invalid token
+        return AuthContext(
+            raw_token=header.decode("iso-8859-1"), error=InvalidToken(e.detail)
+        )
+    if raw_token is None:
+        return AuthContext()
+
+    raw_token = raw_token.decode() if isinstance(raw_token, bytes) else raw_token
+    try:
+        token = authenticator.get_validated_token(raw_token)
+    except (InvalidToken, TokenError) as e:
+        return AuthContext(raw_token=raw_token, error=e)
+    return AuthContext(raw_token=raw_token, token=token)
+
+
+def get_auth_context(request: Any) -> AuthContext:
+    """
+    Return the authentication context of a request, authenticating it on the
+    first call.
+
+    Args:
+        request (Any): A Django or DRF request.
+
+    Returns:
+        AuthContext: The authentication result shared by the whole request.
+    """
+    django_request = _django_request(request)
+    context = getattr(django_request, REQUEST_ATTRIBUTE, None)
+    if context is None:
+        context = authenticate_request(django_request)
+        setattr(django_request, REQUEST_ATTRIBUTE, context)
+    return context
+
+
+class ContextJWTAuthentication(JWTAuthentication):
+    """
+    DRF authentication class reading the token from the request's AuthContext,
+    so the token is not decoded again after the middleware validated it.
+
+    Ephemeral guest tokens authenticate as a stateless GuestUser, without a
+    database lookup.
+    """
+
+    def authenticate(self, request: Any) -> Optional[Tuple[Any, Token]]:
+        """
+        Authenticate the request using its AuthContext.
+
+        Args:
+            request (Any): The DRF request.
+
+        Returns:
+            Optional[Tuple[Any, Token]]: The user and validated token, or None
+            if the request carries no bearer token.
+
+        Raises:
+            InvalidToken: If the bearer token failed validation.
+        """
+        context = get_auth_context(request)
+        if context.raw_token is None:
+            return None
+        token = context.get_validated_token()
+        return self.get_user(token), token
+
+    def get_user(self, validated_token: Token) -> Any:
+        """
+        Return the user a validated token identifies.
+
+        Args:
+            validated_token (Token): The validated token.
+
+        Returns:
+            Any: A GuestUser for ephemeral guest tokens, otherwise the user row.
+        """
+        if is_ephemeral_guest_token(validated_token):
+            return GuestUser(validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,396 @@
+"""
+Read-replica selection shared by the database routers.
+
+Each primary database alias may have read replicas, declared in the
+DATABASE_REPLICAS setting as a mapping of the primary alias to its replicas'
+aliases and weights. Reads are spread over the healthy replicas by smooth
+weighted round robin; a replica is healthy if it answers and its replication
+lag is within MAX_LAG_SECONDS, checked at most once per HEALTH_CHECK_INTERVAL
+per process. Without a healthy replica, reads go to the primary.
+
+Reads also go to the primary inside a transaction on it, and for STICKY_SECONDS
+after a write to it in the same session ("read your writes"). Within a process
+the write is remembered in a context variable; across requests,
+ReadYourWritesMiddleware carries it in a cookie.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Settings the replica router is built from
+REPLICA_SETTINGS = {"DATABASE_REPLICAS", "DATABASE_REPLICA_ROUTING"}
+
+DEFAULT_ROUTING = {
+    "STICKY_SECONDS": 5,
+    "HEALTH_CHECK_INTERVAL": 10,
+    "MAX_LAG_SECONDS": 30,
+}
+
+# Replication lag of a Postgres standby in seconds; 0 when it has replayed
+# everything it received, so an idle primary does not look like lag
+LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Primary aliases mapped to the time until which their reads stay on the
+# primary, for the current request or thread
+_primary_until: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "primary_until", default=None
+)
+
+_replica_router: Optional["ReplicaRouter"] = None
+_replica_router_lock = threading.Lock()
+
+
+class WeightedRoundRobin:
+    """
+    Smooth weighted round robin over a changing set of candidates.
+
+    Each candidate is chosen in proportion to its weight, interleaved rather
+    than in runs, as in nginx's upstream balancing.
+    """
+
+    def __init__(self, weights: Dict[str, int]) -> None:
+        """
+        Initialize the balancer.
+
+        Args:
+            weights (Dict[str, int]): The weight of each candidate.
+        """
+        self.weights = weights
+        self._current = {candidate: 0 for candidate in weights}
+        self._lock = threading.Lock()
+
+    def choose(self, candidates: Iterable[str]) -> Optional[str]:
+        """
+        Choose the next candidate among those currently available.
+
+        Args:
+            candidates (Iterable[str]): The available candidates.
+
+        Returns:
+            Optional[str]: The chosen candidate, or None if none is available.
+        """
+        with self._lock:
+            best = None
+            total = 0
+            for candidate in candidates:
+                self._current[candidate] += self.weights[candidate]
+                total += self.weights[candidate]
+                if best is None or self._current[candidate] > self._current[best]:
+                    best = candidate
+            if best is not None:
+                self._current[best] -= total
+            return best
+
+
+class ReplicaHealth:
+    """
+    Cached health of the read replicas.
+    """
+
+    def __init__(self, check_interval: float, max_lag: float) -> None:
+        """
+        Initialize the health cache.
+
+        Args:
+            check_interval (float): Seconds a health check result is reused.
+            max_lag (float): Maximum replication lag of a healthy replica, in seconds.
+        """
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._status: Dict[str, Tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias: str) -> bool:
+        """
+        Check whether a replica is healthy, reusing a recent result.
+
+        Only one thread checks a replica when its result is due; the others
+        keep using the previous result meanwhile, or treat a replica not
+        checked yet as unhealthy, instead of all waiting on the replica.
+
+        Args:
+            alias (str): The replica's database alias.
+
+        Returns:
+            bool: True if the replica is healthy.
+        """
+        now = time.monotonic()
+        with self._lock:
+            status = self._status.get(alias)
+            if status is not None and now - status[1] < self.check_interval:
+                return status[0]
+            healthy = status[0] if status is not None else False
+            # Claims the check until the interval passes again
+            self._status[alias] = (healthy, now)
+        healthy = self.check(alias)
+        with self._lock:
+            self._status[alias] = (healthy, now)
+        return healthy
+
+    def check(self, alias: str) -> bool:
+        """
+        Query a replica's replication lag.
+
+        Args:
+            alias (str): The replica's database alias.
+
+        Returns:
+            bool: True if the replica answers and lags by at most ``max_lag``.
+        """
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                lag = cursor.fetchone()[0]
+        except Exception as e:
+            logger.warning(f"Read replica {alias} failed its health check: {e}")
+            return False
+        if lag is not None and float(lag) > self.max_lag:
+            logger.warning(f"Read replica {alias} lags by {float(lag):.1f}s")
+            return False
+        return True
+
+
+class ReplicaRouter:
+    """
+    Chooses the database alias for reads from a primary.
+    """
+
+    def __init__(
+        self,
+        replicas: Dict[str, List[Tuple[str, int]]],
+        sticky_seconds: float,
+        health: ReplicaHealth,
+    ) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            replicas (Dict[str, List[Tuple[str, int]]]): Replica aliases and
+                weights by primary alias.
+            sticky_seconds (float): Seconds reads stay on a primary after a write.
+            health (ReplicaHealth): The replica health cache.
+        """
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.health = health
+        self.primaries = {
+            alias: primary
+            for primary, aliases in replicas.items()
+            for alias, _ in aliases
+        }
+        self._balancers = {
+            primary: WeightedRoundRobin(dict(aliases))
+            for primary, aliases in replicas.items()
+        }
+
+    def read_alias(self, primary: str) -> str:
+        """
+        Choose where to read a primary's data from.
+
+        Args:
+            primary (str): The primary's database alias.
+
+        Returns:
+            str: A healthy replica's alias, or the primary's.
+        """
+        balancer = self._balancers.get(primary)
+        if balancer is None or self.is_pinned(primary):
+            return primary
+        if connections[primary].in_atomic_block:
+            return primary
+        healthy = [
+            alias
+            for alias, _ in self.replicas[primary]
+            if self.health.is_healthy(alias)
+        ]
+        return balancer.choose(healthy) or primary
+
+    def is_pinned(self, primary: str) -> bool:
+        """
+        Check whether reads from a primary stay on it after a recent write.
+
+        Args:
+            primary (str): The primary's database alias.
+
+        Returns:
+            bool: True within ``sticky_seconds`` of a write in this session.
+        """
+        pinned = _primary_until.get()
+        return bool(pinned) and pinned.get(primary, 0) > time.time()
+
+    def record_write(self, primary: str) -> None:
+        """
+        Keep reads from a primary on it for ``sticky_seconds``.
+
+        Args:
+            primary (str): The primary's database alias.
+        """
+        if primary not in self.replicas:
+            return
+        pinned = _primary_until.get()
+        if pinned is None:
+            pinned = {}
+            _primary_until.set(pinned)
+        pinned[primary] = time.time() + self.sticky_seconds
+
+
+def parse_replicas(
+    declared: Dict[str, Iterable[Any]],
+) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    Normalize the DATABASE_REPLICAS setting.
+
+    Args:
+        declared (Dict[str, Iterable[Any]]): Replicas by primary alias, each an
+            alias or a mapping with an ``alias`` and an optional ``weight``.
+
+    Returns:
+        Dict[str, List[Tuple[str, int]]]: Replica aliases and weights by
+        primary alias.
+
+    Raises:
+        ValueError: If a weight is not positive.
+    """
+    replicas = {}
+    for primary, entries in declared.items():
+        parsed = []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"alias": entry}
+            weight = int(entry.get("weight", 1))
+            if weight <= 0:
+                raise ValueError(f"Replica weights must be positive: {entry}")
+            parsed.append((entry["alias"], weight))
+        if parsed:
+            replicas[primary] = parsed
+    return replicas
+
+
+def get_replica_router() -> ReplicaRouter:
+    """
+    Return the replica router, building it from the settings on first use.
+
+    Returns:
+        ReplicaRouter: The replica router.
+    """
+    global _replica_router
+    if _replica_router is None:
+        with _replica_router_lock:
+            if _replica_router is None:
+                config = {
+                    **DEFAULT_ROUTING,
+                    **getattr(settings, "DATABASE_REPLICA_ROUTING", {}),
+                }
+                _replica_router = ReplicaRouter(
+                    parse_replicas(getattr(settings, "DATABASE_REPLICAS", {})),
+                    sticky_seconds=config["STICKY_SECONDS"],
+                    health=ReplicaHealth(
+                        config["HEALTH_CHECK_INTERVAL"], config["MAX_LAG_SECONDS"]
+                    ),
+                )
+    return _replica_router
+
+
+def read_alias(primary: str) -> str:
+    """
+    Choose where to read a primary's data from.
+
+    Args:
+        primary (str): The primary's database alias.
+
+    Returns:
+        str: A healthy replica's alias, or the primary's.
+    """
+    return get_replica_router().read_alias(primary)
+
+
+def record_write(primary: str) -> None:
+    """
+    Keep reads from a primary on it for a short window after a write.
+
+    Args:
+        primary (str): The primary's database alias.
+    """
+    get_replica_router().record_write(primary)
+
+
+def replica_aliases(primary: str) -> List[str]:
+    """
+    List the replica aliases of a primary.
+
+    Args:
+        primary (str): The primary's database alias.
+
+    Returns:
+        List[str]: The aliases of its replicas.
+    """
+    return [alias for alias, _ in get_replica_router().replicas.get(primary, [])]
+
+
+def primary_alias(alias: str) -> str:
+    """
+    Return the primary a database alias reads from.
+
+    Args:
+        alias (str): A primary's or a replica's database alias.
+
+    Returns:
+        str: The replica's primary alias, or the alias itself for a primary.
+    """
+    return get_replica_router().primaries.get(alias, alias)
+
+
+def start_session(primary_until: Dict[str, float]) -> Any:
+    """
+    Start tracking the writes of a request.
+
+    Args:
+        primary_until (Dict[str, float]): Primaries whose reads stay on them,
+            carried over from earlier requests of the session.
+
+    Returns:
+        Any: A token for ``end_session``.
+    """
+    return _primary_until.set(dict(primary_until))
+
+
+def end_session(token: Any) -> Dict[str, float]:
+    """
+    Stop tracking the writes of a request.
+
+    Args:
+        token (Any): The token returned by ``start_session``.
+
+    Returns:
+        Dict[str, float]: Primaries whose reads still stay on them, with the
+        time until which they do.
+    """
+    pinned = _primary_until.get() or {}
+    _primary_until.reset(token)
+    now = time.time()
+    return {primary: until for primary, until in pinned.items() if until > now}
+
+
+@receiver(setting_changed)
+def reset_replica_router(setting: str, **kwargs: Any) -> None:
+    """
+    Discard the replica router when a setting it is built from changes.
+    """
+    global _replica_router
+    if setting in REPLICA_SETTINGS:
+        _replica_router = None
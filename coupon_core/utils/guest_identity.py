@@ -0,0 +1,86 @@
+"""
+Lightweight guest identities.
+
+In the "ephemeral" guest identity mode, guest tokens identify the guest by a
+random id in the ``guest_id`` claim instead of a user id, and no user row
+exists for the guest. The token's signature is what vouches for the id. A user
+row is only created when the guest registers.
+"""
+
+import uuid
+
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import Token
+
+# Claim holding the ephemeral id of a guest without a user row
+GUEST_ID_CLAIM = "guest_id"
+
+# Guest identity modes, selected by the GUEST_IDENTITY_MODE setting
+EPHEMERAL_MODE = "ephemeral"
+USER_MODE = "user"
+
+
+def new_guest_id() -> str:
+    """
+    Generate a new ephemeral guest id.
+
+    Returns:
+        str: A random, unguessable id.
+    """
+    return uuid.uuid4().hex
+
+
+def is_ephemeral_guest_token(token: Token) -> bool:
+    """
+    Check whether a token identifies an ephemeral guest.
+
+    Args:
+        token (Token): The validated token.
+
+    Returns:
+        bool: True if the token carries a guest id rather than a user id.
+    """
+    return GUEST_ID_CLAIM in token
+
+
+class GuestUser(TokenUser):
+    """
+    Stateless user backed by an ephemeral guest token.
+
+    It is authenticated, so guest tokens pass the usual permission checks, but
+    has no database row; it cannot be saved and has no profile.
+    """
+
+    is_guest = True
+    is_ephemeral_guest = True
+
+    @property
+    def id(self) -> str:
+        """
+        str: The guest id from the token.
+        """
+        return self.token[GUEST_ID_CLAIM]
+
+    @property
+    def pk(self) -> str:
+        """
+        str: The guest id from the token.
+        """
+        return self.id
+
+    @property
+    def email(self) -> str:
+        """
+        str: The email the guest token was requested for.
+        """
+        return self.token.get("email", "")
+
+    @property
+    def username(self) -> str:
+        """
+        str: The email prefix, as used for guest users with a row.
+        """
+        return self.email.split("@")[0]
+
+    def __str__(self) -> str:
+        return f"GuestUser {self.id}"
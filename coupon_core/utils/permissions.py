@@ -2,23 +2,23 @@
 Custom permission classes for the election system.
 
 This module includes permissions to check if a user has guest access or is authenticated.
+Both read the request's shared authentication context, so the bearer token is only
+validated once per request.
 """
 
-from typing import Any
-
 from rest_framework.permissions import BasePermission
 from rest_framework.request import Request
 from rest_framework.views import View
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from coupon_core.utils.auth_context import get_auth_context
 
 
 class IsGuest(BasePermission):
     """
     Custom permission to check if the user has guest access based on the JWT token.
 
-    This permission extracts the token from the Authorization header, validates it,
-    and checks if the `is_guest` claim is present and set to True.
+    This permission reads the validated token from the request's authentication
+    context and checks if the `is_guest` claim is present and set to True.
     """
 
     def has_permission(self, request: Request, view: View) -> bool:
@@ -32,24 +32,7 @@ class IsGuest(BasePermission):
         Returns:
             bool: True if the user is identified as a guest via the token, False otherwise.
         """
-        auth = JWTAuthentication()
-        try:
-            auth_header: str = request.headers.get("Authorization", "")
-
-            if not auth_header.startswith("Bearer "):
-                return False
-
-            token: str = auth_header.split(" ")[1]
-            validated_token: Any = auth.get_validated_token(token)
-
-            # Check if the user is identified as a guest
-            if validated_token.get("is_guest", False):
-                return True
-
-        except (InvalidToken, TokenError, IndexError):
-            return False
-
-        return False
+        return get_auth_context(request).is_guest
 
 
 class IsAuthenticatedOrGuest(BasePermission):
@@ -69,21 +52,9 @@ class IsAuthenticatedOrGuest(BasePermission):
             bool: True if the user is authenticated or identified as a guest via the token,
             False otherwise.
         """
-        auth = JWTAuthentication()
-        try:
-            auth_header: str = request.headers.get("Authorization", "")
-
-            if not auth_header.startswith("Bearer "):
-                return False
-
-            token: str = auth_header.split(" ")[1]
-            validated_token: Any = auth.get_validated_token(token)
-
-            # Allow if the user is authenticated or has guest access
-            if validated_token.get("is_guest", False) or request.user.is_authenticated:
-                return True
-
-        except (InvalidToken, TokenError, IndexError):
+        context = get_auth_context(request)
+        if not context.is_valid:
             return False
 
-        return False
+        # Allow if the user is authenticated or has guest access
+        return context.is_guest or request.user.is_authenticated
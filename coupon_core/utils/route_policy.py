@@ -0,0 +1,295 @@
+"""
+Compiled route policy table shared by the custom middlewares.
+
+Route policies declare, per path prefix, whether requests need a bearer token
+and which proxies are trusted to report the client's address in
+``X-Forwarded-For``. All prefixes are compiled into one anchored regex, shaped
+as a prefix trie, when the table is first used, so resolving a request's policy
+is a single match whose cost depends on the path length rather than on the
+number of routes. The table is rebuilt when the settings it is built from change.
+"""
+
+import ipaddress
+import re
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Attribute of the Django request holding its resolved RoutePolicy
+REQUEST_ATTRIBUTE = "route_policy"
+
+# Proxies trusted when TRUSTED_PROXY_CIDRS is not configured: loopback and
+# private networks, where load balancers and ingress controllers live
+DEFAULT_TRUSTED_PROXY_CIDRS = (
+    "127.0.0.0/8",
+    "10.0.0.0/8",
+    "172.16.0.0/12",
+    "192.168.0.0/16",
+    "::1/128",
+    "fc00::/7",
+)
+
+# Addresses whose trust is remembered per policy before the memo is reset
+TRUST_CACHE_SIZE = 4096
+
+# Settings the route table is built from
+ROUTE_SETTINGS = {"ROUTE_POLICIES", "PUBLIC_ENDPOINTS", "TRUSTED_PROXY_CIDRS"}
+
+_route_table: Optional["RouteTable"] = None
+
+
+def _trie_pattern(prefixes: Sequence[str]) -> str:
+    """
+    Build a regex matching the longest of the prefixes at the start of a path.
+
+    The prefixes are arranged in a trie whose branches become nested
+    alternations, and each prefix ends in an empty group named ``r<index>``.
+    Longer continuations are tried before a prefix ends, so the last group
+    closed by a match names the longest matching prefix.
+
+    Args:
+        prefixes (Sequence[str]): The prefixes, indexed by position.
+
+    Returns:
+        str: The regex source.
+    """
+    trie: Dict[str, Any] = {}
+    for index, prefix in enumerate(prefixes):
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault("", index)
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + emit(child)
+            for char, child in sorted(node.items())
+            if char != ""
+        ]
+        if "" in node:
+            branches.append(f"(?P<r{node['']}>)")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+def parse_networks(cidrs: Iterable[str]) -> Tuple[IPNetwork, ...]:
+    """
+    Parse CIDR strings into networks.
+
+    Args:
+        cidrs (Iterable[str]): CIDRs such as "10.0.0.0/8"; bare addresses are
+            treated as single-host networks.
+
+    Returns:
+        Tuple[IPNetwork, ...]: The parsed networks.
+
+    Raises:
+        ValueError: If a CIDR is malformed.
+    """
+    return tuple(ipaddress.ip_network(cidr.strip(), strict=False) for cidr in cidrs)
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """
+    The policy applied to requests under a path prefix.
+
+    Attributes:
+        prefix (str): The path prefix the policy applies to.
+        auth_required (bool): Whether requests need a valid bearer token.
+        trusted_proxies (Tuple[IPNetwork, ...]): Networks of proxies whose
+            ``X-Forwarded-For`` entries are trusted.
+    """
+
+    prefix: str
+    auth_required: bool
+    trusted_proxies: Tuple[IPNetwork, ...]
+    # The same proxy addresses recur on most requests, so their trust is memoized
+    _trusted: Dict[str, bool] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def is_trusted_proxy(self, address: str) -> bool:
+        """
+        Check whether an address belongs to a trusted proxy.
+
+        Args:
+            address (str): The IP address.
+
+        Returns:
+            bool: True if the address is in a trusted network; False otherwise,
+            including for malformed addresses.
+        """
+        trusted = self._trusted.get(address)
+        if trusted is None:
+            try:
+                ip = ipaddress.ip_address(address)
+            except ValueError:
+                trusted = False
+            else:
+                trusted = any(ip in network for network in self.trusted_proxies)
+            if len(self._trusted) >= TRUST_CACHE_SIZE:
+                self._trusted.clear()
+            self._trusted[address] = trusted
+        return trusted
+
+    def client_ip(self, meta: Mapping[str, Any]) -> Optional[str]:
+        """
+        Resolve the client's IP address from the request metadata.
+
+        ``X-Forwarded-For`` is only honoured when the direct peer is a trusted
+        proxy. Its entries are then walked from the right, skipping trusted
+        proxies, and the first untrusted address is the client; if every
+        address is trusted, the left-most one is.
+
+        Args:
+            meta (Mapping[str, Any]): The request's META dictionary.
+
+        Returns:
+            Optional[str]: The client's IP address.
+        """
+        remote_addr = meta.get("REMOTE_ADDR")
+        forwarded_for = meta.get("HTTP_X_FORWARDED_FOR")
+        if not forwarded_for or not self.is_trusted_proxy(remote_addr):
+            return remote_addr
+
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self.is_trusted_proxy(hop):
+                return hop
+        return hops[0] if hops else remote_addr
+
+
+class RouteTable:
+    """
+    Route policies compiled into a single prefix-trie regex.
+    """
+
+    def __init__(self, policies: Sequence[RoutePolicy], default: RoutePolicy) -> None:
+        """
+        Compile the route table.
+
+        Args:
+            policies (Sequence[RoutePolicy]): The declared route policies.
+            default (RoutePolicy): The policy of paths matching no prefix.
+        """
+        self.policies: List[RoutePolicy] = list(policies)
+        self.default = default
+        self._pattern = (
+            re.compile(_trie_pattern([policy.prefix for policy in self.policies]))
+            if self.policies
+            else None
+        )
+
+    def resolve(self, path: str) -> RoutePolicy:
+        """
+        Find the policy of a path.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            RoutePolicy: The policy of the longest matching prefix, or the
+            default policy.
+        """
+        if self._pattern is None:
+            return self.default
+        match = self._pattern.match(path)
+        if match is None:
+            return self.default
+        return self.policies[int(match.lastgroup[1:])]
+
+
+def build_route_table() -> RouteTable:
+    """
+    Build the route table from the ROUTE_POLICIES, PUBLIC_ENDPOINTS and
+    TRUSTED_PROXY_CIDRS settings.
+
+    ``ROUTE_POLICIES`` entries are mappings with a ``prefix`` and optional
+    ``auth_required`` (default True) and ``trusted_proxies`` (default
+    TRUSTED_PROXY_CIDRS). Every ``PUBLIC_ENDPOINTS`` prefix not declared there
+    is added as a public route.
+
+    Returns:
+        RouteTable: The compiled route table.
+    """
+    trusted_proxies = parse_networks(
+        getattr(settings, "TRUSTED_PROXY_CIDRS", DEFAULT_TRUSTED_PROXY_CIDRS)
+    )
+    declared: Dict[str, RoutePolicy] = {}
+    for spec in getattr(settings, "ROUTE_POLICIES", []):
+        declared[spec["prefix"]] = RoutePolicy(
+            prefix=spec["prefix"],
+            auth_required=spec.get("auth_required", True),
+            trusted_proxies=(
+                parse_networks(spec["trusted_proxies"])
+                if "trusted_proxies" in spec
+                else trusted_proxies
+            ),
+        )
+    for prefix in getattr(settings, "PUBLIC_ENDPOINTS", None) or ["/public/"]:
+        declared.setdefault(prefix, RoutePolicy(prefix, False, trusted_proxies))
+
+    return RouteTable(
+        list(declared.values()),
+        default=RoutePolicy("", auth_required=True, trusted_proxies=trusted_proxies),
+    )
+
+
+def get_route_table() -> RouteTable:
+    """
+    Return the route table, compiling it on first use.
+
+    Returns:
+        RouteTable: The compiled route table.
+    """
+    global _route_table
+    if _route_table is None:
+        _route_table = build_route_table()
+    return _route_table
+
+
+def get_route_policy(request: HttpRequest) -> RoutePolicy:
+    """
+    Return the policy of a request, resolving it once per request.
+
+    Args:
+        request (HttpRequest): The Django request.
+
+    Returns:
+        RoutePolicy: The policy of the request's path.
+    """
+    policy = getattr(request, REQUEST_ATTRIBUTE, None)
+    if policy is None:
+        policy = get_route_table().resolve(request.path)
+        setattr(request, REQUEST_ATTRIBUTE, policy)
+    return policy
+
+
+@receiver(setting_changed)
+def reset_route_table(setting: str, **kwargs: Any) -> None:
+    """
+    Discard the compiled route table when a setting it is built from changes.
+    """
+    global _route_table
+    if setting in ROUTE_SETTINGS:
+        _route_table = None
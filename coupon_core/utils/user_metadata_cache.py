@@ -0,0 +1,223 @@
+"""
+Two-tier cache for user metadata fetched from the authentication service.
+
+Metadata is cached per access token (by its ``jti`` claim, or the user id when
+the token has none) in a small in-process LRU and in the shared Redis cache.
+Entries never outlive the token they were fetched with, so a revoked or
+expired token cannot be served from the cache.
+
+Entries are not invalidated when a profile changes: the authentication service
+runs in other processes and cannot reach the in-process tier, so updated or
+deleted profiles are served stale for up to USER_METADATA_CACHE["TTL"] seconds.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRUCache:
+    """
+    Thread-safe, size-bounded in-process cache with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries (int): The maximum number of entries kept; the least
+                recently used entry is evicted first.
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retrieve an entry if it exists and has not expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store an entry, evicting the least recently used entries if full.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to cache.
+            ttl (float): Seconds until the entry expires.
+        """
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class UserMetadataCache:
+    """
+    Caches user metadata in an in-process LRU backed by the shared Redis cache.
+
+    Redis errors are logged and treated as cache misses, so an unavailable
+    cache only costs the request a call to the authentication service.
+    """
+
+    KEY_PREFIX = "user_metadata"
+
+    def __init__(
+        self,
+        alias: Optional[str] = None,
+        ttl: Optional[int] = None,
+        max_local_entries: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the cache from the USER_METADATA_CACHE setting.
+
+        Args:
+            alias (Optional[str]): The Django cache alias of the Redis tier.
+            ttl (Optional[int]): The maximum lifetime of an entry in seconds.
+            max_local_entries (Optional[int]): The size of the in-process LRU.
+        """
+        config = settings.USER_METADATA_CACHE
+        self.alias = alias or config["CACHE_ALIAS"]
+        self.ttl = ttl if ttl is not None else config["TTL"]
+        self.local = LocalLRUCache(max_local_entries or config["LOCAL_MAX_ENTRIES"])
+
+    @property
+    def shared(self):
+        """
+        The Django cache used as the shared tier.
+        """
+        return caches[self.alias]
+
+    def key_for(self, claims: Mapping[str, Any]) -> Optional[str]:
+        """
+        Build the cache key for a token.
+
+        Args:
+            claims (Mapping[str, Any]): The validated token claims.
+
+        Returns:
+            Optional[str]: The cache key, or None if the token has neither a
+            ``jti`` nor a user id claim.
+        """
+        if claims.get("jti"):
+            return f"{self.KEY_PREFIX}:jti:{claims['jti']}"
+        user_id = claims.get(settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id"))
+        if user_id is not None:
+            return f"{self.KEY_PREFIX}:user:{user_id}"
+        return None
+
+    def ttl_for(self, claims: Mapping[str, Any]) -> int:
+        """
+        Compute how long metadata fetched with a token may be cached.
+
+        Args:
+            claims (Mapping[str, Any]): The validated token claims.
+
+        Returns:
+            int: The configured TTL, capped at the token's remaining lifetime.
+        """
+        expires_at = claims.get("exp")
+        if expires_at is None:
+            return self.ttl
+        return max(0, min(self.ttl, int(expires_at - time.time())))
+
+    def get(self, claims: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Look up the metadata cached for a token, locally first.
+
+        Args:
+            claims (Mapping[str, Any]): The validated token claims.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached metadata, or None on a miss.
+        """
+        key = self.key_for(claims)
+        if key is None:
+            return None
+
+        metadata = self.local.get(key)
+        if metadata is not None:
+            return metadata
+
+        try:
+            metadata = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"User metadata cache read failed for {key}: {str(e)}")
+            return None
+
+        if metadata is not None:
+            ttl = self.ttl_for(claims)
+            if ttl > 0:
+                self.local.set(key, metadata, ttl)
+        return metadata
+
+    def set(self, claims: Mapping[str, Any], metadata: Dict[str, Any]) -> None:
+        """
+        Cache the metadata fetched for a token in both tiers.
+
+        Args:
+            claims (Mapping[str, Any]): The validated token claims.
+            metadata (Dict[str, Any]): The user metadata.
+        """
+        key = self.key_for(claims)
+        ttl = self.ttl_for(claims)
+        if key is None or ttl <= 0:
+            return
+
+        self.local.set(key, metadata, ttl)
+        try:
+            self.shared.set(key, metadata, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"User metadata cache write failed for {key}: {str(e)}")
+
+
+def build_auth_service_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    Create an HTTP session with a connection pool for the authentication service.
+
+    Args:
+        pool_size (Optional[int]): The number of pooled connections per host.
+
+    Returns:
+        requests.Session: The session.
+    """
+    pool_size = pool_size or settings.USER_METADATA_CACHE["POOL_SIZE"]
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GeodiscountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "geodiscounts"
+
+    def ready(self):
+        import geodiscounts.v1.signals  # noqa: F401
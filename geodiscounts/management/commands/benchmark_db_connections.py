@@ -0,0 +1,152 @@
+"""
+Load test of per-request database connection setup.
+
+Replays many short requests from concurrent threads against a configured
+database, with each connection reuse mode of coupon_core/settings/database.py.
+Every simulated request goes through Django's request lifecycle for
+connections (close_if_unusable_or_obsolete on request start and finish), opens
+a cursor and runs one query. The time spent getting a usable connection is
+reported per request: a fresh (SSL) connection in "none" mode, a health-checked
+persistent connection in "persistent" mode and a pool checkout in "pool" mode.
+
+Usage:
+    python manage.py benchmark_db_connections --database geodiscounts_db \
+        --requests 500 --concurrency 8
+"""
+
+import copy
+import statistics
+import threading
+import time
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from coupon_core.settings.database import NONE, PERSISTENT, POOL, with_connection_reuse
+
+
+class Command(BaseCommand):
+    """
+    Management command measuring connection setup time per request.
+    """
+
+    help = "Load test database connection setup with each connection reuse mode."
+
+    def add_arguments(self, parser: Any) -> None:
+        """
+        Define the command line arguments.
+
+        Args:
+            parser (Any): The argument parser.
+        """
+        parser.add_argument(
+            "--database", default="geodiscounts_db", help="Database alias to test."
+        )
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests per thread."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Concurrent threads."
+        )
+        parser.add_argument(
+            "--modes",
+            default=",".join([NONE, PERSISTENT, POOL]),
+            help="Comma-separated connection reuse modes to compare.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Run the load test once per mode and print connection setup times.
+        """
+        alias = options["database"]
+        if alias not in connections.settings:
+            raise CommandError(f"Unknown database alias: {alias}")
+
+        for mode in options["modes"].split(","):
+            if mode == POOL:
+                try:
+                    import psycopg_pool  # noqa: F401
+                except ImportError:
+                    self.stdout.write(f"{mode:<12} skipped: psycopg-pool not installed")
+                    continue
+            settings_dict = with_connection_reuse(
+                {alias: copy.deepcopy(connections.settings[alias])}, mode
+            )[alias]
+            self._run(alias, mode, settings_dict, options)
+
+    def _run(
+        self,
+        alias: str,
+        mode: str,
+        settings_dict: Dict[str, Any],
+        options: Dict[str, Any],
+    ) -> None:
+        """
+        Replay requests from concurrent threads and print the measurements.
+
+        Args:
+            alias (str): The database alias.
+            mode (str): The connection reuse mode.
+            settings_dict (Dict[str, Any]): The database settings for the mode.
+            options (Dict[str, Any]): The command options.
+        """
+        backend = load_backend(settings_dict["ENGINE"])
+        # A separate alias gives the mode its own pool
+        bench_alias = f"{alias}_benchmark_{mode}"
+        setup_times: List[float] = []
+        request_times: List[float] = []
+        errors: List[Exception] = []
+        lock = threading.Lock()
+
+        def worker() -> None:
+            # Database connections are thread-local in Django, so each thread
+            # gets its own wrapper, as each server thread would
+            conn = backend.DatabaseWrapper(copy.deepcopy(settings_dict), bench_alias)
+            setups, totals = [], []
+            try:
+                for _ in range(options["requests"]):
+                    conn.close_if_unusable_or_obsolete()  # request_started
+                    started = time.perf_counter()
+                    with conn.cursor() as cursor:
+                        connected = time.perf_counter()
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                    conn.close_if_unusable_or_obsolete()  # request_finished
+                    setups.append(connected - started)
+                    totals.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                conn.close()
+                with lock:
+                    setup_times.extend(setups)
+                    request_times.extend(totals)
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(options["concurrency"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if mode == POOL:
+            backend.DatabaseWrapper(settings_dict, bench_alias).close_pool()
+        if errors:
+            self.stderr.write(f"{mode}: {len(errors)} threads failed: {errors[0]}")
+        if not setup_times:
+            return
+
+        setup_times.sort()
+        p95 = setup_times[int(len(setup_times) * 0.95) - 1]
+        self.stdout.write(
+            f"{mode:<12} setup mean {statistics.mean(setup_times) * 1e3:8.3f} ms"
+            f"  p95 {p95 * 1e3:8.3f} ms"
+            f"  request mean {statistics.mean(request_times) * 1e3:8.3f} ms"
+            f"  {len(request_times) / elapsed:8.0f} req/s"
+        )
@@ -0,0 +1,69 @@
+"""
+Moves the id sequences of each geodiscounts shard to the shard's id range.
+
+Ids of shard i start at ``i << ID_SHARD_BITS`` (see geodiscounts/sharding.py),
+so that ids stay unique across shards and an id alone identifies its shard.
+Run it after migrating a new shard, before it receives any writes; it never
+moves a sequence backwards, so it is safe to rerun.
+
+Usage:
+    python manage.py configure_shard_sequences
+"""
+
+from typing import Any
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models.fields import AutoFieldMixin
+
+from geodiscounts.sharding import ID_SHARD_BITS, get_shard_map
+
+
+class Command(BaseCommand):
+    """
+    Management command setting the id sequences of the geodiscounts shards.
+    """
+
+    help = "Move the id sequences of each geodiscounts shard to its id range."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Set every geodiscounts table's id sequence on every shard.
+        """
+        models = apps.get_app_config("geodiscounts").get_models()
+        # Tables keyed by another table's id, e.g. RetailerStats, have no sequence
+        tables = [
+            model._meta.db_table
+            for model in models
+            if isinstance(model._meta.pk, AutoFieldMixin)
+        ]
+
+        for shard in get_shard_map().shards:
+            connection = connections[shard.alias]
+            if connection.vendor != "postgresql":
+                raise CommandError(
+                    f"Shard {shard.alias} is not a PostgreSQL database."
+                )
+            start = shard.index << ID_SHARD_BITS
+            end = (shard.index + 1) << ID_SHARD_BITS
+            with connection.cursor() as cursor:
+                for table in tables:
+                    # Only ever move forward, past ids already allocated
+                    cursor.execute(
+                        f"""
+                        SELECT setval(
+                            pg_get_serial_sequence(%s, 'id'),
+                            GREATEST(COALESCE(MAX(id), 0), %s),
+                            COALESCE(MAX(id), 0) >= %s
+                        )
+                        FROM {connection.ops.quote_name(table)}
+                        """,
+                        [table, max(start, 1), max(start, 1)],
+                    )
+                    value = cursor.fetchone()[0]
+                    if value >= end:
+                        raise CommandError(
+                            f"{table} on {shard.alias} has ids beyond its range."
+                        )
+                    self.stdout.write(f"{shard.alias}.{table}: sequence at {value}")
@@ -0,0 +1,100 @@
+"""
+Maintains the monthly partitions of the discounts table on each shard.
+
+Creates the partitions of the coming months, moving rows out of the default
+partition where needed, and retires the partitions of months expired more than
+the retention period ago by detaching and dropping them, then refreshes the
+retailer aggregates the retired rows were counted in. Run it daily, e.g. from
+cron; it is idempotent. See geodiscounts/partitions.py.
+
+Usage:
+    python manage.py manage_discount_partitions
+    python manage.py manage_discount_partitions --retention-days 90 --keep-detached
+"""
+
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from geodiscounts.partitions import (
+    DEFAULT_MONTHS_AHEAD,
+    DEFAULT_RETENTION_DAYS,
+    ensure_partitions,
+    is_partitioned,
+    retire_partitions,
+)
+from geodiscounts.sharding import get_shard_map
+from geodiscounts.v1.utils.retailer_stats import refresh_retailer_stats
+
+
+class Command(BaseCommand):
+    """
+    Management command creating and retiring discount partitions.
+    """
+
+    help = "Create upcoming discount partitions and retire expired ones."
+
+    def add_arguments(self, parser: Any) -> None:
+        """
+        Define the command line arguments.
+
+        Args:
+            parser (Any): The argument parser.
+        """
+        config = getattr(settings, "DISCOUNT_PARTITIONS", {})
+        parser.add_argument(
+            "--database",
+            help="Shard to maintain; defaults to every geodiscounts shard.",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=config.get("MONTHS_AHEAD", DEFAULT_MONTHS_AHEAD),
+            help="Months after the current one to create partitions for.",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=config.get("RETENTION_DAYS", DEFAULT_RETENTION_DAYS),
+            help="Days expired discounts are kept before being retired.",
+        )
+        parser.add_argument(
+            "--keep-detached",
+            action="store_true",
+            default=not config.get("DROP_RETIRED", True),
+            help="Keep retired partitions as standalone tables, without dropping.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Maintain the partitions of each shard.
+        """
+        aliases = [shard.alias for shard in get_shard_map().shards]
+        if options["database"]:
+            if options["database"] not in aliases:
+                raise CommandError(
+                    f"Unknown geodiscounts shard: {options['database']}"
+                )
+            aliases = [options["database"]]
+
+        for alias in aliases:
+            connection = connections[alias]
+            if not is_partitioned(connection):
+                self.stderr.write(f"{alias}: discounts table not partitioned, skipped")
+                continue
+            created = ensure_partitions(connection, options["months_ahead"])
+            retired = retire_partitions(
+                connection,
+                options["retention_days"],
+                drop=not options["keep_detached"],
+            )
+            if retired:
+                # Retiring bypasses model signals
+                refresh_retailer_stats(alias)
+            self.stdout.write(
+                f"{alias}: created {[p.name for p in created]}, "
+                f"{'detached' if options['keep_detached'] else 'dropped'} "
+                f"{[p.name for p in retired]}"
+            )
@@ -0,0 +1,55 @@
+"""
+Rebuilds the retailer aggregates of each shard from the discounts.
+
+The aggregates are maintained as discounts and shares change (see
+geodiscounts/v1/utils/retailer_stats.py); run this after writes that bypass
+model signals, such as bulk loads or raw SQL, to repair them. It is also run
+daily by Celery beat, and is safe to run at any time.
+
+Usage:
+    python manage.py refresh_retailer_stats
+    python manage.py refresh_retailer_stats --database geodiscounts_db
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geodiscounts.sharding import get_shard_map
+from geodiscounts.v1.utils.retailer_stats import refresh_retailer_stats
+
+
+class Command(BaseCommand):
+    """
+    Management command rebuilding the retailer aggregates.
+    """
+
+    help = "Rebuild the retailer aggregates from the discounts."
+
+    def add_arguments(self, parser: Any) -> None:
+        """
+        Define the command line arguments.
+
+        Args:
+            parser (Any): The argument parser.
+        """
+        parser.add_argument(
+            "--database",
+            help="Shard to refresh; defaults to every geodiscounts shard.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Refresh the aggregates of every retailer of each shard.
+        """
+        aliases = [shard.alias for shard in get_shard_map().shards]
+        if options["database"]:
+            if options["database"] not in aliases:
+                raise CommandError(
+                    f"Unknown geodiscounts shard: {options['database']}"
+                )
+            aliases = [options["database"]]
+
+        for alias in aliases:
+            refreshed = refresh_retailer_stats(alias)
+            self.stdout.write(f"{alias}: refreshed {refreshed} retailers")
@@ -0,0 +1,65 @@
+"""
+Runs the Kafka consumer ingesting discounts, as a long-running service.
+
+SIGTERM and SIGINT stop it gracefully. With --check, it instead reports
+whether a running consumer is alive, from the age of its heartbeat, for
+container and supervisor health checks. See
+geodiscounts/v1/utils/kafka_consumer.py.
+
+Usage:
+    python manage.py run_discount_consumer
+    python manage.py run_discount_consumer --check
+"""
+
+import signal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geodiscounts.v1.utils.kafka_consumer import (
+    DiscountConsumer,
+    get_consumer_config,
+    heartbeat_age,
+)
+
+
+class Command(BaseCommand):
+    """
+    Management command running or checking the discount consumer.
+    """
+
+    help = "Run the Kafka discount consumer until stopped, or check its liveness."
+
+    def add_arguments(self, parser: Any) -> None:
+        """
+        Define the command line arguments.
+
+        Args:
+            parser (Any): The argument parser.
+        """
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with an error if the running consumer's heartbeat is stale.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Run the consumer, or check its heartbeat.
+
+        Raises:
+            CommandError: If the heartbeat is missing or stale, with --check.
+        """
+        config = get_consumer_config()
+        if options["check"]:
+            age = heartbeat_age(config["HEARTBEAT_FILE"])
+            if age is None or age > config["HEARTBEAT_MAX_AGE"]:
+                raise CommandError(f"Discount consumer heartbeat is stale: {age}")
+            self.stdout.write(f"Discount consumer alive, heartbeat {age:.1f}s ago")
+            return
+
+        consumer = DiscountConsumer(config)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: consumer.stop())
+        self.stdout.write("Starting the discount consumer")
+        consumer.run()
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-19 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+import geodiscounts.partitions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodiscounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='discount',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterField(
+            model_name='discount',
+            name='expiration_date',
+            field=models.DateTimeField(db_index=True, help_text='Expiration date of the discount.'),
+        ),
+        # Partitioned tables cannot be referenced by foreign key constraints
+        migrations.AlterField(
+            model_name='shareddiscount',
+            name='discount',
+            field=models.ForeignKey(db_constraint=False, help_text='Discount being shared.', on_delete=django.db.models.deletion.CASCADE, related_name='shared_discounts', to='geodiscounts.discount'),
+        ),
+        # On PostgreSQL, rebuilds geodiscounts_discount as a table partitioned by
+        # month of expiration_date; a no-op elsewhere
+        migrations.RunPython(
+            geodiscounts.partitions.partition_discounts,
+            geodiscounts.partitions.unpartition_discounts,
+        ),
+    ]
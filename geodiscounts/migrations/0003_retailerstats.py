@@ -0,0 +1,62 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def create_retailer_stats(apps, schema_editor):
+    """Compute the aggregates of the existing retailers."""
+    alias = schema_editor.connection.alias
+    Retailer = apps.get_model('geodiscounts', 'Retailer')
+    Discount = apps.get_model('geodiscounts', 'Discount')
+    SharedDiscount = apps.get_model('geodiscounts', 'SharedDiscount')
+    RetailerStats = apps.get_model('geodiscounts', 'RetailerStats')
+
+    active = dict(
+        Discount.objects.using(alias)
+        .filter(expiration_date__gt=timezone.now())
+        .order_by()
+        .values('retailer_id')
+        .annotate(count=Count('id'))
+        .values_list('retailer_id', 'count')
+    )
+    shares = dict(
+        SharedDiscount.objects.using(alias)
+        .order_by()
+        .values('discount__retailer_id')
+        .annotate(count=Count('id'))
+        .values_list('discount__retailer_id', 'count')
+    )
+    RetailerStats.objects.using(alias).bulk_create(
+        [
+            RetailerStats(
+                retailer_id=retailer_id,
+                active_discount_count=active.get(retailer_id, 0),
+                share_count=shares.get(retailer_id, 0),
+            )
+            for retailer_id in Retailer.objects.using(alias).values_list('id', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodiscounts', '0002_partition_discounts_by_expiration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetailerStats',
+            fields=[
+                ('retailer', models.OneToOneField(help_text='Retailer the aggregates belong to.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='geodiscounts.retailer')),
+                ('active_discount_count', models.PositiveIntegerField(default=0, help_text='Number of active discounts of the retailer.')),
+                ('share_count', models.PositiveIntegerField(default=0, help_text="Number of shares of the retailer's discounts.")),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the aggregates were last updated.')),
+            ],
+        ),
+        migrations.RunPython(create_retailer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_participants_to_memberships(apps, schema_editor):
+    """Create a membership for each participant of the JSON lists."""
+    alias = schema_editor.connection.alias
+    SharedDiscount = apps.get_model('geodiscounts', 'SharedDiscount')
+    SharedDiscountParticipant = apps.get_model('geodiscounts', 'SharedDiscountParticipant')
+
+    memberships = []
+    for shared_discount_id, participants in (
+        SharedDiscount.objects.using(alias).values_list('id', 'participants').iterator()
+    ):
+        for participant in dict.fromkeys(str(p) for p in participants or []):
+            memberships.append(
+                SharedDiscountParticipant(
+                    shared_discount_id=shared_discount_id, participant=participant
+                )
+            )
+    SharedDiscountParticipant.objects.using(alias).bulk_create(
+        memberships, batch_size=1000
+    )
+
+
+def copy_memberships_to_participants(apps, schema_editor):
+    """Rebuild the JSON lists from the memberships."""
+    alias = schema_editor.connection.alias
+    SharedDiscount = apps.get_model('geodiscounts', 'SharedDiscount')
+    SharedDiscountParticipant = apps.get_model('geodiscounts', 'SharedDiscountParticipant')
+
+    participants = {}
+    for shared_discount_id, participant in (
+        SharedDiscountParticipant.objects.using(alias)
+        .order_by('id')
+        .values_list('shared_discount_id', 'participant')
+        .iterator()
+    ):
+        participants.setdefault(shared_discount_id, []).append(participant)
+    for shared_discount_id, members in participants.items():
+        SharedDiscount.objects.using(alias).filter(id=shared_discount_id).update(
+            participants=members
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodiscounts', '0003_retailerstats'),
+    ]
+
+    operations = [
+        # Lets the column be added back with a value when unapplying
+        migrations.AlterField(
+            model_name='shareddiscount',
+            name='participants',
+            field=models.JSONField(default=list, help_text='List of participants sharing the discount (e.g., user IDs or emails).'),
+        ),
+        migrations.CreateModel(
+            name='SharedDiscountParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant', models.CharField(help_text='Identifier of the participant (e.g., user ID or email).', max_length=255)),
+                ('joined_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the participant joined.')),
+                ('shared_discount', models.ForeignKey(help_text='Shared discount joined.', on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='geodiscounts.shareddiscount')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('participant', 'shared_discount'), name='unique_shared_discount_participant')],
+            },
+        ),
+        migrations.RunPython(
+            copy_participants_to_memberships, copy_memberships_to_participants
+        ),
+        migrations.RemoveField(
+            model_name='shareddiscount',
+            name='participants',
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+import geodiscounts.partitions
+
+CODE_KEY = models.UniqueConstraint(
+    fields=('discount_code', 'expiration_date'),
+    name='geodiscounts_discount_code_uniq',
+)
+
+
+def _code_fields(apps):
+    """Return the discounts model with the unique and the plain code field."""
+    Discount = apps.get_model('geodiscounts', 'Discount')
+    unique = Discount._meta.get_field('discount_code')
+    plain = models.CharField(max_length=50, help_text=unique.help_text)
+    plain.set_attributes_from_name('discount_code')
+    plain.model = Discount
+    return Discount, unique, plain
+
+
+def use_code_key(apps, schema_editor):
+    """Replace the code's unique index by the code key on a plain table."""
+    if geodiscounts.partitions.is_partitioned(schema_editor.connection):
+        return
+    Discount, unique, plain = _code_fields(apps)
+    schema_editor.alter_field(Discount, unique, plain)
+    schema_editor.add_constraint(Discount, CODE_KEY)
+
+
+def use_code_index(apps, schema_editor):
+    """Restore the code's unique index on a plain table."""
+    if geodiscounts.partitions.is_partitioned(schema_editor.connection):
+        return
+    Discount, unique, plain = _code_fields(apps)
+    schema_editor.remove_constraint(Discount, CODE_KEY)
+    schema_editor.alter_field(Discount, plain, unique)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodiscounts', '0004_shareddiscountparticipant'),
+    ]
+
+    operations = [
+        # The partitioned table already has this key, created by 0002, as
+        # PostgreSQL cannot keep the code unique on its own there
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='discount',
+                    name='discount_code',
+                    field=models.CharField(help_text='Unique code for redeeming the discount.', max_length=50),
+                ),
+                migrations.AddConstraint(
+                    model_name='discount',
+                    constraint=CODE_KEY,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(use_code_key, use_code_index),
+            ],
+        ),
+    ]
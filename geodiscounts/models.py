@@ -5,9 +5,11 @@ These models define the database structure for retailers, discounts, and shared
 They are designed to support geospatial queries and group discount sharing functionality.
 """
 
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from django.contrib.gis.db import models
+from django.utils import timezone
 
 
 class Retailer(models.Model):
@@ -43,6 +45,51 @@ class Retailer(models.Model):
         return self.name
 
 
+class DiscountQuerySet(models.QuerySet):
+    """
+    QuerySet of discounts, filtering by expiration.
+
+    Filtering on expiration_date lets PostgreSQL skip the partitions of other
+    months; see geodiscounts.partitions.
+    """
+
+    def active(self, at: Optional[datetime] = None) -> "DiscountQuerySet":
+        """
+        Keep the discounts that have not expired.
+
+        Args:
+            at (Optional[datetime]): The moment to check at; defaults to now.
+
+        Returns:
+            DiscountQuerySet: The active discounts.
+        """
+        return self.filter(expiration_date__gt=at or timezone.now())
+
+    def expired(self, at: Optional[datetime] = None) -> "DiscountQuerySet":
+        """
+        Keep the discounts that have expired.
+
+        Args:
+            at (Optional[datetime]): The moment to check at; defaults to now.
+
+        Returns:
+            DiscountQuerySet: The expired discounts.
+        """
+        return self.filter(expiration_date__lte=at or timezone.now())
+
+
+class ActiveDiscountManager(models.Manager.from_queryset(DiscountQuerySet)):
+    """
+    Manager only returning discounts that have not expired.
+    """
+
+    def get_queryset(self) -> DiscountQuerySet:
+        """
+        Return the active discounts.
+        """
+        return super().get_queryset().active()
+
+
 class Discount(models.Model):
     """
     Represents a discount or offer provided by a retailer.
@@ -55,6 +102,10 @@ class Discount(models.Model):
         location (Point): Geographical location where the discount is valid.
         created_at (datetime): Timestamp when the discount was created.
         updated_at (datetime): Timestamp when the discount was last updated.
+
+    Managers:
+        objects: Discounts that have not expired, as served by the API.
+        all_objects: All discounts, expired ones included.
     """
 
     retailer: Retailer = models.ForeignKey(
@@ -66,11 +117,10 @@ class Discount(models.Model):
     description: str = models.TextField(help_text="Description of the discount.")
     discount_code: str = models.CharField(
         max_length=50,
-        unique=True,
         help_text="Unique code for redeeming the discount.",
     )
     expiration_date: models.DateTimeField = models.DateTimeField(
-        help_text="Expiration date of the discount."
+        db_index=True, help_text="Expiration date of the discount."
     )
     location: models.PointField = models.PointField(
         help_text="Geographic location where the discount is valid (latitude/longitude)."
@@ -83,6 +133,22 @@ class Discount(models.Model):
         help_text="Timestamp when the discount was last updated.",
     )
 
+    objects = ActiveDiscountManager()
+    all_objects = DiscountQuerySet.as_manager()
+
+    class Meta:
+        # Used by related managers, dumpdata and the admin, which must see
+        # expired discounts too
+        default_manager_name = "all_objects"
+        # The key PostgreSQL can enforce on the partitioned table; codes are
+        # checked to be unique when discounts are placed
+        constraints = [
+            models.UniqueConstraint(
+                fields=["discount_code", "expiration_date"],
+                name="geodiscounts_discount_code_uniq",
+            )
+        ]
+
     def __str__(self) -> str:
         return f"{self.retailer.name} - {self.description[:30]}"
 
@@ -94,7 +160,8 @@ class SharedDiscount(models.Model):
     Attributes:
         discount (Discount): The discount being shared.
         group_name (str): Name of the group sharing the discount.
-        participants (list): List of participants in the shared discount.
+        participants (list): Identifiers of the participants in the shared
+            discount, read from its memberships.
         status (str): Status of the shared discount (e.g., active, completed, expired).
         created_at (datetime): Timestamp when the shared discount was created.
         updated_at (datetime): Timestamp when the shared discount was last updated.
@@ -104,14 +171,13 @@ class SharedDiscount(models.Model):
         Discount,
         on_delete=models.CASCADE,
         related_name="shared_discounts",
+        # A partitioned table cannot be referenced by a foreign key constraint
+        db_constraint=False,
         help_text="Discount being shared.",
     )
     group_name: str = models.CharField(
         max_length=255, help_text="Name of the group sharing the discount."
     )
-    participants: List[str] = models.JSONField(
-        help_text="List of participants sharing the discount (e.g., user IDs or emails)."
-    )
     status: str = models.CharField(
         max_length=50,
         choices=[
@@ -131,5 +197,94 @@ class SharedDiscount(models.Model):
         help_text="Timestamp when the shared discount was last updated.",
     )
 
+    @property
+    def participants(self) -> List[str]:
+        """
+        List[str]: The participants' identifiers, in the order they joined.
+        """
+        return [
+            membership.participant
+            for membership in sorted(
+                self.memberships.all(), key=lambda membership: membership.id
+            )
+        ]
+
     def __str__(self) -> str:
         return f"{self.group_name} - {self.discount.discount_code}"
+
+
+class SharedDiscountParticipant(models.Model):
+    """
+    Represents a participant's membership in a shared discount.
+
+    Memberships are stored on the shard of their shared discount; the unique
+    constraint, led by the participant, indexes a participant's shared discounts.
+
+    Attributes:
+        shared_discount (SharedDiscount): The shared discount joined.
+        participant (str): The participant's identifier (e.g., user ID or email).
+        joined_at (datetime): Timestamp when the participant joined.
+    """
+
+    shared_discount: SharedDiscount = models.ForeignKey(
+        SharedDiscount,
+        on_delete=models.CASCADE,
+        related_name="memberships",
+        help_text="Shared discount joined.",
+    )
+    participant: str = models.CharField(
+        max_length=255,
+        help_text="Identifier of the participant (e.g., user ID or email).",
+    )
+    joined_at: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True, help_text="Timestamp when the participant joined."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["participant", "shared_discount"],
+                name="unique_shared_discount_participant",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.participant} - {self.shared_discount_id}"
+
+
+class RetailerStats(models.Model):
+    """
+    Aggregates of a retailer's discounts, maintained as they change.
+
+    Kept in step by the receivers of geodiscounts.signals, so that retailer
+    pages and rankings read them in one row instead of counting discounts; see
+    geodiscounts/v1/utils/retailer_stats.py.
+
+    Attributes:
+        retailer (Retailer): The retailer the aggregates belong to.
+        active_discount_count (int): Discounts of the retailer that have not
+            expired. Discounts expiring are only subtracted when swept.
+        share_count (int): Shared discounts of the retailer's discounts.
+        updated_at (datetime): Timestamp when the aggregates last changed.
+    """
+
+    retailer: Retailer = models.OneToOneField(
+        Retailer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        help_text="Retailer the aggregates belong to.",
+    )
+    active_discount_count: int = models.PositiveIntegerField(
+        default=0, help_text="Number of active discounts of the retailer."
+    )
+    share_count: int = models.PositiveIntegerField(
+        default=0, help_text="Number of shares of the retailer's discounts."
+    )
+    updated_at: models.DateTimeField = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the aggregates were last updated.",
+    )
+
+    def __str__(self) -> str:
+        return f"{self.retailer_id}: {self.active_discount_count} active"
@@ -0,0 +1,399 @@
+"""
+Range partitioning of the discounts table by expiration date.
+
+On PostgreSQL, geodiscounts_discount is partitioned by month of
+``expiration_date``: one partition per month, named
+``geodiscounts_discount_pYYYY_MM``, plus a default partition holding
+expirations beyond the newest month. Discount.objects only returns discounts
+that have not expired, which lets the planner skip the partitions of past
+months, so hot queries only touch live data.
+
+The manage_discount_partitions command keeps partitions created ahead of time,
+moving rows out of the default partition when it creates the month they fall
+in, and retires the partitions of months that expired more than
+DISCOUNT_PARTITIONS["RETENTION_DAYS"] ago by detaching and dropping them, which
+costs a catalog update rather than a bulk DELETE.
+
+Note that PostgreSQL only enforces uniqueness on a partitioned table together
+with the partition key: the database keeps discount codes unique per
+expiration date, and place_discount (geodiscounts.v1.utils.shard_queries)
+keeps them unique across the shards, checking each code before inserting it.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "geodiscounts_discount"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+SHARED_DISCOUNT_TABLE = "geodiscounts_shareddiscount"
+
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_RETENTION_DAYS = 30
+
+# Keeps detaching from queueing behind long queries, and in turn blocking
+# every query on the table while it waits
+LOCK_TIMEOUT = "5s"
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+# Postgres writes UTC offsets as "+00", which fromisoformat only reads from
+# Python 3.11
+_SHORT_OFFSET = re.compile(r"([+-]\d{2})$")
+
+
+@dataclass(frozen=True)
+class Partition:
+    """
+    A monthly partition of the discounts table.
+
+    Attributes:
+        name (str): The partition's table name.
+        start (datetime): The first expiration date it holds, inclusive.
+        end (datetime): The last expiration date it holds, exclusive.
+    """
+
+    name: str
+    start: datetime
+    end: datetime
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    """
+    Return the start of the month of a moment, in UTC, shifted by some months.
+
+    Args:
+        moment (datetime): The moment.
+        months (int): The number of months to shift by; may be negative.
+
+    Returns:
+        datetime: Midnight UTC on the first day of the month.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    """
+    Name the partition of the month starting at a moment.
+
+    Args:
+        start (datetime): The start of the month.
+
+    Returns:
+        str: The partition's table name.
+    """
+    return f"{PARENT_TABLE}_p{start:%Y_%m}"
+
+
+def is_partitioned(connection: BaseDatabaseWrapper) -> bool:
+    """
+    Check whether a database's discounts table is partitioned.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+
+    Returns:
+        bool: True on PostgreSQL once the partitioning migration has run.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [PARENT_TABLE],
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(connection: BaseDatabaseWrapper) -> List[Partition]:
+    """
+    List the monthly partitions of the discounts table, oldest first.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+
+    Returns:
+        List[Partition]: The partitions, without the default partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [PARENT_TABLE],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_PATTERN.search(bound)
+        if match:
+            start, end = (
+                datetime.fromisoformat(_SHORT_OFFSET.sub(r"\1:00", value))
+                for value in match.groups()
+            )
+            partitions.append(Partition(name, start, end))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def create_partition(connection: BaseDatabaseWrapper, start: datetime) -> Partition:
+    """
+    Create the partition of a month.
+
+    Rows of the month already in the default partition are moved to it, as
+    PostgreSQL refuses to attach a partition overlapping rows of the default.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+        start (datetime): The start of the month.
+
+    Returns:
+        Partition: The created partition.
+    """
+    partition = Partition(partition_name(start), start, month_start(start, 1))
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(partition.name)} "
+            f"(LIKE {quote(PARENT_TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {quote(DEFAULT_PARTITION)}
+                WHERE expiration_date >= %s AND expiration_date < %s
+                RETURNING *
+            )
+            INSERT INTO {quote(partition.name)} SELECT * FROM moved
+            """,
+            [partition.start, partition.end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(PARENT_TABLE)} ATTACH PARTITION "
+            f"{quote(partition.name)} FOR VALUES FROM (%s) TO (%s)",
+            [partition.start, partition.end],
+        )
+    return partition
+
+
+def ensure_partitions(
+    connection: BaseDatabaseWrapper,
+    months_ahead: int = DEFAULT_MONTHS_AHEAD,
+    since: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+) -> List[Partition]:
+    """
+    Create the missing partitions up to some months ahead.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+        months_ahead (int): The number of months after the current one to
+            create partitions for.
+        since (Optional[datetime]): The oldest month to create a partition for.
+            Defaults to the oldest expiration in the default partition, or the
+            current month.
+        now (Optional[datetime]): The current time, for tests.
+
+    Returns:
+        List[Partition]: The created partitions.
+    """
+    now = now or datetime.now(timezone.utc)
+    if since is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT MIN(expiration_date) FROM "
+                f"{connection.ops.quote_name(DEFAULT_PARTITION)}"
+            )
+            since = cursor.fetchone()[0]
+    first = month_start(min(since or now, now))
+    last = month_start(now, months_ahead)
+
+    existing = {partition.start for partition in list_partitions(connection)}
+    created = []
+    start = first
+    while start <= last:
+        if start not in existing:
+            with transaction.atomic(using=connection.alias):
+                created.append(create_partition(connection, start))
+            logger.info(f"Created discount partition {created[-1].name}")
+        start = month_start(start, 1)
+    return created
+
+
+def retire_partitions(
+    connection: BaseDatabaseWrapper,
+    retention_days: int = DEFAULT_RETENTION_DAYS,
+    drop: bool = True,
+    now: Optional[datetime] = None,
+) -> List[Partition]:
+    """
+    Detach, and drop, the partitions of months expired long enough ago.
+
+    Shared discounts of the partition's discounts are deleted first, as the
+    database cannot cascade to them from a partitioned table.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+        retention_days (int): Days expired discounts are kept for.
+        drop (bool): Drop the detached partitions; otherwise they are kept as
+            standalone tables, e.g. for archiving.
+        now (Optional[datetime]): The current time, for tests.
+
+    Returns:
+        List[Partition]: The retired partitions.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+    quote = connection.ops.quote_name
+
+    retired = []
+    for partition in list_partitions(connection):
+        if partition.end > cutoff:
+            break
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+            cursor.execute(
+                f"DELETE FROM {quote(SHARED_DISCOUNT_TABLE)} WHERE discount_id IN "
+                f"(SELECT id FROM {quote(partition.name)})"
+            )
+            cursor.execute(
+                f"ALTER TABLE {quote(PARENT_TABLE)} "
+                f"DETACH PARTITION {quote(partition.name)}"
+            )
+            if drop:
+                cursor.execute(f"DROP TABLE {quote(partition.name)}")
+        retired.append(partition)
+        logger.info(
+            f"{'Dropped' if drop else 'Detached'} discount partition {partition.name}"
+        )
+    return retired
+
+
+def _create_indexes(connection: BaseDatabaseWrapper, partitioned: bool) -> None:
+    """
+    Create the discounts table's keys and indexes, once its rows are loaded.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+        partitioned (bool): Whether the table is partitioned, in which case
+            unique keys must include the partition key.
+    """
+    quote = connection.ops.quote_name
+    table = quote(PARENT_TABLE)
+    key = ", expiration_date" if partitioned else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            ALTER TABLE {table}
+                ADD PRIMARY KEY (id{key}),
+                ADD CONSTRAINT geodiscounts_discount_code_uniq
+                    UNIQUE (discount_code{key}),
+                ADD CONSTRAINT geodiscounts_discount_retailer_fk
+                    FOREIGN KEY (retailer_id) REFERENCES geodiscounts_retailer (id)
+                    DEFERRABLE INITIALLY DEFERRED;
+            CREATE INDEX geodiscounts_discount_retailer_idx ON {table} (retailer_id);
+            CREATE INDEX geodiscounts_discount_expiration_idx
+                ON {table} (expiration_date);
+            CREATE INDEX geodiscounts_discount_location_gist
+                ON {table} USING GIST (location);
+            """
+        )
+
+
+def _copy_rows(connection: BaseDatabaseWrapper, source: str) -> None:
+    """
+    Copy the rows and id sequence of a discounts table into the current one.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+        source (str): The table to copy from.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(PARENT_TABLE)} SELECT * FROM {quote(source)}"
+        )
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [source])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT last_value, is_called FROM {sequence}")
+        last_value, is_called = cursor.fetchone()
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)",
+            [PARENT_TABLE, last_value, is_called],
+        )
+
+
+def partition_discounts(apps: Any, schema_editor: Any) -> None:
+    """
+    Migration step converting the discounts table to a partitioned table.
+
+    The rows are copied into monthly partitions covering their expiration
+    dates, the id sequence carries over, and the keys and indexes are rebuilt
+    on the partitioned table. Other databases keep a plain table.
+
+    Args:
+        apps (Any): The historical apps registry.
+        schema_editor (Any): The migration's schema editor.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql" or is_partitioned(connection):
+        return
+    legacy = f"{PARENT_TABLE}_unpartitioned"
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(PARENT_TABLE)} RENAME TO {quote(legacy)}")
+        cursor.execute(
+            f"""
+            CREATE TABLE {quote(PARENT_TABLE)} (
+                LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY
+            ) PARTITION BY RANGE (expiration_date);
+            CREATE TABLE {quote(DEFAULT_PARTITION)}
+                PARTITION OF {quote(PARENT_TABLE)} DEFAULT;
+            """
+        )
+        cursor.execute(f"SELECT MIN(expiration_date) FROM {quote(legacy)}")
+        ensure_partitions(connection, since=cursor.fetchone()[0])
+        _copy_rows(connection, legacy)
+        # Frees the key and index names for the partitioned table
+        cursor.execute(f"DROP TABLE {quote(legacy)}")
+    _create_indexes(connection, partitioned=True)
+
+
+def unpartition_discounts(apps: Any, schema_editor: Any) -> None:
+    """
+    Migration step reverting `partition_discounts`.
+
+    Args:
+        apps (Any): The historical apps registry.
+        schema_editor (Any): The migration's schema editor.
+    """
+    connection = schema_editor.connection
+    if not is_partitioned(connection):
+        return
+    partitioned = f"{PARENT_TABLE}_partitioned"
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {quote(PARENT_TABLE)} RENAME TO {quote(partitioned)}"
+        )
+        cursor.execute(
+            f"CREATE TABLE {quote(PARENT_TABLE)} "
+            f"(LIKE {quote(partitioned)} INCLUDING DEFAULTS INCLUDING IDENTITY)"
+        )
+        _copy_rows(connection, partitioned)
+        cursor.execute(f"DROP TABLE {quote(partitioned)}")
+    _create_indexes(connection, partitioned=False)
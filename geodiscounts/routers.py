@@ -2,8 +2,16 @@
 Database Router for the geodiscounts app.
 
 This router directs all database operations for models in the `geodiscounts`
-app to a specific relational database (`geodiscounts_db`).
+app to the geodiscounts shards (see geodiscounts.sharding). Objects are written
+to the shard owning their location; queries without an explicit `.using()` go
+to the default shard, and lookups through an object's relations to the shard
+it was loaded from. Reads are spread over each shard's healthy read replicas,
+if any, except shortly after a write in the same session.
 """
+from coupon_core.utils.db_replicas import primary_alias, read_alias, record_write
+from geodiscounts.sharding import get_shard_map
+
+
 class GeoDiscountsRouter:
     """
     A database router to control all database operations on models in the `geodiscounts` app.
@@ -14,19 +22,63 @@ class GeoDiscountsRouter:
     DB_NAME = "geodiscounts_db"
 
     def db_for_read(self, model, **hints):
-        """Route read operations for geodiscounts models."""
+        """
+        Route read operations for geodiscounts models to a shard.
+
+        Lookups through an object's relations read from the shard it was
+        loaded from; other reads go to the default shard.
+        """
         if model._meta.app_label == self.APP_LABEL:
-            return self.DB_NAME
+            instance = hints.get("instance")
+            shard_map = get_shard_map()
+            if instance is not None:
+                loaded_from = primary_alias(instance._state.db)
+                if loaded_from in shard_map.aliases:
+                    return read_alias(loaded_from)
+            return read_alias(shard_map.default.alias)
         return None
 
     def db_for_write(self, model, **hints):
-        """Route write operations for geodiscounts models."""
+        """Route write operations for geodiscounts models to the owning shard."""
         if model._meta.app_label == self.APP_LABEL:
-            return self.DB_NAME
+            alias = self._shard_for_instance(hints.get("instance"))
+            record_write(alias)
+            return alias
         return None
 
+    def _shard_for_instance(self, instance):
+        """
+        Find the shard an object is written to.
+
+        An object loaded from a shard, or related to one, stays there; a new
+        one goes to the shard owning its location.
+
+        Args:
+            instance: The object being written, if known
+
+        Returns:
+            str: The shard's database alias
+        """
+        shard_map = get_shard_map()
+        if instance is None:
+            return shard_map.default.alias
+        loaded_from = primary_alias(instance._state.db)
+        if loaded_from in shard_map.aliases:
+            return loaded_from
+        return shard_map.shard_for_point(getattr(instance, "location", None)).alias
+
     def allow_relation(self, obj1, obj2, **hints):
-        """Allow relations if either object is in the geodiscounts app."""
+        """
+        Allow relations between geodiscounts objects on the same shard.
+
+        Objects read from a shard's replicas belong to the shard, whichever
+        replica or the primary they were loaded from.
+        """
+        if (
+            obj1._meta.app_label == self.APP_LABEL
+            and obj2._meta.app_label == self.APP_LABEL
+        ):
+            return primary_alias(obj1._state.db) == primary_alias(obj2._state.db)
         if (
             obj1._meta.app_label == self.APP_LABEL
             or obj2._meta.app_label == self.APP_LABEL
@@ -48,7 +100,7 @@ class GeoDiscountsRouter:
             bool | None: Whether to allow the migration
         """
         if app_label == self.APP_LABEL:
-            if db != self.DB_NAME:
+            if db not in get_shard_map().aliases:
                 return False
                 
             # Check for GIS compatibility if we have access to the schema editor
@@ -0,0 +1,266 @@
+"""
+Geographic sharding of the geodiscounts catalog.
+
+The catalog is split across several geodiscounts databases, each owning one or
+more geographic regions (longitude/latitude boxes, e.g. covering a country or a
+continent), as declared in the GEODISCOUNTS_SHARDS setting. A discount is placed
+on the shard owning its location, with a copy of its retailer on the same shard;
+points outside every region go to the first shard.
+
+Nearby queries only fan out to the shards whose regions the search area
+intersects, and their results are merged by distance; see
+geodiscounts.v1.utils.shard_queries. Every shard allocates ids from its own
+range, starting at ``index << ID_SHARD_BITS`` (see the configure_shard_sequences
+command), so an id alone identifies its shard.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+if TYPE_CHECKING:
+    from django.contrib.gis.geos import Point
+
+# Ids of shard i start at i << ID_SHARD_BITS
+ID_SHARD_BITS = 40
+
+KM_PER_DEGREE_LATITUDE = 111.32
+
+DEFAULT_SHARDS = [{"alias": "geodiscounts_db", "regions": [[-180, -90, 180, 90]]}]
+
+# Settings the shard map is built from
+SHARD_SETTINGS = {"GEODISCOUNTS_SHARDS"}
+
+_shard_map: Optional["ShardMap"] = None
+
+
+@dataclass(frozen=True)
+class Region:
+    """
+    A longitude/latitude box, in degrees.
+    """
+
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+    def contains(self, lon: float, lat: float) -> bool:
+        """
+        Check whether the region contains a point.
+
+        Args:
+            lon (float): The point's longitude.
+            lat (float): The point's latitude.
+
+        Returns:
+            bool: True if the point lies in the region, edges included.
+        """
+        return (
+            self.min_lon <= lon <= self.max_lon and self.min_lat <= lat <= self.max_lat
+        )
+
+    def intersects(self, other: "Region") -> bool:
+        """
+        Check whether two regions overlap.
+
+        Args:
+            other (Region): The other region.
+
+        Returns:
+            bool: True if the regions share at least a point.
+        """
+        return (
+            self.min_lon <= other.max_lon
+            and other.min_lon <= self.max_lon
+            and self.min_lat <= other.max_lat
+            and other.min_lat <= self.max_lat
+        )
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    A geodiscounts database and the regions it owns.
+
+    Attributes:
+        alias (str): The database alias.
+        index (int): The shard's position in GEODISCOUNTS_SHARDS, which selects
+            its id range.
+        regions (Tuple[Region, ...]): The regions it owns.
+    """
+
+    alias: str
+    index: int
+    regions: Tuple[Region, ...]
+
+
+def search_regions(lon: float, lat: float, radius_km: float) -> List[Region]:
+    """
+    Bound the area within a radius of a point by longitude/latitude boxes.
+
+    The box is split in two where it crosses the antimeridian, and spans all
+    longitudes where it reaches a pole.
+
+    Args:
+        lon (float): The center's longitude.
+        lat (float): The center's latitude.
+        radius_km (float): The radius, in kilometers.
+
+    Returns:
+        List[Region]: Boxes covering the area.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LATITUDE
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return [Region(-180, max(min_lat, -90), 180, min(max_lat, 90))]
+
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-9)
+    if dlon >= 180:
+        return [Region(-180, min_lat, 180, max_lat)]
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return [
+            Region(min_lon + 360, min_lat, 180, max_lat),
+            Region(-180, min_lat, max_lon, max_lat),
+        ]
+    if max_lon > 180:
+        return [
+            Region(min_lon, min_lat, 180, max_lat),
+            Region(-180, min_lat, max_lon - 360, max_lat),
+        ]
+    return [Region(min_lon, min_lat, max_lon, max_lat)]
+
+
+class ShardMap:
+    """
+    The geodiscounts shards and the regions they own.
+    """
+
+    def __init__(self, shards: Sequence[Shard]) -> None:
+        """
+        Initialize the shard map.
+
+        Args:
+            shards (Sequence[Shard]): The shards; the first one also holds
+                points outside every region.
+
+        Raises:
+            ValueError: If no shard is declared.
+        """
+        if not shards:
+            raise ValueError("At least one geodiscounts shard must be declared.")
+        self.shards: List[Shard] = list(shards)
+        self.default = self.shards[0]
+        self.aliases = {shard.alias for shard in self.shards}
+
+    def shard_for_point(self, point: Optional["Point"]) -> Shard:
+        """
+        Find the shard owning a location.
+
+        Args:
+            point (Optional[Point]): The location, in WGS 84.
+
+        Returns:
+            Shard: The first shard with a region containing the point, or the
+            default shard.
+        """
+        if point is not None:
+            for shard in self.shards:
+                if any(region.contains(point.x, point.y) for region in shard.regions):
+                    return shard
+        return self.default
+
+    def shards_for_radius(
+        self, point: "Point", radius_km: Optional[float] = None
+    ) -> List[Shard]:
+        """
+        Find the shards that may hold locations within a radius of a point.
+
+        Args:
+            point (Point): The center, in WGS 84.
+            radius_km (Optional[float]): The radius, in kilometers; all shards
+                if None.
+
+        Returns:
+            List[Shard]: The shards whose regions intersect the search area,
+            always including the default shard, which also holds points
+            outside every region.
+        """
+        if radius_km is None or len(self.shards) == 1:
+            return list(self.shards)
+        area = search_regions(point.x, point.y, radius_km)
+        return [
+            shard
+            for shard in self.shards
+            if shard is self.default
+            or any(
+                region.intersects(box) for region in shard.regions for box in area
+            )
+        ]
+
+    def shard_for_id(self, object_id: int) -> Shard:
+        """
+        Find the shard that allocated an id.
+
+        Args:
+            object_id (int): The id of a discount or retailer.
+
+        Returns:
+            Shard: The shard owning the id's range, or the default shard.
+        """
+        index = object_id >> ID_SHARD_BITS
+        if 0 <= index < len(self.shards):
+            return self.shards[index]
+        return self.default
+
+
+def build_shard_map() -> ShardMap:
+    """
+    Build the shard map from the GEODISCOUNTS_SHARDS setting.
+
+    Each entry is a mapping with an ``alias`` and a list of ``regions``, each
+    region being ``[min_lon, min_lat, max_lon, max_lat]``. Entries must only
+    ever be appended, as a shard's position selects its id range.
+
+    Returns:
+        ShardMap: The shard map.
+    """
+    declared = getattr(settings, "GEODISCOUNTS_SHARDS", None) or DEFAULT_SHARDS
+    return ShardMap(
+        [
+            Shard(
+                alias=spec["alias"],
+                index=index,
+                regions=tuple(Region(*bounds) for bounds in spec["regions"]),
+            )
+            for index, spec in enumerate(declared)
+        ]
+    )
+
+
+def get_shard_map() -> ShardMap:
+    """
+    Return the shard map, building it on first use.
+
+    Returns:
+        ShardMap: The shard map.
+    """
+    global _shard_map
+    if _shard_map is None:
+        _shard_map = build_shard_map()
+    return _shard_map
+
+
+@receiver(setting_changed)
+def reset_shard_map(setting: str, **kwargs: Any) -> None:
+    """
+    Discard the shard map when the setting it is built from changes.
+    """
+    global _shard_map
+    if setting in SHARD_SETTINGS:
+        _shard_map = None
@@ -0,0 +1,53 @@
+"""
+Celery tasks of the geodiscounts app, discovered by the Celery app.
+"""
+
+import logging
+from dataclasses import asdict
+from typing import Dict
+
+from celery import shared_task
+
+from geodiscounts.v1.utils.discount_sweeper import sweep_expired_discounts
+from geodiscounts.sharding import get_shard_map
+from geodiscounts.v1.utils.redis_utils import redis_client
+from geodiscounts.v1.utils.retailer_stats import refresh_retailer_stats
+
+logger = logging.getLogger(__name__)
+
+SWEEPER_LOCK_KEY = "discount_sweeper_lock"
+SWEEPER_LOCK_TIMEOUT = 3600
+
+
+@shared_task(name="geodiscounts.sweep_expired_discounts", ignore_result=True)
+def sweep_expired_discounts_task() -> Dict[str, int]:
+    """
+    Sweep expired discounts, unless a sweep is already running.
+
+    Returns:
+        Dict[str, int]: What the sweep removed; empty if it was skipped.
+    """
+    token = redis_client.acquire_lock(SWEEPER_LOCK_KEY, SWEEPER_LOCK_TIMEOUT)
+    if token is None:
+        logger.info("Expired discount sweep already running, skipped")
+        return {}
+    try:
+        return asdict(sweep_expired_discounts())
+    finally:
+        redis_client.release_lock(SWEEPER_LOCK_KEY, token)
+
+
+@shared_task(name="geodiscounts.refresh_retailer_stats", ignore_result=True)
+def refresh_retailer_stats_task() -> Dict[str, int]:
+    """
+    Rebuild the retailer aggregates of every shard, repairing any drift.
+
+    Returns:
+        Dict[str, int]: The number of retailers refreshed, by shard.
+    """
+    refreshed = {
+        shard.alias: refresh_retailer_stats(shard.alias)
+        for shard in get_shard_map().shards
+    }
+    logger.info(f"Refreshed retailer stats: {refreshed}")
+    return refreshed
@@ -2,7 +2,8 @@
 Serializers for the Discount Discovery System.
 
 These serializers transform model instances into JSON format and validate
-incoming data for Retailer, Discount, and SharedDiscount models.
+incoming data for Retailer, Discount, and SharedDiscount models, and for the
+participants of shared discounts.
 
 Author: Your Name
 Date: YYYY-MM-DD
@@ -11,6 +12,7 @@ Date: YYYY-MM-DD
 from rest_framework import serializers
 
 from geodiscounts.models import Discount, Retailer, SharedDiscount
+from geodiscounts.v1.utils.shard_queries import discount_code_exists
 
 
 class RetailerSerializer(serializers.ModelSerializer):
@@ -39,6 +41,30 @@ class RetailerSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
+class RetailerWithStatsSerializer(RetailerSerializer):
+    """
+    Serializer for a Retailer with its aggregates, read from RetailerStats.
+
+    Fields:
+        - All the fields of RetailerSerializer.
+        - active_discount_count: Number of active discounts of the retailer.
+        - share_count: Number of shares of the retailer's discounts.
+    """
+
+    active_discount_count = serializers.IntegerField(
+        source="stats.active_discount_count", read_only=True
+    )
+    share_count = serializers.IntegerField(
+        source="stats.share_count", read_only=True
+    )
+
+    class Meta(RetailerSerializer.Meta):
+        fields = RetailerSerializer.Meta.fields + [
+            "active_discount_count",
+            "share_count",
+        ]
+
+
 class DiscountSerializer(serializers.ModelSerializer):
     """
     Serializer for the Discount model.
@@ -69,6 +95,27 @@ class DiscountSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+        # The model only keys codes per expiration date; see validate_discount_code
+        validators = []
+
+    def validate_discount_code(self, value: str) -> str:
+        """
+        Ensure the discount code is unique across the shards.
+
+        Args:
+            value (str): Discount code to validate.
+
+        Returns:
+            str: The validated discount code.
+
+        Raises:
+            serializers.ValidationError: If the code is already in use.
+        """
+        if self.instance is not None and self.instance.discount_code == value:
+            return value
+        if discount_code_exists(value):
+            raise serializers.ValidationError("Discount code is already in use.")
+        return value
 
 
 class SharedDiscountSerializer(serializers.ModelSerializer):
@@ -79,13 +126,14 @@ class SharedDiscountSerializer(serializers.ModelSerializer):
         - id: The primary key of the shared discount.
         - discount: The related discount (nested).
         - group_name: Name of the group sharing the discount.
-        - participants: List of participants in the shared discount.
+        - participants: Identifiers of the participants, read from the memberships.
         - status: Status of the shared discount (active, completed, or expired).
         - created_at: Timestamp when the shared discount was created.
         - updated_at: Timestamp when the shared discount was last updated.
     """
 
     discount = DiscountSerializer(read_only=True)
+    participants = serializers.ListField(child=serializers.CharField(), read_only=True)
 
     class Meta:
         model = SharedDiscount
@@ -99,3 +147,14 @@ class SharedDiscountSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+
+
+class ParticipantSerializer(serializers.Serializer):
+    """
+    Serializer validating a participant added to a shared discount.
+
+    Fields:
+        - participant: Identifier of the participant (e.g., user ID or email).
+    """
+
+    participant = serializers.CharField(max_length=255)
@@ -0,0 +1,154 @@
+"""
+Signals keeping the retailer aggregates in step with discounts and shares.
+
+Signals:
+    - create_retailer_stats: Creates the aggregates of a new retailer.
+    - count_created_discount / count_deleted_discount: Adjust the retailer's
+      active discount count.
+    - count_created_share / count_deleted_share: Adjust the retailer's share
+      count.
+
+Error Handling:
+    Adjustments run in a savepoint, and their exceptions are logged without
+    interrupting the write that triggered them; the next refresh of the
+    retailer's aggregates repairs what they missed.
+    See geodiscounts/v1/utils/retailer_stats.py.
+"""
+
+import logging
+from typing import Optional
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from geodiscounts.models import Discount, Retailer, RetailerStats, SharedDiscount
+from geodiscounts.v1.utils.retailer_stats import (
+    adjust_retailer_stats,
+    retailer_of_discount,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _adjust(alias: str, retailer_id: Optional[int], **deltas: int) -> None:
+    """
+    Adjust a retailer's aggregates, logging failures.
+
+    Args:
+        alias (str): The shard's database alias.
+        retailer_id (Optional[int]): The retailer's id; nothing is done if None.
+        **deltas (int): The amount to add to each aggregate, by field name.
+    """
+    if retailer_id is None:
+        return
+    try:
+        with transaction.atomic(using=alias):
+            adjust_retailer_stats(alias, retailer_id, **deltas)
+    except Exception as e:
+        logger.error(f"Error adjusting the stats of retailer {retailer_id}: {e}")
+
+
+def _is_active(discount: Discount) -> bool:
+    """
+    Whether a discount has not expired.
+
+    Args:
+        discount (Discount): The discount; its expiration date may still be the
+            string it was created from, e.g. by ingestion.
+
+    Returns:
+        bool: True if the discount has not expired.
+    """
+    field = Discount._meta.get_field("expiration_date")
+    expiration = field.to_python(discount.expiration_date)
+    if timezone.is_naive(expiration):
+        expiration = timezone.make_aware(expiration)
+    return expiration > timezone.now()
+
+
+@receiver(post_save, sender=Retailer)
+def create_retailer_stats(sender, instance: Retailer, created: bool, **kwargs) -> None:
+    """
+    Create the empty aggregates of a new retailer, on its shard.
+
+    Args:
+        sender: The model class sending the signal.
+        instance (Retailer): The saved retailer.
+        created (bool): Whether the retailer was created.
+        **kwargs: Additional keyword arguments, including ``using``.
+    """
+    if not created:
+        return
+    try:
+        RetailerStats.objects.using(kwargs["using"]).get_or_create(retailer=instance)
+    except Exception as e:
+        logger.error(f"Error creating the stats of retailer {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=Discount)
+def count_created_discount(
+    sender, instance: Discount, created: bool, **kwargs
+) -> None:
+    """
+    Count a new discount that has not expired in its retailer's aggregates.
+
+    Args:
+        sender: The model class sending the signal.
+        instance (Discount): The saved discount.
+        created (bool): Whether the discount was created.
+        **kwargs: Additional keyword arguments, including ``using``.
+    """
+    if created and _is_active(instance):
+        _adjust(kwargs["using"], instance.retailer_id, active_discount_count=1)
+
+
+@receiver(post_delete, sender=Discount)
+def count_deleted_discount(sender, instance: Discount, **kwargs) -> None:
+    """
+    Uncount a deleted discount that had not expired.
+
+    Expired discounts were left to the sweeper's refresh.
+
+    Args:
+        sender: The model class sending the signal.
+        instance (Discount): The deleted discount.
+        **kwargs: Additional keyword arguments, including ``using``.
+    """
+    if _is_active(instance):
+        _adjust(kwargs["using"], instance.retailer_id, active_discount_count=-1)
+
+
+@receiver(post_save, sender=SharedDiscount)
+def count_created_share(
+    sender, instance: SharedDiscount, created: bool, **kwargs
+) -> None:
+    """
+    Count a new shared discount in its retailer's aggregates.
+
+    Args:
+        sender: The model class sending the signal.
+        instance (SharedDiscount): The saved shared discount.
+        created (bool): Whether the shared discount was created.
+        **kwargs: Additional keyword arguments, including ``using``.
+    """
+    if created:
+        alias = kwargs["using"]
+        retailer_id = retailer_of_discount(alias, instance.discount_id)
+        _adjust(alias, retailer_id, share_count=1)
+
+
+@receiver(post_delete, sender=SharedDiscount)
+def count_deleted_share(sender, instance: SharedDiscount, **kwargs) -> None:
+    """
+    Uncount a deleted shared discount.
+
+    Args:
+        sender: The model class sending the signal.
+        instance (SharedDiscount): The deleted shared discount.
+        **kwargs: Additional keyword arguments, including ``using``.
+    """
+    alias = kwargs["using"]
+    retailer_id = retailer_of_discount(alias, instance.discount_id)
+    _adjust(alias, retailer_id, share_count=-1)
@@ -0,0 +1,55 @@
+"""
+Base test case running the geodiscounts catalog on two shards.
+
+The test databases only migrate geodiscounts_db, the single shard of the
+settings. TwoShardTestCase adds a second shard, on the vector_db test database,
+whose geodiscounts tables are created inside the test case's transaction and
+so dropped with it. geodiscounts_db owns the western hemisphere and the second
+shard the eastern one. Shards are queried in the test's thread, whose
+connections see the test's data.
+"""
+
+from django.apps import apps
+from django.db import connections
+from django.db.models.fields import AutoFieldMixin
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from geodiscounts.sharding import ID_SHARD_BITS
+
+SECOND_SHARD = "vector_db"
+
+
+@override_settings(
+    GEODISCOUNTS_SHARDS=[
+        {"alias": "geodiscounts_db", "regions": [[-180, -90, 0, 90]]},
+        {"alias": SECOND_SHARD, "regions": [[0, -90, 180, 90]]},
+    ],
+    GEODISCOUNTS_FAN_OUT_WORKERS=0,
+)
+class TwoShardTestCase(APITestCase):
+    """
+    Test case with the geodiscounts catalog on two shards.
+    """
+
+    databases = {"default", "geodiscounts_db", SECOND_SHARD}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Creates the geodiscounts tables on the second shard, with their ids in
+        the shard's range.
+        """
+        super().setUpClass()
+        connection = connections[SECOND_SHARD]
+        models = list(apps.get_app_config("geodiscounts").get_models())
+        with connection.schema_editor() as editor:
+            for model in models:
+                editor.create_model(model)
+        with connection.cursor() as cursor:
+            for model in models:
+                if isinstance(model._meta.pk, AutoFieldMixin):
+                    cursor.execute(
+                        "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)",
+                        [model._meta.db_table, 1 << ID_SHARD_BITS],
+                    )
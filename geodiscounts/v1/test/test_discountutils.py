@@ -1,13 +1,29 @@
 import unittest
+from datetime import timedelta
 from typing import Dict
 from unittest.mock import MagicMock, patch
 
-from geodiscounts.models import Discount
+from django.contrib.gis.geos import Point
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from geodiscounts.models import (
+    Discount,
+    Retailer,
+    RetailerStats,
+    SharedDiscount,
+    SharedDiscountParticipant,
+)
+from geodiscounts.v1.test.shards import SECOND_SHARD, TwoShardTestCase
+from geodiscounts.v1.utils.discount_sweeper import sweep_expired_discounts
 from geodiscounts.v1.utils.discount_utils import (
     create_discount,
     delete_discount,
     get_discount_by_vector_id,
 )
+from geodiscounts.v1.utils.redis_utils import invalidate_discount_caches
+from geodiscounts.v1.utils.shard_queries import place_discount
 
 
 class TestDiscountUtils(unittest.TestCase):
@@ -38,56 +54,249 @@ class TestDiscountUtils(unittest.TestCase):
         mock_create.assert_called_once_with(**data)
         self.assertEqual(discount, mock_discount)
 
-    @patch("geodiscounts.models.Discount.objects.get")
-    def test_get_discount_by_vector_id_success(self, mock_get: MagicMock) -> None:
+    @patch("geodiscounts.v1.utils.discount_utils.filter_discounts")
+    def test_get_discount_by_vector_id_success(self, mock_filter: MagicMock) -> None:
         """
         Test retrieving a discount by its vector ID successfully.
 
-        Verifies that the `get` method is called with the correct vector ID.
+        Verifies that the shards are searched for the correct vector ID.
         """
         mock_discount = MagicMock()
-        mock_get.return_value = mock_discount
+        mock_filter.return_value = [mock_discount]
         vector_id = "12345"
         discount = get_discount_by_vector_id(vector_id)
-        mock_get.assert_called_once_with(vector_id=vector_id)
+        mock_filter.assert_called_once_with(vector_id=vector_id)
         self.assertEqual(discount, mock_discount)
 
-    @patch("geodiscounts.models.Discount.objects.get")
-    def test_get_discount_by_vector_id_not_found(self, mock_get: MagicMock) -> None:
+    @patch("geodiscounts.v1.utils.discount_utils.filter_discounts")
+    def test_get_discount_by_vector_id_not_found(self, mock_filter: MagicMock) -> None:
         """
         Test handling when a discount with the given vector ID is not found.
 
         Verifies that a `DoesNotExist` exception is raised.
         """
-        mock_get.side_effect = Discount.DoesNotExist
+        mock_filter.return_value = []
         vector_id = "nonexistent_id"
         with self.assertRaises(Discount.DoesNotExist):
             get_discount_by_vector_id(vector_id)
-        mock_get.assert_called_once_with(vector_id=vector_id)
+        mock_filter.assert_called_once_with(vector_id=vector_id)
 
-    @patch("geodiscounts.models.Discount.objects.get")
-    def test_delete_discount_success(self, mock_get: MagicMock) -> None:
+    @patch("geodiscounts.v1.utils.discount_utils.filter_discounts")
+    def test_delete_discount_success(self, mock_filter: MagicMock) -> None:
         """
         Test deleting a discount by its vector ID successfully.
 
         Verifies that the `delete` method is called on the retrieved discount object.
         """
         mock_discount = MagicMock()
-        mock_get.return_value = mock_discount
+        mock_filter.return_value = [mock_discount]
         vector_id = "12345"
         delete_discount(vector_id)
-        mock_get.assert_called_once_with(vector_id=vector_id)
+        mock_filter.assert_called_once_with(vector_id=vector_id)
         mock_discount.delete.assert_called_once()
 
-    @patch("geodiscounts.models.Discount.objects.get")
-    def test_delete_discount_not_found(self, mock_get: MagicMock) -> None:
+    @patch("geodiscounts.v1.utils.discount_utils.filter_discounts")
+    def test_delete_discount_not_found(self, mock_filter: MagicMock) -> None:
         """
         Test handling when attempting to delete a non-existent discount.
 
         Verifies that a `DoesNotExist` exception is raised.
         """
-        mock_get.side_effect = Discount.DoesNotExist
+        mock_filter.return_value = []
         vector_id = "nonexistent_id"
         with self.assertRaises(Discount.DoesNotExist):
             delete_discount(vector_id)
-        mock_get.assert_called_once_with(vector_id=vector_id)
+        mock_filter.assert_called_once_with(vector_id=vector_id)
+
+
+@override_settings(DISCOUNT_SWEEPER={"BATCH_SIZE": 1, "BATCH_PAUSE_SECONDS": 0})
+class TestDiscountSweeper(TestCase):
+    """
+    Test cases for the expired discount sweeper.
+    """
+
+    databases = {"default", "geodiscounts_db"}
+
+    def setUp(self) -> None:
+        """
+        Create an active discount and two expired ones, one of them shared.
+        """
+        retailer = Retailer.objects.create(name="Retailer", location=Point(0, 0))
+        now = timezone.now()
+        self.active, *self.expired = [
+            Discount.objects.create(
+                retailer=retailer,
+                description="Discount",
+                discount_code=code,
+                expiration_date=now + delta,
+                location=Point(0, 0),
+            )
+            for code, delta in [
+                ("ACTIVE", timedelta(days=1)),
+                ("EXPIRED1", timedelta(days=-1)),
+                ("EXPIRED2", timedelta(days=-2)),
+            ]
+        ]
+        SharedDiscount.objects.create(discount=self.expired[0], group_name="Group")
+
+    @patch("geodiscounts.v1.utils.discount_sweeper.invalidate_discount_caches")
+    def test_sweep_expired_discounts(self, mock_invalidate: MagicMock) -> None:
+        """
+        Test sweeping expired discounts in batches.
+
+        Verifies that expired discounts and their shared discounts are deleted,
+        active ones kept, that vectors and cache entries are removed per batch,
+        and that the retailer's aggregates are refreshed.
+        """
+        mock_invalidate.return_value = 2
+        vector_client = MagicMock()
+        vector_client.delete_vectors.return_value = 1
+
+        result = sweep_expired_discounts(vector_client)
+
+        self.assertEqual(list(Discount.all_objects.all()), [self.active])
+        self.assertFalse(SharedDiscount.objects.exists())
+        self.assertEqual(result.shared_discounts, 1)
+        self.assertEqual(result.vectors, 2)
+        self.assertEqual(result.cache_keys, 4)
+        swept = [call.args[0] for call in vector_client.delete_vectors.call_args_list]
+        self.assertEqual(swept, [[self.expired[1].id], [self.expired[0].id]])
+        stats = RetailerStats.objects.get(retailer_id=self.active.retailer_id)
+        self.assertEqual(stats.active_discount_count, 1)
+        self.assertEqual(stats.share_count, 0)
+
+
+class TestPlaceDiscount(TwoShardTestCase):
+    """
+    Test cases for placing discounts on their shard.
+    """
+
+    def test_place_discount_rejects_duplicate_codes(self) -> None:
+        """
+        Test placing a discount whose code is taken.
+
+        Verifies that codes stay unique whatever their expiration dates, even
+        though the discounts table only keys codes per expiration date.
+        """
+        now = timezone.now()
+        data = {
+            "description": "Discount",
+            "discount_code": "SAVE20",
+            "expiration_date": now + timedelta(days=1),
+            "location": Point(0, 0),
+        }
+        place_discount(data, "Retailer")
+
+        with self.assertRaises(ValidationError):
+            place_discount(
+                {**data, "expiration_date": now + timedelta(days=40)}, "Retailer"
+            )
+        self.assertEqual(Discount.all_objects.filter(discount_code="SAVE20").count(), 1)
+
+    def test_place_discount_rejects_codes_of_other_shards(self) -> None:
+        """
+        Test placing a discount whose code is taken in another region.
+
+        Verifies that the discounts are placed on the shards owning their
+        locations, and that a code used on one shard is refused on the other.
+        """
+        data = {
+            "description": "Discount",
+            "discount_code": "WORLDWIDE",
+            "expiration_date": timezone.now() + timedelta(days=1),
+            "location": Point(-10, 0),
+        }
+        discount = place_discount(data, "West")
+        self.assertEqual(discount._state.db, "geodiscounts_db")
+
+        with self.assertRaises(ValidationError):
+            place_discount({**data, "location": Point(10, 0)}, "East")
+        self.assertFalse(Discount.all_objects.using(SECOND_SHARD).exists())
+
+        discount = place_discount(
+            {**data, "discount_code": "EAST", "location": Point(10, 0)}, "East"
+        )
+        self.assertEqual(discount._state.db, SECOND_SHARD)
+
+
+class TestShardRouting(TwoShardTestCase):
+    """
+    Test cases for reading discounts stored outside the default shard.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create a retailer with a shared discount in the second shard's region.
+        """
+        retailer = Retailer.objects.create(name="Retailer", location=Point(10, 0))
+        discount = Discount.objects.create(
+            retailer=retailer,
+            description="Discount",
+            discount_code="EAST",
+            expiration_date=timezone.now() + timedelta(days=1),
+            location=Point(10, 0),
+        )
+        shared = SharedDiscount.objects.create(discount=discount, group_name="Group")
+        for participant in ["1", "2"]:
+            SharedDiscountParticipant.objects.create(
+                shared_discount=shared, participant=participant
+            )
+
+    def test_relations_read_from_the_objects_shard(self) -> None:
+        """
+        Test following the relations of objects loaded from the second shard.
+
+        Verifies that the objects were written to the shard owning their
+        location, and that lookups and prefetches through their relations read
+        from that shard rather than the default one.
+        """
+        self.assertFalse(Retailer.objects.using("geodiscounts_db").exists())
+
+        retailer = Retailer.objects.using(SECOND_SHARD).get()
+        self.assertEqual(
+            [discount.discount_code for discount in retailer.discounts.all()],
+            ["EAST"],
+        )
+        self.assertEqual(retailer.stats.active_discount_count, 1)
+
+        shared = SharedDiscount.objects.using(SECOND_SHARD).get()
+        self.assertEqual(shared.discount.retailer.name, "Retailer")
+        self.assertEqual(shared.participants, ["1", "2"])
+
+        shared = (
+            SharedDiscount.objects.using(SECOND_SHARD)
+            .prefetch_related("memberships")
+            .get()
+        )
+        self.assertEqual(shared.participants, ["1", "2"])
+
+
+class TestDiscountCacheInvalidation(unittest.TestCase):
+    """
+    Test cases for invalidating cached discount query results.
+    """
+
+    @patch("geodiscounts.v1.utils.redis_utils.redis_client")
+    def test_invalidate_discount_caches(self, mock_redis: MagicMock) -> None:
+        """
+        Test invalidating the cache entries containing some discounts.
+
+        Verifies that the indexed entries and the indexes are deleted in chunks.
+        """
+        mock_redis.pipeline.return_value.execute.side_effect = [
+            [{"nearby:a", "nearby:b"}, {"nearby:b"}],
+            [set()],
+        ]
+        mock_redis.delete.side_effect = lambda *keys: len(keys)
+
+        deleted = invalidate_discount_caches([1, 2, 3], chunk_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(
+            [call.args for call in mock_redis.delete.call_args_list],
+            [
+                ("nearby:a", "nearby:b"),
+                ("discount_cache_keys:1", "discount_cache_keys:2"),
+                ("discount_cache_keys:3",),
+            ],
+        )
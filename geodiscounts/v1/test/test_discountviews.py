@@ -8,12 +8,17 @@ Author: Your Name
 Date: YYYY-MM-DD
 """
 
-from unittest.mock import patch
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
 
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point
-from rest_framework.test import APITestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
 
 from geodiscounts.models import Discount, Retailer
+from geodiscounts.v1.views.async_geodiscount_views import AsyncSearchDiscountsView
 
 
 class DiscountAPITestCase(APITestCase):
@@ -32,7 +37,14 @@ class DiscountAPITestCase(APITestCase):
             retailer=self.retailer,
             description="20% off",
             discount_code="SAVE20",
-            expiration_date="2025-12-31",
+            expiration_date=timezone.now() + timedelta(days=30),
+            location=Point(12.4924, 41.8902),
+        )
+        self.expired_discount = Discount.objects.create(
+            retailer=self.retailer,
+            description="10% off",
+            discount_code="SAVE10",
+            expiration_date=timezone.now() - timedelta(days=1),
             location=Point(12.4924, 41.8902),
         )
 
@@ -42,6 +54,7 @@ class DiscountAPITestCase(APITestCase):
 
         Expected Behavior:
         - Returns HTTP 200 with a list of discounts.
+        - Expired discounts are not listed.
         """
         response = self.client.get("/api/geodiscount/v1/discounts/")
         self.assertEqual(response.status_code, 200)
@@ -54,6 +67,7 @@ class DiscountAPITestCase(APITestCase):
 
         Expected Behavior:
         - Returns HTTP 200 with a list of nearby discounts.
+        - Expired discounts are not returned.
         """
         mock_geolocation.return_value = {
             "latitude": 41.8902,
@@ -62,3 +76,117 @@ class DiscountAPITestCase(APITestCase):
         response = self.client.get("/api/geodiscount/v1/discounts/nearby/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 1)
+
+    def test_expired_discounts_are_kept(self):
+        """
+        Test case for expired discounts remaining stored until retired.
+
+        Expected Behavior:
+        - Discount.objects only returns active discounts.
+        - Discount.all_objects also returns expired discounts.
+        """
+        self.assertEqual(list(Discount.objects.all()), [self.discount])
+        self.assertEqual(Discount.all_objects.count(), 2)
+        self.assertEqual(list(Discount.all_objects.expired()), [self.expired_discount])
+
+
+class SearchDiscountsAPITestCase(APITestCase):
+    """
+    Tests for the discount search API views.
+    """
+
+    databases = {"default", "geodiscounts_db"}
+
+    def setUp(self):
+        """
+        Sets up an authenticated user and a retailer with active and expired
+        discounts.
+        """
+        self.user = get_user_model().objects.create_user(
+            username="searcher", email="searcher@example.com", password="pw"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        retailer = Retailer.objects.create(
+            name="Test Retailer", location=Point(12.4924, 41.8902)
+        )
+        self.discount = Discount.objects.create(
+            retailer=retailer,
+            description="20% off",
+            discount_code="SAVE20",
+            expiration_date=timezone.now() + timedelta(days=30),
+            location=Point(12.4924, 41.8902),
+        )
+        self.other_discount = Discount.objects.create(
+            retailer=retailer,
+            description="Free shipping",
+            discount_code="SHIPFREE",
+            expiration_date=timezone.now() + timedelta(days=30),
+            location=Point(12.4924, 41.8902),
+        )
+        self.expired_discount = Discount.objects.create(
+            retailer=retailer,
+            description="10% off",
+            discount_code="SAVE10",
+            expiration_date=timezone.now() - timedelta(days=1),
+            location=Point(12.4924, 41.8902),
+        )
+
+    @patch("geodiscounts.v1.views.geodiscount_views.client")
+    @patch("geodiscounts.v1.views.geodiscount_views.generate_embedding")
+    def test_search_discounts(self, mock_embedding, mock_client):
+        """
+        Test case for searching discounts with a free-text query.
+
+        Expected Behavior:
+        - Returns HTTP 200 with the active discounts whose vectors matched, looked
+          up by discount id and ordered by similarity.
+        """
+        mock_embedding.return_value = [0.1, 0.2]
+        mock_client.search_vectors.return_value = [
+            {"id": self.other_discount.id, "distance": 0.1},
+            {"id": self.expired_discount.id, "distance": 0.2},
+            {"id": self.discount.id, "distance": 0.3},
+        ]
+        response = self.client.post(
+            "/api/geodiscount/v1/discounts/search/",
+            {"query": "shipping", "top_k": 3},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [discount["discount_code"] for discount in response.data],
+            ["SHIPFREE", "SAVE20"],
+        )
+        mock_client.search_vectors.assert_called_once_with([0.1, 0.2], top_k=3)
+
+    @patch(
+        "geodiscounts.v1.views.async_geodiscount_views.async_client.search_vectors",
+        new_callable=AsyncMock,
+    )
+    @patch(
+        "geodiscounts.v1.views.async_geodiscount_views.agenerate_embedding",
+        new_callable=AsyncMock,
+    )
+    def test_async_search_discounts(self, mock_embedding, mock_search):
+        """
+        Test case for searching discounts with the async search view.
+
+        Expected Behavior:
+        - Returns HTTP 200 with the active discounts whose vectors matched.
+        """
+        mock_embedding.return_value = [0.1, 0.2]
+        mock_search.return_value = [
+            {"id": self.discount.id, "distance": 0.1},
+            {"id": self.expired_discount.id, "distance": 0.2},
+        ]
+        request = APIRequestFactory().post(
+            "/api/geodiscount/v1/discounts/search/", {"query": "sale"}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+        # Shard queries run in this thread, inside the test's transaction
+        response = async_to_sync(AsyncSearchDiscountsView.as_view())(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [discount["discount_code"] for discount in response.data], ["SAVE20"]
+        )
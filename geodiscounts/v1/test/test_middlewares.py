@@ -1,16 +1,56 @@
 """
-Tests for the ClientIPMiddleware class.
+Tests for the ClientIPMiddleware and TokenValidationMiddleware classes.
 
-This middleware extracts the client's IP address from the incoming request
+ClientIPMiddleware extracts the client's IP address from the incoming request
 and attaches it to the `request` object as `request.client_ip`. The tests
 verify that the middleware correctly handles different IP extraction scenarios.
 
+TokenValidationMiddleware validates bearer tokens and attaches user metadata,
+which is cached per token instead of being fetched on every request. The token
+is validated once per request and shared with the permission classes and DRF
+authentication through the request's authentication context.
+
 
 """
 
-from django.test import RequestFactory, TestCase
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
 
+from coupon_core.custom_middlewares.authentication_midldleware import (
+    TokenValidationMiddleware,
+)
+from coupon_core.custom_middlewares.replica_middleware import (
+    COOKIE_NAME,
+    ReadYourWritesMiddleware,
+)
 from coupon_core.custom_middlewares.userlocation_middleware import ClientIPMiddleware
+from coupon_core.utils.async_views import AsyncAPIView
+from coupon_core.utils.auth_context import ContextJWTAuthentication, get_auth_context
+from coupon_core.utils.db_replicas import (
+    ReplicaHealth,
+    get_replica_router,
+    primary_alias,
+    read_alias,
+    record_write,
+    reset_replica_router,
+)
+from coupon_core.utils.guest_identity import GUEST_ID_CLAIM, GuestUser
+from coupon_core.utils.permissions import IsAuthenticatedOrGuest, IsGuest
+from coupon_core.utils.route_policy import get_route_policy, get_route_table
+from coupon_core.utils.user_metadata_cache import LocalLRUCache, UserMetadataCache
+from geodiscounts.routers import GeoDiscountsRouter
 
 
 class ClientIPMiddlewareTest(TestCase):
@@ -48,3 +88,478 @@ class ClientIPMiddlewareTest(TestCase):
         request = RequestFactory().get("/", REMOTE_ADDR="127.0.0.1")
         self.middleware(request)
         self.assertEqual(request.client_ip, "127.0.0.1")
+
+    def test_async_chain(self):
+        """
+        Test the middleware in front of an async view.
+
+        Expected Behavior:
+        - The middleware is itself a coroutine function and sets `request.client_ip`.
+        """
+
+        async def view(request):
+            return request.client_ip
+
+        middleware = ClientIPMiddleware(view)
+        request = RequestFactory().get("/", REMOTE_ADDR="127.0.0.1")
+        self.assertEqual(async_to_sync(middleware)(request), "127.0.0.1")
+
+
+class AsyncAPIViewTest(TestCase):
+    """
+    Tests for the AsyncAPIView base class.
+    """
+
+    class EchoView(AsyncAPIView):
+        permission_classes = [AllowAny]
+        authentication_classes = []
+
+        async def get(self, request):
+            if "fail" in request.GET:
+                raise ValidationError("failed")
+            return Response({"echo": request.GET.get("value")})
+
+    def test_async_handler(self):
+        """
+        Test dispatching a request to an async handler.
+
+        Expected Behavior:
+        - The view is a coroutine function and returns the handler's response.
+        - Exceptions raised by the handler go through DRF's exception handling.
+        """
+        view = self.EchoView.as_view()
+        self.assertTrue(self.EchoView.view_is_async)
+
+        response = async_to_sync(view)(RequestFactory().get("/", {"value": "x"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"echo": "x"})
+
+        response = async_to_sync(view)(RequestFactory().get("/", {"fail": "1"}))
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    DATABASE_REPLICAS={
+        "default": [{"alias": "replica_1", "weight": 2}, {"alias": "replica_2"}]
+    },
+    DATABASE_REPLICA_ROUTING={"STICKY_SECONDS": 5},
+)
+class ReplicaRoutingTest(SimpleTestCase):
+    """
+    Tests for read-replica selection and the ReadYourWritesMiddleware class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Rebuilds the replica router and marks every replica healthy unless a
+        test says otherwise.
+        """
+        reset_replica_router("DATABASE_REPLICAS")
+        self.healthy = {"replica_1": True, "replica_2": True}
+        patcher = patch.object(
+            ReplicaHealth, "check", side_effect=lambda alias: self.healthy[alias]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_weighted_round_robin(self):
+        """
+        Test spreading reads over the replicas.
+
+        Expected Behavior:
+        - Reads follow the replica weights, interleaved.
+        - Primaries without replicas are read directly.
+        """
+        reads = [read_alias("default") for _ in range(6)]
+        self.assertEqual(
+            reads,
+            ["replica_1", "replica_2", "replica_1"] * 2,
+        )
+        self.assertEqual(read_alias("other"), "other")
+
+    def test_unhealthy_replicas_are_skipped(self):
+        """
+        Test reading while replicas fail their health checks.
+
+        Expected Behavior:
+        - An unhealthy replica receives no reads.
+        - Without a healthy replica, reads go to the primary.
+        """
+        self.healthy["replica_1"] = False
+        self.assertEqual({read_alias("default") for _ in range(3)}, {"replica_2"})
+
+        get_replica_router().health = ReplicaHealth(0, 30)
+        self.healthy["replica_2"] = False
+        self.assertEqual(read_alias("default"), "default")
+
+    def test_read_your_writes(self):
+        """
+        Test reads following a write in the same session.
+
+        Expected Behavior:
+        - Within a request, reads go to the primary after a write.
+        - The middleware pins later requests of the session through a cookie.
+        """
+
+        def write_view(request):
+            record_write("default")
+            return HttpResponse(read_alias("default"))
+
+        response = ReadYourWritesMiddleware(write_view)(RequestFactory().get("/"))
+        self.assertEqual(response.content, b"default")
+        self.assertIn(COOKIE_NAME, response.cookies)
+
+        def read_view(request):
+            return HttpResponse(read_alias("default"))
+
+        request = RequestFactory().get("/")
+        request.COOKIES[COOKIE_NAME] = response.cookies[COOKIE_NAME].value
+        self.assertEqual(
+            ReadYourWritesMiddleware(read_view)(request).content, b"default"
+        )
+        self.assertEqual(
+            ReadYourWritesMiddleware(read_view)(RequestFactory().get("/")).content,
+            b"replica_1",
+        )
+
+    def test_relations_across_replicas(self):
+        """
+        Test relating objects loaded from a primary and its replicas.
+
+        Expected Behavior:
+        - Replicas resolve to their primary.
+        - Objects of one primary relate, whichever replica loaded them.
+        - Objects of different primaries do not.
+        """
+        self.assertEqual(primary_alias("replica_2"), "default")
+        self.assertEqual(primary_alias("other"), "other")
+
+        def discount(alias):
+            obj = MagicMock()
+            obj._meta.app_label = GeoDiscountsRouter.APP_LABEL
+            obj._state.db = alias
+            return obj
+
+        router = GeoDiscountsRouter()
+        self.assertTrue(
+            router.allow_relation(discount("replica_1"), discount("default"))
+        )
+        self.assertTrue(
+            router.allow_relation(discount("replica_1"), discount("replica_2"))
+        )
+        self.assertFalse(
+            router.allow_relation(discount("replica_1"), discount("other"))
+        )
+
+    def test_health_checked_by_one_thread(self):
+        """
+        Test reading while a replica's health check is slow.
+
+        Expected Behavior:
+        - Only one thread checks a replica whose result is due.
+        - Other threads meanwhile reuse the previous result rather than wait.
+        """
+        health = ReplicaHealth(0, 30)
+        self.assertTrue(health.is_healthy("replica_1"))
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow_check(alias):
+            started.set()
+            release.wait(5)
+            return False
+
+        with patch.object(ReplicaHealth, "check", side_effect=slow_check) as check:
+            health.check_interval = 60
+            health._status["replica_1"] = (True, time.monotonic() - 120)
+            checker = threading.Thread(target=health.is_healthy, args=["replica_1"])
+            checker.start()
+            self.assertTrue(started.wait(5))
+            self.assertTrue(health.is_healthy("replica_1"))
+            release.set()
+            checker.join()
+        self.assertEqual(check.call_count, 1)
+        self.assertFalse(health.is_healthy("replica_1"))
+
+
+@override_settings(
+    PUBLIC_ENDPOINTS=["/api/public/"],
+    TRUSTED_PROXY_CIDRS=["10.0.0.0/8"],
+    ROUTE_POLICIES=[
+        {"prefix": "/api/", "auth_required": True},
+        {"prefix": "/api/public/private/", "auth_required": True},
+        {
+            "prefix": "/edge/",
+            "auth_required": False,
+            "trusted_proxies": ["203.0.113.0/24"],
+        },
+    ],
+)
+class RoutePolicyTest(TestCase):
+    """
+    Tests for the compiled route policy table.
+    """
+
+    def test_longest_prefix_wins(self):
+        """
+        Test resolving the policy of request paths.
+
+        Expected Behavior:
+        - PUBLIC_ENDPOINTS are public routes.
+        - The longest matching prefix decides, regardless of declaration order.
+        - Paths matching no prefix require authentication.
+        """
+        table = get_route_table()
+        self.assertFalse(table.resolve("/api/public/deals/").auth_required)
+        self.assertTrue(table.resolve("/api/public/private/x").auth_required)
+        self.assertTrue(table.resolve("/api/discounts/").auth_required)
+        self.assertFalse(table.resolve("/edge/ping").auth_required)
+        self.assertTrue(table.resolve("/elsewhere/").auth_required)
+
+    def test_client_ip_honours_only_trusted_proxies(self):
+        """
+        Test resolving client IPs through trusted proxies.
+
+        Expected Behavior:
+        - X-Forwarded-For from an untrusted peer is ignored.
+        - Behind trusted proxies, the right-most untrusted hop is the client,
+          so addresses prepended by the client cannot spoof it.
+        - Routes may declare their own trusted proxies.
+        """
+        middleware = ClientIPMiddleware(lambda request: None)
+        cases = [
+            ("/api/x", "198.51.100.7", "1.1.1.1", "198.51.100.7"),
+            ("/api/x", "10.0.0.2", "6.6.6.6, 1.1.1.1, 10.0.0.9", "1.1.1.1"),
+            ("/api/x", "10.0.0.2", "10.1.1.1, 10.0.0.9", "10.1.1.1"),
+            ("/edge/x", "10.0.0.2", "1.1.1.1", "10.0.0.2"),
+            ("/edge/x", "203.0.113.5", "1.1.1.1", "1.1.1.1"),
+        ]
+        for path, remote_addr, forwarded_for, expected in cases:
+            request = RequestFactory().get(
+                path, REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded_for
+            )
+            middleware(request)
+            self.assertEqual(request.client_ip, expected, (path, forwarded_for))
+
+    def test_policy_resolved_once_and_rebuilt_on_settings_change(self):
+        """
+        Test caching of the table and of the per-request policy.
+
+        Expected Behavior:
+        - A request's policy is resolved once and reused by both middlewares.
+        - Changing the route settings rebuilds the table.
+        """
+        request = RequestFactory().get("/api/public/deals/")
+        policy = get_route_policy(request)
+        self.assertIs(get_route_policy(request), policy)
+        response = TokenValidationMiddleware(lambda request: "ok")(request)
+        self.assertEqual(response, "ok")
+
+        with override_settings(PUBLIC_ENDPOINTS=[]):
+            policy = get_route_table().resolve("/api/public/deals/")
+            self.assertTrue(policy.auth_required)
+
+
+@override_settings(
+    AUTH_SERVICE_URL="http://auth.local",
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+)
+class TokenValidationMiddlewareTest(TestCase):
+    """
+    Tests for the user metadata cache of TokenValidationMiddleware.
+    """
+
+    def setUp(self) -> None:
+        """
+        Sets up the middleware with a mocked authentication service session.
+        """
+        self.middleware = TokenValidationMiddleware(lambda request: None)
+        self.middleware.session = MagicMock()
+        self.middleware.session.get.return_value = MagicMock(
+            status_code=200, json=lambda: {"id": 1, "email": "user@example.com"}
+        )
+        self.middleware.metadata_cache.shared.clear()
+
+    def _request(self, token: AccessToken):
+        request = RequestFactory().get(
+            "/geodiscounts/api/v1/discounts/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.middleware(request)
+        return request
+
+    def _token(self, user_id: int = 1) -> AccessToken:
+        token = AccessToken()
+        token["user_id"] = user_id
+        return token
+
+    def test_user_metadata_is_fetched_once_per_token(self):
+        """
+        Test that repeated requests with the same token call the authentication
+        service once, with a timeout, and reuse the cached metadata.
+
+        Expected Behavior:
+        - The first request fetches the metadata; later requests hit the cache.
+        """
+        token = self._token()
+        for _ in range(3):
+            request = self._request(token)
+
+        self.assertEqual(request.user_metadata["email"], "user@example.com")
+        self.middleware.session.get.assert_called_once()
+        self.assertIn("timeout", self.middleware.session.get.call_args.kwargs)
+
+    def test_shared_tier_serves_other_workers(self):
+        """
+        Test that metadata cached by one worker is served from Redis to another.
+
+        Expected Behavior:
+        - A second middleware instance with an empty LRU does not call the service.
+        """
+        token = self._token()
+        self._request(token)
+
+        other = TokenValidationMiddleware(lambda request: None)
+        other.session = MagicMock()
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        other(request)
+
+        other.session.get.assert_not_called()
+        self.assertEqual(request.user_metadata["id"], 1)
+
+    def test_cache_ttl_is_bounded_by_token_expiry(self):
+        """
+        Test that cached metadata never outlives the token it was fetched with.
+
+        Expected Behavior:
+        - The TTL is capped at the token's remaining lifetime.
+        """
+        cache = UserMetadataCache(ttl=300)
+        claims = {"jti": "abc", "exp": int(time.time()) + 30}
+        self.assertLessEqual(cache.ttl_for(claims), 30)
+        self.assertEqual(cache.ttl_for({"jti": "abc", "exp": 0}), 0)
+
+        cache.set({"jti": "expired", "exp": 0}, {"id": 1})
+        self.assertIsNone(cache.get({"jti": "expired", "exp": 0}))
+
+    def test_cache_read_errors_fall_back_to_the_service(self):
+        """
+        Test that an unavailable Redis tier does not fail the request.
+
+        Expected Behavior:
+        - The metadata is fetched from the authentication service instead.
+        """
+        with patch.object(
+            UserMetadataCache, "shared", new_callable=MagicMock
+        ) as shared:
+            shared.get.side_effect = ConnectionError("Redis down")
+            shared.set.side_effect = ConnectionError("Redis down")
+            request = self._request(self._token())
+
+        self.assertEqual(request.user_metadata["id"], 1)
+        self.middleware.session.get.assert_called_once()
+
+    def test_local_lru_evicts_least_recently_used(self):
+        """
+        Test that the in-process LRU keeps at most its configured entries.
+
+        Expected Behavior:
+        - The least recently used entry is evicted first.
+        """
+        lru = LocalLRUCache(max_entries=2)
+        lru.set("a", 1, ttl=60)
+        lru.set("b", 2, ttl=60)
+        lru.get("a")
+        lru.set("c", 3, ttl=60)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("c"), 3)
+
+
+class AuthContextTest(TestCase):
+    """
+    Tests for the request-scoped authentication context.
+    """
+
+    def _guest_request(self):
+        token = AccessToken()
+        token["user_id"] = 1
+        token["is_guest"] = True
+        return RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_token_is_validated_once_per_request(self):
+        """
+        Test that the middleware, both permission classes and DRF authentication
+        share a single validation of the bearer token.
+
+        Expected Behavior:
+        - JWTAuthentication.get_validated_token is called exactly once.
+        """
+        request = self._guest_request()
+        middleware = TokenValidationMiddleware(lambda request: None)
+        original = JWTAuthentication.get_validated_token
+
+        with patch.object(
+            JWTAuthentication,
+            "get_validated_token",
+            autospec=True,
+            side_effect=original,
+        ) as validate:
+            middleware(request)
+            drf_request = Request(request)
+            self.assertTrue(IsGuest().has_permission(drf_request, None))
+            self.assertTrue(IsAuthenticatedOrGuest().has_permission(drf_request, None))
+            with patch.object(ContextJWTAuthentication, "get_user") as get_user:
+                user, token = ContextJWTAuthentication().authenticate(drf_request)
+
+        self.assertEqual(validate.call_count, 1)
+        self.assertTrue(request.is_guest)
+        self.assertEqual(user, get_user.return_value)
+        self.assertTrue(token["is_guest"])
+
+    def test_invalid_and_missing_tokens(self):
+        """
+        Test how requests without a token or with an invalid token are handled.
+
+        Expected Behavior:
+        - Without a token, DRF authentication is skipped and permissions deny.
+        - With an invalid or malformed token, authentication raises InvalidToken.
+        """
+        missing = Request(RequestFactory().get("/"))
+        self.assertIsNone(ContextJWTAuthentication().authenticate(missing))
+        self.assertFalse(IsGuest().has_permission(missing, None))
+
+        for header in ("Bearer not-a-jwt", "Bearer two parts"):
+            request = Request(RequestFactory().get("/", HTTP_AUTHORIZATION=header))
+            self.assertFalse(get_auth_context(request).is_valid)
+            self.assertFalse(IsAuthenticatedOrGuest().has_permission(request, None))
+            with self.assertRaises(InvalidToken):
+                ContextJWTAuthentication().authenticate(request)
+
+    def test_ephemeral_guest_token(self):
+        """
+        Test a guest token carrying an ephemeral guest id instead of a user id.
+
+        Expected Behavior:
+        - DRF authentication returns a GuestUser without querying the database.
+        - The middleware and permission classes treat the request as a guest.
+        """
+        token = AccessToken()
+        token[GUEST_ID_CLAIM] = "guest-123"
+        token["is_guest"] = True
+        token["email"] = "guest@example.com"
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        TokenValidationMiddleware(lambda request: None)(request)
+        drf_request = Request(request)
+        with self.assertNumQueries(0):
+            user, _ = ContextJWTAuthentication().authenticate(drf_request)
+
+        self.assertTrue(request.is_guest)
+        self.assertTrue(IsAuthenticatedOrGuest().has_permission(drf_request, None))
+        self.assertIsInstance(user, GuestUser)
+        self.assertEqual(user.pk, "guest-123")
+        self.assertEqual(user.username, "guest")
+        self.assertTrue(user.is_authenticated and user.is_guest)
@@ -8,10 +8,13 @@ Author: Your Name
 Date: YYYY-MM-DD
 """
 
+from datetime import timedelta
+
 from django.contrib.gis.geos import Point
+from django.utils import timezone
 from rest_framework.test import APITestCase
 
-from geodiscounts.models import Retailer
+from geodiscounts.models import Discount, Retailer, SharedDiscount
 
 
 class RetailerAPITestCase(APITestCase):
@@ -49,3 +52,70 @@ class RetailerAPITestCase(APITestCase):
         response = self.client.get(f"/api/geodiscount/v1/retailers/{self.retailer.id}/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["name"], "Test Retailer")
+
+    def test_retailer_stats_follow_discounts(self):
+        """
+        Test case for the discount and share counts of a retailer.
+
+        Expected Behavior:
+        - Counts active discounts and shares as they are created.
+        - Ignores discounts created already expired.
+        - Uncounts a deleted discount and its shares.
+        """
+        now = timezone.now()
+        discount = Discount.objects.create(
+            retailer=self.retailer,
+            description="Active discount",
+            discount_code="ACTIVE",
+            expiration_date=now + timedelta(days=1),
+            location=Point(12.4924, 41.8902),
+        )
+        Discount.objects.create(
+            retailer=self.retailer,
+            description="Expired discount",
+            discount_code="EXPIRED",
+            expiration_date=now - timedelta(days=1),
+            location=Point(12.4924, 41.8902),
+        )
+        SharedDiscount.objects.create(discount=discount, group_name="Group")
+        url = f"/api/geodiscount/v1/retailers/{self.retailer.id}/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["active_discount_count"], 1)
+        self.assertEqual(response.data["share_count"], 1)
+
+        discount.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data["active_discount_count"], 0)
+        self.assertEqual(response.data["share_count"], 0)
+
+    def test_retailer_list_ordering(self):
+        """
+        Test case for sorting retailers by their aggregates.
+
+        Expected Behavior:
+        - Returns HTTP 200 with retailers sorted by the requested count.
+        - Returns HTTP 400 for an unsupported ordering.
+        """
+        popular = Retailer.objects.create(
+            name="Popular Retailer", location=Point(12.4924, 41.8902)
+        )
+        Discount.objects.create(
+            retailer=popular,
+            description="Discount",
+            discount_code="POPULAR",
+            expiration_date=timezone.now() + timedelta(days=1),
+            location=Point(12.4924, 41.8902),
+        )
+
+        response = self.client.get(
+            "/api/geodiscount/v1/retailers/?ordering=-active_discount_count"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [retailer["name"] for retailer in response.data],
+            ["Popular Retailer", "Test Retailer"],
+        )
+
+        response = self.client.get("/api/geodiscount/v1/retailers/?ordering=rating")
+        self.assertEqual(response.status_code, 400)
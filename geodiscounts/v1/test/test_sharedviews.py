@@ -0,0 +1,212 @@
+"""
+Tests for the shared discount API views.
+
+These tests validate listing the shared discounts a user participates in, and
+adding and removing participants, on one shard and across shards.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from geodiscounts.models import (
+    Discount,
+    Retailer,
+    SharedDiscount,
+    SharedDiscountParticipant,
+)
+from geodiscounts.v1.test.shards import SECOND_SHARD, TwoShardTestCase
+
+
+class SharedDiscountAPITestCase(APITestCase):
+    """
+    Tests for the shared discount API views.
+    """
+
+    databases = {"default", "geodiscounts_db"}
+
+    def setUp(self):
+        """
+        Sets up a shared discount with the authenticated user and another
+        participant, and a shared discount without them.
+        """
+        self.user = get_user_model().objects.create_user(
+            username="participant", email="participant@example.com", password="pw"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.me = str(self.user.pk)
+
+        retailer = Retailer.objects.create(name="Retailer", location=Point(0, 0))
+        discount = Discount.objects.create(
+            retailer=retailer,
+            description="Discount",
+            discount_code="SHARED",
+            expiration_date=timezone.now() + timedelta(days=1),
+            location=Point(0, 0),
+        )
+        self.shared = SharedDiscount.objects.create(
+            discount=discount, group_name="Group"
+        )
+        self.other = SharedDiscount.objects.create(
+            discount=discount, group_name="Other group"
+        )
+        for participant in [self.me, "friend"]:
+            SharedDiscountParticipant.objects.create(
+                shared_discount=self.shared, participant=participant
+            )
+        SharedDiscountParticipant.objects.create(
+            shared_discount=self.other, participant="stranger"
+        )
+
+    def participants_url(self, shared_discount_id, participant=None):
+        """
+        Returns the URL of a shared discount's participants, or of one of them.
+        """
+        url = f"/api/geodiscount/v1/shared-discounts/{shared_discount_id}/participants/"
+        return f"{url}{participant}/" if participant else url
+
+    def test_shared_discount_list(self):
+        """
+        Test case for listing the user's shared discounts.
+
+        Expected Behavior:
+        - Returns HTTP 200 with only the shared discounts the user is in,
+          with their participants.
+        """
+        response = self.client.get("/api/geodiscount/v1/shared-discounts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["id"] for item in response.data], [self.shared.id])
+        self.assertEqual(response.data[0]["participants"], [self.me, "friend"])
+
+    def test_add_participant(self):
+        """
+        Test case for adding participants.
+
+        Expected Behavior:
+        - Returns HTTP 201 when a participant adds someone new.
+        - Returns HTTP 200 when the participant is already in the group.
+        - Returns HTTP 403 when a non-participant adds someone else.
+        - Returns HTTP 403 for an unknown shared discount, as for one the user
+          is not in.
+        """
+        url = self.participants_url(self.shared.id)
+        response = self.client.post(url, {"participant": "newcomer"})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(url, {"participant": "newcomer"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.shared.participants, [self.me, "friend", "newcomer"])
+
+        response = self.client.post(
+            self.participants_url(self.other.id), {"participant": "newcomer"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            self.participants_url(self.other.id + 1000), {"participant": self.me}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_join_and_leave(self):
+        """
+        Test case for users adding and removing themselves.
+
+        Expected Behavior:
+        - Returns HTTP 403 when the user joins a group without an invite.
+        - Returns HTTP 204 when the user leaves a group, then HTTP 404.
+        - Returns HTTP 403 when the user joins the group they left.
+        - Returns HTTP 403 when a non-participant removes someone else.
+        """
+        response = self.client.post(
+            self.participants_url(self.other.id), {"participant": self.me}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.other.participants, ["stranger"])
+
+        url = self.participants_url(self.shared.id, self.me)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        response = self.client.post(
+            self.participants_url(self.shared.id), {"participant": self.me}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.shared.participants, ["friend"])
+
+        url = self.participants_url(self.shared.id, "friend")
+        self.assertEqual(self.client.delete(url).status_code, 403)
+
+
+class SharedDiscountShardsAPITestCase(TwoShardTestCase):
+    """
+    Tests for the shared discount API views with groups on several shards.
+    """
+
+    def setUp(self):
+        """
+        Sets up a shared discount with the authenticated user on each shard.
+        """
+        self.user = get_user_model().objects.create_user(
+            username="participant", email="participant@example.com", password="pw"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.me = str(self.user.pk)
+
+        self.shared = {}
+        for name, longitude in [("West", -10), ("East", 10)]:
+            retailer = Retailer.objects.create(
+                name=name, location=Point(longitude, 0)
+            )
+            discount = Discount.objects.create(
+                retailer=retailer,
+                description="Discount",
+                discount_code=name.upper(),
+                expiration_date=timezone.now() + timedelta(days=1),
+                location=Point(longitude, 0),
+            )
+            self.shared[name] = SharedDiscount.objects.create(
+                discount=discount, group_name=name
+            )
+            for participant in [self.me, f"friend in the {name}"]:
+                SharedDiscountParticipant.objects.create(
+                    shared_discount=self.shared[name], participant=participant
+                )
+
+    def test_shared_discount_list(self):
+        """
+        Test case for listing shared discounts stored on different shards.
+
+        Expected Behavior:
+        - Returns HTTP 200 with the user's shared discounts of every shard,
+          each with its participants and discount.
+        """
+        self.assertEqual(self.shared["East"]._state.db, SECOND_SHARD)
+
+        response = self.client.get("/api/geodiscount/v1/shared-discounts/")
+        self.assertEqual(response.status_code, 200)
+        groups = {item["group_name"]: item for item in response.data}
+        self.assertEqual(set(groups), {"West", "East"})
+        for name in ["West", "East"]:
+            self.assertEqual(
+                groups[name]["participants"], [self.me, f"friend in the {name}"]
+            )
+            self.assertEqual(groups[name]["discount"]["discount_code"], name.upper())
+
+    def test_add_participant(self):
+        """
+        Test case for adding a participant to a shared discount on the second
+        shard.
+
+        Expected Behavior:
+        - Returns HTTP 201, and the participant is listed with the group.
+        """
+        shared = self.shared["East"]
+        response = self.client.post(
+            f"/api/geodiscount/v1/shared-discounts/{shared.id}/participants/",
+            {"participant": "newcomer"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            shared.participants, [self.me, "friend in the East", "newcomer"]
+        )
@@ -8,11 +8,23 @@ these functions.
 
 """
 
-from unittest.mock import patch
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
 
-from django.test import TestCase
+import requests
+from django.contrib.gis.geos import Point
+from django.core.exceptions import ValidationError
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
 
+from geodiscounts.sharding import ID_SHARD_BITS, get_shard_map, search_regions
+from geodiscounts.v1.utils.kafka_consumer import DiscountConsumer, heartbeat_age
 from geodiscounts.v1.utils.ip_geolocation import (
+    aget_location_from_ip,
     calculate_distance,
     get_location_from_ip,
     validate_max_distance,
@@ -42,6 +54,47 @@ class UtilsTest(TestCase):
         self.assertEqual(result["latitude"], 37.7749)
         self.assertEqual(result["longitude"], -122.4194)
 
+    @patch("geodiscounts.v1.utils.ip_geolocation.requests.get")
+    def test_aget_location_from_ip(self, mock_get):
+        """
+        Test case for fetching geolocation data from async views.
+
+        Expected Behavior:
+        - The function should return the location on success, passing its timeout
+          to the HTTP request, and None on errors.
+        """
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {
+            "status": "success",
+            "lat": 37.7749,
+            "lon": -122.4194,
+        }
+        result = asyncio.run(aget_location_from_ip("8.8.8.8", timeout=2.0))
+        self.assertEqual(result["latitude"], 37.7749)
+        mock_get.assert_called_once_with("http://ip-api.com/json/8.8.8.8", timeout=2.0)
+
+        mock_get.side_effect = requests.ConnectionError("unreachable")
+        self.assertIsNone(asyncio.run(aget_location_from_ip("8.8.8.8")))
+
+    @patch("geodiscounts.v1.utils.ip_geolocation.requests.get")
+    def test_aget_location_from_ip_timeout(self, mock_get):
+        """
+        Test case for a geolocation API that does not respond in time.
+
+        Expected Behavior:
+        - The function should stop waiting after the timeout and return None.
+        """
+        mock_get.side_effect = lambda *args, **kwargs: time.sleep(0.5)
+
+        async def lookup():
+            started = time.monotonic()
+            location = await aget_location_from_ip("8.8.8.8", timeout=0.05)
+            return location, time.monotonic() - started
+
+        location, elapsed = asyncio.run(lookup())
+        self.assertIsNone(location)
+        self.assertLess(elapsed, 0.5)
+
     def test_validate_max_distance_valid(self):
         """
         Test case for validating a valid `max_distance` parameter.
@@ -73,3 +126,205 @@ class UtilsTest(TestCase):
         coord2 = (48.8566, 2.3522)  # Paris
         result = calculate_distance(coord1, coord2)
         self.assertAlmostEqual(result, 1105.5, places=1)
+
+
+@override_settings(
+    GEODISCOUNTS_SHARDS=[
+        {"alias": "geodiscounts_db", "regions": [[-180, -90, -30, 90]]},
+        {"alias": "geodiscounts_db_eu", "regions": [[-30, 30, 45, 72]]},
+        {"alias": "geodiscounts_db_asia", "regions": [[45, -10, 180, 80]]},
+    ]
+)
+class ShardMapTest(SimpleTestCase):
+    """
+    Tests for the geographic shard map of the geodiscounts catalog.
+    """
+
+    def test_shard_for_point(self):
+        """
+        Test case for placing locations on shards.
+
+        Expected Behavior:
+        - A location goes to the shard whose region contains it.
+        - A location outside every region, or no location, goes to the first shard.
+        """
+        shard_map = get_shard_map()
+        self.assertEqual(
+            shard_map.shard_for_point(Point(2.35, 48.85, srid=4326)).alias,
+            "geodiscounts_db_eu",
+        )
+        self.assertEqual(
+            shard_map.shard_for_point(Point(18.4, -33.9, srid=4326)).alias,
+            "geodiscounts_db",
+        )
+        self.assertEqual(shard_map.shard_for_point(None).alias, "geodiscounts_db")
+
+    def test_shards_for_radius(self):
+        """
+        Test case for selecting the shards a nearby query fans out to.
+
+        Expected Behavior:
+        - A small radius only reaches the shard owning the center, plus the
+          default shard.
+        - A radius crossing a region boundary reaches both shards.
+        - No radius reaches every shard.
+        """
+        shard_map = get_shard_map()
+        paris = Point(2.35, 48.85, srid=4326)
+        self.assertEqual(
+            [shard.alias for shard in shard_map.shards_for_radius(paris, 50)],
+            ["geodiscounts_db", "geodiscounts_db_eu"],
+        )
+        tehran = Point(51.4, 35.7, srid=4326)
+        self.assertEqual(
+            [shard.alias for shard in shard_map.shards_for_radius(tehran, 1000)],
+            ["geodiscounts_db", "geodiscounts_db_eu", "geodiscounts_db_asia"],
+        )
+        self.assertEqual(len(shard_map.shards_for_radius(paris)), 3)
+
+    def test_shard_for_id(self):
+        """
+        Test case for finding the shard that allocated an id.
+
+        Expected Behavior:
+        - An id in shard i's range maps to shard i; an unknown range maps to
+          the first shard.
+        """
+        shard_map = get_shard_map()
+        self.assertEqual(shard_map.shard_for_id(42).alias, "geodiscounts_db")
+        self.assertEqual(
+            shard_map.shard_for_id((2 << ID_SHARD_BITS) + 42).alias,
+            "geodiscounts_db_asia",
+        )
+        self.assertEqual(
+            shard_map.shard_for_id(9 << ID_SHARD_BITS).alias, "geodiscounts_db"
+        )
+
+    def test_search_regions_antimeridian(self):
+        """
+        Test case for bounding a search area crossing the antimeridian.
+
+        Expected Behavior:
+        - The area is split into two boxes, one on each side.
+        """
+        regions = search_regions(179.9, 0, 50)
+        self.assertEqual(len(regions), 2)
+        self.assertEqual(regions[0].max_lon, 180)
+        self.assertEqual(regions[1].min_lon, -180)
+
+
+@override_settings(KAFKA_BROKER_URL="kafka:9092")
+class DiscountConsumerTest(SimpleTestCase):
+    """
+    Tests for the long-running Kafka discount consumer.
+    """
+
+    def setUp(self):
+        """
+        Configure a consumer writing its heartbeat to a temporary file.
+        """
+        heartbeat_dir = tempfile.mkdtemp()
+        self.config = {
+            "TOPIC": "discounts_topic",
+            "GROUP_ID": "discounts_group",
+            "POLL_TIMEOUT": 0,
+            "HEARTBEAT_FILE": os.path.join(heartbeat_dir, "heartbeat"),
+            "HEARTBEAT_INTERVAL": 0,
+            "HEARTBEAT_MAX_AGE": 60,
+            "RESTART_BACKOFF": 0,
+            "RESTART_BACKOFF_MAX": 0,
+        }
+
+    def _message(self, value):
+        """
+        Build a Kafka message without error.
+        """
+        message = MagicMock()
+        message.error.return_value = None
+        message.value.return_value = value
+        return message
+
+    @patch("geodiscounts.v1.utils.kafka_consumer.ingest_discount_data")
+    def test_consume_until_stopped(self, mock_ingest):
+        """
+        Test case for consuming messages until a stop is requested.
+
+        Expected Behavior:
+        - Valid messages are ingested; malformed ones are skipped.
+        - Offsets are stored after each message, and the consumer is closed.
+        - A heartbeat is written while consuming.
+        """
+        kafka = MagicMock()
+        consumer = DiscountConsumer(self.config, lambda config: kafka)
+        messages = [
+            self._message(json.dumps({"discount_code": "SAVE20"}).encode()),
+            self._message(b"not json"),
+        ]
+
+        def poll(timeout):
+            if messages:
+                return messages.pop(0)
+            consumer.stop()
+            return None
+
+        kafka.poll.side_effect = poll
+        consumer.run()
+
+        mock_ingest.assert_called_once_with({"discount_code": "SAVE20"})
+        self.assertEqual(kafka.store_offsets.call_count, 2)
+        kafka.close.assert_called_once()
+        self.assertLess(heartbeat_age(self.config["HEARTBEAT_FILE"]), 60)
+
+    @patch("geodiscounts.v1.utils.kafka_consumer.ingest_discount_data")
+    def test_ingest_errors(self, mock_ingest):
+        """
+        Test case for discounts that fail to be ingested.
+
+        Expected Behavior:
+        - A rejected discount is skipped and its offset stored.
+        - On a database error the offset is not stored, and the message is
+          consumed again by a new session.
+        """
+        mock_ingest.side_effect = [
+            ValidationError("Discount code SAVE20 already exists."),
+            OperationalError("connection lost"),
+            None,
+        ]
+        rejected = self._message(json.dumps({"discount_code": "SAVE20"}).encode())
+        message = self._message(json.dumps({"discount_code": "SAVE10"}).encode())
+        failing, healthy = MagicMock(), MagicMock()
+        failing.poll.side_effect = [rejected, message]
+        sessions = [failing, healthy]
+        consumer = DiscountConsumer(self.config, lambda config: sessions.pop(0))
+
+        def poll(timeout):
+            consumer.stop()
+            return message
+
+        healthy.poll.side_effect = poll
+        consumer.run()
+
+        failing.store_offsets.assert_called_once_with(message=rejected)
+        failing.close.assert_called_once()
+        healthy.store_offsets.assert_called_once_with(message=message)
+        self.assertEqual(mock_ingest.call_count, 3)
+
+    @patch("geodiscounts.v1.utils.kafka_consumer.ingest_discount_data")
+    def test_restart_on_failure(self, mock_ingest):
+        """
+        Test case for restarting the consume loop after a failure.
+
+        Expected Behavior:
+        - A failed session is closed and a new consumer is created.
+        """
+        failing, healthy = MagicMock(), MagicMock()
+        failing.poll.side_effect = RuntimeError("broker unreachable")
+        sessions = [failing, healthy]
+        consumer = DiscountConsumer(self.config, lambda config: sessions.pop(0))
+        healthy.poll.side_effect = lambda timeout: consumer.stop()
+
+        consumer.run()
+
+        failing.close.assert_called_once()
+        healthy.close.assert_called_once()
+        self.assertEqual(sessions, [])
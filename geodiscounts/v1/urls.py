@@ -7,20 +7,45 @@ All endpoints are prefixed with `v1/` to ensure modularity and maintainability.
 Endpoints:
     - v1/discounts/          : List all available discounts.
     - v1/discounts/nearby/   : Fetch discounts near the user's location (based on IP).
+    - v1/discounts/search/   : Search discounts with a free-text query.
     - v1/retailers/          : List all retailers.
     - v1/retailers/<id>/     : Fetch details of a specific retailer by ID.
+    - v1/shared-discounts/   : List the requesting user's shared discounts.
+    - v1/shared-discounts/<id>/participants/
+                             : Add a participant to a shared discount.
+    - v1/shared-discounts/<id>/participants/<participant>/
+                             : Remove a participant from a shared discount.
 
 Author: Your Name
 Date: YYYY-MM-DD
 """
 
+from django.conf import settings
 from django.urls import path
 
+from geodiscounts.v1.views.async_geodiscount_views import (
+    AsyncNearbyDiscountsView,
+    AsyncSearchDiscountsView,
+)
 from geodiscounts.v1.views.geodiscount_views import (
     DiscountListView,
     NearbyDiscountsView,
+    SearchDiscountsView,
 )
 from geodiscounts.v1.views.retailer_views import RetailerDetailView, RetailerListView
+from geodiscounts.v1.views.shared_discount_views import (
+    SharedDiscountListView,
+    SharedDiscountParticipantDetailView,
+    SharedDiscountParticipantsView,
+)
+
+# The nearby and search endpoints are served by their async views under ASGI
+if getattr(settings, "GEODISCOUNTS_ASYNC_VIEWS", False):
+    nearby_discounts_view = AsyncNearbyDiscountsView.as_view()
+    search_discounts_view = AsyncSearchDiscountsView.as_view()
+else:
+    nearby_discounts_view = NearbyDiscountsView.as_view()
+    search_discounts_view = SearchDiscountsView.as_view()
 
 app_name = "geodiscounts_v1"
 
@@ -29,9 +54,14 @@ urlpatterns = [
     path("v1/discounts/", DiscountListView.as_view(), name="discount_list"),
     path(
         "v1/discounts/nearby/",
-        NearbyDiscountsView.as_view(),
+        nearby_discounts_view,
         name="nearby_discounts",
     ),
+    path(
+        "v1/discounts/search/",
+        search_discounts_view,
+        name="search_discounts",
+    ),
     # Retailer-related endpoints
     path("v1/retailers/", RetailerListView.as_view(), name="retailer_list"),
     path(
@@ -39,4 +69,20 @@ urlpatterns = [
         RetailerDetailView.as_view(),
         name="retailer_detail",
     ),
+    # Shared discount endpoints
+    path(
+        "v1/shared-discounts/",
+        SharedDiscountListView.as_view(),
+        name="shared_discount_list",
+    ),
+    path(
+        "v1/shared-discounts/<int:shared_discount_id>/participants/",
+        SharedDiscountParticipantsView.as_view(),
+        name="shared_discount_participants",
+    ),
+    path(
+        "v1/shared-discounts/<int:shared_discount_id>/participants/<str:participant>/",
+        SharedDiscountParticipantDetailView.as_view(),
+        name="shared_discount_participant_detail",
+    ),
 ]
@@ -0,0 +1,151 @@
+"""
+Sweeper of expired discounts.
+
+Deletes expired discounts and their shared discounts from every geodiscounts
+shard, in small batches of short transactions so that the hot tables are never
+locked for long, and after each batch removes the discounts' vectors from the
+vector database in one statement, invalidates the cached query results
+containing them and refreshes the aggregates of their retailers. Vectors are
+keyed by discount id.
+
+Runs as the ``sweep_expired_discounts`` Celery task, scheduled by Celery beat;
+a Redis lock keeps sweeps from overlapping.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from geodiscounts.models import Discount, SharedDiscount
+from geodiscounts.sharding import get_shard_map
+from geodiscounts.v1.utils.redis_utils import invalidate_discount_caches
+from geodiscounts.v1.utils.retailer_stats import refresh_retailer_stats
+from geodiscounts.v1.utils.vector_utils import PostgreSQLVectorClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SWEEPER = {
+    "BATCH_SIZE": 500,
+    "CACHE_CHUNK_SIZE": 500,
+    "BATCH_PAUSE_SECONDS": 0.1,
+    "GRACE_SECONDS": 0,
+    "MAX_BATCHES": 1000,
+}
+
+
+@dataclass
+class SweepResult:
+    """
+    What a sweep removed.
+
+    Attributes:
+        discounts (int): Discounts deleted.
+        shared_discounts (int): Shared discounts deleted.
+        vectors (int): Vectors deleted.
+        cache_keys (int): Cache keys deleted.
+        retailers (int): Retailers whose aggregates were refreshed.
+    """
+
+    discounts: int = 0
+    shared_discounts: int = 0
+    vectors: int = 0
+    cache_keys: int = 0
+    retailers: int = 0
+
+
+def get_sweeper_config() -> Dict[str, Any]:
+    """
+    Return the sweeper settings, with defaults for the missing ones.
+
+    Returns:
+        Dict[str, Any]: The DISCOUNT_SWEEPER setting.
+    """
+    return {**DEFAULT_SWEEPER, **getattr(settings, "DISCOUNT_SWEEPER", {})}
+
+
+def _delete_batch(alias: str, discount_ids: List[int], cutoff: Any) -> SweepResult:
+    """
+    Delete a batch of discounts and their shared discounts from a shard.
+
+    Args:
+        alias (str): The shard's database alias.
+        discount_ids (List[int]): The ids of the discounts.
+        cutoff (Any): The expiration cutoff, repeated so that the delete only
+            touches the partitions of expired months.
+
+    Returns:
+        SweepResult: The rows deleted.
+    """
+    with transaction.atomic(using=alias):
+        shared, _ = (
+            SharedDiscount.objects.using(alias)
+            .filter(discount_id__in=discount_ids)
+            .delete()
+        )
+        discounts, _ = (
+            Discount.all_objects.using(alias)
+            .filter(id__in=discount_ids, expiration_date__lte=cutoff)
+            .delete()
+        )
+    return SweepResult(discounts=discounts, shared_discounts=shared)
+
+
+def sweep_expired_discounts(
+    vector_client: Optional[PostgreSQLVectorClient] = None,
+) -> SweepResult:
+    """
+    Delete expired discounts, their shared discounts, vectors and cache entries.
+
+    Args:
+        vector_client (Optional[PostgreSQLVectorClient]): The vector database
+            client; a new one is used by default.
+
+    Returns:
+        SweepResult: What the sweep removed.
+    """
+    config = get_sweeper_config()
+    cutoff = timezone.now() - timedelta(seconds=config["GRACE_SECONDS"])
+    vector_client = vector_client or PostgreSQLVectorClient()
+    total = SweepResult()
+
+    for shard in get_shard_map().shards:
+        for _ in range(config["MAX_BATCHES"]):
+            expired = list(
+                Discount.all_objects.using(shard.alias)
+                .expired(cutoff)
+                .order_by("expiration_date")
+                .values_list("id", "retailer_id")[: config["BATCH_SIZE"]]
+            )
+            if not expired:
+                break
+            discount_ids = [discount_id for discount_id, _ in expired]
+
+            batch = _delete_batch(shard.alias, discount_ids, cutoff)
+            batch.vectors = vector_client.delete_vectors(discount_ids)
+            batch.cache_keys = invalidate_discount_caches(
+                discount_ids, config["CACHE_CHUNK_SIZE"]
+            )
+            batch.retailers = refresh_retailer_stats(
+                shard.alias, {retailer_id for _, retailer_id in expired}
+            )
+            for field, value in asdict(batch).items():
+                setattr(total, field, getattr(total, field) + value)
+
+            if len(discount_ids) < config["BATCH_SIZE"]:
+                break
+            # Lets replication and concurrent writers catch up between batches
+            time.sleep(config["BATCH_PAUSE_SECONDS"])
+        else:
+            logger.warning(
+                f"Sweep of {shard.alias} stopped after {config['MAX_BATCHES']} "
+                "batches; the next sweep continues it"
+            )
+
+    logger.info(f"Swept expired discounts: {asdict(total)}")
+    return total
@@ -2,11 +2,14 @@
 Utility module for handling discount metadata operations.
 
 Provides helper functions for managing relational database entries for discounts.
+Discounts are created on the geodiscounts shard owning their location and looked
+up across all shards.
 """
 
 from typing import Any, Dict
 
 from geodiscounts.models import Discount
+from geodiscounts.v1.utils.shard_queries import filter_discounts
 
 
 def create_discount(data: Dict[str, Any]) -> Discount:
@@ -32,8 +35,14 @@ def get_discount_by_vector_id(vector_id: str) -> Discount:
 
     Returns:
         Discount: The discount object associated with the vector ID.
+
+    Raises:
+        Discount.DoesNotExist: If no shard holds a matching discount.
     """
-    return Discount.objects.get(vector_id=vector_id)
+    discounts = filter_discounts(vector_id=vector_id)
+    if not discounts:
+        raise Discount.DoesNotExist(f"No discount with vector ID {vector_id}.")
+    return discounts[0]
 
 
 def delete_discount(vector_id: str) -> None:
@@ -43,5 +52,5 @@ def delete_discount(vector_id: str) -> None:
     Args:
         vector_id (str): The unique ID of the vector.
     """
-    discount = Discount.objects.get(vector_id=vector_id)
+    discount = get_discount_by_vector_id(vector_id)
     discount.delete()
@@ -1,6 +1,10 @@
-from typing import List
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
 
 import torch
+from django.conf import settings
 from transformers import AutoModel, AutoTokenizer
 
 # Initialize model and tokenizer (use a pre-trained embedding model)
@@ -26,3 +30,106 @@ def generate_embedding(query: str) -> List[float]:
         return embedding
     except Exception as e:
         raise ValueError(f"Failed to generate embedding: {str(e)}")
+
+
+class ExecutorBusyError(RuntimeError):
+    """
+    Raised when a bounded executor already holds its maximum of pending jobs.
+    """
+
+
+class BoundedExecutor:
+    """
+    Thread pool running CPU-bound work for async views, with a bounded backlog.
+
+    The pool's size caps how many jobs run at once, and submissions beyond
+    ``max_pending`` running or queued jobs are rejected instead of queuing
+    without bound, so overload is reported to clients rather than turning into
+    ever-growing latency.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers (int): Number of worker threads.
+            max_pending (int): Maximum number of running and queued jobs.
+        """
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="embedding"
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a function in the pool and await its result.
+
+        Args:
+            func (Callable[..., Any]): The function to run.
+            *args (Any): Its positional arguments.
+
+        Returns:
+            Any: The function's return value.
+
+        Raises:
+            ExecutorBusyError: If ``max_pending`` jobs are already pending.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorBusyError("Too many pending jobs.")
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, func, *args
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+_embedding_executor: Optional[BoundedExecutor] = None
+_embedding_executor_lock = threading.Lock()
+
+
+def get_embedding_executor() -> BoundedExecutor:
+    """
+    Return the process-wide embedding executor, creating it on first use.
+
+    Its size is read from the EMBEDDING_EXECUTOR setting.
+
+    Returns:
+        BoundedExecutor: The embedding executor.
+    """
+    global _embedding_executor
+    if _embedding_executor is None:
+        with _embedding_executor_lock:
+            if _embedding_executor is None:
+                config = settings.EMBEDDING_EXECUTOR
+                _embedding_executor = BoundedExecutor(
+                    max_workers=config["MAX_WORKERS"],
+                    max_pending=config["MAX_PENDING"],
+                )
+    return _embedding_executor
+
+
+async def agenerate_embedding(query: str) -> List[float]:
+    """
+    Generate an embedding vector in the embedding executor.
+
+    Async version of `generate_embedding`, for async views; the event loop is
+    not blocked while the model runs.
+
+    Args:
+        query (str): The input query string.
+
+    Returns:
+        List[float]: The embedding vector as a list of floats.
+
+    Raises:
+        ValueError: If the embedding cannot be generated.
+        ExecutorBusyError: If the embedding executor is saturated.
+    """
+    return await get_embedding_executor().run(generate_embedding, query)
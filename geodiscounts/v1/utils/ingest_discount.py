@@ -1,11 +1,18 @@
-from geodiscounts.models import Discount, Retailer
+import logging
 from typing import Dict
 
+from geodiscounts.v1.utils.shard_queries import place_discount
+
+logger = logging.getLogger(__name__)
+
+
 def ingest_discount_data(data: Dict[str, str]) -> None:
     """
     Ingest discount data into the database.
 
-    This function creates or updates a retailer and a discount based on the provided data.
+    This function creates or updates a retailer and a discount based on the provided data,
+    on the geodiscounts shard owning the discount's location. Errors are raised to the
+    caller, which decides whether the message can be skipped or must be retried.
 
     Args:
         data (Dict[str, str]): A dictionary containing discount information, including:
@@ -17,26 +24,27 @@ def ingest_discount_data(data: Dict[str, str]) -> None:
 
     Returns:
         None
+
+    Raises:
+        ValidationError: If the discount's code is already used.
+        DatabaseError: If the discount cannot be written.
     """
-    try:
-        retailer_name = data.get('retailer_name')
-        discount_description = data.get('description')
-        discount_code = data.get('discount_code')
-        expiration_date = data.get('expiration_date')
-        location = data.get('location')  # Ensure this is a Point object
-
-        # Create or get the retailer
-        retailer, created = Retailer.objects.get_or_create(name=retailer_name)
-
-        # Create the discount
-        discount = Discount(
-            retailer=retailer,
-            description=discount_description,
-            discount_code=discount_code,
-            expiration_date=expiration_date,
-            location=location  # Ensure this is a Point object
-        )
-        discount.save()
-        print(f"Saved discount: {discount.description} for retailer: {retailer.name}")
-    except Exception as e:
-        print(f"Error ingesting discount data: {e}")
+    retailer_name = data.get('retailer_name')
+    discount_description = data.get('description')
+    discount_code = data.get('discount_code')
+    expiration_date = data.get('expiration_date')
+    location = data.get('location')  # Ensure this is a Point object
+
+    # Create the discount, and get or create the retailer, on the owning shard
+    discount = place_discount(
+        {
+            "description": discount_description,
+            "discount_code": discount_code,
+            "expiration_date": expiration_date,
+            "location": location,  # Ensure this is a Point object
+        },
+        retailer_name,
+    )
+    logger.info(
+        f"Saved discount: {discount.description} for retailer: {discount.retailer.name}"
+    )
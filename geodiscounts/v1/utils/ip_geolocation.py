@@ -7,24 +7,59 @@ IP-based geolocation, input validation, and geospatial calculations.
 
 Functions:
     - get_location_from_ip: Fetches geolocation data based on a user's IP address.
+    - aget_location_from_ip: Async version of `get_location_from_ip`, for async views.
     - validate_max_distance: Validates and converts the `max_distance` parameter.
     - calculate_distance: Calculates the geodesic distance between two coordinates.
 
 
 """
 
+import asyncio
+import logging
 from typing import Any, Dict, Optional, Tuple
 
 import requests
+from asgiref.sync import sync_to_async
 from geopy.distance import geodesic
 
+logger = logging.getLogger(__name__)
 
-def get_location_from_ip(ip: str) -> Optional[Dict[str, Any]]:
+# Seconds allowed for the whole geolocation lookup in async views
+GEOLOCATION_TIMEOUT = 3.0
+
+
+def _parse_location(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Extracts the location fields from an ip-api.com response.
+
+    Args:
+        data (Dict[str, Any]): The decoded JSON response.
+
+    Returns:
+        Optional[Dict[str, Any]]: The location, or None if the lookup failed.
+    """
+    if data.get("status") != "success":
+        return None
+    return {
+        "latitude": data.get("lat"),
+        "longitude": data.get("lon"),
+        "country": data.get("country"),
+        "region": data.get("regionName"),
+        "city": data.get("city"),
+        "zip": data.get("zip"),
+    }
+
+
+def get_location_from_ip(
+    ip: str, timeout: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
     """
     Fetches geolocation data (latitude, longitude) for a given IP address using an external API.
 
     Args:
         ip (str): The IP address of the user.
+        timeout (Optional[float]): Seconds to wait for the API to connect and to
+            respond; waits indefinitely if None.
 
     Returns:
         Optional[Dict[str, Any]]: A dictionary containing latitude, longitude, and additional
@@ -44,24 +79,40 @@ def get_location_from_ip(ip: str) -> Optional[Dict[str, Any]]:
     """
     GEOLOCATION_API_URL = "http://ip-api.com/json/"
     try:
-        response = requests.get(f"{GEOLOCATION_API_URL}{ip}")
+        response = requests.get(f"{GEOLOCATION_API_URL}{ip}", timeout=timeout)
         if response.status_code == 200:
-            data = response.json()
-            if data.get("status") == "success":
-                return {
-                    "latitude": data.get("lat"),
-                    "longitude": data.get("lon"),
-                    "country": data.get("country"),
-                    "region": data.get("regionName"),
-                    "city": data.get("city"),
-                    "zip": data.get("zip"),
-                }
+            return _parse_location(response.json())
         return None
     except requests.RequestException as e:
         print(f"Error fetching geolocation: {e}")
         return None
 
 
+async def aget_location_from_ip(
+    ip: str, timeout: float = GEOLOCATION_TIMEOUT
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetches geolocation data for a given IP address without blocking the event loop.
+
+    Async version of `get_location_from_ip`, for async views. The lookup runs in a
+    worker thread, and the view stops waiting for it once the timeout has passed.
+
+    Args:
+        ip (str): The IP address of the user.
+        timeout (float): Seconds allowed for the whole lookup.
+
+    Returns:
+        Optional[Dict[str, Any]]: The location, as returned by `get_location_from_ip`.
+        Returns None if the API call fails, times out or cannot resolve the IP address.
+    """
+    lookup = sync_to_async(get_location_from_ip, thread_sensitive=False)
+    try:
+        return await asyncio.wait_for(lookup(ip, timeout), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Geolocation lookup for {ip} timed out after {timeout}s")
+        return None
+
+
 def validate_max_distance(max_distance: str) -> float:
     """
     Validates and converts the `max_distance` parameter to a float.
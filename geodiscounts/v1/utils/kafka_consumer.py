@@ -1,36 +1,227 @@
+"""
+Long-running Kafka consumer ingesting discounts.
+
+Runs as its own service process (``python manage.py run_discount_consumer``),
+not as a Celery task, so that it never holds a Celery worker slot. The consumer:
+
+- stops gracefully: after a stop request it finishes the current message,
+  commits the offsets of the processed messages and leaves its consumer group;
+- restarts on failure: errors of the consume loop are logged and the loop is
+  restarted with exponential backoff, without exiting the process;
+- reports liveness: it touches a heartbeat file while its loop runs, which
+  ``run_discount_consumer --check`` compares against a maximum age.
+
+Offsets are only stored once a message has been ingested, or rejected as
+invalid, so a message is never lost, but may be ingested again after a crash
+or a database error.
+"""
+
 import json
 import logging
-from kafka import KafkaConsumer
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from confluent_kafka import Consumer, KafkaError, KafkaException
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, close_old_connections
+
 from .ingest_discount import ingest_discount_data
-from celery import shared_task
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-@shared_task
-def start_consumer() -> None:
+DEFAULT_CONSUMER = {
+    "TOPIC": "discounts_topic",
+    "GROUP_ID": "discounts_group",
+    "POLL_TIMEOUT": 1.0,
+    "HEARTBEAT_FILE": "/tmp/discount_consumer.heartbeat",
+    "HEARTBEAT_INTERVAL": 10.0,
+    "HEARTBEAT_MAX_AGE": 60.0,
+    "RESTART_BACKOFF": 1.0,
+    "RESTART_BACKOFF_MAX": 60.0,
+}
+
+
+# Errors of a discount that would fail again however often it is ingested
+REJECTED_DISCOUNT_ERRORS = (
+    AttributeError,
+    DataError,
+    IntegrityError,
+    KeyError,
+    TypeError,
+    ValidationError,
+    ValueError,
+)
+
+
+def get_consumer_config() -> Dict[str, Any]:
+    """
+    Return the consumer settings, with defaults for the missing ones.
+
+    Returns:
+        Dict[str, Any]: The KAFKA_CONSUMER setting.
+    """
+    return {**DEFAULT_CONSUMER, **getattr(settings, "KAFKA_CONSUMER", {})}
+
+
+def heartbeat_age(heartbeat_file: str) -> Optional[float]:
     """
-    Start the Kafka consumer to listen for discount messages.
+    Return the seconds since the consumer's last heartbeat.
 
-    This function continuously listens for messages on the specified Kafka topic
-    and processes them by calling the ingest_discount_data function.
+    Args:
+        heartbeat_file (str): The heartbeat file.
 
     Returns:
-        None
+        Optional[float]: The heartbeat's age, or None if there is none.
     """
     try:
-        consumer = KafkaConsumer(
-            'discounts_topic',  # Replace with your Kafka topic name
-            bootstrap_servers=settings.KAFKA_BROKER_URL,
-            auto_offset_reset='earliest',
-            enable_auto_commit=True,
-            group_id='discounts_group',
-            value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+        return time.time() - os.path.getmtime(heartbeat_file)
+    except OSError:
+        return None
+
+
+class DiscountConsumer:
+    """
+    Supervised Kafka consumer feeding discounts to `ingest_discount_data`.
+    """
+
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        consumer_factory: Callable[[Dict[str, Any]], Any] = Consumer,
+    ) -> None:
+        """
+        Initialize the consumer.
+
+        Args:
+            config (Optional[Dict[str, Any]]): The consumer settings; defaults
+                to the KAFKA_CONSUMER setting.
+            consumer_factory (Callable[[Dict[str, Any]], Any]): Builds the
+                Kafka consumer from its configuration.
+        """
+        self.config = config or get_consumer_config()
+        self.consumer_factory = consumer_factory
+        self._stop = threading.Event()
+        self._last_heartbeat = 0.0
+
+    def stop(self) -> None:
+        """
+        Request a graceful stop; safe to call from a signal handler.
+        """
+        self._stop.set()
+
+    @property
+    def stopping(self) -> bool:
+        """
+        Whether a stop was requested.
+        """
+        return self._stop.is_set()
+
+    def run(self) -> None:
+        """
+        Consume until stopped, restarting the consume loop after failures.
+        """
+        backoff = self.config["RESTART_BACKOFF"]
+        while not self.stopping:
+            started = time.monotonic()
+            try:
+                self._consume()
+            except Exception as e:
+                logger.exception(f"Discount consumer failed, restarting: {e}")
+                # A loop that ran for a while recovered; start backing off anew
+                if time.monotonic() - started > self.config["RESTART_BACKOFF_MAX"]:
+                    backoff = self.config["RESTART_BACKOFF"]
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.config["RESTART_BACKOFF_MAX"])
+        logger.info("Discount consumer stopped")
+
+    def _consume(self) -> None:
+        """
+        Run one consumer session until stopped or failed.
+
+        Raises:
+            KafkaException: On a fatal consumer error.
+        """
+        consumer = self.consumer_factory(
+            {
+                "bootstrap.servers": settings.KAFKA_BROKER_URL,
+                "group.id": self.config["GROUP_ID"],
+                "auto.offset.reset": "earliest",
+                # Offsets are committed in the background, but only those
+                # stored after a message is processed
+                "enable.auto.commit": True,
+                "enable.auto.offset.store": False,
+            }
         )
+        try:
+            consumer.subscribe([self.config["TOPIC"]])
+            logger.info(f"Discount consumer subscribed to {self.config['TOPIC']}")
+            while not self.stopping:
+                self._heartbeat()
+                message = consumer.poll(self.config["POLL_TIMEOUT"])
+                if message is None:
+                    continue
+                error = message.error()
+                if error is not None:
+                    if error.fatal():
+                        raise KafkaException(error)
+                    if error.code() != KafkaError._PARTITION_EOF:
+                        logger.warning(f"Kafka consumer error: {error}")
+                    continue
+                self._process(message.value())
+                consumer.store_offsets(message=message)
+        finally:
+            # Commits the stored offsets and leaves the group
+            consumer.close()
+
+    def _process(self, value: bytes) -> None:
+        """
+        Ingest a discount message.
 
-        for message in consumer:
-            data = message.value
-            ingest_discount_data(data)  # Call the ingestion function
-    except Exception as e:
-        logging.error(f"Error in Kafka consumer: {e}")
+        Malformed messages, and discounts the database rejects, are logged and
+        skipped, so that they do not stop the consumer. Other errors, such as a
+        lost database connection, are raised: the message's offset is then not
+        stored, and it is consumed again by the restarted session.
+
+        Args:
+            value (bytes): The message's JSON payload.
+        """
+        try:
+            data = json.loads(value.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError, AttributeError) as e:
+            logger.error(f"Skipping malformed discount message: {e}")
+            return
+        # As around requests: drop connections broken or past their maximum age
+        close_old_connections()
+        try:
+            ingest_discount_data(data)
+        except REJECTED_DISCOUNT_ERRORS as e:
+            logger.error(f"Skipping rejected discount message: {e!r}")
+        finally:
+            close_old_connections()
+
+    def _heartbeat(self) -> None:
+        """
+        Touch the heartbeat file, at most once per HEARTBEAT_INTERVAL.
+        """
+        now = time.monotonic()
+        if now - self._last_heartbeat < self.config["HEARTBEAT_INTERVAL"]:
+            return
+        self._last_heartbeat = now
+        try:
+            with open(self.config["HEARTBEAT_FILE"], "a"):
+                os.utime(self.config["HEARTBEAT_FILE"])
+        except OSError as e:
+            logger.warning(f"Failed to write the consumer heartbeat: {e}")
+
+
+def start_consumer() -> None:
+    """
+    Run the discount consumer in the current process until it is stopped.
+
+    Returns:
+        None
+    """
+    DiscountConsumer().run()
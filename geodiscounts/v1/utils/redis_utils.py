@@ -2,25 +2,88 @@
 Utility module for Redis operations specific to geodiscounts.
 
 Extends RedisClient functionality for discount-specific use cases.
+
+Cached query results are indexed by the discounts they contain, so that the
+entries containing a discount can be invalidated when it expires or is deleted.
 """
 
 import json
+from typing import Iterable, List, Set
 
 from authentication.v1.utils.redis_client import RedisClient
 
+# Set of the cache keys whose results contain a discount
+DISCOUNT_INDEX_PREFIX = "discount_cache_keys:"
+
 redis_client = RedisClient()
 
 
+def discount_index_key(discount_id: int) -> str:
+    """
+    Return the key of the set indexing the cache entries containing a discount.
+
+    Args:
+        discount_id (int): The discount's id.
+
+    Returns:
+        str: The index key.
+    """
+    return f"{DISCOUNT_INDEX_PREFIX}{discount_id}"
+
+
 def cache_discount_query(key: str, results: list, expiry: int = 300) -> None:
     """
     Cache discount query results in Redis.
 
     Args:
         key (str): The cache key.
-        results (list): The query results to cache.
+        results (list): The query results to cache, serialized discounts with
+            an ``id``.
         expiry (int): Time-to-live (TTL) for the cache in seconds (default: 300).
     """
-    redis_client.set_token(key, json.dumps(results), expiry)
+    pipe = redis_client.pipeline()
+    pipe.set(key, json.dumps(results), ex=expiry)
+    for result in results:
+        if isinstance(result, dict) and "id" in result:
+            index_key = discount_index_key(result["id"])
+            pipe.sadd(index_key, key)
+            # The index outlives the entries it lists by at most one expiry
+            pipe.expire(index_key, expiry)
+    pipe.execute()
+
+
+def invalidate_discount_caches(
+    discount_ids: Iterable[int], chunk_size: int = 500
+) -> int:
+    """
+    Delete the cached query results containing some discounts.
+
+    Keys are looked up and deleted in chunks, so that Redis is never blocked
+    by one large command.
+
+    Args:
+        discount_ids (Iterable[int]): The ids of the discounts.
+        chunk_size (int): The maximum number of discounts looked up, and of
+            keys deleted, per command.
+
+    Returns:
+        int: The number of cache keys deleted, indexes included.
+    """
+    discount_ids = list(discount_ids)
+    deleted = 0
+    for start in range(0, len(discount_ids), chunk_size):
+        index_keys = [
+            discount_index_key(discount_id)
+            for discount_id in discount_ids[start : start + chunk_size]
+        ]
+        pipe = redis_client.pipeline()
+        for index_key in index_keys:
+            pipe.smembers(index_key)
+        cached: Set[str] = set().union(*pipe.execute())
+        keys: List[str] = sorted(cached) + index_keys
+        for key_start in range(0, len(keys), chunk_size):
+            deleted += redis_client.delete(*keys[key_start : key_start + chunk_size])
+    return deleted
 
 
 def get_cached_discount_query(key: str) -> list:
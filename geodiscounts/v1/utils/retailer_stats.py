@@ -0,0 +1,167 @@
+"""
+Incrementally maintained aggregates of retailers' discounts.
+
+Each retailer has a RetailerStats row on its shard, holding the number of its
+active discounts and of shares of its discounts, so that retailer pages and
+rankings read them from one row instead of counting discounts:
+
+- creating or deleting a discount that has not expired adjusts the count of
+  its retailer in place;
+- creating or deleting a shared discount adjusts the share count the same way;
+- expiry itself writes nothing, so the sweeper refreshes the counts of the
+  retailers whose expired discounts it deleted, and ``refresh_retailer_stats``
+  rebuilds any count from the discounts, e.g. after partitions are retired.
+
+The receivers are connected in geodiscounts/v1/signals.py. Writes sending no
+signals (``bulk_create``, ``QuerySet.update``, raw SQL) must be followed by a
+refresh, e.g. ``python manage.py refresh_retailer_stats``.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, QuerySet
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from geodiscounts.models import Discount, Retailer, RetailerStats, SharedDiscount
+
+logger = logging.getLogger(__name__)
+
+REFRESH_CHUNK_SIZE = 500
+
+
+def adjust_retailer_stats(alias: str, retailer_id: int, **deltas: int) -> None:
+    """
+    Add to a retailer's aggregates in one statement.
+
+    The row is updated in place, so concurrent adjustments do not lose each
+    other's changes; a missing row is rebuilt from the discounts instead.
+
+    Args:
+        alias (str): The shard's database alias.
+        retailer_id (int): The retailer's id.
+        **deltas (int): The amount to add to each aggregate, by field name.
+    """
+    updates = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    updated = (
+        RetailerStats.objects.using(alias)
+        .filter(retailer_id=retailer_id)
+        .update(updated_at=timezone.now(), **updates)
+    )
+    if not updated:
+        refresh_retailer_stats(alias, [retailer_id])
+
+
+def retailer_of_discount(alias: str, discount_id: int) -> Optional[int]:
+    """
+    Return the id of the retailer offering a discount.
+
+    Args:
+        alias (str): The shard's database alias.
+        discount_id (int): The discount's id.
+
+    Returns:
+        Optional[int]: The retailer's id, or None if the discount is gone.
+    """
+    return (
+        Discount.all_objects.using(alias)
+        .filter(id=discount_id)
+        .values_list("retailer_id", flat=True)
+        .first()
+    )
+
+
+def _count_by_retailer(queryset: QuerySet, retailer_field: str) -> Dict[int, int]:
+    """
+    Count the rows of a queryset per retailer.
+
+    Args:
+        queryset (QuerySet): The rows to count.
+        retailer_field (str): The lookup of the rows' retailer id.
+
+    Returns:
+        Dict[int, int]: The number of rows, by retailer id.
+    """
+    return dict(
+        queryset.order_by()
+        .values(retailer_field)
+        .annotate(count=Count("id"))
+        .values_list(retailer_field, "count")
+    )
+
+
+def _refresh_chunk(alias: str, retailer_ids: List[int]) -> int:
+    """
+    Rebuild the aggregates of some retailers from their discounts.
+
+    The existing rows are locked first, so that adjustments made meanwhile
+    wait for the rebuild and apply on top of it.
+
+    Args:
+        alias (str): The shard's database alias.
+        retailer_ids (List[int]): The retailers' ids.
+
+    Returns:
+        int: The number of retailers refreshed.
+    """
+    with transaction.atomic(using=alias):
+        list(
+            RetailerStats.objects.using(alias)
+            .select_for_update()
+            .filter(retailer_id__in=retailer_ids)
+            .order_by("retailer_id")
+            .values_list("retailer_id", flat=True)
+        )
+        active = _count_by_retailer(
+            Discount.objects.using(alias).filter(retailer_id__in=retailer_ids),
+            "retailer_id",
+        )
+        shares = _count_by_retailer(
+            SharedDiscount.objects.using(alias).filter(
+                discount__retailer_id__in=retailer_ids
+            ),
+            "discount__retailer_id",
+        )
+        stats = [
+            RetailerStats(
+                retailer_id=retailer_id,
+                active_discount_count=active.get(retailer_id, 0),
+                share_count=shares.get(retailer_id, 0),
+            )
+            for retailer_id in retailer_ids
+        ]
+        RetailerStats.objects.using(alias).bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["retailer"],
+            update_fields=["active_discount_count", "share_count", "updated_at"],
+        )
+    return len(stats)
+
+
+def refresh_retailer_stats(
+    alias: str, retailer_ids: Optional[Iterable[int]] = None
+) -> int:
+    """
+    Rebuild retailers' aggregates on a shard from their discounts.
+
+    Args:
+        alias (str): The shard's database alias.
+        retailer_ids (Optional[Iterable[int]]): The retailers to refresh;
+            defaults to every retailer of the shard.
+
+    Returns:
+        int: The number of retailers refreshed.
+    """
+    retailers = Retailer.objects.using(alias).order_by("id")
+    if retailer_ids is not None:
+        retailers = retailers.filter(id__in=set(retailer_ids))
+    ids = list(retailers.values_list("id", flat=True))
+
+    refreshed = 0
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        refreshed += _refresh_chunk(alias, ids[start : start + REFRESH_CHUNK_SIZE])
+    logger.debug(f"Refreshed the stats of {refreshed} retailers on {alias}")
+    return refreshed
@@ -0,0 +1,359 @@
+"""
+Query layer over the geodiscounts shards.
+
+Queries spanning several shards run on them concurrently, in a thread pool,
+and their results are merged; queries on one shard run directly. Reads go to
+each shard's read replicas when it has any.
+"""
+
+import asyncio
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+
+from coupon_core.utils.db_replicas import read_alias
+from geodiscounts.models import Discount, Retailer, SharedDiscount
+from geodiscounts.sharding import Shard, get_shard_map
+
+_fan_out_executor: Optional[ThreadPoolExecutor] = None
+_fan_out_executor_lock = threading.Lock()
+
+
+def _get_fan_out_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool querying shards concurrently, creating it on first use.
+    """
+    global _fan_out_executor
+    if _fan_out_executor is None:
+        with _fan_out_executor_lock:
+            if _fan_out_executor is None:
+                _fan_out_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "GEODISCOUNTS_FAN_OUT_WORKERS", 8),
+                    thread_name_prefix="shard-fan-out",
+                )
+    return _fan_out_executor
+
+
+def _fans_out() -> bool:
+    """
+    Whether shards are queried concurrently; with no workers configured, they
+    are queried one after the other in the calling thread.
+    """
+    return getattr(settings, "GEODISCOUNTS_FAN_OUT_WORKERS", 8) > 0
+
+
+def _on_shard(query: Callable[[str], List[Any]], alias: str) -> List[Any]:
+    """
+    Run a query on a shard from a fan-out thread.
+
+    The thread's connection is recycled around the query, as Django does
+    around requests, so persistent connections stay health-checked.
+    """
+    connections[alias].close_if_unusable_or_obsolete()
+    try:
+        return query(alias)
+    finally:
+        connections[alias].close_if_unusable_or_obsolete()
+
+
+def fan_out(shards: Sequence[Shard], query: Callable[[str], List[Any]]) -> List[Any]:
+    """
+    Run a query on several shards concurrently and concatenate the results.
+
+    Args:
+        shards (Sequence[Shard]): The shards to query.
+        query (Callable[[str], List[Any]]): Runs the query on a database
+            alias and returns the results as a list.
+
+    Returns:
+        List[Any]: The results of every shard, in shard order.
+    """
+    aliases = [read_alias(shard.alias) for shard in shards]
+    if len(aliases) == 1 or not _fans_out():
+        return [result for alias in aliases for result in query(alias)]
+    executor = _get_fan_out_executor()
+    futures = [executor.submit(_on_shard, query, alias) for alias in aliases]
+    return [result for future in futures for result in future.result()]
+
+
+async def afan_out(
+    shards: Sequence[Shard], query: Callable[[str], List[Any]]
+) -> List[Any]:
+    """
+    Async version of `fan_out`, for async views.
+    """
+    aliases = [read_alias(shard.alias) for shard in shards]
+    if len(aliases) == 1 or not _fans_out():
+        return await sync_to_async(
+            lambda: [result for alias in aliases for result in query(alias)]
+        )()
+    loop = asyncio.get_running_loop()
+    executor = _get_fan_out_executor()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(executor, _on_shard, query, alias) for alias in aliases)
+    )
+    return [result for shard_results in results for result in shard_results]
+
+
+def _nearby_query(
+    point: Point, max_distance_km: Optional[float], limit: int
+) -> Callable[[str], List[Discount]]:
+    """
+    Build the per-shard query of the discounts nearest to a point.
+    """
+
+    def query(alias: str) -> List[Discount]:
+        discounts = (
+            Discount.objects.using(alias)
+            .select_related("retailer")
+            .annotate(distance=Distance("location", point))
+        )
+        if max_distance_km:
+            discounts = discounts.filter(distance__lte=max_distance_km * 1000)
+        return list(discounts.order_by("distance")[:limit])
+
+    return query
+
+
+def _nearest(discounts: List[Discount], limit: int) -> List[Discount]:
+    """
+    Merge the per-shard results, keeping the nearest discounts.
+    """
+    return heapq.nsmallest(limit, discounts, key=lambda discount: discount.distance.m)
+
+
+def nearby_discounts(
+    point: Point, max_distance_km: Optional[float] = None, limit: int = 10
+) -> List[Discount]:
+    """
+    Find the discounts nearest to a point across the shards.
+
+    Args:
+        point (Point): The search center, in WGS 84.
+        max_distance_km (Optional[float]): The search radius, in kilometers;
+            unbounded if None.
+        limit (int): The maximum number of discounts returned.
+
+    Returns:
+        List[Discount]: The nearest discounts, annotated with their
+        ``distance`` and ordered by it.
+    """
+    shards = get_shard_map().shards_for_radius(point, max_distance_km)
+    return _nearest(
+        fan_out(shards, _nearby_query(point, max_distance_km, limit)), limit
+    )
+
+
+async def anearby_discounts(
+    point: Point, max_distance_km: Optional[float] = None, limit: int = 10
+) -> List[Discount]:
+    """
+    Async version of `nearby_discounts`, for async views.
+    """
+    shards = get_shard_map().shards_for_radius(point, max_distance_km)
+    return _nearest(
+        await afan_out(shards, _nearby_query(point, max_distance_km, limit)), limit
+    )
+
+
+def all_discounts() -> List[Discount]:
+    """
+    List the discounts of every shard.
+
+    Returns:
+        List[Discount]: The discounts, with their retailers.
+    """
+    return filter_discounts()
+
+
+def filter_discounts(**lookups: Any) -> List[Discount]:
+    """
+    List the discounts of every shard matching field lookups.
+
+    Args:
+        **lookups (Any): Field lookups, as for ``QuerySet.filter``.
+
+    Returns:
+        List[Discount]: The matching discounts, with their retailers.
+    """
+    return fan_out(
+        get_shard_map().shards,
+        lambda alias: list(
+            Discount.objects.using(alias).select_related("retailer").filter(**lookups)
+        ),
+    )
+
+
+async def afilter_discounts(**lookups: Any) -> List[Discount]:
+    """
+    Async version of `filter_discounts`, for async views.
+    """
+    return await afan_out(
+        get_shard_map().shards,
+        lambda alias: list(
+            Discount.objects.using(alias).select_related("retailer").filter(**lookups)
+        ),
+    )
+
+
+RETAILER_ORDERINGS = ("name", "active_discount_count", "share_count")
+
+
+def _retailer_sort_key(ordering: str) -> Callable[[Retailer], Any]:
+    """
+    Return the sort key of retailers for an ordering.
+
+    Args:
+        ordering (str): One of RETAILER_ORDERINGS.
+
+    Returns:
+        Callable[[Retailer], Any]: The sort key.
+    """
+    if ordering == "name":
+        return lambda retailer: retailer.name
+    # Retailers without aggregates yet sort as having none
+    return lambda retailer: getattr(getattr(retailer, "stats", None), ordering, 0)
+
+
+def all_retailers(ordering: Optional[str] = None) -> List[Retailer]:
+    """
+    List the retailers of every shard, with their aggregates.
+
+    A retailer with discounts in several regions has a row on each of their
+    shards.
+
+    Args:
+        ordering (Optional[str]): A field of RETAILER_ORDERINGS to sort by,
+            prefixed with "-" for descending order; unsorted by default.
+
+    Returns:
+        List[Retailer]: The retailers.
+
+    Raises:
+        ValueError: If the ordering is not supported.
+    """
+    retailers = fan_out(
+        get_shard_map().shards,
+        lambda alias: list(Retailer.objects.using(alias).select_related("stats")),
+    )
+    if ordering is None:
+        return retailers
+    field = ordering.removeprefix("-")
+    if field not in RETAILER_ORDERINGS:
+        raise ValueError(f"Unsupported retailer ordering: {ordering}")
+    return sorted(
+        retailers, key=_retailer_sort_key(field), reverse=ordering.startswith("-")
+    )
+
+
+def get_retailer(retailer_id: int) -> Optional[Retailer]:
+    """
+    Fetch a retailer, with its aggregates, from the shard that allocated its id.
+
+    Args:
+        retailer_id (int): The retailer's id.
+
+    Returns:
+        Optional[Retailer]: The retailer, or None if it does not exist.
+    """
+    shard = get_shard_map().shard_for_id(retailer_id)
+    retailers = Retailer.objects.using(read_alias(shard.alias)).select_related("stats")
+    return retailers.filter(id=retailer_id).first()
+
+
+def participant_shared_discounts(participant: str) -> List[SharedDiscount]:
+    """
+    List the shared discounts a participant is in, across every shard.
+
+    Each shard looks the participant up in the index of its memberships.
+
+    Args:
+        participant (str): The participant's identifier.
+
+    Returns:
+        List[SharedDiscount]: The shared discounts, most recent first, with
+            their discount, retailer and memberships loaded.
+    """
+    shared_discounts = fan_out(
+        get_shard_map().shards,
+        lambda alias: list(
+            SharedDiscount.objects.using(alias)
+            .filter(memberships__participant=participant)
+            .select_related("discount__retailer")
+            .prefetch_related("memberships")
+        ),
+    )
+    return sorted(
+        shared_discounts,
+        key=lambda shared_discount: shared_discount.created_at,
+        reverse=True,
+    )
+
+
+def discount_code_exists(code: str) -> bool:
+    """
+    Check whether a discount code is used on any shard.
+
+    Each shard's primary is queried, as a replica may not have the latest
+    discounts yet.
+
+    Args:
+        code (str): The discount code.
+
+    Returns:
+        bool: True if a discount, expired or not, has the code.
+    """
+    return any(
+        Discount.all_objects.using(shard.alias).filter(discount_code=code).exists()
+        for shard in get_shard_map().shards
+    )
+
+
+def place_discount(data: Dict[str, Any], retailer_name: str) -> Discount:
+    """
+    Create a discount on the shard owning its location.
+
+    The retailer is fetched or created on the same shard, located at the
+    discount if it is new there. The database cannot keep discount codes unique
+    on its own: the partitioned discounts table only keys them per expiration
+    date (see geodiscounts.partitions), and each shard has its own table. So the
+    code is looked up on every shard's primary first, under a lock on the code
+    taken on the default shard and held until the discount is inserted, which
+    makes concurrent placements of one code wait for each other.
+
+    Args:
+        data (Dict[str, Any]): The discount's fields, including its ``location``.
+        retailer_name (str): The name of the retailer offering it.
+
+    Returns:
+        Discount: The created discount.
+
+    Raises:
+        ValidationError: If a discount with the same code exists on any shard.
+    """
+    shard_map = get_shard_map()
+    alias = shard_map.shard_for_point(data.get("location")).alias
+    code = data.get("discount_code")
+    lock_alias = shard_map.default.alias
+    with transaction.atomic(using=lock_alias):
+        connection = connections[lock_alias]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext(%s))", [f"discount:{code}"]
+                )
+        if discount_code_exists(code):
+            raise ValidationError(f"Discount code {code} already exists.")
+        with transaction.atomic(using=alias):
+            retailer, _ = Retailer.objects.using(alias).get_or_create(
+                name=retailer_name, defaults={"location": data.get("location")}
+            )
+            return Discount.objects.using(alias).create(retailer=retailer, **data)
@@ -0,0 +1,128 @@
+"""
+Utility module for managing the participants of shared discounts.
+
+Participants are stored as SharedDiscountParticipant memberships, one row each,
+on the shard of their shared discount, which the shared discount's id
+identifies. Adding or removing a participant writes that one row, in a
+transaction that also locks the shared discount, so that concurrent changes to
+a group are applied one after the other.
+"""
+
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from coupon_core.utils.db_replicas import read_alias
+from geodiscounts.models import SharedDiscount, SharedDiscountParticipant
+from geodiscounts.sharding import get_shard_map
+
+
+def get_shared_discount(shared_discount_id: int) -> Optional[SharedDiscount]:
+    """
+    Fetch a shared discount, with its memberships, from its shard.
+
+    Args:
+        shared_discount_id (int): The shared discount's id.
+
+    Returns:
+        Optional[SharedDiscount]: The shared discount, or None if it does not
+            exist.
+    """
+    alias = get_shard_map().shard_for_id(shared_discount_id).alias
+    return (
+        SharedDiscount.objects.using(read_alias(alias))
+        .select_related("discount__retailer")
+        .prefetch_related("memberships")
+        .filter(id=shared_discount_id)
+        .first()
+    )
+
+
+def _lock_shared_discount(alias: str, shared_discount_id: int) -> None:
+    """
+    Lock a shared discount for the current transaction, marking it updated.
+
+    Args:
+        alias (str): The shard's database alias.
+        shared_discount_id (int): The shared discount's id.
+
+    Raises:
+        SharedDiscount.DoesNotExist: If the shared discount does not exist.
+    """
+    updated = (
+        SharedDiscount.objects.using(alias)
+        .filter(id=shared_discount_id)
+        .update(updated_at=timezone.now())
+    )
+    if not updated:
+        raise SharedDiscount.DoesNotExist(
+            f"Shared discount {shared_discount_id} does not exist."
+        )
+
+
+def is_participant(shared_discount_id: int, participant: str) -> bool:
+    """
+    Check whether a participant is in a shared discount.
+
+    Args:
+        shared_discount_id (int): The shared discount's id.
+        participant (str): The participant's identifier.
+
+    Returns:
+        bool: True if the participant is in the shared discount.
+    """
+    alias = get_shard_map().shard_for_id(shared_discount_id).alias
+    return (
+        SharedDiscountParticipant.objects.using(alias)
+        .filter(shared_discount_id=shared_discount_id, participant=participant)
+        .exists()
+    )
+
+
+def add_participant(shared_discount_id: int, participant: str) -> bool:
+    """
+    Add a participant to a shared discount, if not already in it.
+
+    Args:
+        shared_discount_id (int): The shared discount's id.
+        participant (str): The participant's identifier.
+
+    Returns:
+        bool: True if the participant was added, False if already in it.
+
+    Raises:
+        SharedDiscount.DoesNotExist: If the shared discount does not exist.
+    """
+    alias = get_shard_map().shard_for_id(shared_discount_id).alias
+    with transaction.atomic(using=alias):
+        _lock_shared_discount(alias, shared_discount_id)
+        _, created = SharedDiscountParticipant.objects.using(alias).get_or_create(
+            shared_discount_id=shared_discount_id, participant=participant
+        )
+    return created
+
+
+def remove_participant(shared_discount_id: int, participant: str) -> bool:
+    """
+    Remove a participant from a shared discount.
+
+    Args:
+        shared_discount_id (int): The shared discount's id.
+        participant (str): The participant's identifier.
+
+    Returns:
+        bool: True if the participant was removed, False if not in it.
+
+    Raises:
+        SharedDiscount.DoesNotExist: If the shared discount does not exist.
+    """
+    alias = get_shard_map().shard_for_id(shared_discount_id).alias
+    with transaction.atomic(using=alias):
+        _lock_shared_discount(alias, shared_discount_id)
+        removed, _ = (
+            SharedDiscountParticipant.objects.using(alias)
+            .filter(shared_discount_id=shared_discount_id, participant=participant)
+            .delete()
+        )
+    return removed > 0
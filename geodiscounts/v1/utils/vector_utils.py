@@ -13,20 +13,28 @@ Usage Example:
     client.insert_vector(1, [0.1, 0.2, 0.3, ...])  # Provide VECTOR_DIMENSION number of floats.
     results = client.search_vectors([0.1, 0.2, 0.3, ...])
     client.delete_vector(1)
+    client.delete_vectors([2, 3])
     client.close()
 
+    # In async views
+    results = await async_client.search_vectors([0.1, 0.2, 0.3, ...])
+
 Dependencies:
     - Django (for settings)
     - psycopg2
+    - psycopg (for the async client)
     - NumPy
     - pgvector extension on PostgreSQL
 """
 
 import os
+import asyncio
 import logging
-from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional
 
 from django.conf import settings
+import psycopg
 import psycopg2
 import numpy as np
 from psycopg2.extensions import connection as Connection, cursor as Cursor
@@ -156,3 +164,141 @@ class PostgreSQLVectorClient:
             self.conn.rollback()
             logger.error(f"Failed to delete vector {vector_id}: {e}")
             raise ValueError(f"Failed to delete vector {vector_id}: {str(e)}") from e
+
+    def delete_vectors(self, vector_ids: List[int]) -> int:
+        """
+        Deletes several vectors from the PostgreSQL 'vectors' table in one statement.
+
+        Args:
+            vector_ids (List[int]): The IDs of the vectors to delete.
+
+        Returns:
+            int: The number of vectors deleted.
+        """
+        if not vector_ids:
+            return 0
+        try:
+            with self.get_cursor() as cur:
+                cur.execute("DELETE FROM vectors WHERE id = ANY(%s)", (list(vector_ids),))
+                self.conn.commit()
+                logger.info(f"Deleted {cur.rowcount} of {len(vector_ids)} vectors.")
+                return cur.rowcount
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Failed to delete {len(vector_ids)} vectors: {e}")
+            raise ValueError(f"Failed to delete vectors: {str(e)}") from e
+
+
+def _to_pgvector(values: List[float]) -> str:
+    """
+    Formats a vector as a pgvector text literal.
+
+    Args:
+        values (List[float]): The vector's values.
+
+    Returns:
+        str: The literal, such as "[0.1,0.2,0.3]".
+    """
+    return "[" + ",".join(str(float(value)) for value in values) + "]"
+
+
+class AsyncPostgreSQLVectorClient:
+    """
+    An async client for similarity searches in the 'vectors' table, for async views.
+
+    Connections are opened with psycopg's asyncio support, so waiting on the
+    database does not block the event loop, and up to ``pool_size`` of them are
+    kept open for reuse. Requests beyond ``pool_size`` wait for a free connection.
+    Connections belong to the event loop that opened them; if the client is used
+    from another loop, the pool is started afresh. The 'vectors' table is created
+    by PostgreSQLVectorClient.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None) -> None:
+        """
+        Initializes the client; connections are opened on first use.
+
+        Args:
+            pool_size (Optional[int]): Maximum number of connections. Defaults to
+                the VECTOR_DB_ASYNC_POOL_SIZE setting.
+        """
+        self.pool_size = pool_size
+        self._idle: List[psycopg.AsyncConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _connect(self) -> psycopg.AsyncConnection:
+        """
+        Opens a connection using the 'vector_db' configuration from Django settings.
+        """
+        db_settings = settings.DATABASES.get('vector_db')
+        if not db_settings:
+            raise ValueError("No 'vector_db' configuration found in Django settings.")
+        return await psycopg.AsyncConnection.connect(
+            dbname=db_settings["NAME"],
+            user=db_settings["USER"],
+            password=db_settings["PASSWORD"],
+            host=db_settings.get("HOST", "localhost"),
+            port=db_settings.get("PORT", 5432),
+            autocommit=True,
+        )
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """
+        Borrows a connection from the pool, opening one if none is idle.
+
+        A connection is returned to the pool unless an error occurred while it
+        was borrowed, in which case it is closed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle = []
+            self._slots = asyncio.Semaphore(
+                self.pool_size or settings.VECTOR_DB_ASYNC_POOL_SIZE
+            )
+        slots = self._slots
+
+        async with slots:
+            conn = self._idle.pop() if self._idle else None
+            if conn is None or conn.closed:
+                conn = await self._connect()
+            try:
+                yield conn
+            except BaseException:
+                await conn.close()
+                raise
+            if self._slots is slots:
+                self._idle.append(conn)
+            else:
+                await conn.close()
+
+    async def search_vectors(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, float]]:
+        """
+        Searches for similar vectors using pgvector's similarity search.
+
+        Async version of `PostgreSQLVectorClient.search_vectors`.
+
+        Args:
+            query_vector (List[float]): The query vector for similarity search.
+            top_k (int): The number of results to return.
+
+        Returns:
+            List[Dict[str, float]]: A list of dictionaries containing vector IDs and similarity scores.
+        """
+        try:
+            async with self.connection() as conn:
+                async with conn.cursor() as cur:
+                    pg_query = _to_pgvector(query_vector)
+                    await cur.execute("""
+                        SELECT id, vector <-> %s::vector AS distance
+                        FROM vectors
+                        ORDER BY vector <-> %s::vector
+                        LIMIT %s
+                    """, (pg_query, pg_query, top_k))
+                    rows = await cur.fetchall()
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            raise ValueError(f"Search failed: {str(e)}") from e
+        return [{"id": row[0], "score": float(row[1])} for row in rows]
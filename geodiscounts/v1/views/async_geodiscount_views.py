@@ -0,0 +1,205 @@
+"""
+Async versions of the nearby and search discount views.
+
+Under an ASGI server these views hold no worker thread while waiting on
+ip-api.com or the vector database: geolocation waits, up to a timeout, on a
+request made in a worker thread, vector searches use the async pgvector client
+and the geodiscounts shards are
+queried from the shard fan-out thread pool. The embedding model runs in the
+bounded embedding executor. They behave like NearbyDiscountsView and
+SearchDiscountsView and are documented the same way; the
+GEODISCOUNTS_ASYNC_VIEWS setting selects them.
+"""
+
+from typing import Callable, List
+
+from django.contrib.gis.geos import Point
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+from coupon_core.utils.async_views import AsyncAPIView
+from geodiscounts.v1.serializers import DiscountSerializer
+from geodiscounts.v1.utils.embedding_utils import (
+    ExecutorBusyError,
+    agenerate_embedding,
+)
+from geodiscounts.v1.utils.ip_geolocation import (
+    aget_location_from_ip,
+    validate_max_distance,
+)
+from geodiscounts.v1.utils.shard_queries import afilter_discounts, anearby_discounts
+from geodiscounts.v1.utils.vector_utils import AsyncPostgreSQLVectorClient
+from geodiscounts.v1.views.geodiscount_views import (
+    NearbyDiscountsView,
+    SearchDiscountsView,
+)
+
+async_client = AsyncPostgreSQLVectorClient()
+
+
+def documented_as(view_method: Callable) -> Callable:
+    """
+    Reuse the OpenAPI documentation of the sync handler an async handler replaces.
+
+    Args:
+        view_method (Callable): The documented sync handler.
+
+    Returns:
+        Callable: A decorator copying its drf-yasg overrides.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func._swagger_auto_schema = view_method._swagger_auto_schema
+        return func
+
+    return decorator
+
+
+class AsyncNearbyDiscountsView(AsyncAPIView, NearbyDiscountsView):
+    """
+    Async version of NearbyDiscountsView.
+    """
+
+    @documented_as(NearbyDiscountsView.get)
+    async def get(self, request) -> Response:
+        """
+        Handles GET requests to retrieve nearby discounts.
+
+        Query Parameters:
+            - max_distance (optional): Maximum distance (in kilometers) for filtering discounts.
+
+        Returns:
+            Response: JSON response containing nearby discounts.
+
+        Status Codes:
+            - 200: Success.
+            - 400: Validation error.
+            - 404: No discounts found.
+            - 500: Internal server error.
+        """
+        try:
+            ip = getattr(request, "client_ip", None)
+            if not ip:
+                raise ValidationError("Client IP address is not available.")
+
+            location = await aget_location_from_ip(ip)
+            if not location:
+                raise ValidationError("Unable to determine location from IP address.")
+
+            lat, lon = location["latitude"], location["longitude"]
+            user_location = Point(lon, lat, srid=4326)
+
+            max_distance = request.GET.get("max_distance")
+            if max_distance:
+                try:
+                    max_distance = validate_max_distance(max_distance)
+                except ValueError as e:
+                    raise ValidationError(str(e))
+
+            # Retailers are fetched with the discounts, so that serialization
+            # does not hit the database
+            nearest = await anearby_discounts(user_location, max_distance, limit=10)
+            if not nearest:
+                return Response(
+                    {"message": "No discounts found near your location."},
+                    status=HTTP_404_NOT_FOUND,
+                )
+
+            serializer = DiscountSerializer(nearest, many=True)
+            return Response(serializer.data, status=HTTP_200_OK)
+
+        except ValidationError as ve:
+            return Response({"error": str(ve)}, status=HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": "An unexpected error occurred.", "details": str(e)},
+                status=HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class AsyncSearchDiscountsView(AsyncAPIView, SearchDiscountsView):
+    """
+    Async version of SearchDiscountsView.
+
+    Searches arriving while the embedding executor is saturated are answered
+    with a 503 and a Retry-After header.
+    """
+
+    @documented_as(SearchDiscountsView.post)
+    async def post(self, request) -> Response:
+        """
+        Handles POST requests to search for similar discounts.
+
+        Request Body:
+            - query (str): A user-provided search query (e.g., a string description or keywords).
+            - top_k (int, optional): The number of top results to retrieve (default: 10).
+
+        Returns:
+            Response: JSON response containing the top matching discounts.
+
+        Status Codes:
+            - 200: Success.
+            - 400: Validation error.
+            - 500: Internal server error.
+            - 503: The embedding executor is saturated.
+        """
+        try:
+            query: str = request.data.get("query")
+            if not query or not isinstance(query, str):
+                raise ValidationError(
+                    "A valid search query must be provided as a string."
+                )
+
+            # Validate top_k before spending model time on the query
+            top_k = request.data.get("top_k", 10)
+            try:
+                top_k = int(top_k)
+                if top_k <= 0:
+                    raise ValueError()
+            except ValueError:
+                raise ValidationError("top_k must be a positive integer.")
+
+            try:
+                query_vector: List[float] = await agenerate_embedding(query)
+            except ExecutorBusyError:
+                return Response(
+                    {"error": "Search is temporarily overloaded, please retry."},
+                    status=HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "1"},
+                )
+            except Exception as e:
+                raise ValidationError(
+                    f"Failed to generate embedding for the query: {str(e)}"
+                )
+
+            search_results = await async_client.search_vectors(
+                query_vector, top_k=top_k
+            )
+            # Vectors are stored under the id of their discount
+            matching_ids = [result["id"] for result in search_results]
+
+            discounts = await afilter_discounts(id__in=matching_ids)
+            if not discounts:
+                return Response(
+                    {"message": "No matching discounts found."},
+                    status=HTTP_200_OK,
+                )
+
+            discounts.sort(key=lambda discount: matching_ids.index(discount.id))
+            serializer = DiscountSerializer(discounts, many=True)
+            return Response(serializer.data, status=HTTP_200_OK)
+
+        except ValidationError as ve:
+            return Response({"error": str(ve)}, status=HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": "An unexpected error occurred.", "details": str(e)},
+                status=HTTP_500_INTERNAL_SERVER_ERROR,
+            )
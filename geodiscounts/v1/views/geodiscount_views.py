@@ -1,6 +1,5 @@
 from typing import List
 
-from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
@@ -12,13 +11,17 @@ from rest_framework.status import (
 )
 from rest_framework.views import APIView
 
-from geodiscounts.models import Discount
 from geodiscounts.v1.serializers import DiscountSerializer
 from geodiscounts.v1.utils.embedding_utils import generate_embedding
 from geodiscounts.v1.utils.ip_geolocation import (
     get_location_from_ip,
     validate_max_distance,
 )
+from geodiscounts.v1.utils.shard_queries import (
+    all_discounts,
+    filter_discounts,
+    nearby_discounts,
+)
 from geodiscounts.v1.utils.vector_utils import PostgreSQLVectorClient
 
 # drf-yasg imports for OpenAPI documentation
@@ -68,8 +71,8 @@ class DiscountListView(APIView):
             - 500: Internal server error.
         """
         try:
-            discounts = Discount.objects.all()
-            if not discounts.exists():
+            discounts = all_discounts()
+            if not discounts:
                 return Response(
                     {"message": "No discounts available."},
                     status=HTTP_404_NOT_FOUND,
@@ -168,17 +171,9 @@ class NearbyDiscountsView(APIView):
                 except ValueError as e:
                     raise ValidationError(str(e))
 
-            # Query discounts and annotate with distance
-            discounts = Discount.objects.annotate(
-                distance=Distance("location", user_location)
-            )
-            if max_distance:
-                discounts = discounts.filter(
-                    distance__lte=max_distance * 1000
-                )  # Convert km to meters
-
-            discounts = discounts.order_by("distance")[:10]  # Limit results to top 10
-            if not discounts.exists():
+            # Query the shards covering the search area, nearest first
+            discounts = nearby_discounts(user_location, max_distance, limit=10)
+            if not discounts:
                 return Response(
                     {"message": "No discounts found near your location."},
                     status=HTTP_404_NOT_FOUND,
@@ -291,18 +286,19 @@ class SearchDiscountsView(APIView):
             # Search vector database
             search_results = client.search_vectors(query_vector, top_k=top_k)
 
-            # Extract matching vector IDs
+            # Extract matching vector IDs, which are the ids of their discounts
             matching_ids = [result["id"] for result in search_results]
 
             # Query matching discounts from the database
-            discounts = Discount.objects.filter(vector_id__in=matching_ids)
-            if not discounts.exists():
+            discounts = filter_discounts(id__in=matching_ids)
+            if not discounts:
                 return Response(
                     {"message": "No matching discounts found."},
                     status=HTTP_200_OK,
                 )
 
-            # Serialize and return results
+            # Serialize and return results, most similar first
+            discounts.sort(key=lambda discount: matching_ids.index(discount.id))
             serializer = DiscountSerializer(discounts, many=True)
             return Response(serializer.data, status=HTTP_200_OK)
 
@@ -1,13 +1,18 @@
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_200_OK,
+    HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
     HTTP_500_INTERNAL_SERVER_ERROR,
 )
 from rest_framework.views import APIView
 
-from geodiscounts.models import Retailer
-from geodiscounts.v1.serializers import RetailerSerializer
+from geodiscounts.v1.serializers import RetailerWithStatsSerializer
+from geodiscounts.v1.utils.shard_queries import (
+    RETAILER_ORDERINGS,
+    all_retailers,
+    get_retailer,
+)
 
 # drf-yasg imports for OpenAPI documentation
 from drf_yasg.utils import swagger_auto_schema
@@ -16,15 +21,35 @@ from drf_yasg import openapi
 
 class RetailerListView(APIView):
     """
-    API endpoint to fetch all retailers.
+    API endpoint to fetch all retailers, with their discount and share counts.
     """
 
+    ordering_param = openapi.Parameter(
+        "ordering",
+        openapi.IN_QUERY,
+        description=(
+            f"Field to sort retailers by, one of {', '.join(RETAILER_ORDERINGS)}; "
+            'prefix it with "-" for descending order.'
+        ),
+        type=openapi.TYPE_STRING,
+        required=False,
+    )
+
     @swagger_auto_schema(
         operation_description="Returns a list of all retailers.",
+        manual_parameters=[ordering_param],
         responses={
             HTTP_200_OK: openapi.Response(
                 description="Success.",
-                schema=RetailerSerializer(many=True)
+                schema=RetailerWithStatsSerializer(many=True)
+            ),
+            HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Validation error.",
+                examples={
+                    "application/json": {
+                        "error": "Unsupported retailer ordering: rating"
+                    }
+                }
             ),
             HTTP_404_NOT_FOUND: openapi.Response(
                 description="No retailers available.",
@@ -52,18 +77,21 @@ class RetailerListView(APIView):
 
         Status Codes:
             - 200: Success.
+            - 400: Unsupported ordering.
             - 404: No retailers found.
             - 500: Internal server error.
         """
         try:
-            retailers = Retailer.objects.all()
-            if not retailers.exists():
+            retailers = all_retailers(request.query_params.get("ordering"))
+            if not retailers:
                 return Response(
                     {"message": "No retailers available."},
                     status=HTTP_404_NOT_FOUND,
                 )
-            serializer = RetailerSerializer(retailers, many=True)
+            serializer = RetailerWithStatsSerializer(retailers, many=True)
             return Response(serializer.data, status=HTTP_200_OK)
+        except ValueError as ve:
+            return Response({"error": str(ve)}, status=HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": "An unexpected error occurred.", "details": str(e)},
@@ -81,7 +109,7 @@ class RetailerDetailView(APIView):
         responses={
             HTTP_200_OK: openapi.Response(
                 description="Success.",
-                schema=RetailerSerializer()
+                schema=RetailerWithStatsSerializer()
             ),
             HTTP_404_NOT_FOUND: openapi.Response(
                 description="Retailer not found.",
@@ -116,13 +144,13 @@ class RetailerDetailView(APIView):
             - 500: Internal server error.
         """
         try:
-            retailer = Retailer.objects.filter(id=retailer_id).first()
+            retailer = get_retailer(retailer_id)
             if not retailer:
                 return Response(
                     {"message": "Retailer not found."},
                     status=HTTP_404_NOT_FOUND,
                 )
-            serializer = RetailerSerializer(retailer)
+            serializer = RetailerWithStatsSerializer(retailer)
             return Response(serializer.data, status=HTTP_200_OK)
         except Exception as e:
             return Response(
@@ -0,0 +1,280 @@
+"""
+API views for shared discounts and their participants.
+
+A requesting user is identified as a participant by their user id. Shared
+discounts are invite-only: only their participants may add participants,
+themselves included, or remove others, while any user may remove themselves.
+Adding to a shared discount that does not exist is refused like adding to one
+the user is not in, so that ids cannot be probed.
+"""
+
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_404_NOT_FOUND,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+)
+from rest_framework.views import APIView
+
+from geodiscounts.models import SharedDiscount
+from geodiscounts.v1.serializers import ParticipantSerializer, SharedDiscountSerializer
+from geodiscounts.v1.utils.shard_queries import participant_shared_discounts
+from geodiscounts.v1.utils.shared_discount_utils import (
+    add_participant,
+    is_participant,
+    remove_participant,
+)
+
+# drf-yasg imports for OpenAPI documentation
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+FORBIDDEN_RESPONSE = openapi.Response(
+    description="Not a participant of the shared discount.",
+    examples={
+        "application/json": {
+            "message": "Only participants can change participants."
+        }
+    },
+)
+NOT_FOUND_RESPONSE = openapi.Response(
+    description="Shared discount not found.",
+    examples={"application/json": {"message": "Shared discount not found."}},
+)
+SERVER_ERROR_RESPONSE = openapi.Response(
+    description="Internal server error.",
+    examples={
+        "application/json": {
+            "error": "An unexpected error occurred.",
+            "details": "Detailed error message..."
+        }
+    },
+)
+
+
+def requesting_participant(request: Request) -> str:
+    """
+    Return the participant identifier of the requesting user.
+
+    Args:
+        request (Request): The current HTTP request.
+
+    Returns:
+        str: The user's id.
+    """
+    return str(request.user.pk)
+
+
+def may_add_participant(request: Request, shared_discount_id: int) -> bool:
+    """
+    Check whether the requesting user may add participants, themselves included.
+
+    Args:
+        request (Request): The current HTTP request.
+        shared_discount_id (int): The shared discount's id.
+
+    Returns:
+        bool: True if the user already participates.
+    """
+    return is_participant(shared_discount_id, requesting_participant(request))
+
+
+def may_remove_participant(
+    request: Request, shared_discount_id: int, participant: str
+) -> bool:
+    """
+    Check whether the requesting user may remove a participant.
+
+    Args:
+        request (Request): The current HTTP request.
+        shared_discount_id (int): The shared discount's id.
+        participant (str): The participant's identifier.
+
+    Returns:
+        bool: True if the user is the participant or already participates.
+    """
+    requester = requesting_participant(request)
+    return participant == requester or is_participant(shared_discount_id, requester)
+
+
+class SharedDiscountListView(APIView):
+    """
+    API endpoint to fetch the shared discounts of the requesting user.
+    """
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Returns the shared discounts the requesting user participates in."
+        ),
+        responses={
+            HTTP_200_OK: openapi.Response(
+                description="Success.",
+                schema=SharedDiscountSerializer(many=True)
+            ),
+            HTTP_500_INTERNAL_SERVER_ERROR: SERVER_ERROR_RESPONSE,
+        },
+    )
+    def get(self, request: Request) -> Response:
+        """
+        Returns the shared discounts the requesting user participates in.
+
+        Returns:
+            Response: JSON response containing the shared discounts, most
+            recent first.
+
+        Status Codes:
+            - 200: Success.
+            - 500: Internal server error.
+        """
+        try:
+            shared_discounts = participant_shared_discounts(
+                requesting_participant(request)
+            )
+            serializer = SharedDiscountSerializer(shared_discounts, many=True)
+            return Response(serializer.data, status=HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {"error": "An unexpected error occurred.", "details": str(e)},
+                status=HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class SharedDiscountParticipantsView(APIView):
+    """
+    API endpoint to add a participant to a shared discount.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Adds a participant to a shared discount.",
+        request_body=ParticipantSerializer,
+        responses={
+            HTTP_200_OK: openapi.Response(
+                description="Already a participant.",
+                examples={"application/json": {"participant": "42"}}
+            ),
+            HTTP_201_CREATED: openapi.Response(
+                description="Participant added.",
+                examples={"application/json": {"participant": "42"}}
+            ),
+            HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Validation error.",
+                examples={
+                    "application/json": {
+                        "participant": ["This field is required."]
+                    }
+                }
+            ),
+            HTTP_403_FORBIDDEN: FORBIDDEN_RESPONSE,
+            HTTP_404_NOT_FOUND: NOT_FOUND_RESPONSE,
+            HTTP_500_INTERNAL_SERVER_ERROR: SERVER_ERROR_RESPONSE,
+        },
+    )
+    def post(self, request: Request, shared_discount_id: int) -> Response:
+        """
+        Adds a participant to a shared discount.
+
+        Args:
+            shared_discount_id (int): ID of the shared discount.
+
+        Returns:
+            Response: JSON response containing the participant.
+
+        Status Codes:
+            - 200: Already a participant.
+            - 201: Participant added.
+            - 400: Invalid participant.
+            - 403: Requester is not a participant, or the shared discount
+              does not exist.
+            - 404: Shared discount deleted meanwhile.
+            - 500: Internal server error.
+        """
+        serializer = ParticipantSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        participant = serializer.validated_data["participant"]
+        try:
+            if not may_add_participant(request, shared_discount_id):
+                return Response(
+                    {"message": "Only participants can change participants."},
+                    status=HTTP_403_FORBIDDEN,
+                )
+            created = add_participant(shared_discount_id, participant)
+            return Response(
+                {"participant": participant},
+                status=HTTP_201_CREATED if created else HTTP_200_OK,
+            )
+        except SharedDiscount.DoesNotExist:
+            return Response(
+                {"message": "Shared discount not found."},
+                status=HTTP_404_NOT_FOUND,
+            )
+        except Exception as e:
+            return Response(
+                {"error": "An unexpected error occurred.", "details": str(e)},
+                status=HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class SharedDiscountParticipantDetailView(APIView):
+    """
+    API endpoint to remove a participant from a shared discount.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Removes a participant from a shared discount.",
+        responses={
+            HTTP_204_NO_CONTENT: openapi.Response(description="Participant removed."),
+            HTTP_403_FORBIDDEN: FORBIDDEN_RESPONSE,
+            HTTP_404_NOT_FOUND: openapi.Response(
+                description="Shared discount or participant not found.",
+                examples={"application/json": {"message": "Participant not found."}}
+            ),
+            HTTP_500_INTERNAL_SERVER_ERROR: SERVER_ERROR_RESPONSE,
+        },
+    )
+    def delete(
+        self, request: Request, shared_discount_id: int, participant: str
+    ) -> Response:
+        """
+        Removes a participant from a shared discount.
+
+        Args:
+            shared_discount_id (int): ID of the shared discount.
+            participant (str): Identifier of the participant.
+
+        Returns:
+            Response: An empty response.
+
+        Status Codes:
+            - 204: Participant removed.
+            - 403: Requester may not remove the participant.
+            - 404: Shared discount or participant not found.
+            - 500: Internal server error.
+        """
+        try:
+            if not may_remove_participant(request, shared_discount_id, participant):
+                return Response(
+                    {"message": "Only participants can change participants."},
+                    status=HTTP_403_FORBIDDEN,
+                )
+            if not remove_participant(shared_discount_id, participant):
+                return Response(
+                    {"message": "Participant not found."},
+                    status=HTTP_404_NOT_FOUND,
+                )
+            return Response(status=HTTP_204_NO_CONTENT)
+        except SharedDiscount.DoesNotExist:
+            return Response(
+                {"message": "Shared discount not found."},
+                status=HTTP_404_NOT_FOUND,
+            )
+        except Exception as e:
+            return Response(
+                {"error": "An unexpected error occurred.", "details": str(e)},
+                status=HTTP_500_INTERNAL_SERVER_ERROR,
+            )
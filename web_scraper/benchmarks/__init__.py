@@ -0,0 +1,9 @@
+"""
+Crawl throughput benchmarks for the web scraper.
+
+Run from the repository root:
+
+    python -m web_scraper.benchmarks                   # run and print results
+    python -m web_scraper.benchmarks --compare         # exit with 1 on regressions
+    python -m web_scraper.benchmarks --save-baseline   # store new baselines
+"""
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict
+
+# The scraper logs to logs/scraper.log relative to the working directory
+os.makedirs("logs", exist_ok=True)
+
+from .harness import (  # noqa: E402
+    BASELINE_PATH,
+    DEFAULT_TOLERANCE,
+    SCENARIOS,
+    compare,
+    format_results,
+    load_baselines,
+    run_benchmarks,
+    save_baselines,
+)
+
+
+def main() -> int:
+    """
+    Run the benchmark scenarios and optionally compare or store baselines.
+
+    Returns:
+        int: The exit code; 1 if a metric regressed against its baseline.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark crawl throughput.")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run; may be repeated. Defaults to all scenarios.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per scenario; the best is kept."
+    )
+    parser.add_argument(
+        "--baseline-file", default=BASELINE_PATH, help="File holding the baselines."
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store the results as baselines."
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="Exit with 1 if a metric regressed."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Relative change tolerated before a metric counts as regressed.",
+    )
+    parser.add_argument(
+        "--kafka",
+        action="store_true",
+        help="Send discount data to the broker at KAFKA_BROKER_URL.",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON."
+    )
+    args = parser.parse_args()
+
+    scenarios = [SCENARIOS[name] for name in args.scenario or SCENARIOS]
+    results = run_benchmarks(scenarios, repeat=args.repeat, use_kafka=args.kafka)
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print(format_results(results))
+
+    if args.save_baseline:
+        save_baselines(results, args.baseline_file)
+        print(f"Baselines saved to {args.baseline_file}", file=sys.stderr)
+
+    if args.compare:
+        baselines = load_baselines(args.baseline_file)
+        regressions = compare(results, baselines, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against the baselines.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Local HTTP server serving a synthetic retailer site for benchmarks.
+
+Every page carries the discount fields the default extraction rules look for,
+a grid of product tiles padding it to a realistic size, a number of distinct
+images, and links to neighbouring pages. Each response can be delayed to
+simulate network latency. The server runs on its own event loop in a
+background thread, so both the sync and the async crawler can be measured
+against it.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+# A JPEG header, so the images pass the scraper's content sniffing
+JPEG_HEADER = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>Deals {n}</title></head>
+<body>
+    <h1 class="retailer-name">Retailer {n}</h1>
+    <div class="discount-description">Save {percent}% on everything</div>
+    <span class="discount-code">CODE{n:06d}</span>
+    <span class="expiration-date">2030-12-31</span>
+    <span class="location">Berlin</span>
+    <div class="images">{images}</div>
+    <ul class="products">{products}</ul>
+    <nav>{links}</nav>
+</body>
+</html>
+"""
+
+PRODUCT_TEMPLATE = (
+    '<li class="product"><a href="/products/{n}-{i}">Product {i}</a>'
+    '<span class="price">{price}.99</span>'
+    '<p class="blurb">Hand-picked deal number {i} from retailer {n}.</p></li>'
+)
+
+
+class FakeSite:
+    """
+    A synthetic retailer site served from a background thread.
+
+    Counts the requests it answers and the body bytes it sends, so benchmarks
+    can report how much was fetched.
+    """
+
+    def __init__(
+        self,
+        pages: int = 100,
+        images_per_page: int = 2,
+        page_bytes: int = 30_000,
+        image_bytes: int = 20_000,
+        latency: float = 0.0,
+    ) -> None:
+        """
+        Configure the site.
+
+        Args:
+            pages (int): Number of discount pages.
+            images_per_page (int): Distinct images on each page.
+            page_bytes (int): Approximate size of each page.
+            image_bytes (int): Size of each image.
+            latency (float): Seconds each response is delayed.
+        """
+        self.pages = pages
+        self.images_per_page = images_per_page
+        self.page_bytes = page_bytes
+        self.image_bytes = image_bytes
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self.base_url = ""
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._rendered: Dict[str, bytes] = {}
+
+    def page_urls(self) -> List[str]:
+        """
+        Return the URLs of all discount pages.
+
+        Returns:
+            List[str]: The page URLs.
+        """
+        return [f"{self.base_url}/deals/{n}" for n in range(self.pages)]
+
+    def render_page(self, n: int) -> bytes:
+        """
+        Render discount page n.
+
+        Args:
+            n (int): The page number.
+
+        Returns:
+            bytes: The HTML of the page.
+        """
+        images = "".join(
+            f'<img src="/images/{n}-{i}.jpg" alt="Deal {i}">'
+            for i in range(self.images_per_page)
+        )
+        links = "".join(
+            f'<a href="/deals/{(n + step) % self.pages}">Next deals</a>'
+            for step in (1, 2, 3)
+        )
+        products = []
+        html = ""
+        while len(html) < self.page_bytes:
+            i = len(products)
+            products.append(PRODUCT_TEMPLATE.format(n=n, i=i, price=10 + i % 90))
+            html = PAGE_TEMPLATE.format(
+                n=n,
+                percent=5 + n % 50,
+                images=images,
+                products="".join(products),
+                links=links,
+            )
+        return html.encode("utf-8")
+
+    def render_image(self, name: str) -> bytes:
+        """
+        Render an image whose content is unique to its name.
+
+        Args:
+            name (str): The image name.
+
+        Returns:
+            bytes: The image content.
+        """
+        seed = name.encode("utf-8")
+        padding = seed * (self.image_bytes // len(seed) + 1)
+        return (JPEG_HEADER + padding)[: max(self.image_bytes, len(JPEG_HEADER))]
+
+    def _cached(self, key: str, render: Callable[[], bytes]) -> bytes:
+        # Render each response once, so serving costs little CPU time
+        if key not in self._rendered:
+            self._rendered[key] = render()
+        return self._rendered[key]
+
+    async def _respond(
+        self, body: bytes, content_type: str, status: int = 200
+    ) -> web.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+        return web.Response(body=body, status=status, content_type=content_type)
+
+    async def _page(self, request: web.Request) -> web.Response:
+        n = int(request.match_info["n"])
+        if n >= self.pages:
+            return await self._respond(b"Not found", "text/plain", status=404)
+        body = self._cached(f"page:{n}", lambda: self.render_page(n))
+        return await self._respond(body, "text/html")
+
+    async def _image(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        body = self._cached(f"image:{name}", lambda: self.render_image(name))
+        return await self._respond(body, "image/jpeg")
+
+    async def _not_found(self, request: web.Request) -> web.Response:
+        return await self._respond(b"Not found", "text/plain", status=404)
+
+    def start(self) -> str:
+        """
+        Start serving on a free local port.
+
+        Returns:
+            str: The base URL of the site.
+        """
+        started = threading.Event()
+
+        async def serve() -> None:
+            app = web.Application()
+            app.router.add_get(r"/deals/{n:\d+}", self._page)
+            app.router.add_get("/images/{name}", self._image)
+            app.router.add_get("/{path:.*}", self._not_found)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.base_url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+            started.set()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fake-site", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop(self) -> None:
+        """
+        Stop the server and wait for its thread to finish.
+        """
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def reset_counters(self) -> None:
+        """
+        Reset the request and byte counters.
+        """
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    def __enter__(self) -> "FakeSite":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,430 @@
+"""
+End-to-end crawl throughput benchmarks.
+
+Each scenario starts a FakeSite, crawls all of its pages with WebScraper in
+sync or async mode and reports:
+
+- ``pages_per_sec``: pages crawled per second of wall time.
+- ``parse_ms_per_page``: CPU time spent parsing HTML and extracting images,
+  discount data and links, per page.
+- ``bytes_fetched``: body bytes served by the site, pages and images.
+- ``kafka_msgs_per_sec``: discount messages emitted per second of wall time.
+
+Results can be saved as baselines and later compared against them to flag
+throughput regressions. Every run also times a fixed calibration workload, and
+timing metrics are scaled by how much slower or faster it ran than when the
+baselines were recorded, so baselines from one machine can be compared with
+runs on another, e.g. a shared CI runner.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from bs4 import BeautifulSoup
+
+from ..scraper import core
+from ..scraper.core import WebScraper
+from ..scraper.crawl_state import SQLiteCrawlStateStore
+from ..scraper.rate_limit import DomainRateLimiter
+from .fake_site import FakeSite
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Relative change from the baseline tolerated before a metric regresses
+DEFAULT_TOLERANCE = 0.25
+
+# Metrics where higher is better; the others regress when they grow
+HIGHER_IS_BETTER = ("pages_per_sec", "kafka_msgs_per_sec")
+LOWER_IS_BETTER = ("parse_ms_per_page", "bytes_fetched")
+
+# Metrics that depend on the speed of the machine
+TIMING_METRICS = ("pages_per_sec", "kafka_msgs_per_sec", "parse_ms_per_page")
+
+# Pages of the fake site parsed by the calibration workload
+CALIBRATION_PAGES = 20
+
+# WebScraper methods whose time counts as parse time
+PARSE_METHODS = ("parse_html", "parse_images", "process_discount_data", "parse_links")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    A benchmark configuration.
+
+    Attributes:
+        name (str): Name of the scenario, used as its baseline key.
+        mode (str): "async" for crawl_async, "sync" for scrape_all.
+        pages (int): Number of pages on the fake site.
+        images_per_page (int): Distinct images on each page.
+        page_bytes (int): Approximate size of each page.
+        image_bytes (int): Size of each image.
+        latency (float): Seconds each response of the site is delayed.
+        max_concurrency (int): Concurrent pages in async mode.
+    """
+
+    name: str
+    mode: str = "async"
+    pages: int = 200
+    images_per_page: int = 2
+    page_bytes: int = 30_000
+    image_bytes: int = 20_000
+    latency: float = 0.02
+    max_concurrency: int = 32
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("async"),
+        Scenario("async-no-latency", latency=0.0),
+        Scenario("sync", mode="sync", pages=40),
+    )
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Metrics of one benchmark run.
+    """
+
+    scenario: str
+    pages: int
+    seconds: float
+    pages_per_sec: float
+    parse_ms_per_page: float
+    bytes_fetched: int
+    requests: int
+    kafka_messages: int
+    kafka_msgs_per_sec: float
+    calibration_ms: float = 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Return the metrics compared against baselines.
+
+        Returns:
+            Dict[str, float]: The metrics by name.
+        """
+        names = HIGHER_IS_BETTER + LOWER_IS_BETTER
+        return {name: getattr(self, name) for name in names}
+
+
+class KafkaSink:
+    """
+    Stands in for the Kafka producer: serializes and counts discount messages.
+    """
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def send(self, data: dict) -> None:
+        """
+        Serialize a discount message the way the producer does, and count it.
+
+        Args:
+            data (dict): The discount data.
+        """
+        payload = json.dumps(data).encode("utf-8")
+        with self._lock:
+            self.messages += 1
+            self.bytes += len(payload)
+
+
+@dataclass
+class ParseTimer:
+    """
+    Accumulates the thread CPU time spent in the scraper's parsing methods.
+    """
+
+    seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def wrap(self, method: Callable) -> Callable:
+        """
+        Time every call of a method.
+
+        Args:
+            method (Callable): The bound method to time.
+
+        Returns:
+            Callable: The timed method.
+        """
+
+        def timed(*args, **kwargs):
+            started = time.thread_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.thread_time() - started
+                with self._lock:
+                    self.seconds += elapsed
+
+        return timed
+
+
+def instrument(scraper: WebScraper) -> ParseTimer:
+    """
+    Time the parsing methods of a scraper.
+
+    Args:
+        scraper (WebScraper): The scraper to instrument.
+
+    Returns:
+        ParseTimer: The timer collecting the parse time.
+    """
+    timer = ParseTimer()
+    for name in PARSE_METHODS:
+        setattr(scraper, name, timer.wrap(getattr(scraper, name)))
+    return timer
+
+
+def run_scenario(scenario: Scenario, use_kafka: bool = False) -> BenchmarkResult:
+    """
+    Crawl a fresh fake site once and measure the crawl.
+
+    Args:
+        scenario (Scenario): The benchmark configuration.
+        use_kafka (bool): Send discount data to the Kafka broker configured by
+            KAFKA_BROKER_URL instead of counting it in process.
+
+    Returns:
+        BenchmarkResult: The measured metrics.
+    """
+    site = FakeSite(
+        pages=scenario.pages,
+        images_per_page=scenario.images_per_page,
+        page_bytes=scenario.page_bytes,
+        image_bytes=scenario.image_bytes,
+        latency=scenario.latency,
+    )
+    sink = KafkaSink()
+    with site, tempfile.TemporaryDirectory() as output_dir:
+        scraper = WebScraper(
+            base_urls=site.page_urls(),
+            output_dir=output_dir,
+            max_concurrency=scenario.max_concurrency,
+            per_host_concurrency=scenario.max_concurrency,
+            rate_limiter=DomainRateLimiter(
+                requests_per_minute=10_000_000,
+                burst=10_000_000,
+                respect_crawl_delay=False,
+            ),
+            crawl_state=SQLiteCrawlStateStore(":memory:"),
+        )
+        timer = instrument(scraper)
+        produce = core.send_discount_data
+
+        def send(data: dict) -> None:
+            sink.send(data)
+            if use_kafka:
+                produce(data)
+
+        with patch.object(core, "send_discount_data", send):
+            started = time.perf_counter()
+            if scenario.mode == "async":
+                scraper.scrape_all_async()
+            else:
+                scraper.scrape_all()
+            seconds = time.perf_counter() - started
+
+    return BenchmarkResult(
+        scenario=scenario.name,
+        pages=scenario.pages,
+        seconds=round(seconds, 3),
+        pages_per_sec=round(scenario.pages / seconds, 2),
+        parse_ms_per_page=round(timer.seconds * 1000 / scenario.pages, 3),
+        bytes_fetched=site.bytes_sent,
+        requests=site.requests,
+        kafka_messages=sink.messages,
+        kafka_msgs_per_sec=round(sink.messages / seconds, 2),
+    )
+
+
+def calibrate(rounds: int = 3) -> float:
+    """
+    Time a fixed workload, parsing pages of the fake site, to gauge the speed
+    of the machine.
+
+    Args:
+        rounds (int): Times the workload is run; the fastest run is kept.
+
+    Returns:
+        float: CPU milliseconds of the fastest run.
+    """
+    site = FakeSite(pages=CALIBRATION_PAGES)
+    pages = [site.render_page(n) for n in range(CALIBRATION_PAGES)]
+    timings = []
+    for _ in range(max(1, rounds)):
+        started = time.thread_time()
+        for page in pages:
+            soup = BeautifulSoup(page, "html.parser")
+            soup.find_all(["a", "img"])
+        timings.append(time.thread_time() - started)
+    return round(min(timings) * 1000, 3)
+
+
+def run_benchmarks(
+    scenarios: List[Scenario], repeat: int = 3, use_kafka: bool = False
+) -> List[BenchmarkResult]:
+    """
+    Run each scenario several times and keep its fastest run, along with a
+    calibration run.
+
+    Args:
+        scenarios (List[Scenario]): The scenarios to run.
+        repeat (int): Runs per scenario.
+        use_kafka (bool): Send discount data to a real Kafka broker.
+
+    Returns:
+        List[BenchmarkResult]: The fastest run of each scenario.
+    """
+    # Per-page log lines would dominate the measurement
+    logger = logging.getLogger()
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        calibration_ms = calibrate()
+        results = []
+        for scenario in scenarios:
+            runs = [run_scenario(scenario, use_kafka) for _ in range(max(1, repeat))]
+            best = max(runs, key=lambda result: result.pages_per_sec)
+            best.calibration_ms = calibration_ms
+            results.append(best)
+        return results
+    finally:
+        logger.setLevel(level)
+
+
+def load_baselines(path: str = BASELINE_PATH) -> Dict[str, Dict[str, float]]:
+    """
+    Load stored baseline metrics.
+
+    Args:
+        path (str): The baseline file.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Metrics by scenario name; empty if the
+        file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(results: List[BenchmarkResult], path: str = BASELINE_PATH) -> None:
+    """
+    Store the metrics of benchmark results as baselines, keeping the baselines
+    of scenarios that were not run.
+
+    Args:
+        results (List[BenchmarkResult]): The results to store.
+        path (str): The baseline file.
+    """
+    baselines = load_baselines(path)
+    for result in results:
+        baselines[result.scenario] = asdict(result)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baselines: Dict[str, Dict[str, float]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """
+    Compare benchmark results with their baselines.
+
+    If both a result and its baseline carry a calibration time, the baseline's
+    timing metrics are first scaled to the speed of the machine the result was
+    measured on.
+
+    Args:
+        results (List[BenchmarkResult]): The results to check.
+        baselines (Dict[str, Dict[str, float]]): Baseline metrics by scenario.
+        tolerance (float): Relative change tolerated before a metric regresses.
+
+    Returns:
+        List[str]: A description of every regression; empty if there are none.
+    """
+    regressions = []
+    for result in results:
+        baseline: Optional[Dict[str, float]] = baselines.get(result.scenario)
+        if not baseline:
+            logging.warning(f"No baseline for scenario {result.scenario}")
+            continue
+        slowdown = machine_slowdown(result, baseline)
+        for name, value in result.metrics().items():
+            expected = baseline.get(name)
+            if not expected:
+                continue
+            if name in TIMING_METRICS:
+                # A slower machine takes longer per page and crawls fewer pages
+                if name in HIGHER_IS_BETTER:
+                    expected = round(expected / slowdown, 3)
+                else:
+                    expected = round(expected * slowdown, 3)
+            if name in HIGHER_IS_BETTER:
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(
+                    f"{result.scenario}: {name} is {value}, baseline {expected}"
+                )
+    return regressions
+
+
+def machine_slowdown(result: BenchmarkResult, baseline: Dict[str, float]) -> float:
+    """
+    Return how many times slower the machine of a result is than the machine
+    its baseline was recorded on.
+
+    Args:
+        result (BenchmarkResult): The result.
+        baseline (Dict[str, float]): The baseline metrics.
+
+    Returns:
+        float: The ratio of their calibration times; 1.0 if either is missing.
+    """
+    baseline_ms = baseline.get("calibration_ms")
+    if not baseline_ms or not result.calibration_ms:
+        return 1.0
+    return result.calibration_ms / baseline_ms
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    """
+    Format benchmark results as a table.
+
+    Args:
+        results (List[BenchmarkResult]): The results.
+
+    Returns:
+        str: One line per scenario.
+    """
+    header = (
+        f"{'scenario':<20}{'pages/s':>10}{'parse ms/page':>15}"
+        f"{'bytes':>14}{'kafka msg/s':>13}"
+    )
+    lines = [header]
+    for result in results:
+        lines.append(
+            f"{result.scenario:<20}{result.pages_per_sec:>10.1f}"
+            f"{result.parse_ms_per_page:>15.2f}{result.bytes_fetched:>14}"
+            f"{result.kafka_msgs_per_sec:>13.1f}"
+        )
+    return "\n".join(lines)
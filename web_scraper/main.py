@@ -1,8 +1,24 @@
-from scraper.config import BASE_URLS, MAX_WORKERS, OUTPUT_DIR
+import asyncio
+
+from scraper.config import BASE_URLS, CRAWL_MODE, MAX_WORKERS, OUTPUT_DIR
 from scraper.core import WebScraper
+from scraper.frontier import get_frontier
 
 if __name__ == "__main__":
+    frontier = get_frontier()
     scraper = WebScraper(
-        base_urls=BASE_URLS, output_dir=OUTPUT_DIR, max_workers=MAX_WORKERS
+        base_urls=BASE_URLS,
+        output_dir=OUTPUT_DIR,
+        max_workers=MAX_WORKERS,
+        frontier=frontier,
     )
-    scraper.scrape_all()
+    if frontier is not None:
+        # Replicas share the frontier, so each one crawls different URLs
+        if CRAWL_MODE == "async":
+            asyncio.run(scraper.crawl_frontier_async())
+        else:
+            scraper.crawl_frontier()
+    elif CRAWL_MODE == "async":
+        scraper.scrape_all_async()
+    else:
+        scraper.scrape_all()
@@ -0,0 +1,141 @@
+"""
+Memory-compact set of seen URLs.
+
+A Bloom filter answers "have we seen this URL?" in a few bits per URL instead
+of storing the URLs themselves. It never forgets a URL, but may wrongly report
+a new URL as seen with a small, configurable probability. The scalable variant
+adds larger filters as it fills up, so the error rate stays bounded without
+knowing the final number of URLs in advance.
+"""
+
+import hashlib
+import math
+from typing import List
+
+from .config import SEEN_SET_CAPACITY, SEEN_SET_ERROR_RATE
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Size the filter for a number of items and a false positive rate.
+
+        Args:
+            capacity (int): Number of items the filter is sized for.
+            error_rate (float): False positive rate at full capacity.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.num_bits = max(8, math.ceil(bits))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        """
+        Return the bit positions of an item, using double hashing.
+
+        Args:
+            item (str): The item.
+
+        Returns:
+            List[int]: The positions of the item's bits.
+        """
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def add(self, item: str) -> bool:
+        """
+        Add an item to the filter.
+
+        Args:
+            item (str): The item.
+
+        Returns:
+            bool: True if the item was not in the filter before.
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+class ScalableBloomFilter:
+    """
+    A Bloom filter that grows by adding larger filters as it fills up.
+
+    Each new filter has ``growth`` times the capacity and ``tightening`` times
+    the error rate of the previous one, so the overall false positive rate
+    stays below ``error_rate``.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = SEEN_SET_CAPACITY,
+        error_rate: float = SEEN_SET_ERROR_RATE,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ) -> None:
+        """
+        Initialize the filter with a single, empty Bloom filter.
+
+        Args:
+            initial_capacity (int): Capacity of the first filter.
+            error_rate (float): Upper bound of the overall false positive rate.
+            growth (int): Capacity factor between consecutive filters.
+            tightening (float): Error rate factor between consecutive filters.
+        """
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom for bloom in self.filters)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def add(self, item: str) -> bool:
+        """
+        Add an item to the filter.
+
+        Args:
+            item (str): The item.
+
+        Returns:
+            bool: True if the item was not in the filter before.
+        """
+        if item in self:
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(
+                current.capacity * self.growth, current.error_rate * self.tightening
+            )
+            self.filters.append(current)
+        return current.add(item)
+
+    @property
+    def size_in_bytes(self) -> int:
+        """
+        int: Memory used by the filters' bit arrays.
+        """
+        return sum(len(bloom.bits) for bloom in self.filters)
@@ -13,3 +13,83 @@ OUTPUT_DIR = os.getenv("OUTPUT_DIR", "images")
 
 # Maximum number of threads for concurrent downloads
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", 5))
+
+# File or directory containing the per-site extraction rules (YAML or JSON)
+RULES_PATH = os.getenv(
+    "RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+)
+
+# Crawl mode: "sync" walks the URLs one at a time, "async" crawls them concurrently
+CRAWL_MODE = os.getenv("CRAWL_MODE", "sync").lower()
+
+# Maximum number of concurrent connections across all hosts in async mode
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", 100))
+
+# Maximum number of concurrent connections to a single host in async mode
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", 4))
+
+# Requests per minute allowed to each domain
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", 10))
+
+# Number of requests a domain may receive back to back before being throttled
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 10))
+
+# Whether to slow down to the Crawl-delay published in a site's robots.txt
+RESPECT_CRAWL_DELAY = os.getenv("RESPECT_CRAWL_DELAY", "true").lower() == "true"
+
+# How many times a rate-limited URL is rescheduled before it is deferred
+MAX_RESCHEDULES = int(os.getenv("MAX_RESCHEDULES", 10))
+
+# Seconds a URL is deferred for, in the crawl state, once it was rescheduled
+# MAX_RESCHEDULES times; the first crawl after that picks it up again
+RATE_LIMIT_DEFER_SECONDS = float(os.getenv("RATE_LIMIT_DEFER_SECONDS", 3600))
+
+# SQLite database recording ETag, Last-Modified and content hash of crawled pages
+CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", "crawl_state.sqlite3")
+
+# Largest page body, in bytes, that is downloaded before the page is skipped
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", 5 * 1024 * 1024))
+
+# Largest image, in bytes, that is downloaded before the image is skipped
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", 10 * 1024 * 1024))
+
+# Size of the chunks in which page and image bodies are read
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 64 * 1024))
+
+# Crawl frontier shared by scraper replicas: "redis", "memory", or empty to crawl
+# BASE_URLS once without a frontier
+FRONTIER_BACKEND = os.getenv("FRONTIER_BACKEND", "").lower()
+
+# Redis instance holding the shared crawl frontier
+FRONTIER_REDIS_URL = os.getenv("FRONTIER_REDIS_URL", "redis://localhost:6379/0")
+
+# Prefix of the Redis keys used by the crawl frontier
+FRONTIER_KEY_PREFIX = os.getenv("FRONTIER_KEY_PREFIX", "scraper:frontier")
+
+# Seconds a leased URL stays claimed by one replica before others may take it
+FRONTIER_LEASE_SECONDS = float(os.getenv("FRONTIER_LEASE_SECONDS", 300))
+
+# Number of URLs a replica leases from the frontier at a time
+FRONTIER_BATCH_SIZE = int(os.getenv("FRONTIER_BATCH_SIZE", 10))
+
+# Seconds to wait before polling the frontier again when no URL is due
+FRONTIER_IDLE_SECONDS = float(os.getenv("FRONTIER_IDLE_SECONDS", 5))
+
+# Seconds after a successful crawl before a URL is crawled again
+RECRAWL_INTERVAL = float(os.getenv("RECRAWL_INTERVAL", 24 * 60 * 60))
+
+# How many links deep to follow from a base URL, unless a site's rules say otherwise
+LINK_MAX_DEPTH = int(os.getenv("LINK_MAX_DEPTH", 0))
+
+# Most pages crawled per host, unless a site's rules say otherwise
+LINK_MAX_PAGES = int(os.getenv("LINK_MAX_PAGES", 1000))
+
+# Seconds over which the pages of a host added to the shared frontier are counted
+# against its page budget; new links are accepted again in the next window
+LINK_BUDGET_WINDOW = float(os.getenv("LINK_BUDGET_WINDOW", RECRAWL_INTERVAL))
+
+# Number of URLs the seen set is sized for before it grows
+SEEN_SET_CAPACITY = int(os.getenv("SEEN_SET_CAPACITY", 100_000))
+
+# Acceptable rate of new URLs wrongly treated as already seen
+SEEN_SET_ERROR_RATE = float(os.getenv("SEEN_SET_ERROR_RATE", 0.001))
@@ -1,20 +1,44 @@
+import asyncio
 import logging
-import os
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from typing import Dict, Iterable, List, Optional, Union
 from urllib.parse import urljoin
 
+import aiohttp
 from bs4 import BeautifulSoup
-from pyrate_limiter import Duration, Limiter, Rate, BucketFullException
 
+from .bloom import ScalableBloomFilter
+from .config import (
+    FRONTIER_BATCH_SIZE,
+    FRONTIER_IDLE_SECONDS,
+    FRONTIER_LEASE_SECONDS,
+    MAX_CONCURRENCY,
+    PER_HOST_CONCURRENCY,
+    RATE_LIMIT_DEFER_SECONDS,
+    RECRAWL_INTERVAL,
+)
+from .crawl_state import (
+    CrawlState,
+    CrawlStateStore,
+    get_crawl_state_store,
+    hash_content,
+)
+from .frontier import Frontier, Lease
+from .image_store import ImageStore
+from .links import LinkPolicy, canonicalize_url, extract_links
+from .rate_limit import DomainRateLimiter, RateLimitedError, get_domain
+from .rules import RuleRegistry, get_rule_registry
+from .scheduler import DEFAULT_PRIORITY, CrawlRequest, CrawlScheduler
 from .utils import (
+    PageResponse,
+    async_conditional_request,
+    async_head_request,
+    async_stream_image,
+    conditional_request,
+    head_request,
     is_valid_url,
-    retry_request,
-    extract_discount_code,
-    extract_discount_description,
-    extract_expiration_date,
-    extract_location,
-    extract_retailer_name,
+    stream_image,
 )
 from .kafka_producer import send_discount_data  # Import the producer
 import time
@@ -28,65 +52,204 @@ logging.basicConfig(
     ],
 )
 
-# Rate limiter to control the number of requests (10 requests per minute)
-rate = Rate(10, Duration.MINUTE)
-limiter = Limiter(rate)
-
 
 class WebScraper:
     """
     A class to scrape images and discount data from a list of URLs.
     """
 
-    def __init__(self, base_urls: List[str], output_dir: str, max_workers: int = 5) -> None:
+    def __init__(
+        self,
+        base_urls: List[str],
+        output_dir: str,
+        max_workers: int = 5,
+        rules: Optional[RuleRegistry] = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        per_host_concurrency: int = PER_HOST_CONCURRENCY,
+        rate_limiter: Optional[DomainRateLimiter] = None,
+        crawl_state: Optional[CrawlStateStore] = None,
+        frontier: Optional[Frontier] = None,
+        recrawl_interval: Optional[float] = RECRAWL_INTERVAL,
+    ) -> None:
         """
         Initialize the WebScraper instance.
 
         Args:
             base_urls (List[str]): A list of URLs to scrape.
-            output_dir (str): Directory to save downloaded images.
+            output_dir (str): Directory of the content-addressed image store.
             max_workers (int): Number of threads for concurrent downloads.
+            rules (Optional[RuleRegistry]): Extraction rules to use. Defaults to
+                the rules loaded from RULES_PATH.
+            max_concurrency (int): Maximum number of concurrent pages and
+                connections across all hosts in async mode.
+            per_host_concurrency (int): Maximum number of concurrent connections
+                to a single host in async mode.
+            rate_limiter (Optional[DomainRateLimiter]): Per-domain rate limiter
+                for page requests. Defaults to the limits from the config.
+            crawl_state (Optional[CrawlStateStore]): Store of ETags, Last-Modified
+                dates and content hashes used to skip unchanged pages and images,
+                and to map image URLs to their stored digests. Defaults to
+                the SQLite store at CRAWL_STATE_PATH.
+            frontier (Optional[Frontier]): Crawl frontier shared with other
+                scraper replicas, used by crawl_frontier and crawl_frontier_async.
+            recrawl_interval (Optional[float]): Seconds after a crawl before a
+                frontier URL is crawled again, or None to crawl it only once.
+
+        Links are followed according to the link policy in each site's rules.
+        During a crawl of the base URLs, URLs already queued are remembered in a
+        Bloom filter, and the number of pages queued per host is counted against
+        the policy's page budget; both start over with every crawl. Links found
+        on frontier URLs are deduplicated and counted by the shared frontier.
         """
         self.base_urls = base_urls
         self.output_dir = output_dir
         self.max_workers = max_workers
-        os.makedirs(output_dir, exist_ok=True)
+        self.rules = rules or get_rule_registry()
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        self._crawl_state = crawl_state
+        self.frontier = frontier
+        self.recrawl_interval = recrawl_interval
+        self.images = ImageStore(output_dir)
+        self.seen = ScalableBloomFilter()
+        self._pages_per_host: Counter = Counter()
+
+    @property
+    def crawl_state(self) -> CrawlStateStore:
+        """
+        CrawlStateStore: The crawl state store, opened on first use.
+        """
+        if self._crawl_state is None:
+            self._crawl_state = get_crawl_state_store()
+        return self._crawl_state
 
     def fetch_html(self, url: str) -> str:
         """
         Fetch the HTML content of a given URL with rate limiting.
 
+        Waits until the URL's domain accepts another request.
+
         Args:
             url (str): The URL to fetch HTML from.
 
         Returns:
             str: The HTML content of the URL.
+
+        Raises:
+            RateLimitedError: If the site responds with a rate-limit status code.
+        """
+        return self.fetch_page(url).content
+
+    def fetch_page(self, url: str, state: Optional[CrawlState] = None) -> PageResponse:
+        """
+        Fetch a page with rate limiting, as a conditional request if it was
+        crawled before.
+
+        Args:
+            url (str): The URL to fetch.
+            state (Optional[CrawlState]): The URL's state from the last crawl.
+
+        Returns:
+            PageResponse: The response, with status 304 if the page was not modified.
+
+        Raises:
+            RateLimitedError: If the site responds with a rate-limit status code.
         """
         logging.info(f"Fetching HTML from {url}")
 
-        # Apply rate limiting
-        try:
-            limiter.try_acquire("scrape")  # Enforce rate limit for "scrape" identity
-        except BucketFullException as e:
-            wait_time = e.meta_info["remaining_time"]
-            logging.warning(f"Rate limit exceeded. Retrying in {wait_time:.2f} seconds...")
-            raise
+        # Wait for the domain's rate limit
+        self.rate_limiter.acquire(url)
 
         try:
-            response_content = retry_request(url)
-            if not response_content:
+            headers = state.conditional_headers() if state else None
+            page = conditional_request(url, headers)
+            if not page.content and not page.not_modified:
                 logging.warning(f"No HTML content returned from {url}")
-            return response_content
+            return page
         except Exception as e:
             logging.error(f"Error fetching HTML from {url}: {e}")
             raise
 
-    def parse_images(self, html: str, base_url: str) -> List[str]:
+    def _stored_state(self, url: str) -> Optional[CrawlState]:
+        """
+        Return the state of a URL from its last crawl, unless the page was last
+        processed with other extraction rules, so that it is processed again.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            Optional[CrawlState]: The state, or None if the page must be fetched
+            and processed regardless of changes.
+        """
+        state = self.crawl_state.get(url)
+        if state and state.rules_version != self.rules.version:
+            return None
+        return state
+
+    def _changed_state(
+        self, url: str, state: Optional[CrawlState], page: PageResponse
+    ) -> Optional[CrawlState]:
+        """
+        Compare a fetched page with its last crawl.
+
+        For an unchanged page only the check time and validators are stored.
+
+        Args:
+            url (str): The URL of the page.
+            state (Optional[CrawlState]): The URL's state from the last crawl.
+            page (PageResponse): The fetched page.
+
+        Returns:
+            Optional[CrawlState]: The state to store once the page has been
+            processed, or None if the page did not change.
+        """
+        now = time.time()
+        if page.not_modified:
+            if state:
+                state.etag = page.etag or state.etag
+                state.last_modified = page.last_modified or state.last_modified
+                state.checked_at = now
+                self.crawl_state.save(state)
+            return None
+
+        new_state = CrawlState(
+            url,
+            page.etag,
+            page.last_modified,
+            hash_content(page.content),
+            now,
+            now,
+            self.rules.version,
+        )
+        if state and state.content_hash == new_state.content_hash:
+            new_state.changed_at = state.changed_at
+            self.crawl_state.save(new_state)
+            return None
+        return new_state
+
+    def parse_html(self, content: bytes) -> BeautifulSoup:
+        """
+        Parse a fetched page once, for image, data and link extraction.
+
+        Args:
+            content (bytes): The page body.
+
+        Returns:
+            BeautifulSoup: The parsed document.
+        """
+        return BeautifulSoup(content, "html.parser")
+
+    def parse_images(
+        self, html: Union[str, BeautifulSoup], base_url: str
+    ) -> List[str]:
         """
         Parse image URLs from the HTML content.
 
         Args:
-            html (str): HTML content of the page.
+            html (Union[str, BeautifulSoup]): HTML content of the page, or the
+                parsed document.
             base_url (str): Base URL for resolving relative image paths.
 
         Returns:
@@ -95,7 +258,9 @@ class WebScraper:
         if not html:
             logging.warning("Empty HTML content; cannot parse images.")
             return []
-        soup = BeautifulSoup(html, "html.parser")
+        soup = html
+        if not isinstance(soup, BeautifulSoup):
+            soup = BeautifulSoup(html, "html.parser")
         img_tags = soup.find_all("img")
         img_urls = [urljoin(base_url, img.get("src", "")) for img in img_tags]
         valid_urls = [url for url in img_urls if is_valid_url(url)]
@@ -104,69 +269,152 @@ class WebScraper:
 
     def download_image(self, image_url: str) -> None:
         """
-        Download a single image.
+        Download a single image into the image store.
+
+        Images downloaded by an earlier crawl are only fetched again if a
+        conditional HEAD request shows that they changed. Each request waits
+        for the rate limit of the image's domain, like page fetches.
 
         Args:
             image_url (str): The URL of the image to download.
         """
         try:
-            response_content = retry_request(image_url)
-            if response_content:
-                file_name = os.path.join(self.output_dir, os.path.basename(image_url))
-                with open(file_name, "wb") as file:
-                    file.write(response_content)
-                logging.info(f"Downloaded image: {file_name}")
-            else:
-                logging.error(f"No response received when downloading {image_url}")
+            state = self._stored_image(image_url)
+            if state:
+                if not state.etag and not state.last_modified:
+                    logging.info(f"Image already downloaded: {image_url}")
+                    return
+                self.rate_limiter.acquire(image_url)
+                check = head_request(image_url, state.conditional_headers())
+                if self._image_unchanged(state, check):
+                    logging.info(f"Image not modified: {image_url}")
+                    return
+            self.rate_limiter.acquire(image_url)
+            response, digest = stream_image(image_url, self.images)
+            self._index_image(image_url, response, digest)
         except Exception as e:
             logging.error(f"Failed to download {image_url}: {e}")
 
-    def process_discount_data(self, html: str) -> dict:
+    def _stored_image(self, image_url: str) -> Optional[CrawlState]:
+        """
+        Look up an image URL in the index of downloaded images.
+
+        Args:
+            image_url (str): The URL of the image.
+
+        Returns:
+            Optional[CrawlState]: The URL's index entry if its image is stored,
+            otherwise None.
+        """
+        state = self.crawl_state.get(image_url)
+        if state and state.content_hash and self.images.exists(state.content_hash):
+            return state
+        return None
+
+    @staticmethod
+    def _image_unchanged(state: CrawlState, check: PageResponse) -> bool:
         """
-        Extract discount data from HTML.
+        Decide from a HEAD response whether a stored image is still current.
 
         Args:
-            html (str): The HTML content to extract data from.
+            state (CrawlState): The index entry of the stored image.
+            check (PageResponse): The response to the conditional HEAD request.
+
+        Returns:
+            bool: True if the image did not change since it was downloaded.
+        """
+        if check.not_modified:
+            return True
+        if state.etag and check.etag == state.etag:
+            return True
+        return bool(state.last_modified and check.last_modified == state.last_modified)
+
+    def _index_image(self, image_url: str, response: PageResponse, digest: str) -> None:
+        """
+        Record the digest and validators of a downloaded image under its URL.
+
+        Args:
+            image_url (str): The URL the image was downloaded from.
+            response (PageResponse): The image response.
+            digest (str): The digest the image was stored under.
+        """
+        self.crawl_state.save(
+            CrawlState(image_url, response.etag, response.last_modified, digest)
+        )
+        logging.info(f"Downloaded image {image_url} to {self.images.path(digest)}")
+
+    def process_discount_data(
+        self, html: Union[str, BeautifulSoup], url: Optional[str] = None
+    ) -> dict:
+        """
+        Extract discount data from HTML using the extraction rules for the URL.
+
+        Args:
+            html (Union[str, BeautifulSoup]): The HTML content to extract data
+                from, or the parsed document.
+            url (Optional[str]): The URL of the page, used to select the site rules.
 
         Returns:
             dict: A dictionary containing discount data.
         """
         discount_data = {}
         try:
-            discount_data = {
-                "retailer_name": extract_retailer_name(html),
-                "description": extract_discount_description(html),
-                "discount_code": extract_discount_code(html),
-                "expiration_date": extract_expiration_date(html),
-                "location": extract_location(html),
-            }
+            discount_data = self.rules.extract(html, url)
             logging.info(f"Extracted discount data: {discount_data}")
         except Exception as e:
             logging.error(f"Error extracting discount data: {e}")
         return discount_data
 
-    def scrape_url(self, url: str) -> None:
+    def parse_links(self, soup: BeautifulSoup, url: str) -> List[str]:
+        """
+        Parse the links of a page, if its site's link policy follows links.
+
+        Args:
+            soup (BeautifulSoup): The parsed page.
+            url (str): The URL of the page.
+
+        Returns:
+            List[str]: The canonical URLs of the page's links.
+        """
+        if self.rules.link_policy(url).max_depth <= 0:
+            return []
+        return extract_links(soup, url)
+
+    def scrape_url(self, url: str) -> List[str]:
         """
         Scrape images and discount data from a single URL.
 
         Args:
             url (str): The URL to scrape.
+
+        Returns:
+            List[str]: The links found on the page, if it changed and was
+            processed and its site's link policy follows links.
+
+        Raises:
+            RateLimitedError: If the site rate-limited the page request, so the
+                caller can reschedule the URL.
         """
         logging.info(f"Scraping URL: {url}")
         
-        # Fetch HTML with rate limiting
+        # Fetch HTML with rate limiting, conditionally if crawled before
+        state = self._stored_state(url)
         try:
-            html = self.fetch_html(url)
-        except BucketFullException as e:
-            wait_time = e.meta_info["remaining_time"]
-            logging.warning(f"Rate limit exceeded. Retrying in {wait_time:.2f} seconds...")
-            return
+            page = self.fetch_page(url, state)
+        except RateLimitedError:
+            raise
         except Exception as e:
             logging.error(f"Skipping URL {url} due to fetch error: {e}")
-            return
+            return []
+
+        new_state = self._changed_state(url, state, page)
+        if new_state is None:
+            logging.info(f"Skipping URL {url}: unchanged since the last crawl")
+            return []
+        soup = self.parse_html(page.content)
 
         # Download images concurrently
-        images = self.parse_images(html, url)
+        images = self.parse_images(soup, url)
         
         if images:
             try:
@@ -182,37 +430,589 @@ class WebScraper:
                 logging.error(f"Error during concurrent image download for {url}: {e}")
         
         # Extract and send discount data to Kafka
-        discount_data = self.process_discount_data(html)
+        discount_data = self.process_discount_data(soup, url)
         
         if discount_data:
             try:
                 send_discount_data(discount_data)
                 logging.info("Discount data sent to Kafka successfully.")
             except Exception as e:
+                # Keep the old state so the page is processed again next crawl
                 logging.error(f"Failed to send discount data to Kafka: {e}")
+                return []
+
+        self.crawl_state.save(new_state)
+        return self.parse_links(soup, url)
+
+    def _build_scheduler(
+        self, urls: Iterable[str], leases: Dict[str, Lease]
+    ) -> CrawlScheduler:
+        """
+        Create a crawl scheduler holding all valid URLs.
+
+        Args:
+            urls (Iterable[str]): The URLs to crawl.
+            leases (Dict[str, Lease]): Frontier leases of the URLs, by URL.
+
+        Returns:
+            CrawlScheduler: The scheduler with the URLs queued.
+        """
+        scheduler = CrawlScheduler(self.rate_limiter)
+        for url in urls:
+            if not is_valid_url(url):  # Validate URL before scraping
+                logging.warning(f"Invalid URL skipped: {url}")
+                continue
+            lease = leases.get(url)
+            if lease:
+                scheduler.push(url, lease.priority, depth=lease.depth)
+            else:
+                self._mark_seen(canonicalize_url(url) or url)
+                scheduler.push(url, DEFAULT_PRIORITY)
+        return scheduler
+
+    def _reset_seen(self) -> None:
+        """
+        Forget the URLs queued and the pages counted by an earlier crawl.
+        """
+        self.seen = ScalableBloomFilter()
+        self._pages_per_host = Counter()
+
+    def _mark_seen(self, url: str) -> bool:
+        """
+        Add a URL to the seen set and count it against its host's page budget.
+
+        Args:
+            url (str): The canonical URL.
+
+        Returns:
+            bool: True if the URL had not been seen before.
+        """
+        if not self.seen.add(url):
+            return False
+        self._pages_per_host[get_domain(url)] += 1
+        return True
+
+    def _followable_links(
+        self, request: CrawlRequest, links: List[str], policy: LinkPolicy
+    ) -> List[str]:
+        """
+        Select the links of a scraped page that its site's link policy follows.
+
+        A link is followed if the page is within the site's maximum depth and
+        the link passes the host, allow and deny rules of the link policy.
+
+        Args:
+            request (CrawlRequest): The request of the scraped page.
+            links (List[str]): The canonical URLs of the page's links.
+            policy (LinkPolicy): The link policy of the page's site.
+
+        Returns:
+            List[str]: The links to follow.
+        """
+        if not links or request.depth >= policy.max_depth:
+            return []
+        host = get_domain(request.url)
+        return [
+            link
+            for link in links
+            if (not policy.same_host or get_domain(link) == host)
+            and policy.allows(link)
+        ]
+
+    def _discover_links(self, request: CrawlRequest, links: List[str]) -> List[str]:
+        """
+        Select the links of a scraped page that should be crawled.
+
+        A link is crawled if it is followed by the link policy, was not seen
+        before during this crawl, and its host has not used up its page budget.
+
+        Args:
+            request (CrawlRequest): The request of the scraped page.
+            links (List[str]): The canonical URLs of the page's links.
+
+        Returns:
+            List[str]: The links to crawl, now marked as seen.
+        """
+        policy = self.rules.link_policy(request.url)
+        accepted = []
+        for link in self._followable_links(request, links, policy):
+            if link in self.seen:
+                continue
+            if self._pages_per_host[get_domain(link)] >= policy.max_pages:
+                continue
+            if self._mark_seen(link):
+                accepted.append(link)
+        return accepted
+
+    def _add_links_to_frontier(self, request: CrawlRequest, links: List[str]) -> int:
+        """
+        Add the links of a scraped frontier URL to the frontier.
+
+        The frontier ignores links it already knows and counts the others
+        against their host's page budget, shared by all replicas.
+
+        Args:
+            request (CrawlRequest): The request of the scraped page.
+            links (List[str]): The canonical URLs of the page's links.
+
+        Returns:
+            int: The number of links added.
+        """
+        policy = self.rules.link_policy(request.url)
+        return sum(
+            self.frontier.add(
+                link,
+                request.priority + 1,
+                depth=request.depth + 1,
+                max_host_pages=policy.max_pages,
+            )
+            for link in self._followable_links(request, links, policy)
+        )
+
+    def _on_scraped(
+        self,
+        scheduler: CrawlScheduler,
+        request: CrawlRequest,
+        links: List[str],
+        leases: Dict[str, Lease],
+    ) -> None:
+        """
+        Queue the new links of a scraped URL, and complete its frontier lease
+        and schedule its recrawl.
+
+        Links of a leased URL are added to the frontier, so any replica may
+        crawl them; other links are put into the scheduler.
+
+        Args:
+            scheduler (CrawlScheduler): The scheduler the request came from.
+            request (CrawlRequest): The scraped request.
+            links (List[str]): The links found on the page.
+            leases (Dict[str, Lease]): Frontier leases of the crawled URLs, by URL.
+        """
+        lease = leases.pop(request.url, None)
+        if lease:
+            self.frontier.complete(lease, self.recrawl_interval)
+            followed = self._add_links_to_frontier(request, links)
+        else:
+            links = self._discover_links(request, links)
+            for link in links:
+                scheduler.push(link, request.priority + 1, depth=request.depth + 1)
+            followed = len(links)
+
+        if followed:
+            logging.info(
+                f"Following {followed} new link(s) from {request.url} "
+                f"at depth {request.depth + 1}"
+            )
+
+    def _on_rate_limited(
+        self,
+        scheduler: CrawlScheduler,
+        request: CrawlRequest,
+        error: RateLimitedError,
+        leases: Dict[str, Lease],
+    ) -> None:
+        """
+        Pause a rate-limited domain and retry the URL later.
+
+        A leased URL is handed back to the frontier, so whichever replica is
+        free once the site allows it again can retry it. Other URLs are put
+        back into the scheduler, or, once rescheduled too often, deferred in
+        the crawl state to a later crawl.
+
+        Args:
+            scheduler (CrawlScheduler): The scheduler the request came from.
+            request (CrawlRequest): The rate-limited request.
+            error (RateLimitedError): The rate-limit error raised for the request.
+            leases (Dict[str, Lease]): Frontier leases of the crawled URLs, by URL.
+        """
+        self.rate_limiter.backoff(request.url, error.retry_after)
+        lease = leases.pop(request.url, None)
+        if lease:
+            self.frontier.release(lease, error.retry_after)
+        elif scheduler.reschedule(request, error.retry_after):
+            logging.info(f"Rescheduled {request.url} in {error.retry_after:.1f}s")
+        else:
+            delay = max(error.retry_after, RATE_LIMIT_DEFER_SECONDS)
+            self.crawl_state.defer(request.url, request.priority, request.depth, delay)
+            logging.warning(
+                f"Deferred {request.url} by {delay:.0f}s after "
+                f"{request.attempts} reschedules"
+            )
+
+    def _push_deferred(self, scheduler: CrawlScheduler) -> None:
+        """
+        Queue the URLs deferred by earlier crawls that are due again.
+
+        Args:
+            scheduler (CrawlScheduler): The scheduler of the crawl.
+        """
+        for url, priority, depth in self.crawl_state.pop_deferred():
+            scheduler.push(url, priority, depth=depth)
+
+    def _drain(self, scheduler: CrawlScheduler, leases: Dict[str, Lease]) -> None:
+        """
+        Scrape every URL in the scheduler, one at a time.
+
+        Args:
+            scheduler (CrawlScheduler): The scheduler holding the URLs.
+            leases (Dict[str, Lease]): Frontier leases of the URLs, by URL.
+        """
+        while scheduler:
+            request, wait = scheduler.pop()
+            if request is None:
+                time.sleep(wait)
+                continue
+
+            links: List[str] = []
+            try:
+                links = self.scrape_url(request.url)
+            except RateLimitedError as e:
+                self._on_rate_limited(scheduler, request, e, leases)
+                continue
+            except Exception as e:
+                logging.error(f"Unexpected error while scraping {request.url}: {e}")
+            self._on_scraped(scheduler, request, links, leases)
 
     def scrape_all(self) -> None:
         """
         Scrape images and discount data from all base URLs.
         If the list of URLs is empty, wait and retry.
+
+        URLs are taken from a scheduler, so a throttled domain does not hold up
+        the others, and rate-limited URLs are retried later instead of dropped.
         """
         logging.info("Starting the scraping process for all URLs.")
+        self.rules.reload_if_changed()
+
+        while not self.base_urls:  # Keep retrying while there are no URLs
+            logging.warning("No URLs to scrape. Sleeping for 60 seconds before retrying...")
+            time.sleep(60)  # Sleep for 60 seconds before checking again
+
+        self._reset_seen()
+        scheduler = self._build_scheduler(self.base_urls, {})
+        self._push_deferred(scheduler)
+        self._drain(scheduler, {})
+        logging.info("Scraping process completed.")
+
+    def seed_frontier(self) -> None:
+        """
+        Add the base URLs to the frontier; URLs it already knows are ignored.
+        """
+        added = 0
+        for url in self.base_urls:
+            if not is_valid_url(url):
+                logging.warning(f"Invalid URL skipped: {url}")
+                continue
+            added += self.frontier.add(url)
+        logging.info(f"Seeded the crawl frontier with {added} new URL(s)")
+
+    def _lease_batch(self) -> Dict[str, Lease]:
+        """
+        Lease the next batch of due URLs from the frontier.
+
+        Returns:
+            Dict[str, Lease]: The leases, by URL.
+        """
+        self.rules.reload_if_changed()
+        leases = self.frontier.lease(FRONTIER_BATCH_SIZE, FRONTIER_LEASE_SECONDS)
+        return {lease.url: lease for lease in leases}
+
+    def crawl_frontier(self, stop_when_idle: bool = False) -> None:
+        """
+        Crawl URLs leased from the shared frontier, one batch at a time.
+
+        The frontier is seeded with the base URLs first. Every replica running
+        this method against the same frontier gets different URLs.
+
+        Args:
+            stop_when_idle (bool): Return once no URL is due, instead of waiting
+                for recrawls.
+        """
+        logging.info("Starting to crawl from the shared frontier.")
+        self.seed_frontier()
 
-        while True:  # Infinite loop to keep retrying if URLs are empty
-            if not self.base_urls:
-                logging.warning("No URLs to scrape. Sleeping for 60 seconds before retrying...")
-                time.sleep(60)  # Sleep for 60 seconds before checking again
+        while True:
+            leases = self._lease_batch()
+            if not leases:
+                if stop_when_idle:
+                    break
+                time.sleep(FRONTIER_IDLE_SECONDS)
                 continue
+            self._drain(self._build_scheduler(leases, leases), leases)
+
+        logging.info("No URLs due in the frontier; crawl completed.")
+
+    async def fetch_html_async(self, session: aiohttp.ClientSession, url: str) -> str:
+        """
+        Fetch the HTML content of a given URL with rate limiting, without blocking.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session.
+            url (str): The URL to fetch HTML from.
+
+        Returns:
+            str: The HTML content of the URL.
+
+        Raises:
+            RateLimitedError: If the site responds with a rate-limit status code.
+        """
+        page = await self.fetch_page_async(session, url)
+        return page.content.decode("utf-8", errors="replace")
+
+    async def fetch_page_async(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        state: Optional[CrawlState] = None,
+    ) -> PageResponse:
+        """
+        Fetch a page with rate limiting without blocking, as a conditional
+        request if it was crawled before.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session.
+            url (str): The URL to fetch.
+            state (Optional[CrawlState]): The URL's state from the last crawl.
 
-            for url in self.base_urls:
-                if not is_valid_url(url):  # Validate URL before scraping
-                    logging.warning(f"Invalid URL skipped: {url}")
+        Returns:
+            PageResponse: The response, with status 304 if the page was not modified.
+
+        Raises:
+            RateLimitedError: If the site responds with a rate-limit status code.
+        """
+        logging.info(f"Fetching HTML from {url}")
+
+        # Wait for the domain's rate limit without blocking the event loop
+        await self.rate_limiter.acquire_async(url)
+
+        try:
+            page = await async_conditional_request(
+                session, url, state.conditional_headers() if state else None
+            )
+            if not page.content and not page.not_modified:
+                logging.warning(f"No HTML content returned from {url}")
+            return page
+        except Exception as e:
+            logging.error(f"Error fetching HTML from {url}: {e}")
+            raise
+
+    async def download_image_async(
+        self, session: aiohttp.ClientSession, image_url: str
+    ) -> None:
+        """
+        Download a single image into the image store without blocking.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session.
+            image_url (str): The URL of the image to download.
+        """
+        try:
+            state = await asyncio.to_thread(self._stored_image, image_url)
+            if state:
+                if not state.etag and not state.last_modified:
+                    logging.info(f"Image already downloaded: {image_url}")
+                    return
+                await self.rate_limiter.acquire_async(image_url)
+                check = await async_head_request(
+                    session, image_url, state.conditional_headers()
+                )
+                if self._image_unchanged(state, check):
+                    logging.info(f"Image not modified: {image_url}")
+                    return
+            await self.rate_limiter.acquire_async(image_url)
+            response, digest = await async_stream_image(
+                session, image_url, self.images
+            )
+            await asyncio.to_thread(self._index_image, image_url, response, digest)
+        except Exception as e:
+            logging.error(f"Failed to download {image_url}: {e}")
+
+    async def scrape_url_async(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> List[str]:
+        """
+        Scrape images and discount data from a single URL without blocking.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session.
+            url (str): The URL to scrape.
+
+        Returns:
+            List[str]: The links found on the page, if it changed and was
+            processed and its site's link policy follows links.
+
+        Raises:
+            RateLimitedError: If the site rate-limited the page request, so the
+                caller can reschedule the URL.
+        """
+        logging.info(f"Scraping URL: {url}")
+
+        state = await asyncio.to_thread(self._stored_state, url)
+        try:
+            page = await self.fetch_page_async(session, url, state)
+        except RateLimitedError:
+            raise
+        except Exception as e:
+            logging.error(f"Skipping URL {url} due to fetch error: {e}")
+            return []
+
+        new_state = await asyncio.to_thread(self._changed_state, url, state, page)
+        if new_state is None:
+            logging.info(f"Skipping URL {url}: unchanged since the last crawl")
+            return []
+        soup = self.parse_html(page.content)
+
+        # Download images concurrently over the shared session
+        images = self.parse_images(soup, url)
+        if images:
+            await asyncio.gather(
+                *(self.download_image_async(session, img_url) for img_url in images)
+            )
+
+        # Extract and send discount data to Kafka
+        discount_data = self.process_discount_data(soup, url)
+
+        if discount_data:
+            try:
+                await asyncio.to_thread(send_discount_data, discount_data)
+                logging.info("Discount data sent to Kafka successfully.")
+            except Exception as e:
+                # Keep the old state so the page is processed again next crawl
+                logging.error(f"Failed to send discount data to Kafka: {e}")
+                return []
+
+        await asyncio.to_thread(self.crawl_state.save, new_state)
+        return self.parse_links(soup, url)
+
+    async def _drain_async(
+        self,
+        session: aiohttp.ClientSession,
+        scheduler: CrawlScheduler,
+        leases: Dict[str, Lease],
+    ) -> None:
+        """
+        Scrape every URL in the scheduler with up to max_concurrency workers.
+
+        Args:
+            session (aiohttp.ClientSession): The shared HTTP session.
+            scheduler (CrawlScheduler): The scheduler holding the URLs.
+            leases (Dict[str, Lease]): Frontier leases of the URLs, by URL.
+        """
+        active = 0
+
+        async def worker() -> None:
+            nonlocal active
+            while scheduler or active:
+                request, wait = scheduler.pop()
+                if request is None:
+                    # Wait for a throttled domain, or for a URL being scraped
+                    # by another worker to be rescheduled
+                    await asyncio.sleep(wait or 0.1)
                     continue
 
+                active += 1
+                links: List[str] = []
                 try:
-                    self.scrape_url(url)
+                    links = await self.scrape_url_async(session, request.url)
+                except RateLimitedError as e:
+                    self._on_rate_limited(scheduler, request, e, leases)
+                    continue
                 except Exception as e:
-                    logging.error(f"Unexpected error while scraping {url}: {e}")
+                    logging.error(
+                        f"Unexpected error while scraping {request.url}: {e}"
+                    )
+                finally:
+                    active -= 1
+                self._on_scraped(scheduler, request, links, leases)
 
-            logging.info("Scraping process completed.")
-            break  # Exit the loop once scraping is done
+        # Start a full pool even for few URLs, since followed links add more
+        workers = self.max_concurrency if scheduler else 0
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    async def _set_up_rate_limits(self, urls: Iterable[str]) -> None:
+        """
+        Set up each domain's rate limit, including its robots.txt crawl delay,
+        before the workers start, so its first requests are already throttled.
+
+        Args:
+            urls (Iterable[str]): The URLs about to be crawled.
+        """
+        first_urls = {get_domain(url): url for url in urls if is_valid_url(url)}
+        await asyncio.gather(
+            *(
+                asyncio.to_thread(self.rate_limiter.bucket, url)
+                for url in first_urls.values()
+            )
+        )
+
+    def _connector(self) -> aiohttp.TCPConnector:
+        """
+        Create the connection pool for an async crawl.
+
+        Returns:
+            aiohttp.TCPConnector: A pool capped at max_concurrency connections in
+            total and per_host_concurrency connections per host.
+        """
+        return aiohttp.TCPConnector(
+            limit=self.max_concurrency, limit_per_host=self.per_host_concurrency
+        )
+
+    async def crawl_async(self) -> None:
+        """
+        Crawl all base URLs concurrently on a single event loop.
+
+        All requests share one HTTP session whose connection pool is capped at
+        max_concurrency connections in total and per_host_concurrency connections
+        per host. Up to max_concurrency workers take URLs from a scheduler, so a
+        throttled domain does not hold up the others, and rate-limited URLs are
+        retried later instead of dropped.
+        """
+        logging.info("Starting the async scraping process for all URLs.")
+        self.rules.reload_if_changed()
+
+        self._reset_seen()
+        scheduler = self._build_scheduler(self.base_urls, {})
+        self._push_deferred(scheduler)
+        await self._set_up_rate_limits(self.base_urls)
+        async with aiohttp.ClientSession(connector=self._connector()) as session:
+            await self._drain_async(session, scheduler, {})
+
+        logging.info("Async scraping process completed.")
+
+    async def crawl_frontier_async(self, stop_when_idle: bool = False) -> None:
+        """
+        Crawl URLs leased from the shared frontier concurrently, one batch at a
+        time, over a single HTTP session.
+
+        Args:
+            stop_when_idle (bool): Return once no URL is due, instead of waiting
+                for recrawls.
+        """
+        logging.info("Starting to crawl from the shared frontier asynchronously.")
+        await asyncio.to_thread(self.seed_frontier)
+
+        async with aiohttp.ClientSession(connector=self._connector()) as session:
+            while True:
+                leases = await asyncio.to_thread(self._lease_batch)
+                if not leases:
+                    if stop_when_idle:
+                        break
+                    await asyncio.sleep(FRONTIER_IDLE_SECONDS)
+                    continue
+                await self._set_up_rate_limits(leases)
+                await self._drain_async(
+                    session, self._build_scheduler(leases, leases), leases
+                )
+
+        logging.info("No URLs due in the frontier; crawl completed.")
+
+    def scrape_all_async(self) -> None:
+        """
+        Scrape images and discount data from all base URLs concurrently.
+        If the list of URLs is empty, wait and retry.
+        """
+        while not self.base_urls:
+            logging.warning("No URLs to scrape. Sleeping for 60 seconds before retrying...")
+            time.sleep(60)
+        asyncio.run(self.crawl_async())
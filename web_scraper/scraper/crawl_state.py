@@ -0,0 +1,249 @@
+"""
+Persistent crawl state used for incremental re-crawling.
+
+For every crawled URL the store records the ETag and Last-Modified validators
+sent by the site and a hash of the page body. The scraper turns them into
+conditional requests and skips parsing and Kafka emission for pages that did
+not change since the last crawl.
+
+A page's state also records the version of the extraction rules it was
+processed with; a page last processed with other rules is processed again,
+even if unchanged.
+
+The store also keeps the URLs deferred after being rate limited too often, so
+that a later crawl retries them instead of them being lost.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .config import CRAWL_STATE_PATH
+
+
+def hash_content(content: bytes) -> str:
+    """
+    Hash a page body for change detection.
+
+    Args:
+        content (bytes): The page body.
+
+    Returns:
+        str: The hex SHA-256 digest of the body.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+@dataclass
+class CrawlState:
+    """
+    What is known about a URL from its last crawl.
+
+    Attributes:
+        url (str): The crawled URL.
+        etag (Optional[str]): The ETag header of the last response.
+        last_modified (Optional[str]): The Last-Modified header of the last response.
+        content_hash (Optional[str]): Hash of the last processed page body.
+        checked_at (float): Unix time the URL was last fetched.
+        changed_at (float): Unix time the page body last changed.
+        rules_version (Optional[str]): Version of the extraction rules the page
+            was last processed with.
+    """
+
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    checked_at: float = field(default_factory=time.time)
+    changed_at: float = field(default_factory=time.time)
+    rules_version: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Build the headers for a conditional request from the stored validators.
+
+        Returns:
+            Dict[str, str]: If-None-Match and If-Modified-Since headers, where known.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CrawlStateStore:
+    """
+    Interface of a crawl state store.
+    """
+
+    def get(self, url: str) -> Optional[CrawlState]:
+        """
+        Return the stored state of a URL.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            Optional[CrawlState]: The state, or None if the URL was never crawled.
+        """
+        raise NotImplementedError
+
+    def save(self, state: CrawlState) -> None:
+        """
+        Store the state of a URL, replacing any previous state.
+
+        Args:
+            state (CrawlState): The state to store.
+        """
+        raise NotImplementedError
+
+    def defer(self, url: str, priority: int, depth: int, delay: float) -> None:
+        """
+        Keep a URL to be crawled again after a delay, e.g. when rate limited.
+
+        Args:
+            url (str): The URL.
+            priority (int): The URL's crawl priority.
+            depth (int): How many links away from a base URL the URL was found.
+            delay (float): Seconds before the URL is due.
+        """
+        raise NotImplementedError
+
+    def pop_deferred(self) -> List[Tuple[str, int, int]]:
+        """
+        Remove and return the deferred URLs that are due.
+
+        Returns:
+            List[Tuple[str, int, int]]: The URLs, with their priority and depth.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Release any resources held by the store.
+        """
+
+
+class SQLiteCrawlStateStore(CrawlStateStore):
+    """
+    Crawl state store backed by a local SQLite database.
+    """
+
+    def __init__(self, path: str = CRAWL_STATE_PATH) -> None:
+        """
+        Open the database and create the state table if needed.
+
+        Args:
+            path (str): Path of the database file, or ":memory:".
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    checked_at REAL NOT NULL,
+                    changed_at REAL NOT NULL,
+                    rules_version TEXT
+                )
+                """
+            )
+            columns = {
+                row[1]
+                for row in self._connection.execute("PRAGMA table_info(crawl_state)")
+            }
+            if "rules_version" not in columns:
+                self._connection.execute(
+                    "ALTER TABLE crawl_state ADD COLUMN rules_version TEXT"
+                )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS deferred_urls (
+                    url TEXT PRIMARY KEY,
+                    priority INTEGER NOT NULL,
+                    depth INTEGER NOT NULL,
+                    due_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, url: str) -> Optional[CrawlState]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, etag, last_modified, content_hash, checked_at, "
+                "changed_at, rules_version FROM crawl_state WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CrawlState(*row) if row else None
+
+    def save(self, state: CrawlState) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO crawl_state "
+                "(url, etag, last_modified, content_hash, checked_at, changed_at, "
+                "rules_version) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    state.url,
+                    state.etag,
+                    state.last_modified,
+                    state.content_hash,
+                    state.checked_at,
+                    state.changed_at,
+                    state.rules_version,
+                ),
+            )
+
+    def defer(self, url: str, priority: int, depth: int, delay: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO deferred_urls (url, priority, depth, due_at) "
+                "VALUES (?, ?, ?, ?)",
+                (url, priority, depth, time.time() + delay),
+            )
+
+    def pop_deferred(self) -> List[Tuple[str, int, int]]:
+        now = time.time()
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "SELECT url, priority, depth FROM deferred_urls WHERE due_at <= ?",
+                (now,),
+            ).fetchall()
+            self._connection.execute(
+                "DELETE FROM deferred_urls WHERE due_at <= ?", (now,)
+            )
+        return [tuple(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_default_store: Optional[CrawlStateStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_crawl_state_store() -> CrawlStateStore:
+    """
+    Return the process-wide crawl state store, opening it on first use.
+
+    Returns:
+        CrawlStateStore: The SQLite store at CRAWL_STATE_PATH.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = SQLiteCrawlStateStore(CRAWL_STATE_PATH)
+    return _default_store
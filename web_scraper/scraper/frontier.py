@@ -0,0 +1,440 @@
+"""
+Crawl frontier shared by scraper replicas.
+
+The frontier holds every URL the scraper knows about and hands them out as
+leases: a leased URL belongs to one replica until the lease is completed,
+released or expires, so N replicas split the work without fetching the same
+URL twice. URLs are added once (later adds are ignored), leased by priority
+once they are due, and scheduled for a recrawl when their lease is completed.
+The frontier also counts the URLs added per host, so a site's page budget is
+shared by all replicas; the count starts over every LINK_BUDGET_WINDOW seconds.
+
+``RedisFrontier`` shares the frontier between processes; ``MemoryFrontier``
+implements the same behaviour inside one process and is used in tests.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+from .config import (
+    FRONTIER_BACKEND,
+    FRONTIER_KEY_PREFIX,
+    FRONTIER_LEASE_SECONDS,
+    FRONTIER_REDIS_URL,
+    LINK_BUDGET_WINDOW,
+)
+from .rate_limit import get_domain
+from .scheduler import DEFAULT_PRIORITY
+
+
+@dataclass(frozen=True)
+class Lease:
+    """
+    A URL claimed from the frontier by one replica.
+
+    Attributes:
+        url (str): The leased URL.
+        priority (int): The URL's crawl priority; lower values are crawled first.
+        token (str): Identifies this lease when it is completed or released.
+        depth (int): How many links away from a base URL the URL was found.
+    """
+
+    url: str
+    priority: int
+    token: str
+    depth: int = 0
+
+
+class Frontier:
+    """
+    Interface of a crawl frontier.
+    """
+
+    def add(
+        self,
+        url: str,
+        priority: int = DEFAULT_PRIORITY,
+        delay: float = 0.0,
+        depth: int = 0,
+        max_host_pages: Optional[int] = None,
+    ) -> bool:
+        """
+        Add a URL unless the frontier already knows it.
+
+        Args:
+            url (str): The URL to crawl.
+            priority (int): Crawl priority; lower values are crawled first.
+            delay (float): Seconds before the URL may be leased.
+            depth (int): How many links away from a base URL the URL was found.
+            max_host_pages (Optional[int]): If given, the URL is only added while
+                fewer URLs of its host were added in the current budget window.
+
+        Returns:
+            bool: True if the URL was added, False if it was already known or
+            its host's page budget is used up.
+        """
+        raise NotImplementedError
+
+    def lease(
+        self, count: int = 1, lease_seconds: float = FRONTIER_LEASE_SECONDS
+    ) -> List[Lease]:
+        """
+        Claim the highest-priority URLs that are due.
+
+        URLs whose lease expired without being completed are due again.
+
+        Args:
+            count (int): Maximum number of URLs to claim.
+            lease_seconds (float): How long the URLs stay claimed.
+
+        Returns:
+            List[Lease]: The claimed URLs, possibly none.
+        """
+        raise NotImplementedError
+
+    def complete(self, lease: Lease, recrawl_after: Optional[float] = None) -> bool:
+        """
+        Mark a leased URL as crawled.
+
+        Args:
+            lease (Lease): The lease of the crawled URL.
+            recrawl_after (Optional[float]): Seconds until the URL is due again,
+                or None to never crawl it again.
+
+        Returns:
+            bool: False if the lease had expired and the URL was claimed again.
+        """
+        raise NotImplementedError
+
+    def release(self, lease: Lease, delay: float = 0.0) -> bool:
+        """
+        Give a leased URL back without crawling it, e.g. when rate limited.
+
+        Args:
+            lease (Lease): The lease of the URL.
+            delay (float): Seconds before the URL may be leased again.
+
+        Returns:
+            bool: False if the lease had expired and the URL was claimed again.
+        """
+        return self.complete(lease, recrawl_after=delay)
+
+
+class MemoryFrontier(Frontier):
+    """
+    Crawl frontier kept in the memory of a single process.
+    """
+
+    def __init__(self, budget_window: float = LINK_BUDGET_WINDOW) -> None:
+        """
+        Initialize an empty frontier.
+
+        Args:
+            budget_window (float): Seconds over which the URLs added per host
+                are counted against a page budget.
+        """
+        self.budget_window = budget_window
+        self._host_pages: Dict[str, Tuple[float, int]] = {}
+        self._priorities: Dict[str, int] = {}
+        self._depths: Dict[str, int] = {}
+        self._due_at: Dict[str, float] = {}
+        self._tokens: Dict[str, str] = {}
+        self._scheduled: List[tuple] = []
+        self._ready: List[tuple] = []
+        self._leased: List[tuple] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _schedule(self, url: str, due_at: float) -> None:
+        self._due_at[url] = due_at
+        heapq.heappush(self._scheduled, (due_at, next(self._sequence), url))
+
+    def add(
+        self,
+        url: str,
+        priority: int = DEFAULT_PRIORITY,
+        delay: float = 0.0,
+        depth: int = 0,
+        max_host_pages: Optional[int] = None,
+    ) -> bool:
+        with self._lock:
+            if url in self._priorities:
+                return False
+            if max_host_pages is not None and not self._count_page(
+                get_domain(url), max_host_pages
+            ):
+                return False
+            self._priorities[url] = priority
+            self._depths[url] = depth
+            self._schedule(url, time.time() + delay)
+            return True
+
+    def _count_page(self, host: str, max_pages: int) -> bool:
+        """
+        Count a URL against its host's page budget, if any of it is left.
+        """
+        now = time.time()
+        window_ends_at, pages = self._host_pages.get(host, (0.0, 0))
+        if window_ends_at <= now:
+            window_ends_at, pages = now + self.budget_window, 0
+        if pages >= max_pages:
+            return False
+        self._host_pages[host] = (window_ends_at, pages + 1)
+        return True
+
+    def lease(
+        self, count: int = 1, lease_seconds: float = FRONTIER_LEASE_SECONDS
+    ) -> List[Lease]:
+        now = time.time()
+        with self._lock:
+            # Heap entries are left in place when a URL moves on; skip stale ones
+            while self._scheduled and self._scheduled[0][0] <= now:
+                due_at, _, url = heapq.heappop(self._scheduled)
+                if self._due_at.get(url) == due_at:
+                    del self._due_at[url]
+                    self._push_ready(url)
+            while self._leased and self._leased[0][0] <= now:
+                _, _, url, token = heapq.heappop(self._leased)
+                if self._tokens.get(url) == token:
+                    logging.warning(f"Lease on {url} expired; making it due again")
+                    del self._tokens[url]
+                    self._push_ready(url)
+
+            leases = []
+            while self._ready and len(leases) < count:
+                _, _, url = heapq.heappop(self._ready)
+                token = uuid.uuid4().hex
+                self._tokens[url] = token
+                expires_at = now + lease_seconds
+                heapq.heappush(
+                    self._leased, (expires_at, next(self._sequence), url, token)
+                )
+                leases.append(
+                    Lease(url, self._priorities[url], token, self._depths[url])
+                )
+            return leases
+
+    def _push_ready(self, url: str) -> None:
+        heapq.heappush(self._ready, (self._priorities[url], next(self._sequence), url))
+
+    def complete(self, lease: Lease, recrawl_after: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._tokens.get(lease.url) != lease.token:
+                logging.warning(f"Lease on {lease.url} expired before it was finished")
+                return False
+            del self._tokens[lease.url]
+            if recrawl_after is not None:
+                self._schedule(lease.url, time.time() + recrawl_after)
+            return True
+
+
+class RedisFrontier(Frontier):
+    """
+    Crawl frontier stored in Redis and shared by all scraper replicas.
+
+    Every operation runs as a Lua script, so concurrent replicas never lease
+    the same URL. Keys used, below the configured prefix:
+
+    - ``seen``: set of every URL ever added, used for deduplication.
+    - ``priority``: hash of URL to crawl priority.
+    - ``depth``: hash of URL to its link depth from a base URL.
+    - ``scheduled``: sorted set of URLs waiting to become due, by due time.
+    - ``ready``: sorted set of due URLs, by priority.
+    - ``leased``: sorted set of leased URLs, by lease expiry.
+    - ``tokens``: hash of leased URL to the token of its current lease.
+    - ``pages:<host>``: number of URLs of the host added in the current budget
+      window, expiring with the window.
+    """
+
+    ADD_SCRIPT = """
+    if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+        return 0
+    end
+    if ARGV[5] ~= '' then
+        if tonumber(redis.call('GET', KEYS[5]) or 0) >= tonumber(ARGV[5]) then
+            return 0
+        end
+        if redis.call('INCR', KEYS[5]) == 1 then
+            redis.call('PEXPIRE', KEYS[5], ARGV[6])
+        end
+    end
+    redis.call('SADD', KEYS[1], ARGV[1])
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[4])
+    return 1
+    """
+
+    LEASE_SCRIPT = """
+    local now = ARGV[1]
+    for _, url in ipairs(
+        redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, 1000)
+    ) do
+        redis.call('ZREM', KEYS[2], url)
+        redis.call('ZADD', KEYS[3], redis.call('HGET', KEYS[1], url) or 0, url)
+    end
+    for _, url in ipairs(
+        redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now, 'LIMIT', 0, 1000)
+    ) do
+        redis.call('ZREM', KEYS[4], url)
+        redis.call('HDEL', KEYS[5], url)
+        redis.call('ZADD', KEYS[3], redis.call('HGET', KEYS[1], url) or 0, url)
+    end
+    local leases = {}
+    local popped = redis.call('ZPOPMIN', KEYS[3], ARGV[2])
+    for i = 1, #popped, 2 do
+        local url = popped[i]
+        local token = ARGV[4] .. ':' .. i
+        redis.call('ZADD', KEYS[4], ARGV[3], url)
+        redis.call('HSET', KEYS[5], url, token)
+        table.insert(leases, url)
+        table.insert(leases, popped[i + 1])
+        table.insert(leases, token)
+        table.insert(leases, redis.call('HGET', KEYS[6], url) or 0)
+    end
+    return leases
+    """
+
+    COMPLETE_SCRIPT = """
+    if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+        return 0
+    end
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    if ARGV[3] ~= '' then
+        redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+    end
+    return 1
+    """
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        prefix: str = FRONTIER_KEY_PREFIX,
+        budget_window: float = LINK_BUDGET_WINDOW,
+    ) -> None:
+        """
+        Initialize the frontier.
+
+        Args:
+            client (Optional[redis.Redis]): Redis client to use. Defaults to a
+                client for FRONTIER_REDIS_URL.
+            prefix (str): Prefix of the Redis keys holding the frontier.
+            budget_window (float): Seconds over which the URLs added per host
+                are counted against a page budget.
+        """
+        self.prefix = prefix
+        self.budget_window = budget_window
+        self.client = client or redis.Redis.from_url(
+            FRONTIER_REDIS_URL, decode_responses=True
+        )
+        self.keys = {
+            name: f"{prefix}:{name}"
+            for name in (
+                "seen",
+                "priority",
+                "depth",
+                "scheduled",
+                "ready",
+                "leased",
+                "tokens",
+            )
+        }
+        self._add = self.client.register_script(self.ADD_SCRIPT)
+        self._lease = self.client.register_script(self.LEASE_SCRIPT)
+        self._complete = self.client.register_script(self.COMPLETE_SCRIPT)
+
+    def add(
+        self,
+        url: str,
+        priority: int = DEFAULT_PRIORITY,
+        delay: float = 0.0,
+        depth: int = 0,
+        max_host_pages: Optional[int] = None,
+    ) -> bool:
+        keys = [
+            self.keys["seen"],
+            self.keys["priority"],
+            self.keys["scheduled"],
+            self.keys["depth"],
+            f"{self.prefix}:pages:{get_domain(url)}",
+        ]
+        args = [
+            url,
+            priority,
+            time.time() + delay,
+            depth,
+            "" if max_host_pages is None else max_host_pages,
+            max(1, int(self.budget_window * 1000)),
+        ]
+        return bool(self._add(keys=keys, args=args))
+
+    def lease(
+        self, count: int = 1, lease_seconds: float = FRONTIER_LEASE_SECONDS
+    ) -> List[Lease]:
+        now = time.time()
+        keys = [
+            self.keys["priority"],
+            self.keys["scheduled"],
+            self.keys["ready"],
+            self.keys["leased"],
+            self.keys["tokens"],
+            self.keys["depth"],
+        ]
+        result = self._lease(
+            keys=keys, args=[now, count, now + lease_seconds, uuid.uuid4().hex]
+        )
+        return [
+            Lease(
+                _text(result[i]),
+                int(float(result[i + 1])),
+                _text(result[i + 2]),
+                int(result[i + 3]),
+            )
+            for i in range(0, len(result), 4)
+        ]
+
+    def complete(self, lease: Lease, recrawl_after: Optional[float] = None) -> bool:
+        keys = [self.keys["leased"], self.keys["tokens"], self.keys["scheduled"]]
+        due_at = "" if recrawl_after is None else time.time() + recrawl_after
+        if self._complete(keys=keys, args=[lease.url, lease.token, due_at]):
+            return True
+        logging.warning(f"Lease on {lease.url} expired before it was finished")
+        return False
+
+
+def _text(value) -> str:
+    """
+    Decode a value returned by Redis, whether or not the client decodes responses.
+    """
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def get_frontier(backend: str = FRONTIER_BACKEND) -> Optional[Frontier]:
+    """
+    Create the crawl frontier selected by FRONTIER_BACKEND.
+
+    Args:
+        backend (str): "redis", "memory", or empty for no frontier.
+
+    Returns:
+        Optional[Frontier]: The frontier, or None if none is configured.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if not backend:
+        return None
+    if backend == "redis":
+        return RedisFrontier()
+    if backend == "memory":
+        return MemoryFrontier()
+    raise ValueError(f"Unknown frontier backend: {backend}")
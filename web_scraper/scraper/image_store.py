@@ -0,0 +1,146 @@
+"""
+Content-addressed storage for downloaded images.
+
+Images are stored under the SHA-256 digest of their content, so identical
+images found at different URLs are kept once and different images that share
+a file name never overwrite each other. Files are written to a temporary file
+while being hashed and then moved into place atomically.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Iterable
+
+
+class ImageStore:
+    """
+    Stores images as ``<root>/<first two digest characters>/<digest>``.
+    """
+
+    def __init__(self, root: str) -> None:
+        """
+        Initialize the store, creating its root directory if needed.
+
+        Args:
+            root (str): Directory the images are stored in.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        """
+        Return the file path of an image.
+
+        Args:
+            digest (str): The hex SHA-256 digest of the image.
+
+        Returns:
+            str: The path the image is stored at.
+        """
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        """
+        Check whether an image is stored.
+
+        Args:
+            digest (str): The hex SHA-256 digest of the image.
+
+        Returns:
+            bool: True if the image is in the store.
+        """
+        return os.path.exists(self.path(digest))
+
+    def writer(self) -> "ImageWriter":
+        """
+        Start writing an image whose content arrives in chunks.
+
+        Returns:
+            ImageWriter: A writer that hashes and stores the image on commit.
+        """
+        return ImageWriter(self)
+
+    def save(self, chunks: Iterable[bytes]) -> str:
+        """
+        Hash and write an image, keeping only one copy of identical content.
+
+        Args:
+            chunks (Iterable[bytes]): The image content, in chunks.
+
+        Returns:
+            str: The hex SHA-256 digest of the image.
+        """
+        writer = self.writer()
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+
+class ImageWriter:
+    """
+    Writes an image to a temporary file while hashing it, then moves it into
+    the store under its digest.
+    """
+
+    def __init__(self, store: ImageStore) -> None:
+        """
+        Open a temporary file in the store's root directory.
+
+        Args:
+            store (ImageStore): The store the image is written to.
+        """
+        self.store = store
+        self.size = 0
+        self._digest = hashlib.sha256()
+        fd, self._temp_path = tempfile.mkstemp(dir=store.root, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Hash and write a chunk of the image.
+
+        Args:
+            chunk (bytes): The next chunk of the image content.
+        """
+        self._digest.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        """
+        Move the written image into place, unless identical content is stored.
+
+        Returns:
+            str: The hex SHA-256 digest of the image.
+        """
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+            hex_digest = self._digest.hexdigest()
+            path = self.store.path(hex_digest)
+            if os.path.exists(path):
+                logging.info(f"Image {hex_digest} already stored; skipping write")
+                os.remove(self._temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(self._temp_path, path)
+            return hex_digest
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        """
+        Discard the partially written image.
+        """
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
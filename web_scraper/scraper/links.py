@@ -0,0 +1,193 @@
+"""
+Link discovery for bounded-depth crawling.
+
+Links found on a page are canonicalized so that different spellings of the
+same URL are crawled once, then filtered by the link policy of the site: allow
+and deny patterns, whether to stay on the same host, how many links deep to
+follow from a base URL and how many pages to crawl per host.
+
+Link policies are configured per site in the rule files, next to the
+extraction rules:
+
+    shop.example.com:
+      fields: ...
+      links:
+        allow: ["/deals/", "[?&]page=\\d+"]
+        deny: ["/account/", "\\.pdf$"]
+        max_depth: 2
+        max_pages: 500
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Pattern, Tuple, Union
+from urllib.parse import parse_qsl, quote, urlencode, urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+
+from .config import LINK_MAX_DEPTH, LINK_MAX_PAGES
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "yclid"})
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+# Characters left as they are when re-quoting a path
+PATH_SAFE_CHARACTERS = "/%:@!$&'()*+,;=-._~"
+
+
+def _remove_dot_segments(path: str) -> str:
+    """
+    Resolve "." and ".." segments of a URL path.
+
+    Args:
+        path (str): The path, starting with "/".
+
+    Returns:
+        str: The path without dot segments.
+    """
+    segments: List[str] = []
+    for segment in path.split("/")[1:]:
+        if segment == "..":
+            if segments:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    resolved = "/" + "/".join(segments)
+    if path.endswith(("/.", "/..")) and not resolved.endswith("/"):
+        resolved += "/"
+    return resolved
+
+
+def canonicalize_url(url: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a URL so that equivalent spellings compare equal.
+
+    Resolves the URL against base_url, lowercases the scheme and host, drops
+    default ports, fragments and tracking parameters, resolves dot segments,
+    and sorts the query parameters.
+
+    Args:
+        url (str): The URL, possibly relative.
+        base_url (Optional[str]): The URL of the page the link was found on.
+
+    Returns:
+        Optional[str]: The canonical URL, or None if it is not an HTTP(S) URL.
+    """
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    if ":" in host:  # IPv6 address
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    path = quote(_remove_dot_segments(parts.path or "/"), safe=PATH_SAFE_CHARACTERS)
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS
+            and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def extract_links(html: Union[str, BeautifulSoup], base_url: str) -> List[str]:
+    """
+    Extract the canonical URLs of all links on a page.
+
+    Args:
+        html (Union[str, BeautifulSoup]): The HTML content or a parsed document.
+        base_url (str): The URL of the page, used to resolve relative links.
+
+    Returns:
+        List[str]: The distinct canonical link URLs, in page order.
+    """
+    if not isinstance(html, BeautifulSoup):
+        html = BeautifulSoup(html, "html.parser")
+    base_tag = html.find("base", href=True)
+    if base_tag:
+        base_url = urljoin(base_url, base_tag["href"])
+
+    links: Dict[str, None] = {}
+    for anchor in html.find_all("a", href=True):
+        link = canonicalize_url(anchor["href"], base_url)
+        if link:
+            links[link] = None
+    return list(links)
+
+
+@dataclass(frozen=True)
+class LinkPolicy:
+    """
+    Which links of a site are followed.
+
+    Attributes:
+        allow (Tuple[Pattern[str], ...]): Links must match one of these patterns;
+            all links are allowed if there are none.
+        deny (Tuple[Pattern[str], ...]): Links matching any of these are skipped.
+        max_depth (int): How many links deep to follow from a base URL.
+        max_pages (int): Most pages crawled per host.
+        same_host (bool): Whether to follow only links to the page's own host.
+    """
+
+    allow: Tuple[Pattern[str], ...] = ()
+    deny: Tuple[Pattern[str], ...] = ()
+    max_depth: int = LINK_MAX_DEPTH
+    max_pages: int = LINK_MAX_PAGES
+    same_host: bool = True
+
+    def allows(self, url: str) -> bool:
+        """
+        Check a canonical URL against the allow and deny patterns.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            bool: True if the URL may be followed.
+        """
+        if any(pattern.search(url) for pattern in self.deny):
+            return False
+        return not self.allow or any(pattern.search(url) for pattern in self.allow)
+
+
+def compile_link_policy(spec: Optional[Dict[str, Any]]) -> LinkPolicy:
+    """
+    Compile the ``links`` section of a site's rules into a LinkPolicy.
+
+    Args:
+        spec (Optional[Dict[str, Any]]): A mapping with the optional keys
+            ``allow``, ``deny``, ``max_depth``, ``max_pages`` and ``same_host``.
+
+    Returns:
+        LinkPolicy: The compiled policy; the defaults if spec is empty.
+
+    Raises:
+        ValueError: If the specification is invalid.
+    """
+    if not spec:
+        return LinkPolicy()
+    if not isinstance(spec, dict):
+        raise ValueError("'links' must be a mapping.")
+    try:
+        return LinkPolicy(
+            allow=tuple(re.compile(pattern) for pattern in spec.get("allow", [])),
+            deny=tuple(re.compile(pattern) for pattern in spec.get("deny", [])),
+            max_depth=int(spec.get("max_depth", LINK_MAX_DEPTH)),
+            max_pages=int(spec.get("max_pages", LINK_MAX_PAGES)),
+            same_host=bool(spec.get("same_host", True)),
+        )
+    except (re.error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid link policy: {e}") from e
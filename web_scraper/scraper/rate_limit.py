@@ -0,0 +1,314 @@
+"""
+Per-domain rate limiting for the web scraper.
+
+Each domain gets its own token bucket, so a slow or strict site never throttles
+requests to other sites. Buckets honour the ``Crawl-delay`` of a site's
+robots.txt and are paused when a site answers with ``Retry-After``. Callers wait
+for a token (blocking or with asyncio) instead of dropping the request.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from .config import (
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_MINUTE,
+    RESPECT_CRAWL_DELAY,
+)
+
+# Delay used when a site rate-limits us without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 60.0
+
+# Status codes that signal the site wants us to slow down
+RATE_LIMIT_STATUS_CODES = {429, 503}
+
+
+class RateLimitedError(Exception):
+    """
+    Raised when a site responds with a rate-limit status code.
+
+    Attributes:
+        url (str): The URL that was rate limited.
+        retry_after (float): Seconds to wait before retrying the site.
+    """
+
+    def __init__(self, url: str, retry_after: float) -> None:
+        super().__init__(f"Rate limited by {url}; retry after {retry_after:.1f}s")
+        self.url = url
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value (Optional[str]): The header value, either delay seconds or an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or DEFAULT_RETRY_AFTER if the value is missing
+        or invalid.
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def get_domain(url: str) -> str:
+    """
+    Return the rate-limiting key for a URL.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        str: The lowercase host and port of the URL.
+    """
+    return urlparse(url).netloc.lower()
+
+
+class TokenBucket:
+    """
+    A token bucket that hands out reservations instead of rejecting requests.
+
+    Every reservation consumes a token immediately and returns how long the
+    caller has to wait for it, so concurrent callers queue up in order.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Initialize the bucket with a full set of tokens.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens the bucket can hold.
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        """
+        Add the tokens accumulated since the last update.
+
+        Args:
+            now (float): The current monotonic time.
+        """
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """
+        Return how long until a token is available, without consuming one.
+
+        Args:
+            now (Optional[float]): The current monotonic time.
+
+        Returns:
+            float: Seconds until the next request may be sent.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        token_delay = max(0.0, (1.0 - self.tokens) / self.rate)
+        return max(token_delay, self.blocked_until - now)
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Consume a token and return how long to wait before using it.
+
+        Args:
+            now (Optional[float]): The current monotonic time.
+
+        Returns:
+            float: Seconds to wait before sending the request.
+        """
+        now = time.monotonic() if now is None else now
+        wait = self.delay(now)
+        self.tokens -= 1.0
+        return wait
+
+    def block_for(self, seconds: float, now: Optional[float] = None) -> None:
+        """
+        Pause the bucket, e.g. after a Retry-After response.
+
+        Args:
+            seconds (float): How long to pause for.
+            now (Optional[float]): The current monotonic time.
+        """
+        now = time.monotonic() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class DomainRateLimiter:
+    """
+    Keeps one token bucket per domain and waits for tokens before requests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = RATE_LIMIT_PER_MINUTE,
+        burst: float = RATE_LIMIT_BURST,
+        respect_crawl_delay: bool = RESPECT_CRAWL_DELAY,
+    ) -> None:
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (float): Default request rate for each domain.
+            burst (float): Number of requests a domain may receive back to back.
+            respect_crawl_delay (bool): Whether to read Crawl-delay from robots.txt.
+        """
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        self.respect_crawl_delay = respect_crawl_delay
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def fetch_crawl_delay(self, url: str) -> Optional[float]:
+        """
+        Read the Crawl-delay for a site from its robots.txt.
+
+        Args:
+            url (str): Any URL on the site.
+
+        Returns:
+            Optional[float]: The crawl delay in seconds, or None if not set.
+        """
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            response = requests.get(robots_url, timeout=5)
+        except requests.RequestException as e:
+            logging.warning(f"Could not fetch {robots_url}: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+
+        parser = RobotFileParser()
+        parser.parse(response.text.splitlines())
+        delay = parser.crawl_delay("*")
+        return float(delay) if delay else None
+
+    def _create_bucket(self, url: str) -> TokenBucket:
+        """
+        Build the bucket for a domain, slowed down to its crawl delay if needed.
+
+        Args:
+            url (str): Any URL on the domain.
+
+        Returns:
+            TokenBucket: The new bucket.
+        """
+        rate, burst = self.rate, self.burst
+        crawl_delay = self.fetch_crawl_delay(url) if self.respect_crawl_delay else None
+        if crawl_delay:
+            logging.info(f"Using crawl delay of {crawl_delay}s for {get_domain(url)}")
+            rate, burst = min(rate, 1.0 / crawl_delay), 1.0
+        return TokenBucket(rate, burst)
+
+    def bucket(self, url: str) -> TokenBucket:
+        """
+        Return the bucket for the domain of a URL, creating it on first use.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            TokenBucket: The domain's bucket.
+        """
+        domain = get_domain(url)
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            new_bucket = self._create_bucket(url)
+            with self._lock:
+                bucket = self._buckets.setdefault(domain, new_bucket)
+        return bucket
+
+    def delay(self, url: str) -> float:
+        """
+        Return how long until the URL's domain accepts another request.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            float: Seconds to wait; 0 if a request may be sent now or the domain
+            has not been requested yet.
+        """
+        bucket = self._buckets.get(get_domain(url))
+        if bucket is None:
+            return 0.0
+        with self._lock:
+            return bucket.delay()
+
+    def reserve(self, url: str) -> float:
+        """
+        Reserve a request slot for the URL's domain.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            float: Seconds to wait before sending the request.
+        """
+        bucket = self.bucket(url)
+        with self._lock:
+            return bucket.reserve()
+
+    def acquire(self, url: str) -> None:
+        """
+        Block until a request to the URL's domain is allowed.
+
+        Args:
+            url (str): The URL.
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            logging.info(f"Waiting {wait:.2f}s for rate limit on {get_domain(url)}")
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str) -> None:
+        """
+        Wait without blocking the event loop until a request is allowed.
+
+        Args:
+            url (str): The URL.
+        """
+        if get_domain(url) not in self._buckets:
+            await asyncio.to_thread(self.bucket, url)
+        wait = self.reserve(url)
+        if wait > 0:
+            logging.info(f"Waiting {wait:.2f}s for rate limit on {get_domain(url)}")
+            await asyncio.sleep(wait)
+
+    def backoff(self, url: str, seconds: float) -> None:
+        """
+        Pause all requests to the URL's domain, e.g. after a Retry-After response.
+
+        Args:
+            url (str): The URL that was rate limited.
+            seconds (float): How long to pause the domain for.
+        """
+        bucket = self.bucket(url)
+        with self._lock:
+            bucket.block_for(seconds)
+        logging.warning(f"Backing off {get_domain(url)} for {seconds:.1f}s")
@@ -0,0 +1,485 @@
+"""
+Declarative per-site extraction rules.
+
+Rules are loaded from YAML or JSON files and map each discount field to a CSS
+selector, an optional attribute, an optional regex and a chain of normalizers.
+Every rule file maps a hostname to a site definition; the special host ``*`` is
+used when no site-specific rules exist for a page.
+
+Example:
+
+    shop.example.com:
+      fields:
+        retailer_name: "h1.brand"
+        discount_code:
+          selector: "div.coupon"
+          attribute: "data-code"
+          regex: "CODE:\\s*(\\w+)"
+          normalizers: [strip, upper]
+      links:
+        allow: ["/deals/"]
+        max_depth: 2
+
+The optional ``links`` section sets which links of the site are followed; see
+``scraper.links``.
+
+Selectors and regexes are compiled once when the rules are loaded, and the
+compiled rules are cached per hostname. Rules can be reloaded at runtime with
+``RuleRegistry.reload`` or ``RuleRegistry.reload_if_changed``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple, Union
+from urllib.parse import urlparse
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+from .config import RULES_PATH
+from .links import LinkPolicy, compile_link_policy
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - YAML support is optional
+    yaml = None
+
+FALLBACK_HOST = "*"
+RULE_FILE_EXTENSIONS = (".yaml", ".yml", ".json")
+
+# Date formats accepted by the ``iso_date`` normalizer, tried in order.
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d.%m.%Y",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d %B %Y",
+    "%B %d, %Y",
+    "%d %b %Y",
+    "%b %d, %Y",
+)
+
+
+class ExtractionError(ValueError):
+    """Raised when a required field cannot be extracted from a page."""
+
+
+def _iso_date(value: str) -> str:
+    """
+    Convert a date string to ISO 8601 format.
+
+    Args:
+        value (str): The date string to convert.
+
+    Returns:
+        str: The ISO 8601 date, or the original value if no format matches.
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return value
+
+
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "strip": str.strip,
+    "lower": str.lower,
+    "upper": str.upper,
+    "collapse_whitespace": lambda value: " ".join(value.split()),
+    "iso_date": _iso_date,
+}
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """
+    A compiled extraction rule for a single field.
+
+    Attributes:
+        name (str): The name of the field in the extracted data.
+        selector (soupsieve.SoupSieve): The compiled CSS selector.
+        attribute (Optional[str]): Attribute to read instead of the element text.
+        regex (Optional[Pattern[str]]): Pattern applied to the raw value. The
+            first capture group is used if present, otherwise the whole match.
+        normalizers (Tuple[Callable[[str], str], ...]): Functions applied in order.
+        required (bool): Whether extraction fails when the field is missing.
+        default (Optional[str]): Value used when an optional field is missing.
+    """
+
+    name: str
+    selector: soupsieve.SoupSieve
+    attribute: Optional[str] = None
+    regex: Optional[Pattern[str]] = None
+    normalizers: Tuple[Callable[[str], str], ...] = ()
+    required: bool = True
+    default: Optional[str] = None
+
+    def extract(self, soup: BeautifulSoup) -> Optional[str]:
+        """
+        Extract the field value from a parsed page.
+
+        Args:
+            soup (BeautifulSoup): The parsed HTML document.
+
+        Returns:
+            Optional[str]: The normalized value, or the default if not found.
+        """
+        element = self.selector.select_one(soup)
+        if element is None:
+            return self.default
+
+        if self.attribute:
+            raw = element.get(self.attribute)
+            if isinstance(raw, list):
+                raw = " ".join(raw)
+        else:
+            raw = element.get_text()
+        if raw is None:
+            return self.default
+
+        value = str(raw)
+        if self.regex is not None:
+            match = self.regex.search(value)
+            if not match:
+                return self.default
+            value = match.group(1) if match.groups() else match.group(0)
+
+        for normalizer in self.normalizers:
+            value = normalizer(value)
+        return value
+
+
+@dataclass(frozen=True)
+class SiteRules:
+    """
+    Compiled extraction rules for a single site.
+
+    Attributes:
+        host (str): The hostname the rules apply to.
+        fields (Dict[str, FieldRule]): Compiled rules keyed by field name.
+        options (Dict[str, Any]): Additional, non-field settings for the site.
+        links (LinkPolicy): Which links of the site are followed.
+    """
+
+    host: str
+    fields: Dict[str, FieldRule]
+    options: Dict[str, Any] = field(default_factory=dict)
+    links: LinkPolicy = field(default_factory=LinkPolicy)
+
+    def extract(self, html: Union[str, BeautifulSoup]) -> Dict[str, Optional[str]]:
+        """
+        Extract all configured fields from a page.
+
+        Args:
+            html (Union[str, BeautifulSoup]): The HTML content or a parsed document.
+
+        Returns:
+            Dict[str, Optional[str]]: Extracted values keyed by field name.
+
+        Raises:
+            ExtractionError: If a required field is missing.
+        """
+        if not isinstance(html, BeautifulSoup):
+            html = BeautifulSoup(html, "html.parser")
+        data: Dict[str, Optional[str]] = {}
+        for name, rule in self.fields.items():
+            value = rule.extract(html)
+            if value is None and rule.required:
+                raise ExtractionError(
+                    f"Required field '{name}' not found using rules for {self.host}"
+                )
+            data[name] = value
+        return data
+
+
+def compile_field_rule(name: str, spec: Union[str, Dict[str, Any]]) -> FieldRule:
+    """
+    Compile a raw field specification into a FieldRule.
+
+    Args:
+        name (str): The field name.
+        spec (Union[str, Dict[str, Any]]): A CSS selector string, or a mapping with
+            ``selector`` and the optional keys ``attribute``, ``regex``,
+            ``normalizers``, ``required`` and ``default``.
+
+    Returns:
+        FieldRule: The compiled rule.
+
+    Raises:
+        ValueError: If the specification is invalid.
+    """
+    if isinstance(spec, str):
+        spec = {"selector": spec}
+    if not isinstance(spec, dict) or not spec.get("selector"):
+        raise ValueError(f"Field '{name}' must define a selector.")
+
+    normalizer_names = spec.get("normalizers", ["strip"])
+    unknown = [n for n in normalizer_names if n not in NORMALIZERS]
+    if unknown:
+        raise ValueError(f"Field '{name}' uses unknown normalizers: {unknown}")
+
+    try:
+        selector = soupsieve.compile(spec["selector"])
+        regex = re.compile(spec["regex"]) if spec.get("regex") else None
+    except (soupsieve.SelectorSyntaxError, re.error) as e:
+        raise ValueError(f"Invalid rule for field '{name}': {e}") from e
+
+    return FieldRule(
+        name=name,
+        selector=selector,
+        attribute=spec.get("attribute"),
+        regex=regex,
+        normalizers=tuple(NORMALIZERS[n] for n in normalizer_names),
+        required=bool(spec.get("required", True)),
+        default=spec.get("default"),
+    )
+
+
+def compile_site_rules(host: str, spec: Dict[str, Any]) -> SiteRules:
+    """
+    Compile a raw site specification into SiteRules.
+
+    Args:
+        host (str): The hostname the rules apply to.
+        spec (Dict[str, Any]): A mapping with a ``fields`` key, an optional
+            ``links`` policy and optional site-level settings.
+
+    Returns:
+        SiteRules: The compiled site rules.
+
+    Raises:
+        ValueError: If the specification is invalid.
+    """
+    if not isinstance(spec, dict) or not isinstance(spec.get("fields"), dict):
+        raise ValueError(f"Rules for '{host}' must define a 'fields' mapping.")
+    fields = {
+        name: compile_field_rule(name, field_spec)
+        for name, field_spec in spec["fields"].items()
+    }
+    try:
+        links = compile_link_policy(spec.get("links"))
+    except ValueError as e:
+        raise ValueError(f"Rules for '{host}': {e}") from e
+    options = {
+        key: value for key, value in spec.items() if key not in ("fields", "links")
+    }
+    return SiteRules(host=host.lower(), fields=fields, options=options, links=links)
+
+
+def load_rule_file(path: str) -> Dict[str, Any]:
+    """
+    Load raw rules from a YAML or JSON file.
+
+    Args:
+        path (str): Path to the rule file.
+
+    Returns:
+        Dict[str, Any]: The raw rules keyed by hostname.
+
+    Raises:
+        ValueError: If the file cannot be parsed.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith(".json"):
+            data = json.load(file)
+        else:
+            if yaml is None:
+                raise ValueError(f"PyYAML is required to load {path}")
+            data = yaml.safe_load(file)
+    if not isinstance(data, dict):
+        raise ValueError(f"Rule file {path} must contain a mapping of hosts.")
+    return data
+
+
+class RuleRegistry:
+    """
+    Holds compiled site rules and selects them by hostname.
+
+    Rules are read from a single file or from every rule file in a directory.
+    Later files override earlier ones for the same host.
+
+    Attributes:
+        path (str): The rule file or directory.
+        version (str): Hash of the loaded rule files' names and contents.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the registry and load the rules.
+
+        Args:
+            path (str): A rule file or a directory containing rule files.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._sites: Dict[str, SiteRules] = {}
+        self._host_cache: Dict[str, Optional[SiteRules]] = {}
+        self._signature: Tuple[Tuple[str, float], ...] = ()
+        self.version = ""
+        self.reload()
+
+    def _rule_files(self) -> List[str]:
+        """
+        List the rule files to load.
+
+        Returns:
+            List[str]: Sorted paths of rule files.
+        """
+        if os.path.isdir(self.path):
+            return sorted(
+                os.path.join(self.path, name)
+                for name in os.listdir(self.path)
+                if name.endswith(RULE_FILE_EXTENSIONS)
+            )
+        return [self.path] if os.path.exists(self.path) else []
+
+    def _current_signature(self) -> Tuple[Tuple[str, float], ...]:
+        """
+        Build a signature of the rule files based on their modification times.
+
+        Returns:
+            Tuple[Tuple[str, float], ...]: Pairs of file path and mtime.
+        """
+        return tuple((path, os.path.getmtime(path)) for path in self._rule_files())
+
+    def reload(self) -> None:
+        """
+        Load and compile all rule files, replacing the current rules.
+
+        The new rules are compiled before they are swapped in, so a broken rule
+        file leaves the previously loaded rules in place.
+
+        Raises:
+            ValueError: If a rule file is invalid.
+        """
+        signature = self._current_signature()
+        sites: Dict[str, SiteRules] = {}
+        digest = hashlib.sha256()
+        for path, _ in signature:
+            with open(path, "rb") as file:
+                digest.update(os.path.basename(path).encode() + b"\0" + file.read())
+            for host, spec in load_rule_file(path).items():
+                sites[host.lower()] = compile_site_rules(host, spec)
+
+        with self._lock:
+            self._sites = sites
+            self._host_cache = {}
+            self._signature = signature
+            self.version = digest.hexdigest()
+        logging.info(f"Loaded extraction rules for {len(sites)} site(s) from {self.path}")
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the rules if any rule file was added, removed or modified.
+
+        Returns:
+            bool: True if the rules were reloaded, otherwise False.
+        """
+        if self._current_signature() == self._signature:
+            return False
+        try:
+            self.reload()
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to reload extraction rules: {e}")
+            return False
+        return True
+
+    def for_host(self, host: str) -> Optional[SiteRules]:
+        """
+        Select the rules for a hostname.
+
+        The exact hostname is tried first, then each parent domain, and finally
+        the fallback rules.
+
+        Args:
+            host (str): The hostname of the page.
+
+        Returns:
+            Optional[SiteRules]: The matching rules, or None if nothing matches.
+        """
+        host = (host or "").lower()
+        with self._lock:
+            if host in self._host_cache:
+                return self._host_cache[host]
+
+            labels = host.split(".")
+            candidates = [".".join(labels[i:]) for i in range(len(labels) - 1)]
+            rules = next(
+                (self._sites[c] for c in candidates if c in self._sites),
+                self._sites.get(FALLBACK_HOST),
+            )
+            self._host_cache[host] = rules
+            return rules
+
+    def for_url(self, url: Optional[str]) -> Optional[SiteRules]:
+        """
+        Select the rules for a URL.
+
+        Args:
+            url (Optional[str]): The URL of the page.
+
+        Returns:
+            Optional[SiteRules]: The matching rules, or None if nothing matches.
+        """
+        return self.for_host(urlparse(url).hostname if url else "")
+
+    def link_policy(self, url: Optional[str]) -> LinkPolicy:
+        """
+        Select the link policy for a URL.
+
+        Args:
+            url (Optional[str]): The URL of the page.
+
+        Returns:
+            LinkPolicy: The policy of the matching rules, or the default policy.
+        """
+        rules = self.for_url(url)
+        return rules.links if rules else LinkPolicy()
+
+    def extract(
+        self, html: Union[str, BeautifulSoup], url: Optional[str] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Extract discount data from a page using the rules for its URL.
+
+        Args:
+            html (Union[str, BeautifulSoup]): The HTML content or a parsed document.
+            url (Optional[str]): The URL of the page, used to select the rules.
+
+        Returns:
+            Dict[str, Optional[str]]: Extracted values keyed by field name.
+
+        Raises:
+            ExtractionError: If no rules match or a required field is missing.
+        """
+        rules = self.for_url(url)
+        if rules is None:
+            raise ExtractionError(f"No extraction rules configured for {url}")
+        return rules.extract(html)
+
+
+_default_registry: Optional[RuleRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_rule_registry() -> RuleRegistry:
+    """
+    Return the process-wide rule registry, loading it on first use.
+
+    Returns:
+        RuleRegistry: The registry for the configured rules path.
+    """
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = RuleRegistry(RULES_PATH)
+    return _default_registry
@@ -0,0 +1,139 @@
+"""
+Priority scheduler for crawl requests.
+
+URLs are handed out in priority order, but only once their domain's rate
+limiter accepts another request. A URL whose domain is throttled is moved to a
+waiting queue instead of blocking the URLs of other domains, and rate-limited
+URLs are rescheduled rather than dropped; once rescheduled too often, the
+caller defers them to a later crawl.
+"""
+
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .config import MAX_RESCHEDULES
+from .rate_limit import DomainRateLimiter
+
+# Priority given to seed URLs; lower values are crawled first
+DEFAULT_PRIORITY = 10
+
+
+@dataclass(order=True)
+class CrawlRequest:
+    """
+    A URL waiting to be crawled.
+
+    Attributes:
+        priority (int): Crawl priority; lower values are crawled first.
+        sequence (int): Insertion order, used to keep equal priorities FIFO.
+        url (str): The URL to crawl.
+        attempts (int): How many times the URL has been rescheduled.
+        depth (int): How many links away from a base URL the URL was found.
+    """
+
+    priority: int
+    sequence: int
+    url: str = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+    depth: int = field(default=0, compare=False)
+
+
+class CrawlScheduler:
+    """
+    Hands out crawl requests by priority while respecting per-domain limits.
+    """
+
+    def __init__(
+        self, rate_limiter: DomainRateLimiter, max_reschedules: int = MAX_RESCHEDULES
+    ) -> None:
+        """
+        Initialize an empty scheduler.
+
+        Args:
+            rate_limiter (DomainRateLimiter): Limiter used to check domain readiness.
+            max_reschedules (int): How often a URL may be rescheduled before it is
+                left to the caller to defer.
+        """
+        self.rate_limiter = rate_limiter
+        self.max_reschedules = max_reschedules
+        self._ready: List[CrawlRequest] = []
+        self._waiting: List[Tuple[float, int, CrawlRequest]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._ready) + len(self._waiting)
+
+    def push(
+        self,
+        url: str,
+        priority: int = DEFAULT_PRIORITY,
+        delay: float = 0.0,
+        attempts: int = 0,
+        depth: int = 0,
+    ) -> None:
+        """
+        Add a URL to the scheduler.
+
+        Args:
+            url (str): The URL to crawl.
+            priority (int): Crawl priority; lower values are crawled first.
+            delay (float): Seconds to wait before the URL becomes eligible.
+            attempts (int): How many times the URL has been rescheduled.
+            depth (int): How many links away from a base URL the URL was found.
+        """
+        request = CrawlRequest(priority, next(self._sequence), url, attempts, depth)
+        if delay > 0:
+            heapq.heappush(
+                self._waiting, (time.monotonic() + delay, request.sequence, request)
+            )
+        else:
+            heapq.heappush(self._ready, request)
+
+    def reschedule(self, request: CrawlRequest, delay: float) -> bool:
+        """
+        Put a request back into the scheduler after a delay.
+
+        Args:
+            request (CrawlRequest): The request to retry.
+            delay (float): Seconds to wait before the URL becomes eligible again.
+
+        Returns:
+            bool: True if the request was rescheduled, False if it was rescheduled
+            max_reschedules times already and must be deferred by the caller.
+        """
+        if request.attempts >= self.max_reschedules:
+            return False
+        self.push(
+            request.url, request.priority, delay, request.attempts + 1, request.depth
+        )
+        return True
+
+    def pop(self) -> Tuple[Optional[CrawlRequest], float]:
+        """
+        Return the highest-priority request whose domain is ready.
+
+        Requests whose domain is still throttled are moved to the waiting queue
+        until the domain's rate limiter accepts another request.
+
+        Returns:
+            Tuple[Optional[CrawlRequest], float]: The next request and 0, or None
+            and the number of seconds until a request may become ready.
+        """
+        now = time.monotonic()
+        while self._waiting and self._waiting[0][0] <= now:
+            _, _, request = heapq.heappop(self._waiting)
+            heapq.heappush(self._ready, request)
+
+        while self._ready:
+            request = heapq.heappop(self._ready)
+            delay = self.rate_limiter.delay(request.url)
+            if delay <= 0:
+                return request, 0.0
+            heapq.heappush(self._waiting, (now + delay, request.sequence, request))
+
+        if self._waiting:
+            return None, max(0.0, self._waiting[0][0] - now)
+        return None, 0.0
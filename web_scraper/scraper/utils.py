@@ -1,13 +1,66 @@
-from bs4 import BeautifulSoup
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
 from urllib.parse import urlparse
+
+import aiohttp
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+from bs4 import BeautifulSoup
+from tenacity import (
+    retry,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
+from .config import DOWNLOAD_CHUNK_SIZE, MAX_IMAGE_BYTES, MAX_PAGE_BYTES
+from .image_store import ImageStore
+from .rate_limit import RATE_LIMIT_STATUS_CODES, RateLimitedError, parse_retry_after
+from .rules import ExtractionError, get_rule_registry
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-)
+# Content types that may hold an image when a site does not label it properly
+GENERIC_CONTENT_TYPES = {"application/octet-stream", "binary/octet-stream"}
+
+# Leading bytes of the image formats we accept
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+    b"BM": "image/bmp",
+    b"\x00\x00\x01\x00": "image/x-icon",
+}
+
+
+class DownloadRejectedError(Exception):
+    """
+    Raised when a response is refused before or while its body is downloaded.
+    """
+
+
+class ResponseTooLargeError(DownloadRejectedError):
+    """
+    Raised when a response body exceeds the allowed size.
+    """
+
+
+class NotAnImageError(DownloadRejectedError):
+    """
+    Raised when an image download turns out not to be an image.
+    """
+
+
+# Retry policy shared by the blocking and asyncio request helpers. Rate-limited
+# responses are not retried here; the scheduler reschedules them instead.
+# Rejected downloads would be rejected again, so they are not retried either.
+RETRY_POLICY = {
+    "stop": stop_after_attempt(3),
+    "wait": wait_exponential(multiplier=1, min=2, max=10),
+    "retry": retry_if_not_exception_type((RateLimitedError, DownloadRejectedError)),
+}
+
+
+@retry(**RETRY_POLICY)
 def retry_request(url: str, timeout: int = 10) -> bytes:
     """
     Perform an HTTP GET request with retries.
@@ -22,13 +75,445 @@ def retry_request(url: str, timeout: int = 10) -> bytes:
         bytes: The content of the HTTP response.
 
     Raises:
+        RateLimitedError: If the site responds with 429 or 503.
         requests.RequestException: If the request fails after retries.
     """
     response = requests.get(url, timeout=timeout)
+    _check_status(url, response.status_code, response.headers)
     response.raise_for_status()
     return response.content
 
 
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Detect the image format from the first bytes of a body.
+
+    Args:
+        head (bytes): The first bytes of the body.
+
+    Returns:
+        Optional[str]: The image content type, or None if it is not an image.
+    """
+    for signature, content_type in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis", b"heic", b"mif1"):
+        return "image/avif" if head[8:12].startswith(b"avi") else "image/heic"
+    text = head.lstrip()[:256].lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return "image/svg+xml"
+    return None
+
+
+class ResponseGuard:
+    """
+    Checks a streamed response body as it arrives, so oversized bodies and
+    non-images are abandoned without being read in full.
+    """
+
+    def __init__(self, url: str, max_bytes: int, require_image: bool = False) -> None:
+        """
+        Initialize the guard for one response.
+
+        Args:
+            url (str): The URL of the response.
+            max_bytes (int): The largest body size allowed.
+            require_image (bool): Whether the body must be an image.
+        """
+        self.url = url
+        self.max_bytes = max_bytes
+        self.require_image = require_image
+        self.received = 0
+
+    def check_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Reject a response by its headers, before any of the body is read.
+
+        Args:
+            headers (Mapping[str, str]): The response headers.
+
+        Raises:
+            ResponseTooLargeError: If Content-Length exceeds the allowed size.
+            NotAnImageError: If an image is required and Content-Type names
+                something else.
+        """
+        content_length = headers.get("Content-Length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > self.max_bytes:
+                raise ResponseTooLargeError(
+                    f"{self.url} is {content_length} bytes; "
+                    f"limit is {self.max_bytes}"
+                )
+
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if (
+            self.require_image
+            and content_type
+            and not content_type.startswith("image/")
+            and content_type not in GENERIC_CONTENT_TYPES
+        ):
+            raise NotAnImageError(f"{self.url} is {content_type}, not an image")
+
+    def check_chunk(self, chunk: bytes) -> bytes:
+        """
+        Account for the next chunk of the body.
+
+        Args:
+            chunk (bytes): The chunk that was just read.
+
+        Returns:
+            bytes: The same chunk.
+
+        Raises:
+            ResponseTooLargeError: If the body grows beyond the allowed size.
+            NotAnImageError: If an image is required and the first chunk does
+                not start like one.
+        """
+        if self.require_image and self.received == 0 and chunk:
+            if sniff_image_type(chunk) is None:
+                raise NotAnImageError(f"{self.url} does not contain an image")
+        self.received += len(chunk)
+        if self.received > self.max_bytes:
+            raise ResponseTooLargeError(
+                f"{self.url} exceeds the limit of {self.max_bytes} bytes"
+            )
+        return chunk
+
+    def finish(self) -> None:
+        """
+        Check the body once it has been read completely.
+
+        Raises:
+            NotAnImageError: If an image is required and the body was empty.
+        """
+        if self.require_image and self.received == 0:
+            raise NotAnImageError(f"{self.url} returned an empty body")
+
+
+@dataclass
+class PageResponse:
+    """
+    The status, body and validators of an HTTP response.
+
+    Attributes:
+        status (int): The HTTP status code.
+        content (bytes): The response body; empty if the page was not modified.
+        etag (Optional[str]): The ETag header of the response.
+        last_modified (Optional[str]): The Last-Modified header of the response.
+    """
+
+    status: int
+    content: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        """
+        bool: True if the site answered 304 Not Modified.
+        """
+        return self.status == 304
+
+
+def _check_status(url: str, status: int, headers: Mapping[str, str]) -> None:
+    """
+    Raise RateLimitedError for a rate-limit status code.
+
+    Args:
+        url (str): The URL of the response.
+        status (int): The HTTP status code.
+        headers (Mapping[str, str]): The response headers.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+    """
+    if status in RATE_LIMIT_STATUS_CODES:
+        raise RateLimitedError(url, parse_retry_after(headers.get("Retry-After")))
+
+
+@retry(**RETRY_POLICY)
+def conditional_request(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 10,
+    max_bytes: int = MAX_PAGE_BYTES,
+) -> PageResponse:
+    """
+    Perform a conditional HTTP GET request with retries.
+
+    The body is streamed in chunks and abandoned once it exceeds max_bytes.
+
+    Args:
+        url (str): The URL to fetch.
+        headers (Optional[Dict[str, str]]): Extra request headers, e.g. the
+            If-None-Match and If-Modified-Since validators of the last crawl.
+        timeout (int): Timeout for the request in seconds.
+        max_bytes (int): The largest body size allowed.
+
+    Returns:
+        PageResponse: The response, with status 304 if the page was not modified.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+        ResponseTooLargeError: If the body exceeds max_bytes.
+        requests.RequestException: If the request fails after retries.
+    """
+    response = requests.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        _check_status(url, response.status_code, response.headers)
+        response.raise_for_status()
+        guard = ResponseGuard(url, max_bytes)
+        guard.check_headers(response.headers)
+        content = b"".join(
+            guard.check_chunk(chunk)
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE)
+        )
+        return PageResponse(
+            response.status_code,
+            content,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    finally:
+        response.close()
+
+
+@retry(**RETRY_POLICY)
+async def async_conditional_request(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 10,
+    max_bytes: int = MAX_PAGE_BYTES,
+) -> PageResponse:
+    """
+    Perform an asynchronous conditional HTTP GET request with retries.
+
+    The body is streamed in chunks and abandoned once it exceeds max_bytes.
+
+    Args:
+        session (aiohttp.ClientSession): The shared HTTP session.
+        url (str): The URL to fetch.
+        headers (Optional[Dict[str, str]]): Extra request headers, e.g. the
+            If-None-Match and If-Modified-Since validators of the last crawl.
+        timeout (int): Timeout for the request in seconds.
+        max_bytes (int): The largest body size allowed.
+
+    Returns:
+        PageResponse: The response, with status 304 if the page was not modified.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+        ResponseTooLargeError: If the body exceeds max_bytes.
+        aiohttp.ClientError: If the request fails after retries.
+    """
+    async with session.get(
+        url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        _check_status(url, response.status, response.headers)
+        response.raise_for_status()
+        guard = ResponseGuard(url, max_bytes)
+        guard.check_headers(response.headers)
+        chunks = []
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            chunks.append(guard.check_chunk(chunk))
+        return PageResponse(
+            response.status,
+            b"".join(chunks),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+
+@retry(**RETRY_POLICY)
+def stream_image(
+    url: str,
+    store: ImageStore,
+    timeout: int = 10,
+    max_bytes: int = MAX_IMAGE_BYTES,
+) -> Tuple[PageResponse, str]:
+    """
+    Download an image with retries, writing it to the store chunk by chunk.
+
+    The download stops as soon as the response turns out not to be an image
+    or grows beyond max_bytes, and nothing is stored in that case.
+
+    Args:
+        url (str): The URL of the image.
+        store (ImageStore): The store the image is written to.
+        timeout (int): Timeout for the request in seconds.
+        max_bytes (int): The largest image size allowed.
+
+    Returns:
+        Tuple[PageResponse, str]: The response without its body, and the digest
+        the image was stored under.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+        DownloadRejectedError: If the response is too large or not an image.
+        requests.RequestException: If the request fails after retries.
+    """
+    response = requests.get(url, timeout=timeout, stream=True)
+    try:
+        _check_status(url, response.status_code, response.headers)
+        response.raise_for_status()
+        guard = ResponseGuard(url, max_bytes, require_image=True)
+        guard.check_headers(response.headers)
+        writer = store.writer()
+        try:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                writer.write(guard.check_chunk(chunk))
+            guard.finish()
+        except BaseException:
+            writer.abort()
+            raise
+        digest = writer.commit()
+        return (
+            PageResponse(
+                response.status_code,
+                b"",
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            ),
+            digest,
+        )
+    finally:
+        response.close()
+
+
+@retry(**RETRY_POLICY)
+async def async_stream_image(
+    session: aiohttp.ClientSession,
+    url: str,
+    store: ImageStore,
+    timeout: int = 10,
+    max_bytes: int = MAX_IMAGE_BYTES,
+) -> Tuple[PageResponse, str]:
+    """
+    Download an image asynchronously with retries, writing it to the store
+    chunk by chunk.
+
+    The download stops as soon as the response turns out not to be an image
+    or grows beyond max_bytes, and nothing is stored in that case.
+
+    Args:
+        session (aiohttp.ClientSession): The shared HTTP session.
+        url (str): The URL of the image.
+        store (ImageStore): The store the image is written to.
+        timeout (int): Timeout for the request in seconds.
+        max_bytes (int): The largest image size allowed.
+
+    Returns:
+        Tuple[PageResponse, str]: The response without its body, and the digest
+        the image was stored under.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+        DownloadRejectedError: If the response is too large or not an image.
+        aiohttp.ClientError: If the request fails after retries.
+    """
+    async with session.get(
+        url, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        _check_status(url, response.status, response.headers)
+        response.raise_for_status()
+        guard = ResponseGuard(url, max_bytes, require_image=True)
+        guard.check_headers(response.headers)
+        writer = await asyncio.to_thread(store.writer)
+        try:
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(writer.write, guard.check_chunk(chunk))
+            guard.finish()
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+        digest = await asyncio.to_thread(writer.commit)
+        return (
+            PageResponse(
+                response.status,
+                b"",
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            ),
+            digest,
+        )
+
+
+@retry(**RETRY_POLICY)
+def head_request(
+    url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 10
+) -> PageResponse:
+    """
+    Perform an HTTP HEAD request with retries.
+
+    Args:
+        url (str): The URL to check.
+        headers (Optional[Dict[str, str]]): Extra request headers, e.g. the
+            validators of the last download.
+        timeout (int): Timeout for the request in seconds.
+
+    Returns:
+        PageResponse: The response status and validators, without a body.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+        requests.RequestException: If the request fails after retries.
+    """
+    response = requests.head(
+        url, headers=headers, timeout=timeout, allow_redirects=True
+    )
+    _check_status(url, response.status_code, response.headers)
+    response.raise_for_status()
+    return PageResponse(
+        response.status_code,
+        b"",
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+    )
+
+
+@retry(**RETRY_POLICY)
+async def async_head_request(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 10,
+) -> PageResponse:
+    """
+    Perform an asynchronous HTTP HEAD request with retries.
+
+    Args:
+        session (aiohttp.ClientSession): The shared HTTP session.
+        url (str): The URL to check.
+        headers (Optional[Dict[str, str]]): Extra request headers, e.g. the
+            validators of the last download.
+        timeout (int): Timeout for the request in seconds.
+
+    Returns:
+        PageResponse: The response status and validators, without a body.
+
+    Raises:
+        RateLimitedError: If the site responds with 429 or 503.
+        aiohttp.ClientError: If the request fails after retries.
+    """
+    async with session.head(
+        url,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        allow_redirects=True,
+    ) as response:
+        _check_status(url, response.status, response.headers)
+        response.raise_for_status()
+        return PageResponse(
+            response.status,
+            b"",
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+
 def is_valid_url(url: str) -> bool:
     """
     Validate the structure of a URL.
@@ -41,77 +526,97 @@ def is_valid_url(url: str) -> bool:
     """
     parsed = urlparse(url)
     return bool(parsed.netloc) and bool(parsed.scheme)
-def extract_retailer_name(html: str) -> str:
+
+
+def extract_field(html: str, field_name: str, url: Optional[str] = None) -> str:
+    """
+    Extract a single field from the HTML content using the site's extraction rules.
+
+    Args:
+        html (str): The HTML content of the page.
+        field_name (str): The name of the field to extract.
+        url (Optional[str]): The URL of the page, used to select the site rules.
+
+    Returns:
+        str: The extracted value.
+
+    Raises:
+        ExtractionError: If no rule exists for the field or the value is missing.
+    """
+    rules = get_rule_registry().for_url(url)
+    if rules is None or field_name not in rules.fields:
+        raise ExtractionError(f"No extraction rule for field '{field_name}' at {url}")
+    value = rules.fields[field_name].extract(BeautifulSoup(html, "html.parser"))
+    if value is None:
+        raise ExtractionError(f"Field '{field_name}' not found at {url}")
+    return value
+
+
+def extract_retailer_name(html: str, url: Optional[str] = None) -> str:
     """
     Extract the retailer name from the HTML content.
 
     Args:
         html (str): The HTML content of the page.
+        url (Optional[str]): The URL of the page, used to select the site rules.
 
     Returns:
         str: The name of the retailer.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    # Logic to extract retailer name (placeholder logic)
-    retailer_name = soup.find("h1", class_="retailer-name").text.strip()
-    return retailer_name
+    return extract_field(html, "retailer_name", url)
 
-def extract_discount_description(html: str) -> str:
+
+def extract_discount_description(html: str, url: Optional[str] = None) -> str:
     """
     Extract the discount description from the HTML content.
 
     Args:
         html (str): The HTML content of the page.
+        url (Optional[str]): The URL of the page, used to select the site rules.
 
     Returns:
         str: The description of the discount.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    # Logic to extract discount description (placeholder logic)
-    description = soup.find("div", class_="discount-description").text.strip()
-    return description
+    return extract_field(html, "description", url)
+
 
-def extract_discount_code(html: str) -> str:
+def extract_discount_code(html: str, url: Optional[str] = None) -> str:
     """
     Extract the discount code from the HTML content.
 
     Args:
         html (str): The HTML content of the page.
+        url (Optional[str]): The URL of the page, used to select the site rules.
 
     Returns:
         str: The discount code.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    # Logic to extract discount code (placeholder logic)
-    discount_code = soup.find("span", class_="discount-code").text.strip()
-    return discount_code
+    return extract_field(html, "discount_code", url)
 
-def extract_expiration_date(html: str) -> str:
+
+def extract_expiration_date(html: str, url: Optional[str] = None) -> str:
     """
     Extract the expiration date from the HTML content.
 
     Args:
         html (str): The HTML content of the page.
+        url (Optional[str]): The URL of the page, used to select the site rules.
 
     Returns:
         str: The expiration date of the discount.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    # Logic to extract expiration date (placeholder logic)
-    expiration_date = soup.find("span", class_="expiration-date").text.strip()
-    return expiration_date
+    return extract_field(html, "expiration_date", url)
+
 
-def extract_location(html: str) -> str:
+def extract_location(html: str, url: Optional[str] = None) -> str:
     """
     Extract the location from the HTML content.
 
     Args:
         html (str): The HTML content of the page.
+        url (Optional[str]): The URL of the page, used to select the site rules.
 
     Returns:
         str: The location where the discount is valid.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    # Logic to extract location (placeholder logic)
-    location = soup.find("span", class_="location").text.strip()
-    return location
+    return extract_field(html, "location", url)
@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import patch
+
+from aiohttp import web
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0"
+
+PAGE_HTML = """
+<html>
+    <body>
+        <h1 class="retailer-name">Shop {n}</h1>
+        <div class="discount-description">10% off</div>
+        <span class="discount-code">CODE{n}</span>
+        <span class="expiration-date">2025-12-31</span>
+        <span class="location">Berlin</span>
+        <img src="/images/{n}.jpg" />
+    </body>
+</html>
+"""
+
+
+def test_scraper_crawl_async(tmp_path) -> None:
+    """
+    Test the WebScraper's async crawl mode against a local HTTP server.
+
+    This ensures that every page and image is fetched over the shared session,
+    that discount data is sent for each page, and that the number of requests
+    in flight never exceeds the per-host connection limit.
+    """
+    from web_scraper.scraper.core import WebScraper
+    from web_scraper.scraper.crawl_state import SQLiteCrawlStateStore, hash_content
+
+    in_flight = 0
+    max_in_flight = 0
+    stored = []
+
+    async def track(handler_result):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return handler_result
+
+    async def page(request: web.Request) -> web.Response:
+        n = request.match_info["n"]
+        return await track(
+            web.Response(text=PAGE_HTML.format(n=n), content_type="text/html")
+        )
+
+    async def image(request: web.Request) -> web.Response:
+        n = request.match_info["n"]
+        return await track(web.Response(body=JPEG_HEADER + f"image-{n}".encode()))
+
+    async def run() -> None:
+        app = web.Application()
+        app.router.add_get("/deals/{n}", page)
+        app.router.add_get("/images/{n}.jpg", image)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            scraper = WebScraper(
+                base_urls=[f"http://127.0.0.1:{port}/deals/{n}" for n in range(3)],
+                output_dir=str(tmp_path),
+                per_host_concurrency=2,
+                crawl_state=SQLiteCrawlStateStore(":memory:"),
+            )
+            await scraper.crawl_async()
+            stored.extend(
+                scraper.images.path(hash_content(JPEG_HEADER + f"image-{n}".encode()))
+                for n in range(3)
+            )
+        finally:
+            await runner.cleanup()
+
+    with patch("web_scraper.scraper.core.send_discount_data") as mock_send:
+        asyncio.run(run())
+
+    assert mock_send.call_count == 3
+    codes = sorted(call.args[0]["discount_code"] for call in mock_send.call_args_list)
+    assert codes == ["CODE0", "CODE1", "CODE2"]
+    assert len(stored) == 3
+    for n, path in enumerate(stored):
+        with open(path, "rb") as file:
+            assert file.read() == JPEG_HEADER + f"image-{n}".encode()
+    assert max_in_flight <= 2
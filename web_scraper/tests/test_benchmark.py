@@ -0,0 +1,102 @@
+from web_scraper.benchmarks.fake_site import FakeSite
+from web_scraper.benchmarks.harness import (
+    BenchmarkResult,
+    Scenario,
+    calibrate,
+    compare,
+    load_baselines,
+    run_scenario,
+    save_baselines,
+)
+
+
+def result(**metrics) -> BenchmarkResult:
+    """
+    Build a benchmark result with default metrics.
+    """
+    values = dict(
+        scenario="small",
+        pages=10,
+        seconds=1.0,
+        pages_per_sec=10.0,
+        parse_ms_per_page=5.0,
+        bytes_fetched=1000,
+        requests=30,
+        kafka_messages=10,
+        kafka_msgs_per_sec=10.0,
+    )
+    values.update(metrics)
+    return BenchmarkResult(**values)
+
+
+def test_fake_site_pages_have_requested_size() -> None:
+    """
+    Test that fake pages carry the discount fields and are padded to size.
+    """
+    site = FakeSite(pages=5, images_per_page=3, page_bytes=10_000)
+    page = site.render_page(2)
+
+    assert len(page) >= 10_000
+    assert b"CODE000002" in page
+    assert page.count(b"<img ") == 3
+    assert site.render_image("2-0.jpg") != site.render_image("2-1.jpg")
+
+
+def test_run_scenario_measures_crawl() -> None:
+    """
+    Test that a benchmark run crawls every page and image of the fake site and
+    counts one Kafka message per page.
+    """
+    scenario = Scenario(
+        "small", pages=10, images_per_page=2, page_bytes=5_000, image_bytes=1_000
+    )
+    measured = run_scenario(scenario)
+
+    assert measured.requests == 10 * 3
+    assert measured.bytes_fetched >= 10 * (5_000 + 2 * 1_000)
+    assert measured.kafka_messages == 10
+    assert measured.pages_per_sec > 0
+    assert measured.parse_ms_per_page > 0
+
+
+def test_compare_flags_regressions(tmp_path) -> None:
+    """
+    Test that only changes beyond the tolerance, in the wrong direction, count
+    as regressions.
+    """
+    path = str(tmp_path / "baselines.json")
+    save_baselines([result()], path)
+    baselines = load_baselines(path)
+
+    assert compare([result(pages_per_sec=8.0, parse_ms_per_page=6.0)], baselines) == []
+    assert compare([result(pages_per_sec=30.0, bytes_fetched=500)], baselines) == []
+    regressions = compare(
+        [result(pages_per_sec=5.0, bytes_fetched=2000)], baselines, tolerance=0.25
+    )
+    assert len(regressions) == 2
+    assert compare([result(scenario="unknown")], baselines) == []
+
+
+def test_compare_scales_timings_to_machine_speed(tmp_path) -> None:
+    """
+    Test that timing metrics are compared relative to the calibration run, so
+    a uniformly slower machine is not reported as a regression while a real
+    slowdown still is.
+    """
+    path = str(tmp_path / "baselines.json")
+    save_baselines([result(calibration_ms=100.0)], path)
+    baselines = load_baselines(path)
+
+    slower_machine = result(
+        pages_per_sec=5.0,
+        kafka_msgs_per_sec=5.0,
+        parse_ms_per_page=10.0,
+        calibration_ms=200.0,
+    )
+    assert compare([slower_machine], baselines) == []
+    regressions = compare(
+        [result(pages_per_sec=5.0, calibration_ms=100.0)], baselines
+    )
+    assert regressions == ["small: pages_per_sec is 5.0, baseline 10.0"]
+    assert len(compare([result(pages_per_sec=5.0)], baselines)) == 1
+    assert calibrate(rounds=1) > 0
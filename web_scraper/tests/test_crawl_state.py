@@ -0,0 +1,168 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+from aiohttp import web
+
+from web_scraper.scraper.crawl_state import (
+    CrawlState,
+    SQLiteCrawlStateStore,
+    hash_content,
+)
+
+PAGE_HTML = """
+<html>
+    <body>
+        <h1 class="retailer-name">Shop</h1>
+        <div class="discount-description">10% off</div>
+        <span class="discount-code">{code}</span>
+        <span class="expiration-date">2025-12-31</span>
+        <span class="location">Berlin</span>
+    </body>
+</html>
+"""
+
+
+def page_response(status: int, code: str = "", headers: dict = None) -> Mock:
+    """
+    Build a mocked requests response for a discount page.
+    """
+    content = PAGE_HTML.format(code=code).encode() if status == 200 else b""
+    return Mock(
+        status_code=status,
+        content=content,
+        headers=headers or {},
+        iter_content=lambda chunk_size: [content],
+    )
+
+
+def test_crawl_state_store_persists(tmp_path) -> None:
+    """
+    Test that the SQLite store keeps the state of a URL across connections.
+    """
+    path = str(tmp_path / "state.sqlite3")
+    store = SQLiteCrawlStateStore(path)
+    store.save(CrawlState("https://example.com", etag='"v1"', content_hash="abc"))
+    store.close()
+
+    state = SQLiteCrawlStateStore(path).get("https://example.com")
+    assert state.etag == '"v1"'
+    assert state.content_hash == "abc"
+    assert state.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert SQLiteCrawlStateStore(path).get("https://other.example.com") is None
+
+
+def test_scrape_url_skips_unchanged_pages(tmp_path) -> None:
+    """
+    Test that scrape_url sends conditional requests and only parses and emits
+    pages whose body changed since the last crawl.
+    """
+    from web_scraper.scraper.core import WebScraper
+    from web_scraper.scraper.rate_limit import DomainRateLimiter
+
+    url = "https://example.com/deals"
+    store = SQLiteCrawlStateStore(":memory:")
+    scraper = WebScraper(
+        base_urls=[url],
+        output_dir=str(tmp_path),
+        rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+        crawl_state=store,
+    )
+    responses = [
+        page_response(200, "CODE1", {"ETag": '"v1"'}),
+        page_response(304),
+        page_response(200, "CODE1"),
+        page_response(200, "CODE2"),
+    ]
+
+    with patch("requests.get", side_effect=responses) as mock_get, patch(
+        "web_scraper.scraper.core.send_discount_data"
+    ) as mock_send:
+        for _ in responses:
+            scraper.scrape_url(url)
+
+    assert mock_get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+    sent_codes = [call.args[0]["discount_code"] for call in mock_send.call_args_list]
+    assert sent_codes == ["CODE1", "CODE2"]
+    assert store.get(url).content_hash == hash_content(responses[-1].content)
+
+
+def test_scrape_url_reprocesses_pages_after_rules_change(tmp_path) -> None:
+    """
+    Test that a page processed with older extraction rules is fetched and
+    processed again once the rules change, even though it did not change.
+    """
+    from web_scraper.scraper.core import WebScraper
+    from web_scraper.scraper.rate_limit import DomainRateLimiter
+
+    url = "https://example.com/deals"
+    store = SQLiteCrawlStateStore(":memory:")
+    scraper = WebScraper(
+        base_urls=[url],
+        output_dir=str(tmp_path),
+        rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+        crawl_state=store,
+    )
+    responses = [page_response(200, "CODE1", {"ETag": '"v1"'}) for _ in range(3)]
+
+    with patch("requests.get", side_effect=responses) as mock_get, patch(
+        "web_scraper.scraper.core.send_discount_data"
+    ) as mock_send:
+        scraper.scrape_url(url)
+        scraper.scrape_url(url)
+        with patch.object(scraper.rules, "version", "fixed-rules"):
+            scraper.scrape_url(url)
+
+    assert mock_get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert not mock_get.call_args_list[2].kwargs["headers"]
+    assert mock_send.call_count == 2
+    assert store.get(url).rules_version == "fixed-rules"
+
+
+def test_crawl_async_skips_unchanged_pages(tmp_path) -> None:
+    """
+    Test that a second async crawl of an unchanged site is answered with
+    304 Not Modified and emits nothing to Kafka.
+    """
+    from web_scraper.scraper.core import WebScraper
+    from web_scraper.scraper.rate_limit import DomainRateLimiter
+
+    statuses = []
+
+    async def page(request: web.Request) -> web.Response:
+        n = request.match_info["n"]
+        etag = f'"{n}"'
+        if request.headers.get("If-None-Match") == etag:
+            statuses.append(304)
+            return web.Response(status=304, headers={"ETag": etag})
+        statuses.append(200)
+        return web.Response(
+            text=PAGE_HTML.format(code=f"CODE{n}"),
+            content_type="text/html",
+            headers={"ETag": etag},
+        )
+
+    async def run() -> None:
+        app = web.Application()
+        app.router.add_get("/deals/{n}", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            scraper = WebScraper(
+                base_urls=[f"http://127.0.0.1:{port}/deals/{n}" for n in range(3)],
+                output_dir=str(tmp_path),
+                rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+                crawl_state=SQLiteCrawlStateStore(str(tmp_path / "state.sqlite3")),
+            )
+            await scraper.crawl_async()
+            await scraper.crawl_async()
+        finally:
+            await runner.cleanup()
+
+    with patch("web_scraper.scraper.core.send_discount_data") as mock_send:
+        asyncio.run(run())
+
+    assert mock_send.call_count == 3
+    assert statuses == [200] * 3 + [304] * 3
@@ -0,0 +1,161 @@
+import threading
+import time
+from dataclasses import replace
+from unittest.mock import patch
+
+import pytest
+
+from web_scraper.scraper.frontier import Frontier, MemoryFrontier, RedisFrontier
+from web_scraper.scraper.rate_limit import DomainRateLimiter, RateLimitedError
+
+
+@pytest.fixture(params=["memory", "redis"])
+def frontier(request) -> Frontier:
+    """
+    Provide each frontier backend, the Redis one running its Lua scripts on
+    fakeredis.
+    """
+    if request.param == "memory":
+        return MemoryFrontier()
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisFrontier(fakeredis.FakeRedis(decode_responses=True), prefix="test")
+
+
+def test_frontier_leases_by_priority_without_duplicates(frontier) -> None:
+    """
+    Test that the frontier ignores known URLs, leases due URLs by priority
+    and never hands out a URL that is already leased.
+    """
+    assert frontier.add("https://example.com/b", priority=5) is True
+    assert frontier.add("https://example.com/a", priority=1) is True
+    assert frontier.add("https://example.com/a", priority=0) is False
+    frontier.add("https://example.com/later", delay=60)
+
+    leases = frontier.lease(count=10)
+    assert [lease.url for lease in leases] == [
+        "https://example.com/a",
+        "https://example.com/b",
+    ]
+    assert frontier.lease(count=10) == []
+
+
+def test_frontier_recrawls_and_expires_leases(frontier) -> None:
+    """
+    Test that completed URLs come back after their recrawl interval and that
+    an expired lease can no longer be completed once the URL was re-leased.
+    """
+    frontier.add("https://example.com/done")
+    frontier.add("https://example.com/recrawl")
+    frontier.add("https://example.com/stuck")
+    done, recrawl, stuck = sorted(
+        frontier.lease(count=3, lease_seconds=0.05), key=lambda lease: lease.url
+    )
+
+    assert frontier.complete(done) is True
+    assert frontier.complete(recrawl, recrawl_after=0.05) is True
+    time.sleep(0.1)
+
+    leases = frontier.lease(count=3)
+    assert sorted(lease.url for lease in leases) == [
+        "https://example.com/recrawl",
+        "https://example.com/stuck",
+    ]
+    assert frontier.complete(stuck) is False
+
+
+def test_frontier_keeps_depth_and_checks_tokens(frontier) -> None:
+    """
+    Test that leases carry the URL's priority and depth, that a lease with
+    another token cannot complete the URL, and that completing a URL without
+    a recrawl interval retires it for good.
+    """
+    frontier.add("https://example.com/deep", priority=3, depth=2)
+
+    (lease,) = frontier.lease()
+    assert (lease.priority, lease.depth) == (3, 2)
+    assert frontier.complete(replace(lease, token="forged")) is False
+    assert frontier.complete(lease) is True
+    assert frontier.complete(lease) is False
+    assert frontier.add("https://example.com/deep") is False
+    assert frontier.lease() == []
+
+
+def test_frontier_shares_host_page_budget(frontier) -> None:
+    """
+    Test that the frontier adds no more URLs of a host than its page budget,
+    does not count known URLs against it, and starts over in the next budget
+    window.
+    """
+    frontier.budget_window = 0.05
+    added = [
+        frontier.add(f"https://example.com/{n}", max_host_pages=2) for n in range(3)
+    ]
+    assert added == [True, True, False]
+    assert frontier.add("https://example.com/0", max_host_pages=2) is False
+    assert frontier.add("https://other.example.com/", max_host_pages=2) is True
+
+    time.sleep(0.1)
+    assert frontier.add("https://example.com/2", max_host_pages=2) is True
+    assert frontier.add("https://example.com/3", max_host_pages=2) is True
+    assert frontier.add("https://example.com/4", max_host_pages=2) is False
+
+
+def test_replicas_split_the_frontier(tmp_path) -> None:
+    """
+    Test that scrapers sharing a frontier crawl every URL exactly once.
+    """
+    from web_scraper.scraper.core import WebScraper
+
+    urls = [f"https://shop{n % 4}.example.com/deals/{n}" for n in range(40)]
+    frontier = MemoryFrontier()
+    scraped = []
+
+    def run_replica() -> None:
+        scraper = WebScraper(
+            base_urls=urls,
+            output_dir=str(tmp_path),
+            rate_limiter=DomainRateLimiter(
+                requests_per_minute=60000, respect_crawl_delay=False
+            ),
+            frontier=frontier,
+            recrawl_interval=None,
+        )
+
+        def scrape_url(url: str) -> list:
+            scraped.append(url)
+            return []
+
+        with patch.object(scraper, "scrape_url", side_effect=scrape_url):
+            scraper.crawl_frontier(stop_when_idle=True)
+
+    replicas = [threading.Thread(target=run_replica) for _ in range(3)]
+    for replica in replicas:
+        replica.start()
+    for replica in replicas:
+        replica.join()
+
+    assert sorted(scraped) == sorted(urls)
+
+
+def test_rate_limited_lease_is_released(tmp_path) -> None:
+    """
+    Test that a rate-limited URL is handed back to the frontier with the
+    Retry-After delay instead of being dropped.
+    """
+    from web_scraper.scraper.core import WebScraper
+
+    frontier = MemoryFrontier()
+    scraper = WebScraper(
+        base_urls=["https://example.com/deals"],
+        output_dir=str(tmp_path),
+        rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+        frontier=frontier,
+    )
+    error = RateLimitedError("https://example.com/deals", 0.05)
+    with patch.object(scraper, "scrape_url", side_effect=error):
+        scraper.crawl_frontier(stop_when_idle=True)
+
+    assert frontier.lease() == []
+    time.sleep(0.1)
+    assert [lease.url for lease in frontier.lease()] == ["https://example.com/deals"]
@@ -0,0 +1,196 @@
+from unittest.mock import Mock, call, patch
+
+import pytest
+
+from web_scraper.scraper.crawl_state import SQLiteCrawlStateStore, hash_content
+from web_scraper.scraper.image_store import ImageStore
+from web_scraper.scraper.rate_limit import DomainRateLimiter
+from web_scraper.scraper.utils import (
+    NotAnImageError,
+    ResponseTooLargeError,
+    conditional_request,
+    sniff_image_type,
+    stream_image,
+)
+
+PNG_LOGO = b"\x89PNG\r\n\x1a\nlogo"
+
+
+def test_image_store_deduplicates_content(tmp_path) -> None:
+    """
+    Test that the ImageStore keeps a single copy of identical images and
+    leaves no temporary files behind.
+    """
+    store = ImageStore(str(tmp_path))
+
+    first = store.save([b"same ", b"image"])
+    second = store.save([b"same image"])
+    other = store.save([b"other image"])
+
+    assert first == second == hash_content(b"same image")
+    assert other != first
+    assert store.exists(first) and store.exists(other)
+    stored_files = sorted(str(p) for p in tmp_path.rglob("*") if p.is_file())
+    assert stored_files == sorted([store.path(first), store.path(other)])
+
+
+def test_download_image_fetches_only_new_images(tmp_path) -> None:
+    """
+    Test that download_image stores identical images from different URLs once
+    and that a repeated crawl only sends a conditional HEAD request for images
+    it already has.
+    """
+    from web_scraper.scraper.core import WebScraper
+
+    index = SQLiteCrawlStateStore(":memory:")
+    scraper = WebScraper(
+        base_urls=[],
+        output_dir=str(tmp_path),
+        rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+        crawl_state=index,
+    )
+    response = Mock(
+        status_code=200,
+        headers={"ETag": '"logo"', "Content-Type": "image/png"},
+        iter_content=lambda chunk_size: [PNG_LOGO],
+    )
+
+    with patch("requests.get", return_value=response) as mock_get:
+        scraper.download_image("https://a.example.com/logo.png")
+        scraper.download_image("https://b.example.com/img/logo.png")
+    assert mock_get.call_count == 2
+
+    digest = hash_content(PNG_LOGO)
+    assert index.get("https://a.example.com/logo.png").content_hash == digest
+    assert index.get("https://b.example.com/img/logo.png").content_hash == digest
+    stored_files = [str(p) for p in tmp_path.rglob("*") if p.is_file()]
+    assert stored_files == [scraper.images.path(digest)]
+
+    not_modified = Mock(status_code=304, headers={})
+    with patch("requests.head", return_value=not_modified) as mock_head, patch(
+        "requests.get"
+    ) as mock_get:
+        scraper.download_image("https://a.example.com/logo.png")
+
+    assert mock_head.call_args.kwargs["headers"] == {"If-None-Match": '"logo"'}
+    mock_get.assert_not_called()
+
+
+def test_download_image_waits_for_rate_limit(tmp_path) -> None:
+    """
+    Test that every image request, the HEAD check of a known image included,
+    first waits for the rate limit of the image's domain.
+    """
+    from web_scraper.scraper.core import WebScraper
+
+    rate_limiter = Mock()
+    scraper = WebScraper(
+        base_urls=[],
+        output_dir=str(tmp_path),
+        rate_limiter=rate_limiter,
+        crawl_state=SQLiteCrawlStateStore(":memory:"),
+    )
+    response = Mock(
+        status_code=200,
+        headers={"ETag": '"logo"', "Content-Type": "image/png"},
+        iter_content=lambda chunk_size: [PNG_LOGO],
+    )
+    url = "https://a.example.com/logo.png"
+
+    with patch("requests.get", return_value=response):
+        scraper.download_image(url)
+    with patch("requests.head", return_value=Mock(status_code=304, headers={})):
+        scraper.download_image(url)
+
+    assert rate_limiter.acquire.call_args_list == [call(url), call(url)]
+
+
+def test_sniff_image_type() -> None:
+    """
+    Test that common image formats are recognised from their first bytes and
+    that HTML is not mistaken for an image.
+    """
+    assert sniff_image_type(b"\xff\xd8\xff\xe0rest") == "image/jpeg"
+    assert sniff_image_type(PNG_LOGO) == "image/png"
+    assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_image_type(b'  <?xml version="1.0"?><svg></svg>') == "image/svg+xml"
+    assert sniff_image_type(b"<!DOCTYPE html><html></html>") is None
+
+
+def test_stream_image_stops_early(tmp_path) -> None:
+    """
+    Test that stream_image stops reading as soon as a response is known not to
+    be an acceptable image, and that nothing is stored in that case.
+    """
+    store = ImageStore(str(tmp_path))
+    chunks_read = []
+
+    def body(*chunks: bytes):
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                chunks_read.append(chunk)
+                yield chunk
+
+        return iter_content
+
+    html_page = Mock(
+        status_code=200,
+        headers={"Content-Type": "text/html; charset=utf-8"},
+        iter_content=body(b"<html>", b"</html>"),
+    )
+    mislabelled = Mock(
+        status_code=200,
+        headers={"Content-Type": "application/octet-stream"},
+        iter_content=body(b"<html>", b"</html>"),
+    )
+    declared_too_large = Mock(
+        status_code=200,
+        headers={"Content-Type": "image/png", "Content-Length": "2048"},
+        iter_content=body(PNG_LOGO),
+    )
+    too_large = Mock(
+        status_code=200,
+        headers={"Content-Type": "image/png"},
+        iter_content=body(PNG_LOGO, b"x" * 1024, b"never read"),
+    )
+
+    with patch("requests.get", return_value=html_page):
+        with pytest.raises(NotAnImageError):
+            stream_image("https://example.com/a.png", store, max_bytes=1024)
+    assert chunks_read == []
+
+    with patch("requests.get", return_value=mislabelled):
+        with pytest.raises(NotAnImageError):
+            stream_image("https://example.com/b.png", store, max_bytes=1024)
+    assert chunks_read == [b"<html>"]
+
+    chunks_read.clear()
+    with patch("requests.get", return_value=declared_too_large):
+        with pytest.raises(ResponseTooLargeError):
+            stream_image("https://example.com/c.png", store, max_bytes=1024)
+    assert chunks_read == []
+
+    with patch("requests.get", return_value=too_large) as mock_get:
+        with pytest.raises(ResponseTooLargeError):
+            stream_image("https://example.com/d.png", store, max_bytes=1024)
+    assert chunks_read == [PNG_LOGO, b"x" * 1024]
+    assert mock_get.call_count == 1
+    assert list(tmp_path.rglob("*")) == []
+
+
+def test_conditional_request_enforces_page_size() -> None:
+    """
+    Test that page bodies are read in chunks and abandoned once they exceed
+    the maximum page size.
+    """
+    page = Mock(
+        status_code=200,
+        headers={},
+        iter_content=lambda chunk_size: iter([b"a" * 600, b"b" * 600]),
+    )
+    with patch("requests.get", return_value=page) as mock_get:
+        with pytest.raises(ResponseTooLargeError):
+            conditional_request("https://example.com", max_bytes=1000)
+
+    assert mock_get.call_args.kwargs["stream"] is True
+    page.close.assert_called_once()
@@ -0,0 +1,230 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+
+from web_scraper.scraper.bloom import BloomFilter, ScalableBloomFilter
+from web_scraper.scraper.crawl_state import SQLiteCrawlStateStore
+from web_scraper.scraper.links import (
+    canonicalize_url,
+    compile_link_policy,
+    extract_links,
+)
+from web_scraper.scraper.rules import RuleRegistry
+
+SITE_RULES = """
+"*":
+  fields:
+    discount_code: "span.discount-code"
+  links:
+    deny: ["/account/"]
+    max_depth: 2
+    max_pages: {max_pages}
+"""
+
+
+def test_canonicalize_url() -> None:
+    """
+    Test that equivalent spellings of a URL are canonicalized to one URL.
+    """
+    expected = "https://example.com/deals/shoes?color=red&page=2"
+    spellings = [
+        "HTTPS://Example.COM:443/deals/./sale/../shoes?page=2&color=red#top",
+        "https://example.com/deals/shoes?utm_source=mail&color=red&page=2",
+        "/deals/shoes?color=red&page=2&gclid=abc",
+    ]
+    for url in spellings:
+        assert canonicalize_url(url, "https://example.com/") == expected
+
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/a b") == (
+        "http://example.com:8080/a%20b"
+    )
+    assert canonicalize_url("mailto:deals@example.com") is None
+    assert canonicalize_url("javascript:void(0)", "https://example.com") is None
+    assert canonicalize_url("http://example.com:99999/") is None
+
+
+def test_extract_links_honours_base_tag() -> None:
+    """
+    Test that links are resolved against the page's <base> and deduplicated.
+    """
+    html = """
+    <html><head><base href="https://cdn.example.com/shop/"></head><body>
+        <a href="deals">Deals</a>
+        <a href="deals#top">Deals again</a>
+        <a href="/about">About</a>
+        <a href="mailto:x@example.com">Mail</a>
+        <a>No href</a>
+    </body></html>
+    """
+    assert extract_links(html, "https://example.com/") == [
+        "https://cdn.example.com/shop/deals",
+        "https://cdn.example.com/about",
+    ]
+
+
+def test_link_policy_allow_and_deny() -> None:
+    """
+    Test that deny patterns win over allow patterns, and that invalid
+    policies are rejected.
+    """
+    policy = compile_link_policy(
+        {"allow": ["/deals/"], "deny": [r"\.pdf$"], "max_depth": 3}
+    )
+    assert policy.max_depth == 3
+    assert policy.allows("https://example.com/deals/shoes")
+    assert not policy.allows("https://example.com/deals/terms.pdf")
+    assert not policy.allows("https://example.com/about")
+    assert compile_link_policy(None).allows("https://example.com/anything")
+
+    with pytest.raises(ValueError):
+        compile_link_policy({"allow": ["("]})
+    with pytest.raises(ValueError):
+        compile_link_policy(["/deals/"])
+
+
+def test_bloom_filter_false_positive_rate() -> None:
+    """
+    Test that a full Bloom filter stays close to its configured error rate.
+    """
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"https://example.com/deals/{i}")
+
+    assert all(f"https://example.com/deals/{i}" in bloom for i in range(10_000))
+    false_positives = sum(
+        f"https://example.com/other/{i}" in bloom for i in range(10_000)
+    )
+    assert false_positives / 10_000 < 0.02
+
+
+def test_scalable_bloom_filter_grows() -> None:
+    """
+    Test that the scalable filter adds filters as it fills up and still
+    remembers every item.
+    """
+    seen = ScalableBloomFilter(initial_capacity=100, error_rate=0.001)
+    added = sum(seen.add(f"https://example.com/{i}") for i in range(1_000))
+
+    assert added >= 999
+    assert len(seen.filters) > 1
+    assert not seen.add("https://example.com/0")
+    assert all(f"https://example.com/{i}" in seen for i in range(1_000))
+    assert seen.size_in_bytes < 1_000 * len("https://example.com/999")
+
+
+def crawl_site(tmp_path, max_pages: int) -> list:
+    """
+    Crawl a local site whose pages each link to two deeper pages, and return
+    the paths that were requested.
+    """
+    rules_path = tmp_path / "rules.yaml"
+    rules_path.write_text(SITE_RULES.format(max_pages=max_pages))
+    requested = []
+
+    async def page(request: web.Request) -> web.Response:
+        path = request.path
+        requested.append(path)
+        base = path.rstrip("/")
+        html = f"""
+        <html><body>
+            <span class="discount-code">{path}</span>
+            <a href="{base}/a?utm_source=crawl">A</a>
+            <a href="{base}/b#top">B</a>
+            <a href="/account/login">Log in</a>
+            <a href="https://other.example.com/">Elsewhere</a>
+        </body></html>
+        """
+        return web.Response(text=html, content_type="text/html")
+
+    async def run() -> None:
+        from web_scraper.scraper.core import WebScraper
+        from web_scraper.scraper.rate_limit import DomainRateLimiter
+
+        app = web.Application()
+        app.router.add_get("/{path:.*}", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            scraper = WebScraper(
+                base_urls=[f"http://127.0.0.1:{port}/"],
+                output_dir=str(tmp_path / "images"),
+                rules=RuleRegistry(str(rules_path)),
+                rate_limiter=DomainRateLimiter(
+                    requests_per_minute=60000, respect_crawl_delay=False
+                ),
+                crawl_state=SQLiteCrawlStateStore(":memory:"),
+            )
+            await scraper.crawl_async()
+        finally:
+            await runner.cleanup()
+
+    with patch("web_scraper.scraper.core.send_discount_data"):
+        asyncio.run(run())
+    return requested
+
+
+def test_crawl_follows_links_to_max_depth(tmp_path) -> None:
+    """
+    Test that links are followed once each, up to the maximum depth, on the
+    same host only, skipping denied paths.
+    """
+    requested = crawl_site(tmp_path, max_pages=100)
+
+    assert sorted(requested) == [
+        "/",
+        "/a",
+        "/a/a",
+        "/a/b",
+        "/b",
+        "/b/a",
+        "/b/b",
+    ]
+
+
+def test_crawl_stops_at_page_budget(tmp_path) -> None:
+    """
+    Test that no more pages of a host are crawled than its page budget.
+    """
+    requested = crawl_site(tmp_path, max_pages=4)
+
+    assert len(requested) == 4
+    assert requested[0] == "/"
+
+
+def test_page_budget_starts_over_every_crawl(tmp_path) -> None:
+    """
+    Test that a long-running scraper crawls the links of a host again in its
+    next crawl, instead of treating them as seen and over budget for good.
+    """
+    from web_scraper.scraper.core import WebScraper
+    from web_scraper.scraper.rate_limit import DomainRateLimiter
+
+    rules_path = tmp_path / "rules.yaml"
+    rules_path.write_text(SITE_RULES.format(max_pages=2))
+    base_url = "https://example.com/"
+    requested = []
+
+    def scrape_url(url: str) -> list:
+        requested.append(url)
+        return [f"{base_url}a", f"{base_url}b"] if url == base_url else []
+
+    scraper = WebScraper(
+        base_urls=[base_url],
+        output_dir=str(tmp_path / "images"),
+        rules=RuleRegistry(str(rules_path)),
+        rate_limiter=DomainRateLimiter(
+            requests_per_minute=60000, respect_crawl_delay=False
+        ),
+        crawl_state=SQLiteCrawlStateStore(":memory:"),
+    )
+    with patch.object(scraper, "scrape_url", side_effect=scrape_url):
+        scraper.scrape_all()
+        scraper.scrape_all()
+
+    assert requested == [base_url, f"{base_url}a"] * 2
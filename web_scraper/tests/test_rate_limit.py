@@ -0,0 +1,153 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from web_scraper.scraper.crawl_state import SQLiteCrawlStateStore
+from web_scraper.scraper.rate_limit import (
+    DEFAULT_RETRY_AFTER,
+    DomainRateLimiter,
+    RateLimitedError,
+    TokenBucket,
+    parse_retry_after,
+)
+from web_scraper.scraper.scheduler import CrawlScheduler
+from web_scraper.scraper.utils import retry_request
+
+
+def test_token_bucket_reserves_instead_of_rejecting() -> None:
+    """
+    Test that a TokenBucket hands out the burst immediately and then returns
+    increasing waits instead of rejecting requests.
+    """
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    now = bucket.updated_at
+
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    assert bucket.reserve(now) == pytest.approx(2.0)
+    assert bucket.delay(now + 3.0) == pytest.approx(0.0)
+
+    bucket.block_for(30, now + 3.0)
+    assert bucket.delay(now + 3.0) == pytest.approx(30.0)
+
+
+def test_parse_retry_after() -> None:
+    """
+    Test parsing Retry-After values given as seconds, HTTP dates and garbage.
+    """
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) == DEFAULT_RETRY_AFTER
+    assert parse_retry_after("soon") == DEFAULT_RETRY_AFTER
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_domain_rate_limiter_uses_crawl_delay() -> None:
+    """
+    Test that a domain's Crawl-delay slows down its bucket without affecting
+    other domains.
+    """
+    limiter = DomainRateLimiter(requests_per_minute=600, burst=5)
+    robots = Mock(status_code=200, text="User-agent: *\nCrawl-delay: 4\n")
+    with patch("web_scraper.scraper.rate_limit.requests.get", return_value=robots):
+        slow = limiter.bucket("https://slow.example.com/deals")
+    with patch(
+        "web_scraper.scraper.rate_limit.requests.get",
+        return_value=Mock(status_code=404),
+    ):
+        fast = limiter.bucket("https://fast.example.com/deals")
+
+    assert slow.rate == pytest.approx(0.25)
+    assert slow.capacity == 1
+    assert fast.rate == pytest.approx(10.0)
+    assert fast.capacity == 5
+
+
+def test_retry_request_raises_rate_limited_error() -> None:
+    """
+    Test that a 429 response raises RateLimitedError right away with the
+    Retry-After delay, instead of being retried.
+    """
+    response = Mock(status_code=429, headers={"Retry-After": "30"})
+    with patch("requests.get", return_value=response) as mock_get:
+        with pytest.raises(RateLimitedError) as excinfo:
+            retry_request("https://example.com")
+
+    assert excinfo.value.retry_after == 30.0
+    assert mock_get.call_count == 1
+
+
+def test_scheduler_skips_throttled_domains() -> None:
+    """
+    Test that the scheduler hands out URLs by priority but does not let a
+    throttled domain hold up URLs of other domains.
+    """
+    limiter = DomainRateLimiter(requests_per_minute=60, respect_crawl_delay=False)
+    limiter.backoff("https://slow.example.com/", 30)
+    scheduler = CrawlScheduler(limiter)
+    scheduler.push("https://slow.example.com/a", priority=0)
+    scheduler.push("https://fast.example.com/b", priority=5)
+    scheduler.push("https://fast.example.com/a", priority=1)
+
+    assert scheduler.pop()[0].url == "https://fast.example.com/a"
+    assert scheduler.pop()[0].url == "https://fast.example.com/b"
+    request, wait = scheduler.pop()
+    assert request is None
+    assert 29 < wait <= 30
+    assert len(scheduler) == 1
+
+
+def test_scraper_reschedules_rate_limited_url(tmp_path) -> None:
+    """
+    Test that scrape_all backs off a rate-limited domain and scrapes the URL
+    again later instead of dropping it.
+    """
+    from web_scraper.scraper.core import WebScraper
+
+    scraper = WebScraper(
+        base_urls=["https://example1.com", "https://example2.com"],
+        output_dir=str(tmp_path),
+        rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+        crawl_state=SQLiteCrawlStateStore(":memory:"),
+    )
+    side_effects = [RateLimitedError("https://example1.com", 0.01), [], []]
+    with patch.object(scraper, "scrape_url", side_effect=side_effects) as mock_scrape:
+        scraper.scrape_all()
+
+    assert [call.args[0] for call in mock_scrape.call_args_list] == [
+        "https://example1.com",
+        "https://example2.com",
+        "https://example1.com",
+    ]
+
+
+def test_scraper_defers_url_rescheduled_too_often(tmp_path) -> None:
+    """
+    Test that a URL rate limited more often than it may be rescheduled is
+    deferred in the crawl state, and crawled again by the next crawl.
+    """
+    from web_scraper.scraper.core import WebScraper
+
+    scraper = WebScraper(
+        base_urls=["https://example.com"],
+        output_dir=str(tmp_path),
+        rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+        crawl_state=SQLiteCrawlStateStore(":memory:"),
+    )
+    scheduler = CrawlScheduler(scraper.rate_limiter, max_reschedules=0)
+    scheduler.push("https://example.com/deal", priority=11, depth=1)
+    request, _ = scheduler.pop()
+
+    with patch("web_scraper.scraper.core.RATE_LIMIT_DEFER_SECONDS", 0):
+        scraper._on_rate_limited(
+            scheduler, request, RateLimitedError(request.url, 0), {}
+        )
+    assert len(scheduler) == 0
+
+    with patch.object(scraper, "scrape_url", return_value=[]) as mock_scrape:
+        scraper.scrape_all()
+    assert sorted(call.args[0] for call in mock_scrape.call_args_list) == [
+        "https://example.com",
+        "https://example.com/deal",
+    ]
+    assert scraper.crawl_state.pop_deferred() == []
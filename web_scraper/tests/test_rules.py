@@ -0,0 +1,102 @@
+import glob
+import json
+import os
+
+import pytest
+
+from web_scraper.scraper.config import RULES_PATH
+from web_scraper.scraper.rules import ExtractionError, RuleRegistry
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+PAGE_FIXTURES = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+
+
+@pytest.mark.parametrize("html_path", PAGE_FIXTURES, ids=os.path.basename)
+def test_rules_against_saved_pages(html_path: str) -> None:
+    """
+    Run the shipped extraction rules against every saved HTML fixture.
+
+    Each ``<name>.html`` fixture has a ``<name>.json`` file next to it with the
+    page URL and the expected extracted fields. Adding rules for a retailer
+    only needs a saved page and its expected output here.
+    """
+    with open(html_path, encoding="utf-8") as file:
+        html = file.read()
+    with open(html_path[: -len(".html")] + ".json", encoding="utf-8") as file:
+        expected = json.load(file)
+
+    registry = RuleRegistry(RULES_PATH)
+    assert registry.extract(html, expected["url"]) == expected["expected"]
+
+
+def test_rules_selected_by_hostname(tmp_path) -> None:
+    """
+    Test that site rules are chosen by hostname, including parent domains,
+    and that other hosts use the fallback rules.
+    """
+    (tmp_path / "rules.yaml").write_text(
+        """
+"*":
+  fields:
+    discount_code: "span.discount-code"
+shop.example.com:
+  fields:
+    discount_code:
+      selector: "div.coupon"
+      attribute: "data-code"
+      regex: "(?i)code-(\\\\w+)"
+      normalizers: [strip, upper]
+    expiration_date:
+      selector: "p.valid"
+      normalizers: [strip, iso_date]
+      required: false
+"""
+    )
+    registry = RuleRegistry(str(tmp_path))
+    html = (
+        '<div class="coupon" data-code=" code-save10 "></div>'
+        '<span class="discount-code">OTHER</span>'
+        '<p class="valid">31.12.2025</p>'
+    )
+
+    assert registry.extract(html, "https://www.shop.example.com/deal") == {
+        "discount_code": "SAVE10",
+        "expiration_date": "2025-12-31",
+    }
+    assert registry.extract(html, "https://another.example.org/") == {
+        "discount_code": "OTHER",
+    }
+
+
+def test_rules_missing_required_field(tmp_path) -> None:
+    """
+    Test that a missing required field raises an ExtractionError.
+    """
+    (tmp_path / "rules.json").write_text(
+        json.dumps({"*": {"fields": {"discount_code": "span.discount-code"}}})
+    )
+    registry = RuleRegistry(str(tmp_path))
+    with pytest.raises(ExtractionError):
+        registry.extract("<html></html>", "https://example.com")
+
+
+def test_rules_reload_if_changed(tmp_path) -> None:
+    """
+    Test that modified rule files are picked up at runtime and that an invalid
+    file keeps the previously loaded rules.
+    """
+    rule_file = tmp_path / "rules.json"
+    rule_file.write_text(json.dumps({"*": {"fields": {"code": "span.old"}}}))
+    registry = RuleRegistry(str(tmp_path))
+    html = '<span class="old">A</span><span class="new">B</span>'
+    assert registry.extract(html, "https://example.com") == {"code": "A"}
+
+    rule_file.write_text(json.dumps({"*": {"fields": {"code": "span.new"}}}))
+    os.utime(rule_file, (0, os.path.getmtime(rule_file) + 10))
+    assert registry.reload_if_changed() is True
+    assert registry.extract(html, "https://example.com") == {"code": "B"}
+
+    rule_file.write_text(json.dumps({"*": {"fields": {"code": "span["}}}))
+    os.utime(rule_file, (0, os.path.getmtime(rule_file) + 20))
+    assert registry.reload_if_changed() is False
+    assert registry.extract(html, "https://example.com") == {"code": "B"}
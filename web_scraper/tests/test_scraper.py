@@ -3,6 +3,7 @@ from unittest.mock import Mock, patch
 import pytest
 import requests
 
+from web_scraper.scraper.crawl_state import SQLiteCrawlStateStore, hash_content
 from web_scraper.scraper.utils import is_valid_url, retry_request
 
 
@@ -88,19 +89,27 @@ def test_scraper_download_image_success(tmp_path) -> None:
     image URL to the specified output directory.
     """
     from web_scraper.scraper.core import WebScraper
+    from web_scraper.scraper.rate_limit import DomainRateLimiter
 
     mock_response = Mock()
-    mock_response.iter_content = lambda chunk_size: [b"content"]
+    mock_response.iter_content = lambda chunk_size: [b"\xff\xd8\xffcontent"]
     mock_response.status_code = 200
+    mock_response.headers = {"Content-Type": "image/jpeg"}
 
     with patch("requests.get", return_value=mock_response):
-        scraper = WebScraper(base_urls=[], output_dir=str(tmp_path))
+        scraper = WebScraper(
+            base_urls=[],
+            output_dir=str(tmp_path),
+            rate_limiter=DomainRateLimiter(respect_crawl_delay=False),
+            crawl_state=SQLiteCrawlStateStore(":memory:"),
+        )
         scraper.download_image("https://example.com/image.jpg")
 
-        # Assert the file was created
-        downloaded_file = tmp_path / "image.jpg"
+        # Assert the file was created under its content digest
+        content = b"\xff\xd8\xffcontent"
+        downloaded_file = tmp_path / scraper.images.path(hash_content(content))
         assert downloaded_file.exists()
-        assert downloaded_file.read_bytes() == b"content"
+        assert downloaded_file.read_bytes() == content
 
 
 def test_scraper_download_image_failure() -> None:
@@ -113,7 +122,11 @@ def test_scraper_download_image_failure() -> None:
     from web_scraper.scraper.core import WebScraper
 
     with patch("requests.get", side_effect=requests.RequestException("Failed")):
-        scraper = WebScraper(base_urls=[], output_dir="images")
+        scraper = WebScraper(
+            base_urls=[],
+            output_dir="images",
+            crawl_state=SQLiteCrawlStateStore(":memory:"),
+        )
         with pytest.raises(requests.RequestException, match="Failed"):
             scraper.download_image("https://example.com/image.jpg")
 
@@ -130,6 +143,7 @@ def test_scraper_scrape_all() -> None:
     scraper = WebScraper(
         base_urls=["https://example1.com", "https://example2.com"],
         output_dir="images",
+        crawl_state=SQLiteCrawlStateStore(":memory:"),
     )
     with patch.object(scraper, "scrape_url") as mock_scrape_url:
         scraper.scrape_all()